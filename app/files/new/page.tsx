@@ -52,8 +52,8 @@ export default function FileAdditionPage() {
       }
 
       toast({
-        title: '가져오기 성공',
-        description: `${res.imported_pages}개의 페이지를 가져왔습니다.`,
+        title: '가져오기 시작',
+        description: '페이지를 받는 대로 저장하고 수집을 시작합니다. 파일 목록에서 진행 상황을 확인하세요.',
       });
     } catch (err: any) {
       toast({
@@ -16,7 +16,11 @@ async def chat_with_document(request: ChatRequest):
         raise HTTPException(status_code=400, detail="질문을 입력해주세요.")
     
     try:
-        response_stream = get_chat_response_stream(request.question)
+        response_stream = get_chat_response_stream(
+            request.question,
+            include_timings=request.include_timings,
+            filters=request.filters,
+        )
         return StreamingResponse(
             response_stream, 
             media_type="text/event-stream",
@@ -1,17 +1,27 @@
+from typing import Literal
 from fastapi import APIRouter, Depends
-from neo4j import Driver
-from app.services.rag_service import get_neo4j_driver
+from neo4j import Driver, AsyncDriver
+from starlette.concurrency import run_in_threadpool
+from app.services.rag_service import get_neo4j_driver, backfill_document_embeddings
+from app.services.rate_limiter import get_all_rate_limiter_metrics
+from app.services.llm_cache import get_llm_cache
+from app.services.time_buckets import rebuild_time_buckets
+from app.services.graph_export import rebuild_entity_degrees, reset_entity_degrees
+from app.services.entity_resolution import resolve_all_entities
+from app.services.chunk_migration import migrate_chunks
+from app.services.query_profiler import get_query_profiler
+from app.services.pools import get_async_neo4j_driver, query_slot, pool_stats, query_slot_stats
 
 router = APIRouter()
 
 @router.get("/debug/entities")
-async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
+async def debug_entities(driver: AsyncDriver = Depends(get_async_neo4j_driver)):
     """
     Debug endpoint to understand Entity structure
     """
-    with driver.session() as session:
+    async with query_slot("admin"), driver.session() as session:
         # Count all node types
-        node_counts_result = session.run("""
+        node_counts_result = await session.run("""
             MATCH (n)
             RETURN labels(n)[0] as label, count(n) as count
             ORDER BY count DESC
@@ -19,11 +29,11 @@ async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
         
         node_counts = {
             record["label"]: record["count"] 
-            for record in node_counts_result
+            async for record in node_counts_result
         }
         
         # Get sample entities
-        entities_result = session.run("""
+        entities_result = await session.run("""
             MATCH (e:Entity)
             RETURN properties(e) as props, labels(e) as labels
             LIMIT 5
@@ -31,11 +41,11 @@ async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
         
         entities = [
             {"properties": dict(record["props"]), "labels": record["labels"]}
-            for record in entities_result
+            async for record in entities_result
         ]
         
         # Get all documents
-        all_docs_result = session.run("""
+        all_docs_result = await session.run("""
             MATCH (d:Document)
             RETURN d.id as id, d.title as title
             LIMIT 5
@@ -43,11 +53,11 @@ async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
         
         all_documents = [
             {"id": record["id"], "title": record["title"]}
-            for record in all_docs_result
+            async for record in all_docs_result
         ]
         
         # Get documents with chunks
-        docs_result = session.run("""
+        docs_result = await session.run("""
             MATCH (d:Document)
             OPTIONAL MATCH (c:Chunk {document_id: d.id})
             WITH d, count(c) as chunk_count
@@ -58,7 +68,7 @@ async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
         
         documents = [
             {"id": record["id"], "title": record["title"], "chunks": record["chunk_count"]}
-            for record in docs_result
+            async for record in docs_result
         ]
         
         # Test the graph query with first document
@@ -67,7 +77,7 @@ async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
             doc_id = documents[0]["id"]
             
             # Run our graph query
-            graph_result = session.run("""
+            graph_result = await session.run("""
                 // 1. 해당 문서의 제목과 Chunk 텍스트를 가져옵니다
                 MATCH (d:Document {id: $document_id})
                 OPTIONAL MATCH (c:Chunk {document_id: $document_id})
@@ -84,7 +94,7 @@ async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
                 RETURN count(e) as entity_count
             """, document_id=doc_id)
             
-            entity_count = graph_result.single()["entity_count"]
+            entity_count = (await graph_result.single())["entity_count"]
             graph_results.append({
                 "document_id": doc_id,
                 "entity_count": entity_count
@@ -97,4 +107,102 @@ async def debug_entities(driver: Driver = Depends(get_neo4j_driver)):
             "documents_with_chunks": documents,
             "graph_query_test": graph_results,
             "total_entities": len(entities)
-        }
\ No newline at end of file
+        }
+
+@router.get("/debug/rate-limits")
+async def debug_rate_limits():
+    """
+    Gemini 레이트 리미터의 현재 예산, 백오프 상태, 레인별 호출 통계를 반환합니다.
+    """
+    return get_all_rate_limiter_metrics()
+
+@router.get("/debug/llm-cache")
+async def debug_llm_cache():
+    """
+    LLM 완성 결과 캐시의 크기와 적중률을 반환합니다.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.post("/debug/rebuild-time-buckets")
+async def debug_rebuild_time_buckets(driver: Driver = Depends(get_neo4j_driver)):
+    """
+    TimeBucket 카운터를 Document 노드로부터 다시 계산합니다. (기존 데이터 백필용)
+    """
+    def rebuild():
+        with driver.session() as session:
+            return rebuild_time_buckets(session)
+
+    async with query_slot("admin"):
+        return await run_in_threadpool(rebuild)
+
+@router.post("/debug/rebuild-entity-degrees")
+async def debug_rebuild_entity_degrees(full: bool = False, driver: Driver = Depends(get_neo4j_driver)):
+    """
+    그래프 내보내기 정렬에 쓰는 Entity.degree를 계산합니다. (기존 데이터 백필용)
+    full=true면 모든 엔티티를 다시 계산하고, 아니면 degree가 없는 엔티티만 계산합니다.
+    """
+    def rebuild():
+        with driver.session() as session:
+            if full:
+                reset_entity_degrees(session)
+            return {"updated": rebuild_entity_degrees(session)}
+
+    async with query_slot("admin"):
+        return await run_in_threadpool(rebuild)
+
+@router.post("/debug/resolve-entities")
+async def debug_resolve_entities(driver: Driver = Depends(get_neo4j_driver)):
+    """
+    전체 엔티티의 이름을 정규화하고 표기만 다른 중복 엔티티를 병합합니다. (기존 데이터 백필용)
+    """
+    async with query_slot("admin"):
+        return await run_in_threadpool(resolve_all_entities, driver)
+
+@router.post("/debug/migrate-chunks")
+async def debug_migrate_chunks(dry_run: bool = False, driver: Driver = Depends(get_neo4j_driver)):
+    """
+    예전 형식(메타데이터/_node_content 중복 저장)의 Chunk 노드를 슬림 스키마로 다시 씁니다. (배포 후 1회)
+    dry_run=true면 대상 청크 수만 반환합니다.
+    """
+    async with query_slot("admin"):
+        return await run_in_threadpool(migrate_chunks, driver, dry_run=dry_run)
+
+@router.post("/debug/backfill-document-embeddings")
+async def debug_backfill_document_embeddings():
+    """
+    요약 임베딩(Document.embedding)이 없는 기존 문서를 채웁니다. 2단계 검색(SEARCH_DOCUMENT_PREFILTER)을 켜기 전에 1회 실행합니다.
+    """
+    async with query_slot("admin"):
+        return {"updated": await run_in_threadpool(backfill_document_embeddings)}
+
+@router.get("/debug/pools")
+async def debug_pools():
+    """
+    Neo4j 드라이버(동기/비동기)와 Supabase HTTP 커넥션 풀의 설정값과 사용량(사용 중/유휴/대기),
+    라우터 엔드포인트 종류별 쿼리 슬롯 사용량을 반환합니다. 아직 만들어지지 않은 풀은 null입니다.
+    """
+    return {**pool_stats(), "query_slots": query_slot_stats()}
+
+@router.get("/debug/queries")
+async def debug_queries(limit: int = 20, sort: Literal["total_ms", "avg_ms", "max_ms", "count", "rows"] = "total_ms"):
+    """
+    Cypher 쿼리별 누적 통계(총/평균/최대 소요 시간, 반환 행 수, 느린 횟수, PROFILE 표본)와 최근 느린 쿼리 목록
+    """
+    profiler = get_query_profiler()
+    return {
+        "slow_query_ms": profiler.slow_query_ms,
+        "profile_slow_queries": profiler.profile_slow_queries,
+        "queries": profiler.top_queries(limit=limit, sort=sort),
+        "recent_slow": profiler.recent_slow_queries(limit=limit),
+    }
+
+@router.post("/debug/queries/reset")
+async def debug_reset_queries():
+    """
+    Cypher 쿼리 통계를 초기화합니다.
+    """
+    get_query_profiler().reset()
+    return {"reset": True}
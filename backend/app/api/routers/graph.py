@@ -1,6 +1,15 @@
+from typing import Literal
 from fastapi import APIRouter, Depends, HTTPException
-from neo4j import Driver
-from app.services.rag_service import get_neo4j_driver
+from neo4j import AsyncDriver
+from app.services.pools import get_async_neo4j_driver, query_slot
+from app.services.graph_export import (
+    export_graph_page, stream_graph_page, expand_entity, graph_stats, entities_graph, stream_entities_graph,
+    decode_cursor, MAX_ENTITIES_PER_PAGE,
+)
+from app.services.graph_analytics import get_graph_analytics_runner, community_overview, community_member_ids
+from app.services.graph_wire import graph_stream_response, graph_items
+
+GraphFormat = Literal["json", "ndjson", "msgpack"]
 
 router = APIRouter()
 
@@ -8,91 +17,194 @@ router = APIRouter()
 async def get_all_graph_data(
     limit_entities: int = 100,
     limit_relationships: int = 200,
-    driver: Driver = Depends(get_neo4j_driver)
+    cursor: str | None = None,
+    format: GraphFormat = "json",
+    properties: bool | None = None,
+    driver: AsyncDriver = Depends(get_async_neo4j_driver)
 ):
     """
     전체 지식 그래프 데이터를 반환합니다.
-    성능을 위해 엔티티와 관계 수를 제한합니다.
+    degree(연결 수) 상위 엔티티 limit_entities개와 그 사이의 관계를 최대 limit_relationships개 반환하며,
+    응답의 next_cursor를 cursor로 넘기면 다음 순위의 엔티티를 이어서 받을 수 있습니다.
+    format=ndjson|msgpack이면 압축된 프레임 스트림으로 응답합니다. (properties 기본값: json은 true, 스트림은 false)
+    """
+    include_properties = properties if properties is not None else format == "json"
+    if format != "json":
+        # 잘못된 커서는 스트림을 열기 전에 400으로 응답합니다.
+        try:
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # 세션과 쿼리 슬롯은 응답을 다 보낼 때까지 스트림 안에서 유지합니다. (next_cursor는 end 프레임)
+        async def items():
+            async with query_slot(), driver.session() as session:
+                yield "meta", {"stats": await graph_stats(session)}
+                async for item in stream_graph_page(
+                    session,
+                    limit_entities=limit_entities,
+                    limit_relationships=limit_relationships,
+                    cursor=cursor,
+                    include_properties=include_properties,
+                ):
+                    yield item
+
+        return graph_stream_response(items(), format, include_properties)
+
+    try:
+        async with query_slot(), driver.session() as session:
+            page = await export_graph_page(
+                session,
+                limit_entities=limit_entities,
+                limit_relationships=limit_relationships,
+                cursor=cursor,
+                include_properties=include_properties,
+            )
+            stats = await graph_stats(session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"그래프 데이터 조회 실패: {str(e)}")
+
+    entities = page["entities"]
+    relationships = page["relationships"]
+    return {
+        "entities": entities,
+        "relationships": relationships,
+        "total_entities": len(entities),
+        "total_relationships": len(relationships),
+        "next_cursor": page["next_cursor"],
+        "stats": {
+            **stats,
+            "showing_entities": len(entities),
+            "showing_relationships": len(relationships)
+        }
+    }
+
+@router.get("/graph/expand/{entity_id}")
+async def expand_graph_entity(
+    entity_id: str,
+    limit: int = 50,
+    limit_relationships: int = 500,
+    format: GraphFormat = "json",
+    properties: bool | None = None,
+    driver: AsyncDriver = Depends(get_async_neo4j_driver)
+):
+    """
+    엔티티(elementId) 주변 그래프를 반환합니다.
+    degree 상위 이웃 limit개와, 엔티티와 이웃들 사이의 관계를 포함합니다.
+    """
+    include_properties = properties if properties is not None else format == "json"
+    try:
+        async with query_slot(), driver.session() as session:
+            result = await expand_entity(
+                session,
+                entity_id,
+                limit=limit,
+                limit_relationships=limit_relationships,
+                include_properties=include_properties,
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"그래프 확장 실패: {str(e)}")
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="엔티티를 찾을 수 없습니다.")
+    if format != "json":
+        return graph_stream_response(graph_items(result), format, include_properties, meta={
+            "center": result["center"],
+            "degree": result["degree"],
+        })
+    return {
+        **result,
+        "total_entities": len(result["entities"]),
+        "total_relationships": len(result["relationships"]),
+    }
+
+@router.get("/graph/communities")
+async def get_graph_communities(
+    limit: int = 50,
+    limit_links: int = 500,
+    format: GraphFormat = "json",
+    driver: AsyncDriver = Depends(get_async_neo4j_driver)
+):
+    """
+    그래프 개요: 크기 상위 커뮤니티 슈퍼 노드(id: "community:<번호>")와 커뮤니티 간 연결(weight)을 반환합니다.
+    커뮤니티는 POST /graph/analytics/run 작업으로 계산됩니다.
     """
     try:
-        with driver.session() as session:
-            # 전체 그래프 쿼리 - 문서와 연결된 엔티티만
-            graph_query = """
-            // 1. document_id가 있는 모든 엔티티 찾기
-            MATCH (e:Entity)
-            WHERE e.document_id IS NOT NULL
-            OPTIONAL MATCH (e)-[r]-()
-            WITH e, count(DISTINCT r) as rel_count
-            ORDER BY rel_count DESC
-            WITH collect(e) as all_entities
-            
-            // 2. 엔티티 정보 수집
-            UNWIND all_entities as e
-            WITH all_entities, collect(DISTINCT {
-                id: elementId(e),
-                name: coalesce(e.name, e.id),
-                type: coalesce(labels(e)[0], 'Entity'),
-                properties: properties(e)
-            }) as entities
-            
-            // 3. 선택된 엔티티 간의 관계 찾기
-            UNWIND all_entities as e1
-            UNWIND all_entities as e2
-            OPTIONAL MATCH (e1)-[rel]->(e2)
-            WHERE e1 <> e2 AND rel IS NOT NULL
-            WITH entities, collect(DISTINCT {
-                source: elementId(e1),
-                target: elementId(e2),
-                type: type(rel),
-                properties: properties(rel)
-            }) as all_relationships
-            
-            // 4. 관계 필터링
-            WITH entities, [r IN all_relationships WHERE r.type IS NOT NULL] as relationships
-            RETURN entities, relationships
-            """
-            
-            result = session.run(graph_query)
-            record = result.single()
-            
-            if record:
-                entities = record["entities"] or []
-                relationships = [r for r in (record["relationships"] or []) if r["type"]]
-                
-                # 통계 정보 추가 - 문서와 연결된 엔티티만
-                stats_result = session.run("""
-                    MATCH (e:Entity)
-                    WHERE e.document_id IS NOT NULL OR EXISTS {
-                        MATCH (e)-[]-(other)
-                        WHERE other.document_id IS NOT NULL
-                    }
-                    WITH count(DISTINCT e) as total_entities
-                    MATCH ()-[r]->()
-                    WHERE type(r) <> 'BELONGS_TO'
-                    RETURN total_entities, count(r) as total_relationships
-                """)
-                stats = stats_result.single()
-                
-                return {
-                    "entities": entities,
-                    "relationships": relationships,
-                    "total_entities": len(entities),
-                    "total_relationships": len(relationships),
-                    "stats": {
-                        "total_entities_in_db": stats["total_entities"],
-                        "total_relationships_in_db": stats["total_relationships"],
-                        "showing_entities": len(entities),
-                        "showing_relationships": len(relationships)
-                    }
-                }
-            else:
-                return {
-                    "entities": [],
-                    "relationships": [],
-                    "total_entities": 0,
-                    "total_relationships": 0,
-                    "stats": {}
-                }
-                
+        async with query_slot(), driver.session() as session:
+            overview = await community_overview(session, limit=min(limit, MAX_ENTITIES_PER_PAGE), limit_links=limit_links)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"그래프 데이터 조회 실패: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"커뮤니티 조회 실패: {str(e)}")
+
+    if format != "json":
+        return graph_stream_response(graph_items(overview), format, include_properties=True, meta={"level": "communities"})
+    return {
+        **overview,
+        "total_entities": len(overview["entities"]),
+        "total_relationships": len(overview["relationships"]),
+        "analytics": get_graph_analytics_runner().status(),
+    }
+
+@router.get("/graph/communities/{community_id}")
+async def get_graph_community(
+    community_id: int,
+    limit: int = 200,
+    limit_relationships: int = 1000,
+    format: GraphFormat = "json",
+    properties: bool | None = None,
+    driver: AsyncDriver = Depends(get_async_neo4j_driver)
+):
+    """
+    커뮤니티 하나를 펼칩니다. PageRank 상위 엔티티 limit개와 그 사이의 관계를 반환합니다.
+    """
+    include_properties = properties if properties is not None else format == "json"
+    if format != "json":
+        async def items():
+            async with query_slot(), driver.session() as session:
+                member_ids = await community_member_ids(session, community_id, limit=min(limit, MAX_ENTITIES_PER_PAGE))
+                async for item in stream_entities_graph(
+                    session,
+                    member_ids,
+                    limit_relationships=limit_relationships,
+                    include_properties=include_properties,
+                ):
+                    yield item
+
+        return graph_stream_response(items(), format, include_properties, meta={"community": community_id})
+
+    try:
+        async with query_slot(), driver.session() as session:
+            member_ids = await community_member_ids(session, community_id, limit=min(limit, MAX_ENTITIES_PER_PAGE))
+            graph = await entities_graph(
+                session,
+                member_ids,
+                limit_relationships=limit_relationships,
+                include_properties=include_properties,
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"커뮤니티 조회 실패: {str(e)}")
+
+    return {
+        "community": community_id,
+        **graph,
+        "total_entities": len(graph["entities"]),
+        "total_relationships": len(graph["relationships"]),
+    }
+
+@router.post("/graph/analytics/run")
+async def run_graph_analytics(resolution: float = 1.0):
+    """
+    그래프 분석(연결 요소, Louvain 커뮤니티, degree/PageRank)을 백그라운드에서 시작합니다.
+    """
+    runner = get_graph_analytics_runner()
+    started = runner.start(resolution=resolution)
+    return {"started": started, **runner.status()}
+
+@router.get("/graph/analytics/status")
+async def get_graph_analytics_status():
+    """
+    마지막 그래프 분석 작업의 상태와 요약(커뮤니티 수, 모듈성, 소요 시간 등)을 반환합니다.
+    """
+    return get_graph_analytics_runner().status()
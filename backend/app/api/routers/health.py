@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from app.services.components import readiness
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def liveness():
+    """
+    프로세스가 요청을 받을 수 있는지만 확인합니다. (외부 서비스 호출 없음)
+    """
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Supabase, Neo4j, 모델/저장소가 초기화되어 상태 확인을 통과했는지 반환합니다.
+    준비되지 않았으면 503과 구성요소별 상태(state, init_ms, error)를 돌려줍니다.
+    """
+    ready, components = await run_in_threadpool(readiness)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "components": components},
+    )
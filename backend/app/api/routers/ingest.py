@@ -1,11 +1,16 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from app.models.schemas import IngestRequest, IngestResponse
-from app.services.rag_service import process_ingestion, get_neo4j_driver, supabase_client
-from app.services.supabase_service import get_document_status
-from app.services.notion_service import fetch_notion_pages
-from typing import List, Dict, Any
-from neo4j import Driver
+from app.services.rag_service import process_ingestion, delete_document_graph
+from app.services.pools import get_async_neo4j_driver, query_slot
+from app.services.supabase_service import get_document_status, run_supabase
+from app.services.graph_export import document_graph, stream_document_graph
+from app.services.graph_wire import graph_stream_response
+from app.services.notion_sync import start_notion_import, get_import_job
+from app.services.ingestion_queue import get_ingestion_queue
+from typing import List, Dict, Any, Literal
+from neo4j import AsyncDriver
 import logging
 
 router = APIRouter()
@@ -28,22 +33,21 @@ async def ingest_document(request: IngestRequest, background_tasks: BackgroundTa
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 @router.get("/ingest/{document_id}/details")
-async def get_ingestion_details(document_id: str, driver: Driver = Depends(get_neo4j_driver)):
+async def get_ingestion_details(document_id: str, driver: AsyncDriver = Depends(get_async_neo4j_driver)):
     """
     특정 문서의 청킹 결과와 세부 정보를 반환합니다.
     """
     try:
-        with driver.session() as session:
+        async with query_slot(), driver.session() as session:
             chunks_query = """
             MATCH (d:Document {id: $document_id})
-            OPTIONAL MATCH (c:Chunk)
-            WHERE c.ref_doc_id = $document_id OR c.document_id = $document_id
+            OPTIONAL MATCH (c:Chunk {document_id: $document_id})
+            WITH d, c ORDER BY c.chunk_index
             WITH d, collect({
                 id: c.id,
-                text: CASE 
-                    WHEN size(coalesce(c.text, '')) > 0 THEN c.text
-                    ELSE substring(c._node_content, 0, 500)
-                END,
+                text: c.text,
+                chunk_index: c.chunk_index,
+                speaker: c.speaker,
                 embedding: CASE WHEN c.embedding IS NOT NULL THEN true ELSE false END
             }) as chunks
             RETURN d.title as title, 
@@ -51,183 +55,112 @@ async def get_ingestion_details(document_id: str, driver: Driver = Depends(get_n
                    chunks
             """
             
-            result = session.run(chunks_query, document_id=document_id)
-            record = result.single()
-            
-            if not record:
-                raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
-            
-            # Supabase에서 최신 상태를 비동기적으로 가져옵니다.
-            status = await get_document_status(document_id)
-            
-            return {
-                "document_id": document_id,
-                "title": record["title"],
-                "status": status,
-                "created_at": record["created_at"],
-                "chunks": record["chunks"],
-                "total_chunks": len(record["chunks"])
-            }
+            result = await session.run(chunks_query, document_id=document_id)
+            record = await result.single()
             
+        if not record:
+            raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
+
+        # Supabase에서 최신 상태를 비동기적으로 가져옵니다. (Neo4j 세션/슬롯은 이미 반환)
+        status = await get_document_status(document_id)
+
+        return {
+            "document_id": document_id,
+            "title": record["title"],
+            "status": status,
+            "created_at": record["created_at"],
+            "chunks": record["chunks"],
+            "total_chunks": len(record["chunks"])
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"청킹 정보 조회 실패: {str(e)}")
 
 @router.get("/ingest/{document_id}/graph")
 async def get_ingestion_graph(
     document_id: str, 
-    driver: Driver = Depends(get_neo4j_driver)
+    format: Literal["json", "ndjson", "msgpack"] = "json",
+    properties: bool | None = None,
+    driver: AsyncDriver = Depends(get_async_neo4j_driver)
 ):
     """
     특정 문서에서 추출된 지식 그래프 노드와 관계를 반현합니다.
+    format=ndjson|msgpack이면 압축된 프레임 스트림으로 응답합니다. (properties 기본값: json은 true, 스트림은 false)
     """
+    include_properties = properties if properties is not None else format == "json"
+    if format != "json":
+        # 엔티티가 도착하는 대로 노드 프레임을 보냅니다. 세션과 쿼리 슬롯은 응답을 다 보낼 때까지 유지합니다.
+        async def items():
+            async with query_slot(), driver.session() as session:
+                async for item in stream_document_graph(session, document_id, include_properties=include_properties):
+                    yield item
+
+        return graph_stream_response(items(), format, include_properties, meta={"document_id": document_id})
+
     try:
-        with driver.session() as session:
-            graph_query = """
-            // 1. 해당 문서와 관련된 청크 찾기
-            MATCH (d:Document {id: $document_id})
-            OPTIONAL MATCH (c:Chunk)
-            WHERE c.ref_doc_id = $document_id OR c.document_id = $document_id
-            WITH d, collect(DISTINCT c) as chunks
-            
-            // 2. 해당 문서에 속한 엔티티 찾기
-            MATCH (e:Entity)
-            WHERE e.document_id = $document_id OR 
-                  EXISTS {
-                    MATCH (e)-[r]-(other)
-                    WHERE other.document_id = $document_id
-                  }
-            WITH d, collect(DISTINCT e) as all_entities
-            
-            // 5. 모든 엔티티 정보 준비
-            WITH d, all_entities as selected_entities
-            UNWIND selected_entities as e
-            WITH collect(DISTINCT {
-                id: elementId(e),
-                name: coalesce(e.name, e.id),
-                type: coalesce(labels(e)[0], 'Entity'),
-                properties: properties(e)
-            }) as entities, selected_entities
+        async with query_slot(), driver.session() as session:
+            # 문서 엔티티(와 이웃 엔티티)를 모은 뒤, 그 집합 내부의 관계만 한 번에 조회합니다.
+            graph = await document_graph(session, document_id, include_properties=include_properties)
+
+        return {
+            "document_id": document_id,
+            "entities": graph["entities"],
+            "relationships": graph["relationships"],
+            "total_entities": len(graph["entities"]),
+            "total_relationships": len(graph["relationships"])
+        }
 
-            // 6. 선택된 엔티티 간의 관계 찾기
-            UNWIND selected_entities as e1
-            UNWIND selected_entities as e2
-            OPTIONAL MATCH (e1)-[rel]->(e2)
-            WHERE e1 <> e2 AND rel IS NOT NULL
-            WITH entities, collect(DISTINCT {
-                source: elementId(e1),
-                target: elementId(e2),
-                type: type(rel),
-                properties: properties(rel)
-            }) as all_relationships
-            
-            // 7. 관계 필터링
-            WITH entities, [r IN all_relationships WHERE r.type IS NOT NULL] as relationships
-            
-            RETURN entities, relationships
-            """
-            
-            result = session.run(graph_query, document_id=document_id)
-            record = result.single()
-            
-            if not record:
-                # 결과가 없어도 오류는 아니므로 빈 리스트를 반환합니다.
-                 return {
-                    "document_id": document_id,
-                    "entities": [],
-                    "relationships": [],
-                    "total_entities": 0,
-                    "total_relationships": 0
-                }
-            
-            return {
-                "document_id": document_id,
-                "entities": record["entities"] or [],
-                "relationships": record["relationships"] or [],
-                "total_entities": len(record["entities"] or []),
-                "total_relationships": len(record["relationships"] or [])
-            }
-            
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"그래프 정보 조회 실패: {str(e)}")
 
 # Notion
 class NotionIngestRequest(BaseModel):
     database_url: str
+    # True면 마지막 동기화 이후 수정된 페이지만 가져와 갱신합니다.
+    incremental: bool = False
 
 
 @router.post("/ingest_from_notion")
-async def ingest_from_notion(req: NotionIngestRequest, background_tasks: BackgroundTasks):
+async def ingest_from_notion(req: NotionIngestRequest):
     """
-    Notion 데이터베이스 URL을 기반으로 모든 페이지를 수집하고
-    Supabase에 저장한 뒤, RAG 청킹 프로세스를 자동 시작합니다.
+    Notion 데이터베이스 가져오기 작업을 시작하고 작업 핸들을 즉시 반환합니다.
+    페이지는 본문이 준비되는 대로 Supabase에 배치 upsert 되고, 곧바로 수집 큐에 들어갑니다.
+    진행 상황은 GET /ingest_jobs/{job_id} 로 확인합니다.
     """
     try:
-        # 1️⃣ Notion에서 모든 페이지 가져오기
-        pages = fetch_notion_pages(req.database_url)
-    except Exception as e:
+        job = start_notion_import(req.database_url, incremental=req.incremental)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Notion fetch error: {e}")
 
-    if not pages:
-        raise HTTPException(status_code=404, detail="No pages found in this Notion DB")
-
-    results = []
-    for page in pages:
-        try:
-            # 2️⃣ Supabase에 문서 등록
-            insert_data = {
-                "title": page["title"],
-                "content": page["content"],
-                "metadata": {
-                    "date": page["date"],
-                    "tags": page["tags"],
-                    "people": page["people"],
-                    "generation": page["generation"],
-                    "source": page["source"],
-                },
-                "status": "PENDING",
-            }
-            inserted = supabase_client.from_("documents").insert(insert_data).execute()
-
-            if not inserted.data or len(inserted.data) == 0:
-                raise Exception("Supabase insert failed")
-
-            document_id = inserted.data[0]["id"]
-
-            # 3️⃣ 백그라운드에서 RAG ingestion (청킹 + 임베딩 + 그래프)
-            background_tasks.add_task(process_ingestion, document_id)
-
-            results.append({
-                "document_id": document_id,
-                "title": page["title"],
-                "status": "started"
-            })
-
-        except Exception as e:
-            logging.error(f"❌ Failed to ingest page '{page['title']}': {e}")
-            results.append({
-                "title": page["title"],
-                "status": f"error: {e}"
-            })
-
     return {
         "status": "✅ ingestion started",
-        "total_pages": len(results),
+        "job_id": job.id,
+        "status_url": f"/api/ingest_jobs/{job.id}",
         "from": req.database_url,
-        "results": results,
+        "incremental": req.incremental,
     }
 
+
+@router.get("/ingest_jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """
+    Notion 가져오기 작업의 진행 상황(조회/저장/수집 건수, watermark 등)을 반환합니다.
+    """
+    job = get_import_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return {**job.to_dict(), "ingestion_queue": get_ingestion_queue().stats()}
+
 @router.post("/ingest_all_pending")
 async def ingest_all_pending(background_tasks: BackgroundTasks):
     """
     Supabase에서 status='PENDING' 문서들을 전부 자동 수집(청킹) 처리
     """
     try:
-        pending_docs = (
-            supabase_client
-            .from_("documents")
-            .select("id, title")
-            .eq("status", "PENDING")
-            .execute()
+        pending_docs = await run_supabase(
+            lambda client: client.from_("documents").select("id, title").eq("status", "PENDING")
         )
 
         if not pending_docs.data:
@@ -249,47 +182,27 @@ async def ingest_all_pending(background_tasks: BackgroundTasks):
 
 
 @router.post("/ingest/{document_id}/rechunk", response_model=IngestResponse)
-async def rechunk_document(document_id: str, background_tasks: BackgroundTasks, driver: Driver = Depends(get_neo4j_driver)):
+async def rechunk_document(document_id: str, background_tasks: BackgroundTasks):
     """
     특정 문서를 재청킹합니다.
     기존 청크와 관련 데이터를 모두 삭제하고 다시 처리합니다.
     """
     try:
         # 1. 문서 존재 여부 확인
-        doc_result = supabase_client.from_("documents").select("*").eq("id", document_id).execute()
+        doc_result = await run_supabase(lambda client: client.from_("documents").select("*").eq("id", document_id))
         if not doc_result.data:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # 2. Neo4j에서 기존 청크 삭제
-        with driver.session() as session:
-            # 청크 삭제
-            session.run("""
-                MATCH (c:Chunk)
-                WHERE c.ref_doc_id = $document_id OR c.document_id = $document_id
-                DETACH DELETE c
-            """, document_id=document_id)
-            
-            # Document 노드 삭제 (나중에 다시 생성됨)
-            session.run("""
-                MATCH (d:Document {id: $document_id})
-                DETACH DELETE d
-            """, document_id=document_id)
-            
-            # 관련 엔티티도 삭제 (선택적)
-            session.run("""
-                MATCH (e:Entity)
-                WHERE e.document_id = $document_id
-                DETACH DELETE e
-            """, document_id=document_id)
-            
-            logging.info(f"Deleted existing chunks and entities for document {document_id}")
+        # 2. Neo4j에서 기존 청크, Document 노드, 관련 엔티티 삭제 (Document 노드는 나중에 다시 생성됨)
+        await run_in_threadpool(delete_document_graph, document_id)
+        logging.info(f"Deleted existing chunks and entities for document {document_id}")
         
         # 3. Supabase에서 문서 상태를 PENDING으로 변경
-        supabase_client.from_("documents").update({
+        await run_supabase(lambda client: client.from_("documents").update({
             "status": "PENDING",
             "summary": None,
             "theme": None
-        }).eq("id", document_id).execute()
+        }).eq("id", document_id))
         
         # 4. 백그라운드에서 재처리
         background_tasks.add_task(process_ingestion, document_id)
@@ -308,38 +221,18 @@ async def rechunk_document(document_id: str, background_tasks: BackgroundTasks,
 
 
 @router.delete("/ingest/{document_id}")
-async def delete_document(document_id: str, driver: Driver = Depends(get_neo4j_driver)):
+async def delete_document(document_id: str):
     """
     특정 문서를 DB와 지식 그래프에서 완전히 삭제합니다.
     """
     try:
         # 1. Neo4j에서 관련 데이터 모두 삭제 (청크, 문서 노드, 엔티티)
-        with driver.session() as session:
-            # 청크 삭제
-            session.run("""
-                MATCH (c:Chunk)
-                WHERE c.ref_doc_id = $document_id OR c.document_id = $document_id
-                DETACH DELETE c
-            """, document_id=document_id)
-            
-            # Document 노드 삭제
-            session.run("""
-                MATCH (d:Document {id: $document_id})
-                DETACH DELETE d
-            """, document_id=document_id)
-            
-            # 관련 엔티티 삭제
-            session.run("""
-                MATCH (e:Entity)
-                WHERE e.document_id = $document_id
-                DETACH DELETE e
-            """, document_id=document_id)
-            
-            logging.info(f"Deleted all graph data for document {document_id}")
+        await run_in_threadpool(delete_document_graph, document_id)
+        logging.info(f"Deleted all graph data for document {document_id}")
 
         # 2. Supabase에서 문서 레코드 삭제
         # ON DELETE CASCADE에 의해 labels 테이블의 관련 데이터도 자동 삭제됨
-        supabase_client.from_("documents").delete().eq("id", document_id).execute()
+        await run_supabase(lambda client: client.from_("documents").delete().eq("id", document_id))
         logging.info(f"Deleted document record from Supabase for id {document_id}")
 
         return {"success": True, "message": "문서가 성공적으로 삭제되었습니다."}
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.services.metrics import get_metrics_registry, PROMETHEUS_CONTENT_TYPE
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    채팅/수집 파이프라인 단계별 지연 시간 히스토그램 (Prometheus 텍스트 형식)
+    """
+    return Response(content=get_metrics_registry().render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -23,6 +23,65 @@ class Settings(BaseSettings):
     # Model Names
     LLM_MODEL: str = "gemini-2.5-pro"
 
+    # Gemini 호출 예산 (프로세스 전역 레이트 리미터)
+    GEMINI_LLM_REQUESTS_PER_MINUTE: int = 60
+    GEMINI_LLM_TOKENS_PER_MINUTE: int = 1_000_000
+    GEMINI_EMBED_REQUESTS_PER_MINUTE: int = 600
+    GEMINI_EMBED_TOKENS_PER_MINUTE: int = 1_000_000
+    # 백그라운드(수집) 작업이 사용할 수 있는 예산 비율. 나머지는 채팅용으로 남겨둡니다.
+    GEMINI_BACKGROUND_SHARE: float = 0.8
+
+    # LLM 완성 결과 디스크 캐시 (테마/요약/트리플렛 추출 등 결정적 프롬프트용)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DIR: str = ".cache/llm"
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # 문서 수집 큐 워커 수 (Notion 스트리밍 가져오기 등). 엔티티 소유 문서는 추출 중에 문서별로 기록되므로 동시에 수집해도 섞이지 않습니다.
+    INGESTION_WORKERS: int = 2
+
+    # 대시보드 스냅샷 전체 재적재 주기(초). 다른 프로세스에서 바뀐 내용을 반영하기 위한 안전장치이며, 0이면 끕니다.
+    DASHBOARD_SNAPSHOT_REFRESH_SECONDS: int = 600
+
+    # Neo4j 드라이버 커넥션 풀. 라우터, 수집, LlamaIndex 저장소가 드라이버 하나를 공유합니다.
+    NEO4J_MAX_CONNECTION_POOL_SIZE: int = 50
+    # 풀이 가득 찼을 때 커넥션을 기다리는 최대 시간(초). 넘기면 쿼리가 실패합니다.
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT: float = 30.0
+    # 커넥션 최대 수명(초). 로드밸런서/방화벽이 유휴 연결을 끊는 시간보다 짧게 둡니다.
+    NEO4J_MAX_CONNECTION_LIFETIME: float = 1800.0
+    # 새 커넥션 연결 제한 시간(초)
+    NEO4J_CONNECTION_TIMEOUT: float = 15.0
+
+    # async 라우터의 동시 쿼리 상한. 대시보드/그래프/수집 조회(interactive)와 디버그/재계산(admin)을 따로 셉니다.
+    # 라우터 전용 비동기 Neo4j 드라이버의 풀 크기는 두 값의 합입니다.
+    ROUTER_QUERY_CONCURRENCY: int = 16
+    ADMIN_QUERY_CONCURRENCY: int = 1
+
+    # Supabase HTTP 커넥션 풀 (keep-alive)
+    SUPABASE_MAX_CONNECTIONS: int = 20
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    # 유휴 keep-alive 연결을 유지하는 시간(초)
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_TIMEOUT_SECONDS: float = 30.0
+
+    # 2단계 검색: 요약 임베딩(Document.embedding)으로 상위 N개 문서를 먼저 고르고 그 문서의 청크만 검색합니다. 0이면 끕니다.
+    SEARCH_DOCUMENT_PREFILTER: int = 0
+    # 참석자/회의 수처럼 Document 메타데이터로 답할 수 있는 질문은 검색/LLM 없이 바로 답합니다. (metadata_answers)
+    METADATA_ANSWERS_ENABLED: bool = True
+
+    # Cypher 쿼리 프로파일러: 이 시간(ms) 이상 걸린 쿼리는 느린 쿼리 로그에 남깁니다.
+    NEO4J_SLOW_QUERY_MS: int = 500
+    # 느린 읽기 쿼리를 백그라운드에서 PROFILE로 다시 실행해 실행 계획 표본을 저장할지 여부
+    NEO4J_PROFILE_SLOW_QUERIES: bool = False
+
+    # 저장소 구현: "neo4j"(Supabase + Neo4j) | "memory"(프로세스 내, 벤치마크용)
+    RAG_BACKEND: str = "neo4j"
+    # 모델 제공자: "gemini" | "stub"(외부 호출 없는 결정적 모델, 벤치마크/부하 테스트용)
+    MODEL_PROVIDER: str = "gemini"
+    # stub 모델의 인위적 지연(ms). 실제 API 지연을 흉내 낼 때 사용합니다.
+    STUB_LLM_LATENCY_MS: float = 0
+    STUB_LLM_TOKEN_LATENCY_MS: float = 0
+    STUB_EMBED_LATENCY_MS: float = 0
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,11 +1,27 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api.routers import chat, ingest, dashboard, debug, graph  # Import routers
+from .api.routers import chat, ingest, dashboard, debug, graph, metrics, health  # Import routers
+from .services import components, pools
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 모델/저장소 초기화는 백그라운드에서 진행하고 바로 요청을 받습니다.
+    # 준비 여부는 /api/health/ready 로 확인하며, 먼저 들어온 요청은 해당 구성요소를 직접 초기화합니다.
+    warm_up = asyncio.create_task(asyncio.to_thread(components.warm_up))
+    yield
+    if not warm_up.done():
+        await asyncio.wait([warm_up], timeout=5)
+    await pools.close_async_resources()
+    await asyncio.to_thread(components.shutdown)
 
 app = FastAPI(
     title="Project SYSTEMA Backend",
     description="API for intelligent Korean data interface",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware setup
@@ -23,6 +39,9 @@ app.include_router(ingest.router, prefix="/api", tags=["Ingestion"])
 app.include_router(dashboard.router, prefix="/api", tags=["Dashboard"]) # Register the dashboard router
 app.include_router(debug.router, prefix="/api", tags=["Debug"])
 app.include_router(graph.router, prefix="/api", tags=["Graph"])
+app.include_router(health.router, prefix="/api", tags=["Health"])
+# Prometheus 스크레이프 경로는 관례대로 /metrics (prefix 없음)
+app.include_router(metrics.router, tags=["Metrics"])
 
 @app.get("/", tags=["Root"])
 async def read_root():
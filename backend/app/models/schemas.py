@@ -1,6 +1,9 @@
-from pydantic import BaseModel
+from datetime import date
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
 
+from app.core.config import settings
+
 class IngestRequest(BaseModel):
     document_id: str
 
@@ -9,8 +12,53 @@ class IngestResponse(BaseModel):
     message: str
     document_id: str
 
+class SearchFilters(BaseModel):
+    """
+    검색 범위 필터. 필터끼리는 AND, 한 필터의 값 목록 안에서는 OR로 결합합니다.
+    날짜는 회의 날짜(Document.meeting_date, 없으면 문서 생성일)를 기준으로 양 끝을 포함합니다.
+    """
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    themes: list[str] = []
+    # 참석자 이름 일부로도 매칭합니다. ("김철수"는 "김철수 (PM)"과 매칭)
+    attendees: list[str] = []
+    # 청크 단위 발언자 (정확히 일치)
+    speakers: list[str] = []
+    document_ids: list[str] = []
+
+    @model_validator(mode="after")
+    def _check_range(self):
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from은 date_to보다 늦을 수 없습니다.")
+        return self
+
+    @property
+    def scopes_documents(self) -> bool:
+        """문서 단위 필터(발언자 외)가 하나라도 있는지"""
+        return bool(self.date_from or self.date_to or self.themes or self.attendees or self.document_ids)
+
 class ChatRequest(BaseModel):
     question: str
+    # True면 done 직전에 단계별 소요 시간(ms)을 담은 timings 이벤트를 보냅니다.
+    include_timings: bool = False
+    # 검색 범위 제한 (생략하면 전체 문서)
+    filters: Optional[SearchFilters] = None
+
+class SearchParams(BaseModel):
+    """perform_hybrid_search 튜닝 값. 기본값이 운영 설정이며, bench/evaluate.py로 조합별 품질/비용을 비교합니다."""
+    # 벡터/키워드 검색 각각에서 top_k * candidate_multiplier개 후보를 가져옵니다.
+    candidate_multiplier: int = 2
+    # 이 점수 미만의 벡터 결과는 버림 (코사인 유사도를 [0, 1]로 옮긴 값)
+    vector_threshold: float = 0.7
+    # 이 점수 미만의 키워드 결과는 버림 (풀텍스트 점수)
+    keyword_threshold: float = 0.5
+    # RRF 합산 시 키워드 순위의 가중치 (벡터는 1.0)
+    keyword_weight: float = 1.5
+    rrf_k: int = 60
+    # 문서 생성일 기준 시간 감쇠율 (일 단위, exp(-rate * days))
+    decay_rate: float = 0.05
+    # 2단계 검색: 요약 임베딩 유사도 상위 N개 문서의 청크로만 벡터/키워드 검색을 제한 (0이면 전체 검색)
+    document_prefilter: int = Field(default_factory=lambda: settings.SEARCH_DOCUMENT_PREFILTER)
 
 # ChatResponse는 스트리밍을 사용하므로, 여기서는 별도 정의하지 않음.
 # 스트리밍의 각 청크는 문자열이 될 것임.
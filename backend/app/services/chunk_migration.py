@@ -0,0 +1,152 @@
+"""
+기존 Chunk 노드를 슬림 스키마로 옮기는 일회성 마이그레이션.
+
+예전에는 Neo4jVectorStore.add로 청크를 썼기 때문에 청크마다 문서 메타데이터 전체(제목, 날짜, 참석자, 레이블 등)가
+평탄화된 속성과 직렬화한 노드(_node_content), _node_type, ref_doc_id로 중복 저장되어 있습니다.
+이 작업은 청크를 {id, text, embedding, document_id, chunk_index, speaker}만 남기고 다시 쓰며,
+청크에만 있던 회의 메타데이터(meeting_date, attendees, location, agenda)는 비어 있는 Document 속성에 채웁니다.
+마지막으로 회의 날짜가 없는 문서는 문서 생성일을 회의 날짜로 채웁니다. (검색 날짜 필터용)
+
+배치 단위로 처리하므로 중간에 멈춰도 다시 실행하면 남은 청크부터 이어서 진행합니다.
+수동 실행: python -m app.services.chunk_migration [--dry-run] [--batch-size N]
+"""
+import json
+import logging
+
+from app.services.rag_storage import parse_meeting_date
+
+MIGRATION_BATCH_SIZE = 1000
+
+# 예전 저장 방식으로 쓰인 청크
+_LEGACY_CHUNKS = """
+MATCH (c:Chunk)
+WHERE c._node_content IS NOT NULL OR c.ref_doc_id IS NOT NULL
+"""
+
+# 임베딩은 서버 안에서 그대로 옮깁니다. (SET c = map은 id를 포함한 모든 속성을 교체)
+_REWRITE_CHUNKS_QUERY = """
+UNWIND $rows AS row
+MATCH (c:Chunk) WHERE elementId(c) = row.element_id
+WITH c, row, c.embedding AS embedding
+SET c = row.props
+WITH c, row, embedding
+OPTIONAL MATCH (d:Document {id: row.props.document_id})
+FOREACH (_ IN CASE WHEN d IS NULL THEN [] ELSE [1] END | MERGE (c)-[:BELONGS_TO]->(d))
+WITH c, embedding
+WHERE embedding IS NOT NULL
+CALL db.create.setNodeVectorProperty(c, 'embedding', embedding)
+RETURN count(c) AS rewritten
+"""
+
+_FILL_DOCUMENTS_QUERY = """
+UNWIND $documents AS doc
+MATCH (d:Document {id: doc.id})
+SET d.meeting_date = coalesce(d.meeting_date, date(doc.meeting_date)),
+    d.attendees = coalesce(d.attendees, doc.attendees),
+    d.location = coalesce(d.location, doc.location),
+    d.agenda = coalesce(d.agenda, doc.agenda)
+RETURN count(d) AS updated
+"""
+
+# 회의 날짜를 추출하지 못한 문서는 문서 생성일을 회의 날짜로 씁니다.
+_FILL_MEETING_DATES_QUERY = """
+MATCH (d:Document)
+WHERE d.meeting_date IS NULL AND d.created_at IS NOT NULL
+SET d.meeting_date = date(d.created_at)
+RETURN count(d) AS updated
+"""
+
+
+def _legacy_metadata(props: dict) -> dict:
+    """_node_content에 들어 있는 원래 노드 메타데이터 (없거나 깨졌으면 평탄화된 속성)"""
+    try:
+        metadata = json.loads(props.get("_node_content") or "{}").get("metadata") or {}
+    except (TypeError, ValueError):
+        metadata = {}
+    return {**props, **metadata}
+
+
+def slim_chunk(props: dict) -> tuple:
+    """
+    예전 청크 속성(임베딩 제외) -> (슬림 속성, 문서 회의 메타데이터)
+    document_id는 메타데이터 -> ref_doc_id 순서로 찾습니다.
+    """
+    metadata = _legacy_metadata(props)
+    chunk = {
+        "id": props["id"],
+        "text": props.get("text") or "",
+        "document_id": props.get("document_id") or metadata.get("document_id") or props.get("ref_doc_id"),
+        "chunk_index": metadata.get("chunk_index"),
+        "speaker": metadata.get("speaker"),
+    }
+    attendees = metadata.get("attendees")
+    if isinstance(attendees, str):
+        attendees = [name.strip() for name in attendees.split(",") if name.strip()]
+    document = {
+        "id": chunk["document_id"],
+        "meeting_date": parse_meeting_date(metadata.get("meeting_date")),
+        "attendees": attendees or None,
+        "location": metadata.get("location"),
+        "agenda": metadata.get("agenda"),
+    }
+    return {key: value for key, value in chunk.items() if value is not None}, document
+
+
+def count_legacy_chunks(session) -> int:
+    return session.run(_LEGACY_CHUNKS + "RETURN count(c) AS c").single()["c"]
+
+
+def migrate_chunks(driver, batch_size: int = MIGRATION_BATCH_SIZE, dry_run: bool = False) -> dict:
+    """
+    예전 형식의 청크를 batch_size개씩 슬림 스키마로 다시 씁니다.
+    dry_run=True면 대상 청크 수만 셉니다. 반환: {"legacy_chunks", "migrated", "documents_updated", "meeting_dates_filled"}
+    """
+    with driver.session() as session:
+        legacy = count_legacy_chunks(session)
+        report = {"legacy_chunks": legacy, "migrated": 0, "documents_updated": 0, "meeting_dates_filled": 0}
+        if dry_run:
+            return report
+
+        while True:
+            records = list(session.run(
+                _LEGACY_CHUNKS + "RETURN elementId(c) AS element_id, c {.*, embedding: null} AS props LIMIT $batch_size",
+                batch_size=batch_size,
+            ))
+            if not records:
+                break
+            rows, documents = [], {}
+            for record in records:
+                props, document = slim_chunk(record["props"])
+                rows.append({"element_id": record["element_id"], "props": props})
+                if document["id"] and document["id"] not in documents:
+                    documents[document["id"]] = document
+
+            session.execute_write(lambda tx: tx.run(_REWRITE_CHUNKS_QUERY, rows=rows).consume())
+            if documents:
+                updated = session.execute_write(
+                    lambda tx: tx.run(_FILL_DOCUMENTS_QUERY, documents=list(documents.values())).single()["updated"]
+                )
+                report["documents_updated"] += updated
+            report["migrated"] += len(rows)
+            logging.info(f"청크 마이그레이션: {report['migrated']}/{legacy}")
+            if len(records) < batch_size:
+                break
+
+        report["meeting_dates_filled"] = session.execute_write(
+            lambda tx: tx.run(_FILL_MEETING_DATES_QUERY).single()["updated"]
+        )
+
+    logging.info(f"청크 마이그레이션 완료: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.services.rag_service import get_neo4j_driver
+
+    parser = argparse.ArgumentParser(description="Chunk 노드를 슬림 스키마로 마이그레이션")
+    parser.add_argument("--dry-run", action="store_true", help="대상 청크 수만 출력")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+    print(migrate_chunks(get_neo4j_driver(), batch_size=args.batch_size, dry_run=args.dry_run))
@@ -0,0 +1,153 @@
+"""
+지연 초기화되는 외부 구성요소(Supabase 클라이언트, Neo4j 드라이버, 모델/저장소) 레지스트리.
+
+각 구성요소는 처음 사용할 때 만들어지고, 실패하면 RETRY_SECONDS 동안 None을 반환한 뒤 다시 시도합니다.
+(import 시점이나 서비스 장애 시 프로세스가 죽지 않고, 복구되면 재시작 없이 다시 연결됩니다.)
+
+앱 lifespan에서 warm_up()으로 백그라운드에서 미리 만들어 두고, 종료 시 shutdown()으로 닫습니다.
+readiness()는 /api/health/ready 에서 사용하며, 준비된 구성요소에 가벼운 상태 확인을 실행합니다.
+"""
+import logging
+import threading
+import time
+
+# 생성 실패 후 재시도까지 대기 시간(초)
+RETRY_SECONDS = 15
+# 상태 확인 결과 캐시 시간(초). 프로브가 자주 와도 외부 서비스를 두드리지 않도록 합니다.
+CHECK_CACHE_SECONDS = 5
+
+
+class LazyComponent:
+    """
+    factory()로 한 번 만들고 재사용합니다.
+    - factory가 None을 반환하면 비활성(disabled) 상태로 봅니다. (예: memory 저장소 구성의 Neo4j)
+    - check(instance)는 준비 상태 확인용이며 예외가 나면 unhealthy로 기록합니다.
+    - close(instance)는 shutdown 시 호출합니다.
+    """
+
+    def __init__(self, name: str, factory, check=None, close=None, required: bool = True):
+        self.name = name
+        self._factory = factory
+        self._check = check
+        self._close = close
+        self.required = required
+        self._lock = threading.Lock()
+        self._instance = None
+        self._state = "pending"  # pending | ready | disabled | failed
+        self._error = None
+        self._failed_at = 0.0
+        self._init_ms = None
+        self._last_check = None  # (monotonic, ok, error)
+
+    def get(self):
+        if self._state in ("ready", "disabled"):
+            return self._instance
+        with self._lock:
+            if self._state in ("ready", "disabled"):
+                return self._instance
+            if self._state == "failed" and time.monotonic() - self._failed_at < RETRY_SECONDS:
+                return None
+            started = time.perf_counter()
+            try:
+                instance = self._factory()
+            except Exception as e:
+                self._state, self._error, self._failed_at = "failed", f"{type(e).__name__}: {e}", time.monotonic()
+                logging.error(f"{self.name} 초기화 실패: {e}", exc_info=True)
+                return None
+            self._init_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._instance = instance
+            self._state = "ready" if instance is not None else "disabled"
+            self._error = None
+            logging.info(f"{self.name} 초기화 완료 ({self._init_ms}ms)")
+            return instance
+
+    def get_in_background(self):
+        """생성 중이 아니면 백그라운드 스레드에서 get()을 시작합니다. (프로브가 초기화를 기다리지 않도록)"""
+        if self._state in ("ready", "disabled") or self._lock.locked():
+            return
+        threading.Thread(target=self.get, name=f"init-{self.name}", daemon=True).start()
+
+    def healthy(self) -> tuple:
+        """(ok, error). 아직 준비되지 않았으면 초기화를 백그라운드에서 (재)시도하고 바로 반환합니다."""
+        if self._state == "disabled":
+            return True, None
+        if self._state != "ready":
+            self.get_in_background()
+            return False, self._error or ("initializing" if self._lock.locked() else self._state)
+        instance = self._instance
+        if self._check is None:
+            return True, None
+        cached = self._last_check
+        if cached and time.monotonic() - cached[0] < CHECK_CACHE_SECONDS:
+            return cached[1], cached[2]
+        try:
+            self._check(instance)
+            result = (True, None)
+        except Exception as e:
+            result = (False, f"{type(e).__name__}: {e}")
+        self._last_check = (time.monotonic(),) + result
+        return result
+
+    def status(self) -> dict:
+        return {
+            "state": self._state,
+            "required": self.required,
+            "init_ms": self._init_ms,
+            "error": self._error,
+        }
+
+    def close(self):
+        with self._lock:
+            instance, self._instance = self._instance, None
+            self._state = "pending"
+            self._last_check = None
+        if instance is not None and self._close is not None:
+            try:
+                self._close(instance)
+            except Exception as e:
+                logging.warning(f"{self.name} 종료 중 오류: {e}")
+
+
+_REGISTRY = {}
+
+
+def register(name: str, factory, check=None, close=None, required: bool = True) -> LazyComponent:
+    """같은 이름으로 다시 등록하면 기존 구성요소를 반환합니다."""
+    component = _REGISTRY.get(name)
+    if component is None:
+        component = _REGISTRY[name] = LazyComponent(name, factory, check=check, close=close, required=required)
+    return component
+
+
+def warm_up():
+    """등록된 구성요소를 모두 (서로 독립적이므로 병렬로) 만들어 둡니다. (lifespan 백그라운드 작업)"""
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=component.get, name=f"init-{component.name}", daemon=True)
+        for component in list(_REGISTRY.values())
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logging.info(f"구성요소 준비 완료 ({(time.perf_counter() - started) * 1000:.0f}ms): "
+                 f"{ {name: c.status()['state'] for name, c in _REGISTRY.items()} }")
+
+
+def readiness() -> tuple:
+    """(ready, {name: status}) — 필수 구성요소가 모두 준비되어 상태 확인을 통과하면 ready"""
+    ready = True
+    report = {}
+    for name, component in list(_REGISTRY.items()):
+        ok, error = component.healthy()
+        report[name] = {**component.status(), "healthy": ok}
+        if error:
+            report[name]["error"] = error
+        if component.required and not ok:
+            ready = False
+    return ready, report
+
+
+def shutdown():
+    for component in reversed(list(_REGISTRY.values())):
+        component.close()
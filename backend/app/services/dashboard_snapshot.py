@@ -0,0 +1,306 @@
+import hashlib
+import heapq
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+
+from app.core.config import settings
+
+# 대시보드에 노출하는 개수 (기존 Cypher 쿼리의 LIMIT과 동일)
+# 타임라인은 스냅샷이 아니라 TimeBucket 카운터에서 읽습니다. (/dashboard 라우터, time_buckets.query_timeline)
+TIMELINE_WEEKS = 4
+TOP_THEMES = 10
+SOURCES_PER_THEME = 5
+FALLBACK_DOCUMENTS = 10
+PREVIEW_CHARS = 200
+
+
+def _to_datetime(value):
+    """Neo4j DateTime / ISO 문자열 / datetime을 파이썬 datetime으로 변환합니다."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if hasattr(value, "to_native"):
+        try:
+            return value.to_native()
+        except Exception:
+            pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def make_preview(content: str) -> str:
+    return (content or "")[:PREVIEW_CHARS] + "..."
+
+
+class DashboardSnapshot:
+    """
+    /dashboard 응답(테마별 작업 목록)을 미리 계산해 메모리에 보관하는 스냅샷.
+
+    - 최초 요청(또는 refresh 주기 경과) 시 Neo4j에서 한 번의 쿼리로 전체를 적재합니다.
+    - 이후에는 수집 완료/재테마/삭제 이벤트마다 문서 하나만큼 증분 갱신합니다.
+    - 응답 본문은 버전별로 캐시되어, 변경이 없으면 요청 비용이 상수 시간입니다.
+    """
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._docs = {}              # doc_id -> 문서 요약 정보
+        self._themes = {}            # theme -> {"count", "refs", "doc_ids": set}
+        self._version = 0
+        self._built_at = None
+        self._rebuilding = False
+        self._view = None            # (version, etag, payload)
+        # 프로세스가 재시작되면 버전이 다시 0부터 시작하므로 ETag에 인스턴스 고유값을 섞습니다.
+        self._instance_id = uuid.uuid4().hex
+
+    # ---- 적재 ----
+
+    def build(self):
+        """Neo4j의 Document 노드 전체로 스냅샷을 다시 만듭니다."""
+        from app.services.rag_service import get_neo4j_driver
+
+        driver = get_neo4j_driver()
+        if not driver:
+            raise RuntimeError("Neo4j 드라이버를 가져올 수 없습니다.")
+
+        query = """
+        MATCH (d:Document)
+        RETURN d.id AS id,
+               d.title AS title,
+               d.created_at AS created_at,
+               d.theme AS theme,
+               size(coalesce(d.reference_urls, [])) AS refs,
+               COUNT { (:Chunk)-[:BELONGS_TO]->(d) } AS chunk_count
+        """
+        with driver.session() as session:
+            records = list(session.run(query))
+
+        previous = self._docs
+        docs = {}
+        for record in records:
+            doc_id = record["id"]
+            if not doc_id:
+                continue
+            old = previous.get(doc_id, {})
+            docs[doc_id] = {
+                "id": doc_id,
+                "title": record["title"],
+                "created_at": _to_datetime(record["created_at"]),
+                "theme": record["theme"] or "",
+                "has_refs": (record["refs"] or 0) > 0,
+                "chunk_count": record["chunk_count"] or 0,
+                # 미리보기는 비용이 크므로 이전 스냅샷 값을 재사용하고, 없으면 화면에 노출될 때 채웁니다.
+                "preview": old.get("preview"),
+                "link": old.get("link"),
+            }
+
+        with self._lock:
+            self._docs = {}
+            self._themes = {}
+            for doc in docs.values():
+                self._add(doc)
+            self._version += 1
+            self._built_at = time.monotonic()
+        logging.info(f"대시보드 스냅샷 적재 완료: 문서 {len(docs)}개")
+
+    def _ensure_fresh(self):
+        if self._built_at is None:
+            with self._lock:
+                if self._built_at is None:
+                    self.build()
+            return
+        if self.refresh_seconds and time.monotonic() - self._built_at > self.refresh_seconds and not self._rebuilding:
+            # 다른 프로세스에서 일어난 변경을 반영하기 위해 백그라운드에서 재적재 (기존 스냅샷은 계속 제공)
+            self._rebuilding = True
+            threading.Thread(target=self._background_rebuild, daemon=True).start()
+
+    def _background_rebuild(self):
+        try:
+            self.build()
+        except Exception as e:
+            logging.error(f"대시보드 스냅샷 재적재 실패: {e}")
+        finally:
+            self._rebuilding = False
+
+    # ---- 증분 갱신 ----
+
+    def _add(self, doc: dict):
+        self._docs[doc["id"]] = doc
+        if doc["theme"]:
+            theme = self._themes.setdefault(doc["theme"], {"count": 0, "refs": 0, "doc_ids": set()})
+            theme["count"] += 1
+            theme["refs"] += 1 if doc["has_refs"] else 0
+            theme["doc_ids"].add(doc["id"])
+
+    def _remove(self, doc_id: str):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return None
+        if doc["theme"] and doc["theme"] in self._themes:
+            theme = self._themes[doc["theme"]]
+            theme["count"] -= 1
+            theme["refs"] -= 1 if doc["has_refs"] else 0
+            theme["doc_ids"].discard(doc_id)
+            if theme["count"] <= 0:
+                del self._themes[doc["theme"]]
+        return doc
+
+    def upsert_document(
+        self,
+        document_id: str,
+        title: str,
+        created_at,
+        theme: str,
+        reference_urls=None,
+        chunk_count: int = 0,
+        content: str | None = None,
+        link: str | None = None,
+    ):
+        """
+        수집 완료(또는 재테마) 이벤트: 문서 하나를 스냅샷에 반영합니다.
+        이전 테마(없으면 None)를 반환합니다.
+        """
+        with self._lock:
+            if self._built_at is None:
+                # 아직 적재 전이면 첫 요청 때 전체를 읽으므로 여기서는 할 일이 없습니다.
+                return None
+            old = self._remove(document_id) or {}
+            self._add({
+                "id": document_id,
+                "title": title,
+                "created_at": _to_datetime(created_at),
+                "theme": theme or "",
+                "has_refs": bool(reference_urls),
+                "chunk_count": chunk_count,
+                "preview": make_preview(content) if content is not None else old.get("preview"),
+                "link": link if link is not None else old.get("link"),
+            })
+            self._version += 1
+            return old.get("theme") or None
+
+    def remove_document(self, document_id: str):
+        """문서 삭제(또는 재청킹 시작) 이벤트. 삭제된 문서의 테마(없으면 None)를 반환합니다."""
+        with self._lock:
+            doc = self._remove(document_id)
+            if doc is None:
+                return None
+            self._version += 1
+            return doc["theme"] or None
+
+    def theme_document_ids(self, theme: str):
+        """(스냅샷 버전, 테마에 속한 문서 ID 정렬 목록)을 반환합니다."""
+        self._ensure_fresh()
+        with self._lock:
+            info = self._themes.get(theme)
+            return self._version, sorted(info["doc_ids"]) if info else []
+
+    # ---- 응답 ----
+
+    def get_view(self):
+        """(etag, payload)를 반환합니다. 변경이 없으면 캐시된 응답을 그대로 돌려줍니다."""
+        self._ensure_fresh()
+        with self._lock:
+            if self._view is not None and self._view[0] == self._version:
+                return self._view[1], self._view[2]
+            version = self._version
+            payload, missing_previews = self._compose()
+
+        if missing_previews:
+            self._fill_previews(missing_previews)
+            with self._lock:
+                if self._version != version:
+                    return self.get_view()
+                payload, _ = self._compose()
+
+        etag = '"' + hashlib.sha1(f"{self._instance_id}:{version}".encode()).hexdigest()[:16] + '"'
+        with self._lock:
+            self._view = (version, etag, payload)
+        return etag, payload
+
+    def _compose(self):
+        """현재 상태로 /dashboard 응답(timeline 제외)을 구성합니다. 미리보기가 비어 있는 문서 ID 목록도 함께 반환합니다."""
+        missing = []
+
+        themes = heapq.nlargest(TOP_THEMES, self._themes.items(), key=lambda item: item[1]["count"])
+        tasks = []
+        for i, (theme, info) in enumerate(themes):
+            docs = [self._docs[doc_id] for doc_id in info["doc_ids"] if doc_id in self._docs]
+            recent = heapq.nlargest(SOURCES_PER_THEME, docs, key=self._recency_key)
+            sources = []
+            for doc in recent:
+                if doc.get("preview") is None:
+                    missing.append(doc["id"])
+                sources.append({
+                    "type": "meeting",
+                    "title": doc["title"],
+                    "content": doc.get("preview") or f"Document ID: {doc['id'][:8]}...",
+                    "link": doc.get("link"),
+                })
+            tasks.append({
+                "id": f"task-{i+1}",
+                "theme": theme,
+                "summaries": info["count"],
+                "refs": info["refs"],
+                "detailedSummary": None,  # Frontend will handle loading state
+                "sources": sources,
+            })
+
+        # If no tasks found with themes, show individual documents
+        if not tasks:
+            recent = heapq.nlargest(FALLBACK_DOCUMENTS, self._docs.values(), key=self._recency_key)
+            for i, doc in enumerate(recent):
+                tasks.append({
+                    "id": f"task-{i+1}",
+                    "theme": doc["title"],
+                    "summaries": 1,
+                    "refs": 0,
+                    "detailedSummary": f"문서 '{doc['title']}'에는 {doc['chunk_count']}개의 청크가 포함되어 있습니다.",
+                    "sources": [{
+                        "type": "meeting",
+                        "title": doc["title"],
+                        "content": f"Document ID: {doc['id'][:8]}..."
+                    }]
+                })
+
+        return {"tasks": tasks}, missing
+
+    @staticmethod
+    def _recency_key(doc: dict):
+        created_at = doc.get("created_at")
+        return created_at.timestamp() if created_at else float("-inf")
+
+    def _fill_previews(self, doc_ids: list):
+        """화면에 노출될 문서의 미리보기/링크를 Supabase에서 한 번에 가져옵니다."""
+        from app.services.supabase_service import get_supabase_client
+        supabase_client = get_supabase_client()
+
+        try:
+            response = supabase_client.from_("documents").select("id, content, link").in_("id", doc_ids).execute()
+        except Exception as e:
+            logging.error(f"대시보드 미리보기 조회 실패: {e}")
+            response = None
+
+        rows = {row["id"]: row for row in (response.data if response else None) or []}
+        with self._lock:
+            for doc_id in doc_ids:
+                doc = self._docs.get(doc_id)
+                if doc is None:
+                    continue
+                row = rows.get(doc_id)
+                if row:
+                    doc["preview"] = make_preview(row.get("content"))
+                    doc["link"] = row.get("link")
+                else:
+                    doc["preview"] = f"Document ID: {doc_id[:8]}..."
+
+
+@lru_cache(maxsize=None)
+def get_dashboard_snapshot() -> DashboardSnapshot:
+    return DashboardSnapshot(settings.DASHBOARD_SNAPSHOT_REFRESH_SECONDS)
@@ -0,0 +1,391 @@
+"""
+엔티티 정규화(Entity resolution).
+
+KnowledgeGraphIndex 추출은 "홍길동", "홍길동 님", "길동"처럼 같은 대상을 다른 Entity 노드로 만듭니다.
+이 모듈은 이름을 정규화 키(name_key)로 바꾸고, 문자 bigram으로 후보를 묶은 뒤,
+같은 대상으로 판단된 노드를 대표 노드 하나로 합칩니다. 관계는 대표 노드로 옮겨 보존하고,
+합쳐진 이름은 대표 노드의 aliases에 남깁니다.
+
+- 증분: 수집이 끝날 때 resolve_document_entities(session, document_id)
+- 전체 백필: resolve_all_entities(driver) 또는 `cd backend && python -m app.services.entity_resolution`
+
+APOC 없이 동작하도록 관계 타입별 Cypher로 관계를 옮깁니다.
+"""
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+
+# 한 트랜잭션에서 합칠 중복 노드 수
+MERGE_BATCH_SIZE = 200
+
+# 긴 것부터 검사해야 "선생님"이 "님"보다 먼저 제거됩니다.
+HONORIFICS = sorted(
+    ["님", "씨", "군", "양", "선생님", "선생", "교수님", "교수", "박사님", "박사", "대표님", "대표이사",
+     "사장님", "회장님", "이사님", "부장님", "차장님", "과장님", "대리님", "팀장님", "실장님", "본부장님",
+     "매니저님", "책임님", "선임님", "수석님", "담당자님"],
+    key=len,
+    reverse=True,
+)
+PARTICLES = sorted(
+    ["은", "는", "이", "가", "을", "를", "의", "에", "에게", "께", "께서", "한테", "와", "과", "도", "만",
+     "로", "으로", "에서", "부터", "까지", "이랑", "랑", "하고", "이나", "나"],
+    key=len,
+    reverse=True,
+)
+
+# 조사를 떼고 남아야 하는 최소 글자 수. 2글자 이하가 남으면 이름의 일부일 가능성이 높아 떼지 않습니다. ("이영도" -> "이영" 방지)
+MIN_STEM_CHARS = 3
+# 호칭을 떼고 성만 남으면 다른 사람과 키가 겹치므로 떼지 않습니다. ("김 팀장님" -> "김" 방지)
+COMPOUND_SURNAMES = {"남궁", "황보", "제갈", "선우", "독고", "사공", "서문", "동방", "어금", "망절"}
+# bigram 유사도로 합칠 때의 최소 Jaccard와 최소 길이. 짧은 이름은 한 글자 차이도 다른 대상인 경우가 많습니다.
+FUZZY_THRESHOLD = 0.85
+FUZZY_MIN_CHARS = 6
+
+_HANGUL = re.compile(r"^[가-힣]+$")
+_EDGE_PUNCT = re.compile(r"^[\s\"'`“”‘’()\[\]{}<>«»「」『』.,;:!?·~\-]+|[\s\"'`“”‘’()\[\]{}<>«»「」『』.,;:!?·~\-]+$")
+
+
+def _is_bare_surname(text: str) -> bool:
+    """한글 한 글자(성) 또는 두 글자 복성만 남았는지"""
+    key = text.replace(" ", "")
+    return (len(key) == 1 and bool(_HANGUL.match(key))) or key in COMPOUND_SURNAMES
+
+
+def _strip_honorific(text: str) -> str:
+    for suffix in HONORIFICS:
+        if text.endswith(suffix):
+            stem = text[: -len(suffix)].rstrip()
+            if stem and not _is_bare_surname(stem):
+                return stem
+    return text
+
+
+def _strip_particle(text: str) -> str:
+    # 조사는 한글로 끝나는 경우에만 뗍니다.
+    if not _HANGUL.match(text.rsplit(" ", 1)[-1]):
+        return text
+    for suffix in PARTICLES:
+        if text.endswith(suffix):
+            stem = text[: -len(suffix)].rstrip()
+            if len(stem.replace(" ", "")) >= MIN_STEM_CHARS:
+                return stem
+    return text
+
+
+def normalize_name(name: str) -> str:
+    """
+    비교용 정규화 키.
+    NFKC 정규화, 소문자화, 앞뒤 구두점 제거, 호칭("님", "팀장님" 등)과 조사 제거 후 공백을 없앱니다.
+    호칭과 조사는 더 바뀌지 않을 때까지 번갈아 뗍니다. ("홍길동님은" -> "홍길동")
+    """
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKC", str(name)).casefold()
+    text = re.sub(r"\s+", " ", text)
+    text = _EDGE_PUNCT.sub("", text)
+
+    while True:
+        stripped = _strip_particle(_strip_honorific(text))
+        if stripped == text:
+            break
+        text = stripped
+
+    return text.replace(" ", "")
+
+
+def char_ngrams(key: str, n: int = 2) -> set:
+    if len(key) <= n:
+        return {key} if key else set()
+    return {key[i:i + n] for i in range(len(key) - n + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _is_given_name(short: str, full: str) -> bool:
+    """"길동"이 "홍길동"의 이름 부분인지 (한글 2글자 + 성 1글자)"""
+    return (
+        len(short) == 2
+        and len(full) == 3
+        and full.endswith(short)
+        and bool(_HANGUL.match(full))
+    )
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+def find_duplicate_groups(entities: list, focus: set | None = None) -> list:
+    """
+    entities: [{"id": elementId, "name": str, "key": 정규화 키, "degree": int}, ...]
+    focus: 주어지면 이 elementId를 하나 이상 포함한 그룹만 반환합니다. (증분 처리용)
+
+    반환: [(대표 엔티티, [중복 엔티티, ...]), ...]
+
+    같은 대상으로 보는 규칙
+    1. 정규화 키가 같음 ("홍길동", "홍길동 님", "홍길동은")
+    2. 한글 2글자 키가 정확히 하나의 한글 3글자 키의 이름 부분 ("길동" -> "홍길동")
+       같은 이름을 가진 사람이 둘 이상이면 모호하므로 합치지 않습니다.
+    3. 충분히 긴 키끼리 bigram Jaccard가 FUZZY_THRESHOLD 이상
+    """
+    by_id = {e["id"]: e for e in entities if e.get("key")}
+    uf = _UnionFind()
+
+    # 1. 같은 키
+    by_key = defaultdict(list)
+    for e in by_id.values():
+        by_key[e["key"]].append(e["id"])
+    for ids in by_key.values():
+        for other in ids[1:]:
+            uf.union(ids[0], other)
+
+    # 2, 3. bigram 블로킹: 같은 bigram을 공유하는 키끼리만 비교합니다.
+    grams = {key: char_ngrams(key) for key in by_key}
+    blocks = defaultdict(set)
+    for key, key_grams in grams.items():
+        for gram in key_grams:
+            blocks[gram].add(key)
+
+    given_name_matches = defaultdict(set)
+    compared = set()
+    for block in blocks.values():
+        if len(block) < 2:
+            continue
+        ordered = sorted(block)
+        for i, a in enumerate(ordered):
+            for b in ordered[i + 1:]:
+                if (a, b) in compared:
+                    continue
+                compared.add((a, b))
+                if _is_given_name(a, b):
+                    given_name_matches[a].add(b)
+                elif _is_given_name(b, a):
+                    given_name_matches[b].add(a)
+                elif (
+                    min(len(a), len(b)) >= FUZZY_MIN_CHARS
+                    and _jaccard(grams[a], grams[b]) >= FUZZY_THRESHOLD
+                ):
+                    uf.union(by_key[a][0], by_key[b][0])
+
+    for short, fulls in given_name_matches.items():
+        if len(fulls) == 1:
+            uf.union(by_key[next(iter(fulls))][0], by_key[short][0])
+
+    groups = defaultdict(list)
+    for entity_id in by_id:
+        groups[uf.find(entity_id)].append(by_id[entity_id])
+
+    result = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        if focus is not None and not any(m["id"] in focus for m in members):
+            continue
+        canonical = max(members, key=_canonical_rank)
+        result.append((canonical, [m for m in members if m["id"] != canonical["id"]]))
+    return result
+
+
+def _canonical_rank(entity: dict):
+    """
+    대표 노드 선택 기준: 호칭/조사 없이 깨끗한 이름 > 긴 키(성까지 있는 이름) > 높은 degree > 짧은 원문
+    """
+    name = unicodedata.normalize("NFKC", entity["name"] or "").casefold().replace(" ", "")
+    return (
+        name == entity["key"],
+        len(entity["key"]),
+        entity.get("degree") or 0,
+        -len(entity["name"] or ""),
+        entity["id"],
+    )
+
+
+# ---- Neo4j ----
+
+def _quote(rel_type: str) -> str:
+    return "`" + rel_type.replace("`", "``") + "`"
+
+
+def _load_entities(session, where: str = "", **params) -> list:
+    result = session.run(f"""
+        MATCH (e:Entity)
+        {where}
+        RETURN elementId(e) AS id, coalesce(e.name, e.id) AS name, e.name_key AS key, e.degree AS degree
+    """, **params)
+    return [dict(record) for record in result]
+
+
+def _ensure_keys(session, entities: list):
+    """정규화 키를 계산하고, 저장된 값과 다르면 name_key 속성을 갱신합니다."""
+    updates = []
+    for entity in entities:
+        key = normalize_name(entity["name"])
+        if entity.get("key") != key:
+            updates.append({"id": entity["id"], "key": key})
+        entity["key"] = key
+    for i in range(0, len(updates), 5000):
+        session.run("""
+            UNWIND $rows AS row
+            MATCH (e:Entity) WHERE elementId(e) = row.id
+            SET e.name_key = row.key
+        """, rows=updates[i:i + 5000])
+
+
+def _merge_batch(tx, pairs: list):
+    """pairs: [{"dup": elementId, "canonical": elementId}, ...] 를 한 트랜잭션에서 합칩니다."""
+    types = tx.run("""
+        UNWIND $pairs AS p
+        MATCH (d:Entity) WHERE elementId(d) = p.dup
+        MATCH (d)-[r]-()
+        RETURN collect(DISTINCT type(r)) AS types
+    """, pairs=pairs).single()["types"]
+
+    for rel_type in types:
+        # 중복 노드의 관계를 대표 노드로 옮깁니다. 대표 노드와 중복 노드 사이의 관계는 자기 루프가 되므로 버립니다.
+        tx.run(f"""
+            UNWIND $pairs AS p
+            MATCH (d:Entity) WHERE elementId(d) = p.dup
+            MATCH (c:Entity) WHERE elementId(c) = p.canonical
+            MATCH (d)-[r:{_quote(rel_type)}]->(x)
+            WITH c, r, x, properties(r) AS props
+            DELETE r
+            WITH c, x, props
+            WHERE x <> c AND NOT elementId(x) IN [q IN $pairs WHERE q.canonical = elementId(c) | q.dup]
+            MERGE (c)-[nr:{_quote(rel_type)}]->(x)
+            SET nr += props
+        """, pairs=pairs)
+        tx.run(f"""
+            UNWIND $pairs AS p
+            MATCH (d:Entity) WHERE elementId(d) = p.dup
+            MATCH (c:Entity) WHERE elementId(c) = p.canonical
+            MATCH (x)-[r:{_quote(rel_type)}]->(d)
+            WITH c, r, x, properties(r) AS props
+            DELETE r
+            WITH c, x, props
+            WHERE x <> c AND NOT elementId(x) IN [q IN $pairs WHERE q.canonical = elementId(c) | q.dup]
+            MERGE (x)-[nr:{_quote(rel_type)}]->(c)
+            SET nr += props
+        """, pairs=pairs)
+
+    result = tx.run("""
+        UNWIND $pairs AS p
+        MATCH (d:Entity) WHERE elementId(d) = p.dup
+        MATCH (c:Entity) WHERE elementId(c) = p.canonical
+        WITH c, collect(d) AS dups
+        SET c.aliases = reduce(
+                acc = coalesce(c.aliases, []),
+                name IN [d IN dups | coalesce(d.name, d.id)] + reduce(names = [], d IN dups | names + coalesce(d.aliases, []))
+                | CASE WHEN name IN acc OR name = coalesce(c.name, c.id) THEN acc ELSE acc + name END
+            ),
+            // 소유 문서는 합집합: 어느 한 문서를 지워도 다른 문서에서 온 관계는 남습니다. (delete_document_entities)
+            c.document_ids = reduce(
+                acc = c.document_ids,
+                id IN reduce(ids = [], d IN dups | ids + coalesce(d.document_ids, []))
+                | CASE WHEN id IN coalesce(acc, []) THEN acc ELSE coalesce(acc, []) + id END
+            )
+        WITH c, dups
+        UNWIND dups AS d
+        DETACH DELETE d
+        WITH DISTINCT c
+        RETURN elementId(c) AS id
+    """, pairs=pairs)
+    canonical_ids = [record["id"] for record in result]
+
+    # 대표 노드와 이웃의 degree 재계산 (graph_export의 정렬 기준)
+    tx.run("""
+        UNWIND $ids AS id
+        MATCH (c:Entity) WHERE elementId(c) = id
+        OPTIONAL MATCH (c)--(n:Entity)
+        WITH collect(DISTINCT c) + collect(DISTINCT n) AS nodes
+        UNWIND nodes AS x
+        WITH DISTINCT x
+        SET x.degree = COUNT { (x)--(:Entity) }
+    """, ids=canonical_ids)
+
+
+def merge_groups(session, groups: list) -> int:
+    """find_duplicate_groups 결과를 MERGE_BATCH_SIZE 단위 트랜잭션으로 합칩니다. 반환: 삭제된 중복 노드 수"""
+    pairs = [
+        {"dup": dup["id"], "canonical": canonical["id"]}
+        for canonical, dups in groups
+        for dup in dups
+    ]
+    for i in range(0, len(pairs), MERGE_BATCH_SIZE):
+        batch = pairs[i:i + MERGE_BATCH_SIZE]
+        # 한 그룹이 배치 경계에서 나뉘어도 각 배치는 독립적으로 올바르게 합쳐집니다.
+        session.execute_write(_merge_batch, batch)
+    for canonical, dups in groups:
+        logging.info(f"엔티티 병합: {[d['name'] for d in dups]} -> '{canonical['name']}'")
+    return len(pairs)
+
+
+def resolve_document_entities(session, document_id: str) -> int:
+    """
+    증분 처리: 이 문서의 엔티티를 기존 그래프의 같은 대상과 합칩니다.
+    후보는 name_key 인덱스로 같은 키, 이름 부분("길동" <-> "홍길동") 관계에 있는 키만 가져옵니다.
+    """
+    new_entities = _load_entities(session, "WHERE $document_id IN e.document_ids", document_id=document_id)
+    if not new_entities:
+        return 0
+    _ensure_keys(session, new_entities)
+
+    keys = {e["key"] for e in new_entities if e["key"]}
+    # "홍길동"이 새로 생겼으면 기존 "길동"을, "길동"이 새로 생겼으면 기존 "?길동"을 찾습니다.
+    short_keys = {key[1:] for key in keys if len(key) == 3 and _HANGUL.match(key)}
+    given_names = [key for key in keys if len(key) == 2 and _HANGUL.match(key)]
+
+    candidates = _load_entities(
+        session,
+        """
+        WHERE (e.document_ids IS NULL OR NOT $document_id IN e.document_ids)
+          AND (e.name_key IN $keys
+               OR any(g IN $given_names WHERE e.name_key ENDS WITH g AND size(e.name_key) = 3))
+        """,
+        document_id=document_id,
+        keys=list(keys | short_keys),
+        given_names=given_names,
+    )
+    _ensure_keys(session, candidates)
+
+    groups = find_duplicate_groups(new_entities + candidates, focus={e["id"] for e in new_entities})
+    if not groups:
+        return 0
+    merged = merge_groups(session, groups)
+    logging.info(f"문서 {document_id}: 중복 엔티티 {merged}개 병합")
+    return merged
+
+
+def resolve_all_entities(driver) -> dict:
+    """전체 백필: 모든 엔티티의 키를 계산하고 중복을 합칩니다."""
+    with driver.session() as session:
+        entities = _load_entities(session)
+        _ensure_keys(session, entities)
+        groups = find_duplicate_groups(entities)
+        merged = merge_groups(session, groups) if groups else 0
+    logging.info(f"엔티티 정규화 완료: {len(entities)}개 중 {merged}개 병합 ({len(groups)}개 그룹)")
+    return {"entities": len(entities), "groups": len(groups), "merged": merged}
+
+
+if __name__ == "__main__":
+    from app.services.rag_service import get_neo4j_driver
+
+    logging.basicConfig(level=logging.INFO)
+    print(resolve_all_entities(get_neo4j_driver()))
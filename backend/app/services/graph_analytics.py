@@ -0,0 +1,418 @@
+"""
+Entity 그래프 분석 작업 (연결 요소, Louvain 커뮤니티, degree/PageRank).
+
+Neo4j에서 Entity 그래프를 한 번 읽어 SciPy 희소 행렬로 계산한 뒤 결과를 다시 저장합니다.
+- Entity 속성: component, community, pagerank, degree
+- (:Community {id, size, label, top_entities, pagerank, component}) 슈퍼 노드와
+  커뮤니티 사이의 (:Community)-[:COMMUNITY_LINK {weight}]->(:Community) 관계
+
+전체 그래프 화면은 커뮤니티 슈퍼 노드를 먼저 보여주고, 선택한 커뮤니티만 엔티티 단위로 펼칩니다.
+수동 실행: python -m app.services.graph_analytics
+
+SciPy는 분석을 실제로 돌릴 때 _numeric()으로 처음 불러옵니다. (그래프 라우터가 이 모듈을 import해도 API 기동 시 로드되지 않음)
+NumPy는 neo4j 드라이버가 이미 불러오므로 기동 비용과 무관하지만, 같은 로더로 가져옵니다.
+"""
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
+
+# Neo4j에 결과를 쓰는 배치 크기
+WRITE_BATCH_SIZE = 5000
+# 커뮤니티 라벨/미리보기에 쓰는 상위 엔티티 수
+TOP_ENTITIES_PER_COMMUNITY = 5
+
+
+# ---- 계산 (순수 NumPy/SciPy) ----
+
+def _numeric() -> tuple:
+    """(numpy, scipy.sparse). csgraph까지 불러오므로 sparse.csgraph를 바로 쓸 수 있습니다."""
+    import numpy
+    import scipy.sparse.csgraph
+
+    return numpy, scipy.sparse
+
+
+def build_adjacency(n: int, sources: "np.ndarray", targets: "np.ndarray") -> "sparse.csr_matrix":
+    """방향 간선 목록으로 무방향 가중 인접 행렬(A = D + Dᵀ, 자기 루프 제외)을 만듭니다."""
+    np, sparse = _numeric()
+
+    mask = sources != targets
+    directed = sparse.coo_matrix(
+        (np.ones(int(mask.sum())), (sources[mask], targets[mask])), shape=(n, n)
+    ).tocsr()
+    return (directed + directed.T).tocsr()
+
+
+def pagerank(n: int, sources: "np.ndarray", targets: "np.ndarray", damping: float = 0.85, tol: float = 1e-9, max_iter: int = 100) -> "np.ndarray":
+    """방향 간선 기준 PageRank (멱법, dangling 노드는 균등 분배)"""
+    np, sparse = _numeric()
+
+    if n == 0:
+        return np.zeros(0)
+    directed = sparse.coo_matrix((np.ones(len(sources)), (sources, targets)), shape=(n, n)).tocsr()
+    out_degree = np.asarray(directed.sum(axis=1)).ravel()
+    inverse = np.divide(1.0, out_degree, out=np.zeros_like(out_degree), where=out_degree > 0)
+    transition_t = (sparse.diags(inverse) @ directed).T.tocsr()
+    dangling = out_degree == 0
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        updated = damping * (transition_t @ rank) + (damping * rank[dangling].sum() + 1.0 - damping) / n
+        converged = np.abs(updated - rank).sum() < tol * n
+        rank = updated
+        if converged:
+            break
+    return rank
+
+
+def _louvain_one_level(adjacency: "sparse.csr_matrix", resolution: float, rng: "np.random.Generator", threshold: float = 1e-7, max_passes: int = 20):
+    """
+    Louvain 1단계: 모듈성이 늘어나는 한 노드를 이웃 커뮤니티로 옮깁니다. (labels, 개선 여부)
+    한 바퀴의 모듈성 증가량이 threshold 미만이거나 max_passes 바퀴를 돌면 멈춥니다.
+
+    노드 대부분은 이웃이 몇 개뿐이라 NumPy 호출 오버헤드가 더 크므로, 안쪽 루프는 파이썬 리스트로 돕니다.
+    """
+    np, _ = _numeric()
+
+    n = adjacency.shape[0]
+    k_array = np.asarray(adjacency.sum(axis=1)).ravel()
+    m2 = float(k_array.sum())
+    if m2 == 0:
+        return np.arange(n), False
+
+    indptr = adjacency.indptr.tolist()
+    indices = adjacency.indices.tolist()
+    data = adjacency.data.tolist()
+    k = k_array.tolist()
+    labels = list(range(n))
+    tot = list(k)
+    scale = resolution / m2
+    improved = False
+
+    for _ in range(max_passes):
+        pass_gain = 0.0
+        for i in rng.permutation(n).tolist():
+            start, end = indptr[i], indptr[i + 1]
+            if start == end:
+                continue
+            k_in = {}
+            for j, w in zip(indices[start:end], data[start:end]):
+                if j != i:
+                    c = labels[j]
+                    k_in[c] = k_in.get(c, 0.0) + w
+            if not k_in:
+                continue
+
+            current = labels[i]
+            k_i = k[i]
+            tot[current] -= k_i
+            stay_gain = k_in.get(current, 0.0) - scale * tot[current] * k_i
+            target, best_gain = current, stay_gain
+            for c, weight in k_in.items():
+                gain = weight - scale * tot[c] * k_i
+                if gain > best_gain + 1e-12:
+                    target, best_gain = c, gain
+
+            tot[target] += k_i
+            if target != current:
+                labels[i] = target
+                pass_gain += best_gain - stay_gain
+                improved = True
+        # 노드 이동의 모듈성 증가량은 (gain 차이) * 2 / 2m
+        if 2.0 * pass_gain / m2 < threshold:
+            break
+
+    _, labels = np.unique(np.asarray(labels), return_inverse=True)
+    return labels, improved
+
+
+def louvain(adjacency: "sparse.csr_matrix", resolution: float = 1.0, max_levels: int = 10, seed: int = 42) -> "np.ndarray":
+    """
+    Louvain 커뮤니티 탐지. 커뮤니티 번호는 크기 내림차순(0이 가장 큼)으로 매깁니다.
+    """
+    np, sparse = _numeric()
+
+    n = adjacency.shape[0]
+    rng = np.random.default_rng(seed)
+    labels = np.arange(n)
+    graph = adjacency.tocsr()
+    for _ in range(max_levels):
+        level_labels, improved = _louvain_one_level(graph, resolution, rng)
+        if not improved:
+            break
+        labels = level_labels[labels]
+        membership = sparse.csr_matrix(
+            (np.ones(graph.shape[0]), (np.arange(graph.shape[0]), level_labels)),
+            shape=(graph.shape[0], int(level_labels.max()) + 1),
+        )
+        graph = (membership.T @ graph @ membership).tocsr()
+
+    if n == 0:
+        return labels
+    sizes = np.bincount(labels)
+    order = np.argsort(-sizes, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    return rank[labels]
+
+
+def modularity(adjacency: "sparse.csr_matrix", labels: "np.ndarray", resolution: float = 1.0) -> float:
+    np, _ = _numeric()
+
+    k = np.asarray(adjacency.sum(axis=1)).ravel()
+    m2 = k.sum()
+    if m2 == 0:
+        return 0.0
+    coo = adjacency.tocoo()
+    internal = coo.data[labels[coo.row] == labels[coo.col]].sum()
+    community_degree = np.bincount(labels, weights=k)
+    return float(internal / m2 - resolution * np.sum((community_degree / m2) ** 2))
+
+
+# ---- Neo4j 입출력 ----
+
+def load_entity_graph(session):
+    """(elementId 목록, 이름 목록, 간선 source 인덱스, 간선 target 인덱스)"""
+    np, _ = _numeric()
+
+    ids, names, index = [], [], {}
+    for record in session.run("MATCH (e:Entity) RETURN elementId(e) AS id, coalesce(e.name, e.id) AS name"):
+        index[record["id"]] = len(ids)
+        ids.append(record["id"])
+        names.append(record["name"])
+
+    sources, targets = [], []
+    for record in session.run("""
+        MATCH (a:Entity)-[]->(b:Entity)
+        RETURN elementId(a) AS source, elementId(b) AS target
+    """):
+        source = index.get(record["source"])
+        target = index.get(record["target"])
+        if source is not None and target is not None:
+            sources.append(source)
+            targets.append(target)
+
+    return ids, names, np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+
+
+def _write_entities(session, rows: list):
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        session.run("""
+            UNWIND $rows AS row
+            MATCH (e:Entity) WHERE elementId(e) = row.id
+            SET e.component = row.component,
+                e.community = row.community,
+                e.pagerank = row.pagerank,
+                e.degree = row.degree
+        """, rows=rows[start:start + WRITE_BATCH_SIZE])
+
+
+def _write_communities(session, communities: list, links: list):
+    session.run("MATCH (c:Community) DETACH DELETE c")
+    for start in range(0, len(communities), WRITE_BATCH_SIZE):
+        session.run("""
+            UNWIND $rows AS row
+            CREATE (c:Community)
+            SET c = row
+        """, rows=communities[start:start + WRITE_BATCH_SIZE])
+    for start in range(0, len(links), WRITE_BATCH_SIZE):
+        session.run("""
+            UNWIND $rows AS row
+            MATCH (a:Community {id: row.source})
+            MATCH (b:Community {id: row.target})
+            CREATE (a)-[:COMMUNITY_LINK {weight: row.weight}]->(b)
+        """, rows=links[start:start + WRITE_BATCH_SIZE])
+
+
+def run_graph_analytics(driver, resolution: float = 1.0) -> dict:
+    """Entity 그래프 전체를 분석하고 결과를 Neo4j에 저장합니다. 요약 통계를 반환합니다."""
+    np, sparse = _numeric()
+
+    started = time.monotonic()
+    with driver.session() as session:
+        ids, names, sources, targets = load_entity_graph(session)
+    n = len(ids)
+    loaded = time.monotonic()
+
+    adjacency = build_adjacency(n, sources, targets)
+    component_count, components = sparse.csgraph.connected_components(adjacency, directed=False)
+    communities = louvain(adjacency, resolution=resolution)
+    ranks = pagerank(n, sources, targets)
+    loops = sources[sources == targets]
+    degrees = np.bincount(sources, minlength=n) + np.bincount(targets, minlength=n) - np.bincount(loops, minlength=n)
+    computed = time.monotonic()
+
+    entity_rows = [
+        {
+            "id": ids[i],
+            "component": int(components[i]),
+            "community": int(communities[i]),
+            "pagerank": float(ranks[i]),
+            "degree": int(degrees[i]),
+        }
+        for i in range(n)
+    ]
+
+    community_rows, link_rows = [], []
+    if n:
+        community_count = int(communities.max()) + 1
+        sizes = np.bincount(communities, minlength=community_count)
+        pagerank_sums = np.bincount(communities, weights=ranks, minlength=community_count)
+        # 커뮤니티별 PageRank 상위 엔티티 (커뮤니티 번호, PageRank 내림차순 정렬)
+        order = np.lexsort((-ranks, communities))
+        boundaries = np.searchsorted(communities[order], np.arange(community_count))
+        computed_at = int(time.time() * 1000)
+        for c in range(community_count):
+            members = order[boundaries[c]:boundaries[c] + TOP_ENTITIES_PER_COMMUNITY]
+            top = [names[i] for i in members]
+            community_rows.append({
+                "id": c,
+                "size": int(sizes[c]),
+                "label": top[0] if top else f"community-{c}",
+                "top_entities": top,
+                "pagerank": float(pagerank_sums[c]),
+                "component": int(components[members[0]]) if len(members) else -1,
+                "computed_at": computed_at,
+            })
+
+        membership = sparse.csr_matrix((np.ones(n), (np.arange(n), communities)), shape=(n, community_count))
+        between = sparse.triu(membership.T @ adjacency @ membership, k=1).tocoo()
+        link_rows = [
+            {"source": int(a), "target": int(b), "weight": float(w)}
+            for a, b, w in zip(between.row, between.col, between.data)
+        ]
+
+    with driver.session() as session:
+        _write_entities(session, entity_rows)
+        _write_communities(session, community_rows, link_rows)
+    finished = time.monotonic()
+
+    summary = {
+        "entities": n,
+        "relationships": int(len(sources)),
+        "components": int(component_count),
+        "communities": len(community_rows),
+        "community_links": len(link_rows),
+        "modularity": round(modularity(adjacency, communities, resolution), 4) if n else 0.0,
+        "load_seconds": round(loaded - started, 3),
+        "compute_seconds": round(computed - loaded, 3),
+        "write_seconds": round(finished - computed, 3),
+    }
+    logging.info(f"그래프 분석 완료: {summary}")
+    return summary
+
+
+# ---- 백그라운드 실행 ----
+
+class GraphAnalyticsRunner:
+    """분석 작업을 백그라운드 스레드에서 한 번에 하나만 실행합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {"status": "idle", "started_at": None, "finished_at": None, "result": None, "error": None}
+
+    def start(self, resolution: float = 1.0) -> bool:
+        """작업을 시작합니다. 이미 실행 중이면 False"""
+        with self._lock:
+            if self._state["status"] == "running":
+                return False
+            self._state = {"status": "running", "started_at": time.time(), "finished_at": None, "result": None, "error": None}
+        threading.Thread(target=self._run, args=(resolution,), name="graph-analytics", daemon=True).start()
+        return True
+
+    def _run(self, resolution: float):
+        from app.services.rag_service import get_neo4j_driver
+
+        try:
+            driver = get_neo4j_driver()
+            if not driver:
+                raise RuntimeError("Neo4j 드라이버를 가져올 수 없습니다.")
+            result = run_graph_analytics(driver, resolution=resolution)
+            with self._lock:
+                self._state.update(status="completed", result=result)
+        except Exception as e:
+            logging.error(f"그래프 분석 실패: {e}", exc_info=True)
+            with self._lock:
+                self._state.update(status="failed", error=str(e))
+        finally:
+            with self._lock:
+                self._state["finished_at"] = time.time()
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._state)
+
+
+@lru_cache(maxsize=None)
+def get_graph_analytics_runner() -> GraphAnalyticsRunner:
+    return GraphAnalyticsRunner()
+
+
+# ---- 단계별 상세(level-of-detail) 조회 ----
+# 라우터용 읽기 쿼리는 neo4j.AsyncSession을 받습니다. (pools.get_async_neo4j_driver)
+
+async def community_overview(session, limit: int = 50, limit_links: int = 500) -> dict:
+    """크기 상위 커뮤니티 슈퍼 노드와 그 사이의 연결 (그래프 응답과 같은 entities/relationships 형태)"""
+    result = await session.run("""
+        MATCH (c:Community)
+        RETURN c.id AS id, c.label AS label, c.size AS size, c.top_entities AS top_entities,
+               c.pagerank AS pagerank, c.component AS component
+        ORDER BY c.size DESC, c.id ASC
+        LIMIT $limit
+    """, limit=limit)
+    entities = [
+        {
+            "id": f"community:{record['id']}",
+            "name": record["label"],
+            "type": "Community",
+            "properties": {
+                "community": record["id"],
+                "size": record["size"],
+                "top_entities": record["top_entities"],
+                "pagerank": record["pagerank"],
+                "component": record["component"],
+            },
+        }
+        async for record in result
+    ]
+    community_ids = [e["properties"]["community"] for e in entities]
+    links = await session.run("""
+        MATCH (a:Community)-[l:COMMUNITY_LINK]->(b:Community)
+        WHERE a.id IN $ids AND b.id IN $ids
+        RETURN a.id AS source, b.id AS target, l.weight AS weight
+        ORDER BY l.weight DESC
+        LIMIT $limit
+    """, ids=community_ids, limit=limit_links)
+    relationships = [
+        {
+            "source": f"community:{record['source']}",
+            "target": f"community:{record['target']}",
+            "type": "COMMUNITY_LINK",
+            "properties": {"weight": record["weight"]},
+        }
+        async for record in links
+    ]
+    return {"entities": entities, "relationships": relationships}
+
+
+async def community_member_ids(session, community_id: int, limit: int = 200) -> list:
+    """커뮤니티 안에서 PageRank 상위 엔티티의 elementId"""
+    result = await session.run("""
+        MATCH (e:Entity {community: $community})
+        RETURN elementId(e) AS id
+        ORDER BY coalesce(e.pagerank, 0) DESC, elementId(e) ASC
+        LIMIT $limit
+    """, community=community_id, limit=limit)
+    return [record["id"] async for record in result]
+
+
+if __name__ == "__main__":
+    from app.services.rag_service import get_neo4j_driver
+
+    print(run_graph_analytics(get_neo4j_driver()))
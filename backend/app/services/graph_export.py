@@ -0,0 +1,363 @@
+import base64
+import json
+import logging
+
+# 한 번에 반환할 수 있는 최대 개수 (요청 파라미터 상한)
+MAX_ENTITIES_PER_PAGE = 2000
+MAX_RELATIONSHIPS_PER_PAGE = 10000
+
+_ENTITY_FIELDS = """
+elementId(e) AS id,
+coalesce(e.name, e.id) AS name,
+coalesce(labels(e)[0], 'Entity') AS type,
+CASE WHEN $include_properties THEN properties(e) END AS properties,
+e.degree AS degree
+"""
+
+_DEGREE = "COUNT { (x)--(:Entity) }"
+
+
+def _entity(record) -> dict:
+    return {
+        "id": record["id"],
+        "name": record["name"],
+        "type": record["type"],
+        "properties": dict(record["properties"] or {}),
+    }
+
+
+def _relationship(record) -> dict:
+    return {
+        "source": record["source"],
+        "target": record["target"],
+        "type": record["type"],
+        "properties": dict(record["properties"] or {}),
+    }
+
+
+def encode_cursor(degree: int, element_id: str) -> str:
+    raw = json.dumps([degree, element_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(degree, elementId). 잘못된 커서면 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        degree, element_id = json.loads(raw)
+        return int(degree), str(element_id)
+    except Exception:
+        raise ValueError("잘못된 cursor 값입니다.")
+
+
+def _clamp(value: int, upper: int) -> int:
+    return max(0, min(int(value), upper))
+
+
+# ---- degree 유지 ----
+
+def refresh_entity_degrees(session, document_id: str) -> int:
+    """
+    문서의 엔티티와 그 이웃 엔티티의 degree(다른 Entity와의 관계 수)를 다시 계산합니다.
+    수집이 끝난 뒤 호출하며, 비용은 해당 문서 주변 엔티티 수에 비례합니다.
+    """
+    result = session.run(f"""
+        MATCH (e:Entity) WHERE $document_id IN e.document_ids
+        OPTIONAL MATCH (e)--(n:Entity)
+        WITH collect(DISTINCT e) + collect(DISTINCT n) AS nodes
+        UNWIND nodes AS x
+        WITH DISTINCT x
+        SET x.degree = {_DEGREE}
+        RETURN count(x) AS updated
+    """, document_id=document_id)
+    record = result.single()
+    return record["updated"] if record else 0
+
+
+def delete_document_entities(session, document_id: str) -> int:
+    """
+    엔티티의 소유 문서 목록(document_ids)에서 이 문서를 빼고, 더 이상 소유 문서가 없는 엔티티만 삭제합니다.
+    다른 문서와 병합된 엔티티와 그 관계는 남습니다. 삭제된 엔티티의 이웃은 degree를 다시 계산합니다.
+    """
+    orphan_ids = session.run("""
+        MATCH (e:Entity) WHERE $document_id IN e.document_ids
+        SET e.document_ids = [id IN e.document_ids WHERE id <> $document_id]
+        WITH e WHERE size(e.document_ids) = 0
+        RETURN collect(elementId(e)) AS ids
+    """, document_id=document_id).single()["ids"]
+    if not orphan_ids:
+        return 0
+
+    neighbor_ids = session.run("""
+        UNWIND $ids AS id
+        MATCH (e:Entity)--(n:Entity) WHERE elementId(e) = id AND NOT elementId(n) IN $ids
+        RETURN collect(DISTINCT elementId(n)) AS ids
+    """, ids=orphan_ids).single()["ids"]
+
+    deleted = session.run("""
+        UNWIND $ids AS id
+        MATCH (e:Entity) WHERE elementId(e) = id
+        DETACH DELETE e
+        RETURN count(*) AS deleted
+    """, ids=orphan_ids).single()["deleted"]
+
+    if neighbor_ids:
+        session.run(f"""
+            UNWIND $ids AS id
+            MATCH (x:Entity) WHERE elementId(x) = id
+            SET x.degree = {_DEGREE}
+        """, ids=neighbor_ids)
+    return deleted
+
+
+def rebuild_entity_degrees(session, batch_size: int = 10000) -> int:
+    """모든 엔티티의 degree를 다시 계산합니다. (기존 데이터 백필용)"""
+    total = 0
+    while True:
+        record = session.run(f"""
+            MATCH (x:Entity)
+            WHERE x.degree IS NULL
+            WITH x LIMIT $batch_size
+            SET x.degree = {_DEGREE}
+            RETURN count(x) AS updated
+        """, batch_size=batch_size).single()
+        updated = record["updated"] if record else 0
+        total += updated
+        if updated < batch_size:
+            break
+    logging.info(f"엔티티 degree 계산 완료: {total}개")
+    return total
+
+
+def reset_entity_degrees(session):
+    """모든 degree를 지웁니다. rebuild_entity_degrees와 함께 전체 재계산에 사용합니다."""
+    session.run("MATCH (x:Entity) WHERE x.degree IS NOT NULL REMOVE x.degree")
+
+
+# ---- 조회 ----
+# 라우터용 읽기 쿼리는 neo4j.AsyncSession을 받습니다. (pools.get_async_neo4j_driver)
+#
+# stream_* 함수는 Cypher 결과가 도착하는 대로 (kind, value) 항목을 내보내는 async generator입니다.
+# - ("entity", 엔티티 dict): 항상 관계보다 먼저
+# - ("relationship", 관계 dict)
+# - ("meta", dict): 결과를 다 읽은 뒤에야 알 수 있는 부가 정보 (next_cursor 등)
+# 스트림 응답(graph_wire)은 항목을 그대로 프레임으로 보내고, JSON 응답은 collect_graph()로 모읍니다.
+
+async def _count(session, query: str) -> int:
+    return (await (await session.run(query)).single())["c"]
+
+
+async def collect_graph(items) -> dict:
+    """stream_* 항목을 {"entities", "relationships", **meta}로 모읍니다."""
+    graph = {"entities": [], "relationships": []}
+    async for kind, value in items:
+        if kind == "entity":
+            graph["entities"].append(value)
+        elif kind == "relationship":
+            graph["relationships"].append(value)
+        else:
+            graph.update(value)
+    return graph
+
+
+async def _stream_entities(session, query: str, ids: list, **params):
+    """엔티티 쿼리 결과를 항목으로 내보내며, 받은 elementId를 ids에 모읍니다. (뒤이은 관계 쿼리용)"""
+    result = await session.run(query, **params)
+    async for record in result:
+        entity = _entity(record)
+        ids.append(entity["id"])
+        yield "entity", entity
+
+
+async def stream_relationships_among(session, element_ids: list, limit: int, include_properties: bool = True):
+    """주어진 엔티티 집합 내부의 관계만 한 번의 패턴 매칭으로 가져옵니다."""
+    if not element_ids or limit <= 0:
+        return
+    result = await session.run("""
+        UNWIND $ids AS id
+        MATCH (a:Entity) WHERE elementId(a) = id
+        MATCH (a)-[r]->(b:Entity)
+        WHERE elementId(b) IN $ids
+        RETURN elementId(a) AS source, elementId(b) AS target, type(r) AS type,
+               CASE WHEN $include_properties THEN properties(r) END AS properties
+        LIMIT $limit
+    """, ids=element_ids, limit=limit, include_properties=include_properties)
+    async for record in result:
+        yield "relationship", _relationship(record)
+
+
+async def relationships_among(session, element_ids: list, limit: int, include_properties: bool = True) -> list:
+    return [
+        relationship
+        async for _, relationship in stream_relationships_among(session, element_ids, limit, include_properties)
+    ]
+
+
+async def graph_stats(session) -> dict:
+    """
+    전체 엔티티/관계 수. 라벨·타입 단위 count는 Neo4j count store에서 바로 읽으므로 상수 시간입니다.
+    """
+    total_entities = await _count(session, "MATCH (e:Entity) RETURN count(e) AS c")
+    total_relationships = await _count(session, "MATCH ()-[r]->() RETURN count(r) AS c")
+    belongs_to = await _count(session, "MATCH ()-[r:BELONGS_TO]->() RETURN count(r) AS c")
+    # 그래프 분석 작업이 만든 커뮤니티 간 연결은 엔티티 관계가 아니므로 제외
+    community_links = await _count(session, "MATCH ()-[r:COMMUNITY_LINK]->() RETURN count(r) AS c")
+    return {
+        "total_entities_in_db": total_entities,
+        "total_relationships_in_db": total_relationships - belongs_to - community_links,
+    }
+
+
+async def stream_entities_graph(session, element_ids: list, limit_relationships: int = 1000, include_properties: bool = True):
+    """주어진 엔티티들(순서 유지)과 그 집합 내부의 관계"""
+    limit_relationships = _clamp(limit_relationships, MAX_RELATIONSHIPS_PER_PAGE)
+    ids = []
+    async for item in _stream_entities(session, f"""
+        UNWIND $ids AS id
+        MATCH (e:Entity) WHERE elementId(e) = id
+        RETURN {_ENTITY_FIELDS}
+    """, ids, ids=element_ids, include_properties=include_properties):
+        yield item
+    async for item in stream_relationships_among(session, ids, limit_relationships, include_properties=include_properties):
+        yield item
+
+
+async def entities_graph(session, element_ids: list, limit_relationships: int = 1000, include_properties: bool = True) -> dict:
+    return await collect_graph(stream_entities_graph(session, element_ids, limit_relationships, include_properties))
+
+
+async def stream_graph_page(
+    session,
+    limit_entities: int = 100,
+    limit_relationships: int = 200,
+    cursor: str | None = None,
+    include_properties: bool = True,
+):
+    """
+    degree 순으로 상위 엔티티를 limit_entities개씩 페이지 단위로 내보냅니다. 마지막 항목은 ("meta", {"next_cursor"})입니다.
+
+    각 페이지의 관계는 이번 페이지 엔티티와 '지금까지 받은 모든 페이지' 엔티티 사이의 관계이므로,
+    페이지를 이어 붙이면 상위 N개 엔티티의 유도 부분 그래프와 같아집니다.
+    """
+    limit_entities = _clamp(limit_entities, MAX_ENTITIES_PER_PAGE)
+    limit_relationships = _clamp(limit_relationships, MAX_RELATIONSHIPS_PER_PAGE)
+    after_degree, after_id = decode_cursor(cursor) if cursor else (None, None)
+
+    result = await session.run(f"""
+        MATCH (e:Entity)
+        WHERE e.degree IS NOT NULL AND e.document_ids IS NOT NULL
+          AND ($after_degree IS NULL
+               OR e.degree < $after_degree
+               OR (e.degree = $after_degree AND elementId(e) > $after_id))
+        RETURN {_ENTITY_FIELDS}
+        ORDER BY e.degree DESC, elementId(e) ASC
+        LIMIT $limit
+    """, after_degree=after_degree, after_id=after_id, limit=limit_entities, include_properties=include_properties)
+    ids = []
+    last = None
+    async for record in result:
+        last = record
+        entity = _entity(record)
+        ids.append(entity["id"])
+        yield "entity", entity
+
+    next_cursor = None
+    if last is not None:
+        relationships_result = await session.run("""
+            UNWIND $ids AS id
+            MATCH (a:Entity) WHERE elementId(a) = id
+            MATCH (a)-[r]-(b:Entity)
+            WHERE b.degree IS NOT NULL AND b.document_ids IS NOT NULL
+              AND (b.degree > $last_degree OR (b.degree = $last_degree AND elementId(b) <= $last_id))
+            WITH DISTINCT r
+            RETURN elementId(startNode(r)) AS source, elementId(endNode(r)) AS target,
+                   type(r) AS type, CASE WHEN $include_properties THEN properties(r) END AS properties
+            LIMIT $limit
+        """, ids=ids, last_degree=last["degree"], last_id=last["id"],
+            limit=limit_relationships, include_properties=include_properties)
+        async for record in relationships_result:
+            yield "relationship", _relationship(record)
+        if len(ids) == limit_entities:
+            next_cursor = encode_cursor(last["degree"], last["id"])
+
+    yield "meta", {"next_cursor": next_cursor}
+
+
+async def export_graph_page(
+    session,
+    limit_entities: int = 100,
+    limit_relationships: int = 200,
+    cursor: str | None = None,
+    include_properties: bool = True,
+) -> dict:
+    """stream_graph_page 결과 {"entities", "relationships", "next_cursor"}"""
+    return await collect_graph(stream_graph_page(session, limit_entities, limit_relationships, cursor, include_properties))
+
+
+async def expand_entity(
+    session,
+    element_id: str,
+    limit: int = 50,
+    limit_relationships: int = 500,
+    include_properties: bool = True,
+) -> dict | None:
+    """엔티티와 degree 상위 이웃 limit개, 그리고 그 집합 내부의 관계를 반환합니다. 엔티티가 없으면 None"""
+    limit = _clamp(limit, MAX_ENTITIES_PER_PAGE)
+    limit_relationships = _clamp(limit_relationships, MAX_RELATIONSHIPS_PER_PAGE)
+
+    center = await (await session.run(f"""
+        MATCH (e:Entity) WHERE elementId(e) = $id
+        RETURN {_ENTITY_FIELDS}
+    """, id=element_id, include_properties=include_properties)).single()
+    if center is None:
+        return None
+
+    neighbors_result = await session.run(f"""
+        MATCH (c:Entity)--(e:Entity)
+        WHERE elementId(c) = $id AND e <> c
+        WITH DISTINCT e
+        RETURN {_ENTITY_FIELDS}
+        ORDER BY coalesce(e.degree, 0) DESC, elementId(e) ASC
+        LIMIT $limit
+    """, id=element_id, limit=limit, include_properties=include_properties)
+    neighbors = [_entity(record) async for record in neighbors_result]
+
+    entities = [_entity(center)] + neighbors
+    return {
+        "center": element_id,
+        "entities": entities,
+        "relationships": await relationships_among(
+            session, [e["id"] for e in entities], limit_relationships, include_properties=include_properties
+        ),
+        "degree": center["degree"],
+    }
+
+
+async def stream_document_graph(
+    session,
+    document_id: str,
+    limit_relationships: int = MAX_RELATIONSHIPS_PER_PAGE,
+    include_properties: bool = True,
+):
+    """문서에서 추출된 엔티티(와 그 이웃 엔티티), 그리고 그 집합 내부의 관계"""
+    ids = []
+    async for item in _stream_entities(session, f"""
+        MATCH (d:Entity) WHERE $document_id IN d.document_ids
+        OPTIONAL MATCH (d)--(n:Entity)
+        WITH collect(DISTINCT d) + collect(DISTINCT n) AS nodes
+        UNWIND nodes AS e
+        WITH DISTINCT e
+        RETURN {_ENTITY_FIELDS}
+    """, ids, document_id=document_id, include_properties=include_properties):
+        yield item
+    async for item in stream_relationships_among(session, ids, limit_relationships, include_properties=include_properties):
+        yield item
+
+
+async def document_graph(
+    session,
+    document_id: str,
+    limit_relationships: int = MAX_RELATIONSHIPS_PER_PAGE,
+    include_properties: bool = True,
+) -> dict:
+    return await collect_graph(stream_document_graph(session, document_id, limit_relationships, include_properties))
@@ -0,0 +1,124 @@
+"""
+큰 그래프 응답을 위한 스트리밍 전송 형식.
+
+응답은 프레임의 연속입니다. 각 프레임은 dict이며 "t"로 종류를 구분합니다.
+
+- {"t": "meta", ...}                     그래프 외 부가 정보 (stats 등). 항상 첫 프레임
+- {"t": "nodes", "rows": [[id, name, type(, properties)], ...]}
+    노드의 정수 인덱스는 도착 순서(0부터)입니다. id는 Neo4j elementId로, 노드마다 한 번만 전송됩니다.
+- {"t": "edges", "rows": [[source, target, type(, properties)], ...]}
+    source/target은 노드 정수 인덱스입니다. 이 응답에 없는 노드(커서로 받은 이전 페이지의 노드 등)는
+    elementId 문자열 그대로 전송되므로, 클라이언트는 이미 받은 노드의 id로 찾으면 됩니다.
+- {"t": "end", "nodes": N, "edges": M, ...}    마지막 프레임. 결과를 다 읽은 뒤에 정해지는 부가 정보(next_cursor 등)를 함께 담습니다.
+- {"t": "error", "message": "..."}       전송 도중 쿼리가 실패하면 end 대신 보내고 스트림을 끝냅니다.
+
+프레임은 Cypher 결과가 도착하는 대로 만들어지므로(graph_export.stream_*), 첫 노드 프레임은 쿼리 전체가 끝나기 전에 나갑니다.
+NDJSON은 프레임 하나가 한 줄이고, msgpack은 4바이트 big-endian 길이 뒤에 msgpack 본문이 옵니다.
+"""
+import json
+import logging
+import struct
+
+import msgpack
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+STREAM_FORMATS = {"ndjson": NDJSON_MEDIA_TYPE, "msgpack": MSGPACK_MEDIA_TYPE}
+
+# 한 프레임에 담는 행 수. 작을수록 첫 렌더가 빠르고, 클수록 프레임 오버헤드가 줄어듭니다.
+ROWS_PER_FRAME = 500
+
+
+def encode_ndjson(frame: dict) -> bytes:
+    return (json.dumps(frame, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def encode_msgpack(frame: dict) -> bytes:
+    body = msgpack.packb(frame, use_bin_type=True)
+    return struct.pack(">I", len(body)) + body
+
+
+async def graph_items(graph: dict):
+    """이미 모은 결과(entities/relationships)를 graph_export.stream_*과 같은 항목 스트림으로 바꿉니다."""
+    for entity in graph["entities"]:
+        yield "entity", entity
+    for relationship in graph["relationships"]:
+        yield "relationship", relationship
+
+
+async def iter_graph_frames(items, include_properties: bool = False, meta: dict | None = None):
+    """
+    (kind, value) 항목 스트림(graph_export.stream_* 형식)을 정수 인덱스로 압축한 프레임으로 바꿉니다.
+    첫 노드/관계 항목보다 먼저 온 ("meta", dict)는 첫 meta 프레임에, 그 뒤에 온 것은 end 프레임에 합칩니다.
+    """
+    head = dict(meta or {})
+    tail = {}
+    started = False
+    index = {}
+    nodes, edges = [], []
+    edge_count = 0
+    try:
+        async for kind, value in items:
+            if kind == "meta":
+                (tail if started else head).update(value)
+                continue
+            if not started:
+                started = True
+                yield {"t": "meta", **head}
+
+            if kind == "entity":
+                if value["id"] in index:
+                    continue
+                index[value["id"]] = len(index)
+                row = [value["id"], value["name"], value["type"]]
+                if include_properties:
+                    row.append(value.get("properties") or {})
+                nodes.append(row)
+                if len(nodes) >= ROWS_PER_FRAME:
+                    yield {"t": "nodes", "rows": nodes}
+                    nodes = []
+            else:
+                # 관계가 참조하는 노드가 먼저 도착하도록 남은 노드를 먼저 보냅니다.
+                if nodes:
+                    yield {"t": "nodes", "rows": nodes}
+                    nodes = []
+                row = [index.get(value["source"], value["source"]), index.get(value["target"], value["target"]), value["type"]]
+                if include_properties:
+                    row.append(value.get("properties") or {})
+                edges.append(row)
+                edge_count += 1
+                if len(edges) >= ROWS_PER_FRAME:
+                    yield {"t": "edges", "rows": edges}
+                    edges = []
+    except Exception as e:
+        logging.error(f"그래프 스트림 전송 중 오류: {e}", exc_info=True)
+        if not started:
+            yield {"t": "meta", **head}
+        yield {"t": "error", "message": str(e)}
+        return
+
+    if not started:
+        yield {"t": "meta", **head}
+    if nodes:
+        yield {"t": "nodes", "rows": nodes}
+    if edges:
+        yield {"t": "edges", "rows": edges}
+    yield {"t": "end", "nodes": len(index), "edges": edge_count, **tail}
+
+
+async def encode_frames(frames, fmt: str):
+    """프레임을 요청한 형식(ndjson/msgpack)의 바이트로 인코딩합니다."""
+    encode = encode_msgpack if fmt == "msgpack" else encode_ndjson
+    async for frame in frames:
+        yield encode(frame)
+
+
+def graph_stream_response(items, fmt: str, include_properties: bool, meta: dict | None = None) -> StreamingResponse:
+    """
+    항목 스트림을 스트리밍 응답으로 만듭니다.
+    items가 열린 세션에서 읽는 async generator라면 세션과 query_slot은 그 generator 안에서 잡아야
+    응답을 다 보낼 때까지 유지됩니다. (라우터의 예시 참고)
+    """
+    frames = iter_graph_frames(items, include_properties=include_properties, meta=meta)
+    return StreamingResponse(encode_frames(frames, fmt), media_type=STREAM_FORMATS[fmt])
@@ -0,0 +1,70 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.core.config import settings
+
+
+class IngestionQueue:
+    """
+    문서 수집 작업(process_ingestion 등)을 고정된 개수의 워커 스레드로 처리하는 큐.
+    요청 핸들러가 끝난 뒤에도 작업을 계속 넣을 수 있어, 스트리밍 가져오기에서
+    문서가 저장되는 즉시 수집을 시작할 수 있습니다.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    def submit(self, fn, document_id: str, on_done=None):
+        """
+        fn(document_id)를 큐에 넣습니다. on_done(document_id, error)는 작업이 끝나면 호출됩니다.
+        """
+        with self._lock:
+            self._queued += 1
+
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            error = None
+            try:
+                fn(document_id)
+            except Exception as e:
+                error = e
+                logging.error(f"수집 큐 작업 실패 (document_id={document_id}): {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    if error is None:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+            if on_done is not None:
+                try:
+                    on_done(document_id, error)
+                except Exception as e:
+                    logging.error(f"수집 완료 콜백 실패 (document_id={document_id}): {e}")
+
+        return self._executor.submit(run)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+
+@lru_cache(maxsize=None)
+def get_ingestion_queue() -> IngestionQueue:
+    return IngestionQueue(settings.INGESTION_WORKERS)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+
+from app.core.config import settings
+
+
+def make_cache_key(model: str, template: str, variables: dict) -> str:
+    """
+    (모델, 프롬프트 템플릿, 입력 값) 조합의 SHA-256 해시를 캐시 키로 사용합니다.
+    템플릿이나 모델이 바뀌면 키도 바뀌므로 별도의 무효화가 필요 없습니다.
+    """
+    payload = json.dumps(
+        {"model": model, "template": template, "variables": variables},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskLLMCache:
+    """
+    LLM 완성 결과를 로컬 디스크에 저장하는 내용 주소 기반(content-addressed) 캐시.
+
+    - 항목 하나당 JSON 파일 하나를 `<dir>/<key[:2]>/<key>.json`에 저장합니다.
+    - 조회 시 파일 mtime을 갱신하여 LRU 순서를 유지합니다.
+    - 전체 크기가 max_bytes를 넘으면 오래 사용되지 않은 항목부터 삭제해 90%까지 줄입니다.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._total_bytes = self._scan_total_bytes()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _iter_entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _scan_total_bytes(self) -> int:
+        total = 0
+        for path in self._iter_entries():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path, None)  # LRU 갱신
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"LLM 캐시 항목 읽기 실패 ({key[:12]}...): {e}")
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return entry.get("value")
+
+    def set(self, key: str, value: str, meta: dict | None = None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(
+            {"value": value, "meta": meta or {}, "created_at": time.time()},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        try:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            # 동시에 같은 키를 쓰는 경우를 대비해 임시 파일에 쓴 뒤 원자적으로 교체
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"LLM 캐시 항목 저장 실패 ({key[:12]}...): {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            self._total_bytes += len(data) - previous
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _evict(self):
+        """mtime이 오래된 항목부터 삭제하여 max_bytes의 90% 이하로 줄입니다."""
+        with self._lock:
+            entries = []
+            for path in self._iter_entries():
+                try:
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    continue
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    self._evictions += 1
+                except OSError:
+                    continue
+            self._total_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "directory": self.directory,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "writes": self._writes,
+                "evictions": self._evictions,
+            }
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache():
+    """
+    프로세스 전역 LLM 캐시를 반환합니다. 비활성화되어 있거나 디렉터리를 만들 수 없으면 None.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    try:
+        return DiskLLMCache(settings.LLM_CACHE_DIR, settings.LLM_CACHE_MAX_BYTES)
+    except OSError as e:
+        logging.error(f"LLM 캐시 디렉터리 초기화 실패 ({settings.LLM_CACHE_DIR}): {e}")
+        return None
@@ -0,0 +1,251 @@
+"""
+메타데이터 질문 라우터.
+
+"5/21 회의 참석자가 누구야?", "이번 달 설계 회의 몇 번 했어?"처럼 답이 이미 Document 메타데이터
+(회의 날짜, 참석자, 테마)에 있는 질문을 규칙으로 알아보고, 임베딩/검색/LLM 없이
+인덱스된 Document 속성(RagStorage.filter_documents, describe_documents)에서 바로 답합니다.
+
+- attendees: 특정 날짜(또는 기간) 회의의 참석자
+- count: 기간/테마 조건에 맞는 회의 수
+
+회의 내용을 묻는 질문이나 규칙에 확실히 맞지 않는 질문은 None을 반환해 일반 RAG 경로로 넘깁니다.
+"""
+import calendar
+import re
+from datetime import date, timedelta
+
+from app.models.schemas import SearchFilters
+
+# 이보다 긴 질문은 내용 질문일 가능성이 높아 라우팅하지 않습니다.
+MAX_QUESTION_CHARS = 80
+# 답변에 나열하는 문서 수 (소스 이벤트도 같은 문서)
+MAX_LISTED_DOCUMENTS = 5
+
+# 질문 속 표현 -> Document.theme 값 (영문은 단어 단위로 매칭)
+THEME_ALIASES = {
+    "개발": "개발", "development": "개발", "dev": "개발",
+    "설계": "설계", "디자인": "설계", "design": "설계",
+    "기획": "기획", "planning": "기획",
+    "마케팅": "마케팅", "marketing": "마케팅",
+    "qa": "QA", "품질": "QA",
+    "사업": "사업", "business": "사업",
+    "일반 회의": "일반 회의",
+}
+
+_MEETING = re.compile(r"회의|미팅|meetings?\b", re.I)
+_ATTENDEES = re.compile(
+    r"참석자|참석한|참석했|참여자|참여한|참여했|누가 ?(왔|참석|참여)|who (attended|was at|were at|joined)|attendees",
+    re.I,
+)
+# "몇 명"은 참석/참여와 함께 쓰였을 때만 참석자 질문입니다. ("3월에 몇 명 채용하기로 했어?"는 아님)
+_HEADCOUNT = re.compile(r"몇 ?명")
+_PARTICIPATION = re.compile(r"참석|참여")
+_COUNT = re.compile(r"몇 ?(번|회|개|건|차례)|횟수|how many|number of", re.I)
+# 회의 수 질문에서 기간/테마/회의/횟수 표현을 지운 뒤 남아도 되는 말 (조사, 어미, 영어 기능어)
+# 이 밖의 말이 남으면 주제 한정어("배포 회의", "프로젝트 2.0 회의")로 보고 일반 검색으로 보냅니다.
+_COUNT_FILLER = re.compile(
+    r"(에|에는|은|는|이|가|을|를|의|이나|나|야|요|총|전체|모두|우리|저희|팀|동안|중|"
+    r"했\w*|하였\w*|했었\w*|있었\w*|열렸\w*|열었\w*|진행\w*|됐\w*|되었\w*|"
+    r"how|many|number|of|were|was|there|did|we|have|had|held|in|on|the|during|are|do)",
+    re.I,
+)
+# 회의 내용을 묻는 질문은 검색 경로로 보냅니다.
+_CONTENT = re.compile(
+    r"논의|얘기|이야기|결정|내용|안건|발언|말했|무엇|뭐|뭘|왜|어떻게|요약|\b(what|why|discuss\w*|decid\w*|said|summar\w*)\b",
+    re.I,
+)
+
+_FULL_DATE = re.compile(r"(\d{4})\s*[-./년]\s*(\d{1,2})\s*[-./월]\s*(\d{1,2})\s*일?")
+_YEAR_MONTH = re.compile(r"(\d{4})\s*년\s*(\d{1,2})\s*월(?!\s*\d+\s*일)")
+_MONTH_DAY = re.compile(r"(?<![\d/.-])(\d{1,2})/(\d{1,2})(?![\d/])|(\d{1,2})\s*월\s*(\d{1,2})\s*일")
+_MONTH = re.compile(r"(?<!\d)(\d{1,2})\s*월(?!\s*\d+\s*일)")
+_RELATIVE = [
+    (re.compile(r"오늘|\btoday\b", re.I), "today"),
+    (re.compile(r"어제|\byesterday\b", re.I), "yesterday"),
+    (re.compile(r"이번 ?주|금주|\bthis week\b", re.I), "this_week"),
+    (re.compile(r"지난 ?주|저번 ?주|\blast week\b", re.I), "last_week"),
+    (re.compile(r"이번 ?달|금월|\bthis month\b", re.I), "this_month"),
+    (re.compile(r"지난 ?달|저번 ?달|\blast month\b", re.I), "last_month"),
+    (re.compile(r"올해|금년|\bthis year\b", re.I), "this_year"),
+    (re.compile(r"작년|지난 ?해|\blast year\b", re.I), "last_year"),
+]
+_RELATIVE_LABELS = {
+    "today": "오늘", "yesterday": "어제", "this_week": "이번 주", "last_week": "지난 주",
+    "this_month": "이번 달", "last_month": "지난 달", "this_year": "올해", "last_year": "작년",
+}
+
+
+class MetadataQuestion:
+    """detect_metadata_question 결과: 질문 종류와 질문에서 읽은 조건"""
+
+    def __init__(self, kind: str, date_from: date | None, date_to: date | None, period_label: str | None, themes: list):
+        self.kind = kind  # attendees | count
+        self.date_from = date_from
+        self.date_to = date_to
+        self.period_label = period_label
+        self.themes = themes
+
+    def scope_label(self) -> str:
+        """답변 문장에 쓰는 범위 설명. 예: '이번 달(2024-05-01 ~ 2024-05-31) 설계 회의'"""
+        parts = []
+        if self.period_label:
+            parts.append(self.period_label)
+        if self.themes:
+            parts.append("/".join(self.themes))
+        parts.append("회의")
+        return " ".join(parts)
+
+
+def _month_range(year: int, month: int) -> tuple:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _past_year(month: int, day: int, today: date) -> int:
+    """연도 없이 쓴 날짜는 지나간 회의로 봅니다. (올해 기준으로 미래면 작년)"""
+    try:
+        return today.year if date(today.year, month, day) <= today else today.year - 1
+    except ValueError:
+        return today.year
+
+
+def _range_label(name: str, date_from: date, date_to: date) -> str:
+    if date_from == date_to:
+        return f"{name}({date_from.isoformat()})" if name else date_from.isoformat()
+    return f"{name}({date_from.isoformat()} ~ {date_to.isoformat()})"
+
+
+def parse_period(question: str, today: date) -> tuple | None:
+    """질문 속 날짜/기간 표현 -> (date_from, date_to, label). 없거나 잘못된 날짜면 None"""
+    try:
+        if match := _FULL_DATE.search(question):
+            day = date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+            return day, day, day.isoformat()
+        if match := _YEAR_MONTH.search(question):
+            date_from, date_to = _month_range(int(match.group(1)), int(match.group(2)))
+            return date_from, date_to, _range_label(f"{match.group(1)}년 {int(match.group(2))}월", date_from, date_to)
+        if match := _MONTH_DAY.search(question):
+            month, day_of_month = (int(value) for value in (match.group(1, 2) if match.group(1) else match.group(3, 4)))
+            day = date(_past_year(month, day_of_month, today), month, day_of_month)
+            return day, day, day.isoformat()
+        if match := _MONTH.search(question):
+            month = int(match.group(1))
+            date_from, date_to = _month_range(_past_year(month, 1, today), month)
+            return date_from, date_to, _range_label(f"{month}월", date_from, date_to)
+    except ValueError:
+        return None
+
+    for pattern, name in _RELATIVE:
+        if not pattern.search(question):
+            continue
+        if name == "today":
+            date_from = date_to = today
+        elif name == "yesterday":
+            date_from = date_to = today - timedelta(days=1)
+        elif name in ("this_week", "last_week"):
+            monday = today - timedelta(days=today.weekday())
+            if name == "last_week":
+                monday -= timedelta(days=7)
+            date_from, date_to = monday, monday + timedelta(days=6)
+        elif name == "this_month":
+            date_from, date_to = _month_range(today.year, today.month)
+        elif name == "last_month":
+            previous = today.replace(day=1) - timedelta(days=1)
+            date_from, date_to = _month_range(previous.year, previous.month)
+        elif name == "this_year":
+            date_from, date_to = date(today.year, 1, 1), date(today.year, 12, 31)
+        else:
+            date_from, date_to = date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+        return date_from, date_to, _range_label(_RELATIVE_LABELS[name], date_from, date_to)
+    return None
+
+
+def parse_themes(question: str) -> list:
+    themes = []
+    for alias, theme in THEME_ALIASES.items():
+        pattern = rf"\b{re.escape(alias)}\b" if alias.isascii() else re.escape(alias)
+        if re.search(pattern, question, re.I) and theme not in themes:
+            themes.append(theme)
+    return themes
+
+
+def _has_count_qualifier(question: str) -> bool:
+    """회의 수 질문에 기간/테마 말고 다른 한정어(주제, 프로젝트 이름 등)가 남아 있는지"""
+    text = question
+    patterns = [_FULL_DATE, _YEAR_MONTH, _MONTH_DAY, _MONTH, _COUNT, _MEETING] + [pattern for pattern, _ in _RELATIVE]
+    patterns += [
+        re.compile(rf"\b{re.escape(alias)}\b" if alias.isascii() else re.escape(alias), re.I)
+        for alias in THEME_ALIASES
+    ]
+    for pattern in patterns:
+        text = pattern.sub(" ", text)
+    tokens = [token for token in re.split(r"[\s?!.,~]+", text) if token]
+    return any(not _COUNT_FILLER.fullmatch(token) for token in tokens)
+
+
+def detect_metadata_question(question: str, today: date | None = None) -> MetadataQuestion | None:
+    """메타데이터만으로 답할 수 있는 질문이면 MetadataQuestion, 아니면 None"""
+    text = (question or "").strip()
+    if not text or len(text) > MAX_QUESTION_CHARS or _CONTENT.search(text):
+        return None
+    period = parse_period(text, today or date.today())
+    date_from, date_to, period_label = period or (None, None, None)
+    themes = parse_themes(text)
+
+    if _ATTENDEES.search(text) or (_HEADCOUNT.search(text) and _PARTICIPATION.search(text)):
+        # "김철수가 참석한 회의 몇 번이야?"는 사람 조건이 붙은 회의 수 질문이므로 일반 검색으로 보냅니다.
+        # 어느 회의인지 알아야 참석자를 답할 수 있습니다.
+        if _COUNT.search(text) or period is None:
+            return None
+        return MetadataQuestion("attendees", date_from, date_to, period_label, themes)
+    if _HEADCOUNT.search(text):
+        return None
+    if _COUNT.search(text) and _MEETING.search(text) and not _has_count_qualifier(text):
+        return MetadataQuestion("count", date_from, date_to, period_label, themes)
+    return None
+
+
+def _document_line(document: dict) -> str:
+    title = document.get("title") or document["id"]
+    return f"- {document.get('meeting_date') or '날짜 미상'} {title}"
+
+
+def answer_metadata_question(storage, question: str, filters: SearchFilters | None = None, today: date | None = None) -> dict | None:
+    """
+    메타데이터 질문이면 {"kind", "answer", "documents"}를 반환합니다. (documents는 describe_documents 행)
+    질문에서 읽은 날짜/테마가 요청 필터의 같은 항목보다 우선하고, 나머지 필터(참석자, 문서)는 그대로 적용합니다.
+    """
+    intent = detect_metadata_question(question, today)
+    if intent is None:
+        return None
+
+    update = {}
+    if intent.date_from is not None:
+        update.update(date_from=intent.date_from, date_to=intent.date_to)
+    if intent.themes:
+        update["themes"] = intent.themes
+    scope = (filters or SearchFilters()).model_copy(update=update)
+    scope_label = intent.scope_label()
+
+    documents = storage.describe_documents(scope, MAX_LISTED_DOCUMENTS)
+    total = len(documents)
+    if total == MAX_LISTED_DOCUMENTS:
+        total = len(storage.filter_documents(scope))
+
+    if intent.kind == "count":
+        lines = [f"{scope_label}는 총 {total}건입니다." if intent.period_label or intent.themes else f"기록된 회의는 총 {total}건입니다."]
+        if documents:
+            lines.append("")
+            lines.append("최근 회의:" if total > len(documents) else "회의 목록:")
+            lines.extend(_document_line(document) for document in documents)
+    elif not documents:
+        lines = [f"{scope_label} 기록이 없습니다."]
+    else:
+        lines = [f"{scope_label} 참석자입니다." if total == 1 else f"{scope_label}는 {total}건이며 참석자는 다음과 같습니다."]
+        for document in documents:
+            attendees = document.get("attendees") or []
+            names = f"{', '.join(attendees)} ({len(attendees)}명)" if attendees else "참석자 정보 없음"
+            lines.append(f"{_document_line(document)}: {names}")
+        if total > len(documents):
+            lines.append(f"외 {total - len(documents)}건")
+
+    return {"kind": intent.kind, "answer": "\n".join(lines), "documents": documents}
@@ -0,0 +1,218 @@
+"""
+단계별 지연 시간 계측.
+
+채팅/수집 파이프라인의 각 단계를 StageTimer로 재고, 프로세스 전역 히스토그램에 누적합니다.
+누적 값은 GET /metrics 에서 Prometheus 텍스트 형식으로 노출됩니다.
+
+핫패스 비용은 perf_counter 두 번과 락 한 번(버킷 이분 탐색 포함) 정도입니다.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+# 초 단위 버킷. 임베딩 수십 ms부터 수집 전체 수 분까지 포함합니다.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """라벨별 누적 히스토그램 (Prometheus histogram 형식)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # 라벨 값 튜플 -> [버킷별 개수(누적 아님) + 초과분, 합계, 개수]
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+        for key, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Counter:
+    """라벨별 누적 카운터"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for key, value in snapshot:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge:
+    """
+    렌더링 시점에 collect()를 호출해 현재 값을 읽는 게이지.
+    collect()는 {라벨 값 튜플: 값}을 반환합니다. (예: 커넥션 풀 사용량)
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self._collect() if self._collect else {}
+        except Exception:
+            # 수집 실패가 /metrics 전체를 깨뜨리지 않도록 이 게이지만 비웁니다.
+            values = {}
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = (), collect=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, collect))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache()
+def get_metrics_registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+_STAGE_SECONDS = get_metrics_registry().histogram(
+    "systema_stage_seconds",
+    "Pipeline stage latency in seconds",
+    labelnames=("pipeline", "stage"),
+)
+_PIPELINE_RUNS = get_metrics_registry().counter(
+    "systema_pipeline_runs_total",
+    "Pipeline runs by outcome",
+    labelnames=("pipeline", "outcome"),
+)
+
+
+class StageTimer:
+    """
+    한 요청(채팅 응답 1회, 문서 수집 1회)의 단계별 소요 시간을 기록합니다.
+
+    - span(stage): with 블록의 소요 시간
+    - lap(stage): 직전 lap(또는 생성 시점) 이후의 소요 시간. 긴 함수를 들여쓰기 없이 단계로 나눌 때 사용합니다.
+    - record(stage, seconds): 직접 잰 값
+
+    같은 단계가 여러 번 기록되면 요청 안에서는 합산되고, 히스토그램에는 각각 관측됩니다.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.stages = {}
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        _STAGE_SECONDS.observe(seconds, pipeline=self.pipeline, stage=stage)
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.record(stage, end - start)
+            self._last = end
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.record(stage, now - self._last)
+        self._last = now
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def finish(self, outcome: str = "success", stage: str = "total"):
+        """전체 소요 시간을 stage로 기록하고 실행 결과를 집계합니다."""
+        self.record(stage, self.elapsed())
+        _PIPELINE_RUNS.inc(pipeline=self.pipeline, outcome=outcome)
+
+    def as_dict(self) -> dict:
+        """SSE timings 이벤트용: 단계별 밀리초"""
+        return {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}
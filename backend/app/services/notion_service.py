@@ -1,14 +1,22 @@
 import os
 import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+
 import requests
+from requests.adapters import HTTPAdapter
 
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
-NOTION_BASE_URL = "https://api.notion.com/v1"
+# 로컬 목 서버로 테스트할 때 덮어쓸 수 있도록 환경 변수로 받습니다.
+NOTION_BASE_URL = os.getenv("NOTION_BASE_URL", "https://api.notion.com/v1")
+NOTION_VERSION = "2022-06-28"
 
-HEADERS = {
-    "Authorization": f"Bearer {NOTION_API_KEY}",
-    "Notion-Version": "2022-06-28",
-}
+# 페이지 본문 동시 수집 개수와 초당 요청 수 (Notion 공식 제한: 평균 초당 3회)
+NOTION_MAX_CONCURRENCY = int(os.getenv("NOTION_MAX_CONCURRENCY", "4"))
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
 
 def extract_database_id(database_url: str) -> str:
     """
@@ -20,67 +28,249 @@ def extract_database_id(database_url: str) -> str:
         raise ValueError("⚠️ 올바르지 않은 노션 DB URL입니다.")
     return match.group(1)
 
+
+class _RequestPacer:
+    """여러 스레드가 공유하는 최소 요청 간격 조절기 (초당 requests_per_second 회)."""
+
+    def __init__(self, requests_per_second: float):
+        self._interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        # 간격 제한이 없어도(interval 0) pause()로 미룬 시각까지는 기다립니다.
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_at)
+            self._next_at = scheduled + self._interval
+        delay = scheduled - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """429 Retry-After 동안 모든 스레드의 다음 요청을 미룹니다."""
+        with self._lock:
+            self._next_at = max(self._next_at, time.monotonic() + seconds)
+
+
+class NotionClient:
+    """
+    커넥션 풀을 재사용하는 Notion API 클라이언트.
+
+    - databases/query, blocks/{id}/children 모두 next_cursor/has_more를 따라 끝까지 조회합니다.
+    - 페이지 본문은 max_concurrency 개의 스레드로 동시에 가져옵니다.
+    - 429 응답은 Retry-After 만큼, 5xx 응답은 지수 백오프로 재시도합니다.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str = NOTION_BASE_URL,
+        max_concurrency: int = NOTION_MAX_CONCURRENCY,
+        requests_per_second: float = NOTION_REQUESTS_PER_SECOND,
+        max_retries: int = 5,
+        timeout: float = 30.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._pacer = _RequestPacer(requests_per_second)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key if api_key is not None else NOTION_API_KEY}",
+            "Notion-Version": NOTION_VERSION,
+        })
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            self._pacer.wait()
+            res = self.session.request(method, url, timeout=self.timeout, **kwargs)
+
+            if res.status_code == 429 or res.status_code >= 500:
+                if attempt >= self.max_retries:
+                    break
+                retry_after = res.headers.get("Retry-After")
+                try:
+                    delay = float(retry_after) if retry_after is not None else 2 ** attempt
+                except ValueError:
+                    delay = 2 ** attempt
+                logging.warning(f"Notion API {res.status_code} 응답: {delay:.1f}초 후 재시도 ({method} {path})")
+                self._pacer.pause(delay)
+                continue
+
+            res.raise_for_status()
+            return res.json()
+
+        res.raise_for_status()
+        return res.json()
+
+    def iter_database_pages(self, database_id: str, filter: dict | None = None, sorts: list | None = None):
+        """databases/query 결과를 커서를 따라가며 페이지 단위로 yield 합니다."""
+        body = {"page_size": 100}
+        if filter:
+            body["filter"] = filter
+        if sorts:
+            body["sorts"] = sorts
+
+        while True:
+            data = self._request("POST", f"/databases/{database_id}/query", json=body)
+            for result in data.get("results", []):
+                yield result
+            if not data.get("has_more") or not data.get("next_cursor"):
+                break
+            body["start_cursor"] = data["next_cursor"]
+
+    def iter_block_children(self, block_id: str):
+        """blocks/{id}/children 결과를 커서를 따라가며 블록 단위로 yield 합니다."""
+        params = {"page_size": 100}
+        while True:
+            data = self._request("GET", f"/blocks/{block_id}/children", params=params)
+            for block in data.get("results", []):
+                yield block
+            if not data.get("has_more") or not data.get("next_cursor"):
+                break
+            params["start_cursor"] = data["next_cursor"]
+
+    def fetch_page_content(self, page_id: str) -> str:
+        """페이지 본문 텍스트(블록 단위)를 모두 가져옴"""
+        texts = []
+        for block in self.iter_block_children(page_id):
+            text = _block_to_text(block)
+            if text is not None:
+                texts.append(text)
+        return "\n".join(texts).strip()
+
+    def fetch_pages_with_content(self, database_id: str, filter: dict | None = None) -> list:
+        """
+        데이터베이스의 모든 페이지 메타데이터를 모은 뒤, 본문은 동시에 가져옵니다.
+        반환 순서는 Notion 조회 순서와 같습니다.
+        """
+        results = list(self.iter_database_pages(database_id, filter=filter))
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            contents = list(executor.map(lambda r: self.fetch_page_content(r["id"]), results))
+        return [_page_to_document(result, content) for result, content in zip(results, contents)]
+
+    def iter_pages_with_content(self, database_id: str, filter: dict | None = None, on_error=None):
+        """
+        페이지 목록 조회와 본문 수집을 겹쳐서 진행하며, 본문이 준비된 문서부터 바로 yield 합니다.
+        전체 목록을 기다리지 않으므로 큰 데이터베이스도 첫 문서가 곧바로 나옵니다.
+        (순서는 보장하지 않습니다.)
+
+        on_error(page, error)를 주면 본문을 가져오지 못한 페이지(본문 빈 문서 dict)는 건너뛰고 알린 뒤 계속합니다.
+        없으면 예외가 그대로 올라옵니다. 목록 조회 실패는 항상 예외입니다.
+        """
+        max_pending = self.max_concurrency * 4  # 메모리 사용을 제한하기 위한 백프레셔
+
+        def finished(done):
+            for future in done:
+                result = pending.pop(future)
+                try:
+                    content = future.result()
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(_page_to_document(result, ""), e)
+                    continue
+                yield _page_to_document(result, content)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending = {}
+            for result in self.iter_database_pages(database_id, filter=filter):
+                future = executor.submit(self.fetch_page_content, result["id"])
+                pending[future] = result
+
+                timeout = None if len(pending) >= max_pending else 0
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+
+
+def _rich_text(block_body: dict) -> str:
+    return "".join(r.get("plain_text", "") for r in block_body.get("rich_text", []))
+
+def _block_to_text(block: dict):
+    """지원하는 블록 타입을 텍스트 한 줄로 변환합니다. 그 외 블록은 None."""
+    if "paragraph" in block:
+        return _rich_text(block["paragraph"])
+    if "heading_2" in block:
+        return f"## {_rich_text(block['heading_2'])}"
+    if "bulleted_list_item" in block:
+        return "• " + _rich_text(block["bulleted_list_item"])
+    return None
+
+def _page_to_document(result: dict, content: str) -> dict:
+    """databases/query 결과 한 건과 본문을 수집용 문서 dict로 변환합니다."""
+    props = result.get("properties", {})
+    title_prop = props.get("Name") or props.get("제목") or props.get("Title")
+    date_prop = props.get("Date", {})
+    tags_prop = props.get("Tags", {})
+    person_prop = props.get("Person", {})
+    gen_prop = props.get("기수", {})
+
+    title = (
+        title_prop["title"][0]["plain_text"]
+        if title_prop and title_prop.get("title")
+        else "Untitled"
+    )
+    date = (date_prop.get("date") or {}).get("start", "Unknown Date")
+    tags = [t["name"] for t in tags_prop.get("multi_select", [])]
+    people = [p.get("name", "") for p in person_prop.get("people", [])]
+    generation = (gen_prop.get("rich_text") or [{}])[0].get("plain_text", "")
+
+    return {
+        "title": title,
+        "date": date,
+        "tags": tags,
+        "people": people,
+        "generation": generation,
+        "content": content,
+        "source": result.get("url", ""),
+        "notion_page_id": result.get("id"),
+        "last_edited_time": result.get("last_edited_time"),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_notion_client() -> NotionClient:
+    """프로세스 전역 Notion 클라이언트 (세션/커넥션 풀 재사용)"""
+    return NotionClient()
+
 def fetch_page_content(page_id: str) -> str:
     """
     페이지 본문 텍스트(블록 단위)를 모두 가져옴
     """
-    blocks_url = f"{NOTION_BASE_URL}/blocks/{page_id}/children"
-    res = requests.get(blocks_url, headers=HEADERS)
-    res.raise_for_status()
-    data = res.json()
-
-    texts = []
-    for block in data.get("results", []):
-        if "paragraph" in block:
-            rich = block["paragraph"].get("rich_text", [])
-            texts.append("".join(r.get("plain_text", "") for r in rich))
-        elif "heading_2" in block:
-            texts.append(f"## {block['heading_2']['rich_text'][0]['plain_text']}")
-        elif "bulleted_list_item" in block:
-            rich = block["bulleted_list_item"].get("rich_text", [])
-            texts.append("• " + "".join(r.get("plain_text", "") for r in rich))
-    return "\n".join(texts).strip()
-
-def fetch_notion_pages(database_url: str):
+    return get_notion_client().fetch_page_content(page_id)
+
+def edited_since_filter(watermark: str) -> dict:
+    """last_edited_time이 watermark 이후(포함)인 페이지만 조회하는 databases/query 필터"""
+    return {
+        "timestamp": "last_edited_time",
+        "last_edited_time": {"on_or_after": watermark},
+    }
+
+def fetch_notion_pages(database_url: str, edited_since: str | None = None):
     """
     지정된 Notion DB에서 각 회의 페이지의 메타데이터 및 본문을 추출
+    edited_since(ISO 8601)를 주면 그 이후 수정된 페이지만 가져옵니다.
     """
     db_id = extract_database_id(database_url)
-    url = f"{NOTION_BASE_URL}/databases/{db_id}/query"
-    res = requests.post(url, headers=HEADERS)
-    res.raise_for_status()
-    data = res.json()
-
-    documents = []
-    for result in data.get("results", []):
-        props = result.get("properties", {})
-        title_prop = props.get("Name") or props.get("제목") or props.get("Title")
-        date_prop = props.get("Date", {})
-        tags_prop = props.get("Tags", {})
-        person_prop = props.get("Person", {})
-        gen_prop = props.get("기수", {})
-
-        title = (
-            title_prop["title"][0]["plain_text"]
-            if title_prop and title_prop.get("title")
-            else "Untitled"
-        )
-        date = date_prop.get("date", {}).get("start", "Unknown Date")
-        tags = [t["name"] for t in tags_prop.get("multi_select", [])]
-        people = [p.get("name", "") for p in person_prop.get("people", [])]
-        generation = gen_prop.get("rich_text", [{}])[0].get("plain_text", "")
-
-        page_id = result["id"]
-        content = fetch_page_content(page_id)
-
-        documents.append({
-            "title": title,
-            "date": date,
-            "tags": tags,
-            "people": people,
-            "generation": generation,
-            "content": content,
-            "source": result.get("url", ""),
-        })
+    query_filter = edited_since_filter(edited_since) if edited_since else None
+    return get_notion_client().fetch_pages_with_content(db_id, filter=query_filter)
 
-    return documents
+def iter_notion_pages(database_url: str, edited_since: str | None = None, on_error=None):
+    """
+    fetch_notion_pages의 스트리밍 버전. 본문을 다 가져온 페이지부터 하나씩 yield 합니다.
+    on_error는 NotionClient.iter_pages_with_content와 같습니다.
+    """
+    db_id = extract_database_id(database_url)
+    query_filter = edited_since_filter(edited_since) if edited_since else None
+    yield from get_notion_client().iter_pages_with_content(db_id, filter=query_filter, on_error=on_error)
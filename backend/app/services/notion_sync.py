@@ -0,0 +1,379 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from app.services.ingestion_queue import get_ingestion_queue
+from app.services.notion_service import extract_database_id, iter_notion_pages
+from app.services.rag_service import delete_document_graph, process_ingestion
+from app.services.supabase_service import get_supabase_client
+
+# Supabase에서 한 번에 조회할 notion_page_id 개수
+_LOOKUP_BATCH_SIZE = 100
+
+
+def _parse_time(value):
+    """Notion/Supabase의 ISO 8601 타임스탬프를 datetime으로 변환합니다."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def get_sync_watermark(database_id: str) -> str | None:
+    """마지막 동기화 시점의 watermark(가장 최근 last_edited_time)를 반환합니다."""
+    response = (
+        get_supabase_client().from_("notion_sync_state")
+        .select("watermark")
+        .eq("database_id", database_id)
+        .execute()
+    )
+    if response.data:
+        return response.data[0].get("watermark")
+    return None
+
+
+def set_sync_watermark(database_id: str, watermark: str):
+    get_supabase_client().from_("notion_sync_state").upsert({
+        "database_id": database_id,
+        "watermark": watermark,
+        "updated_at": datetime.utcnow().isoformat() + "Z",
+    }).execute()
+
+
+def _find_existing_documents(page_ids: list) -> dict:
+    """notion_page_id → {id, notion_last_edited_time} 매핑을 배치 조회합니다."""
+    existing = {}
+    for start in range(0, len(page_ids), _LOOKUP_BATCH_SIZE):
+        batch = page_ids[start:start + _LOOKUP_BATCH_SIZE]
+        response = (
+            get_supabase_client().from_("documents")
+            .select("id, notion_page_id, notion_last_edited_time")
+            .in_("notion_page_id", batch)
+            .execute()
+        )
+        for row in response.data or []:
+            existing[row["notion_page_id"]] = row
+    return existing
+
+
+# 같은 분에 편집된 페이지를 비교할 때 쓰는 documents 열 (page_to_row 결과 중 Notion 내용에 해당)
+_CONTENT_FIELDS = ("title", "content", "link", "metadata")
+
+
+def _load_stored_contents(document_ids: list) -> dict:
+    """document id → 저장된 _CONTENT_FIELDS 매핑"""
+    stored = {}
+    for start in range(0, len(document_ids), _LOOKUP_BATCH_SIZE):
+        response = (
+            get_supabase_client().from_("documents")
+            .select("id, " + ", ".join(_CONTENT_FIELDS))
+            .in_("id", document_ids[start:start + _LOOKUP_BATCH_SIZE])
+            .execute()
+        )
+        for row in response.data or []:
+            stored[row["id"]] = row
+    return stored
+
+
+def page_to_row(page: dict) -> dict:
+    """fetch_notion_pages 결과 한 건을 documents 테이블 행으로 변환합니다."""
+    return {
+        "title": page["title"],
+        "content": page["content"],
+        "link": page["source"] or None,
+        "metadata": {
+            "date": page["date"],
+            "tags": page["tags"],
+            "people": page["people"],
+            "generation": page["generation"],
+            "source": page["source"],
+        },
+        "notion_page_id": page["notion_page_id"],
+        "notion_last_edited_time": page["last_edited_time"],
+        "status": "PENDING",
+    }
+
+
+def reingest_document(document_id: str):
+    """기존 그래프 데이터를 지운 뒤 문서를 다시 수집합니다. (변경된 Notion 페이지용)"""
+    try:
+        delete_document_graph(document_id)
+    except Exception as e:
+        logging.error(f"문서 {document_id}의 기존 그래프 삭제 실패: {e}", exc_info=True)
+    process_ingestion(document_id)
+
+
+class NotionImportJob:
+    """
+    Notion → Supabase → 수집 큐로 이어지는 스트리밍 가져오기 작업 하나의 상태.
+
+    페이지 수집 스레드가 본문이 준비된 페이지를 큐에 넣으면, 작업 스레드가 이를
+    _INSERT_BATCH_SIZE 개(또는 _FLUSH_INTERVAL_SECONDS 초)마다 한 번의 다중 행 upsert로 저장하고
+    저장된 문서를 즉시 수집 큐에 넣습니다.
+    """
+
+    def __init__(self, database_url: str, incremental: bool):
+        self.id = uuid.uuid4().hex
+        self.database_url = database_url
+        self.database_id = extract_database_id(database_url)
+        self.incremental = incremental
+        self.status = "pending"
+        self.error = None
+        self.started_at = time.time()
+        self.first_enqueued_at = None
+        self.finished_at = None
+        self.previous_watermark = None
+        self.watermark = None
+        self.fetched = 0
+        self.unchanged = 0
+        self.created = []
+        self.updated = []
+        self.failed = []
+        self.ingested = 0
+        self.ingest_failed = 0
+        self._lock = threading.Lock()
+
+    def _on_ingested(self, document_id: str, error):
+        with self._lock:
+            if error is None:
+                self.ingested += 1
+            else:
+                self.ingest_failed += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            queued = len(self.created) + len(self.updated)
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "error": self.error,
+                "from": self.database_url,
+                "database_id": self.database_id,
+                "incremental": self.incremental,
+                "previous_watermark": self.previous_watermark,
+                "watermark": self.watermark,
+                "fetched": self.fetched,
+                "created": len(self.created),
+                "updated": len(self.updated),
+                "unchanged": self.unchanged,
+                "failed": list(self.failed),
+                "queued_for_ingestion": queued,
+                "ingested": self.ingested,
+                "ingest_failed": self.ingest_failed,
+                "seconds_to_first_enqueue": (
+                    round(self.first_enqueued_at - self.started_at, 3) if self.first_enqueued_at else None
+                ),
+                "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+                "documents": list(self.created) + list(self.updated),
+            }
+
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+_MAX_TRACKED_JOBS = 50
+
+# 한 번의 upsert로 저장할 최대 페이지 수와, 배치가 덜 찼어도 저장하는 최대 대기 시간
+_INSERT_BATCH_SIZE = 20
+_FLUSH_INTERVAL_SECONDS = 1.0
+_END_OF_PAGES = object()
+
+
+def get_import_job(job_id: str):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def start_notion_import(database_url: str, incremental: bool = False) -> NotionImportJob:
+    """
+    스트리밍 가져오기 작업을 만들고 백그라운드 스레드에서 시작합니다. 작업 핸들을 즉시 반환합니다.
+    잘못된 URL이면 ValueError가 발생합니다.
+    """
+    job = NotionImportJob(database_url, incremental)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        while len(_jobs) > _MAX_TRACKED_JOBS:
+            _jobs.popitem(last=False)
+    threading.Thread(target=_run_import, args=(job,), name=f"notion-import-{job.id[:8]}", daemon=True).start()
+    return job
+
+
+def _produce_pages(job: NotionImportJob, edited_since, pages: queue.Queue):
+    """
+    Notion에서 본문이 준비된 페이지를 순서대로 큐에 넣습니다. 마지막에 종료 표식을 넣습니다.
+    본문을 가져오지 못한 페이지는 job.failed에 남기고 계속합니다. (실패가 있으면 watermark를 올리지 않으므로 다음 동기화에서 다시 조회)
+    """
+    def page_failed(page: dict, error: Exception):
+        logging.error(f"❌ Failed to fetch Notion page {page['notion_page_id']} ({page['title']}): {error}")
+        with job._lock:
+            job.failed.append({"title": page["title"], "error": str(error)})
+
+    try:
+        for page in iter_notion_pages(job.database_url, edited_since=edited_since, on_error=page_failed):
+            pages.put(page)
+    except Exception as e:
+        pages.put(e)
+    finally:
+        pages.put(_END_OF_PAGES)
+
+
+def _changed_pages(job: NotionImportJob, batch: list, existing: dict) -> list:
+    """
+    증분 동기화에서 다시 저장할 페이지(신규 또는 변경)만 고르고, 나머지는 job.unchanged로 셉니다.
+
+    Notion의 last_edited_time은 분 단위라 지난 동기화와 같은 분에 고친 페이지는 시각이 같습니다.
+    시각이 같으면 저장된 내용과 비교하고, 내용을 가져오지 못하면 변경된 것으로 봅니다.
+    """
+    if not job.incremental:
+        return list(batch)
+
+    changed, same_minute = [], []
+    for page in batch:
+        current = existing.get(page["notion_page_id"])
+        stored_time = _parse_time(current.get("notion_last_edited_time")) if current else None
+        page_time = _parse_time(page["last_edited_time"])
+        if not stored_time or not page_time or page_time > stored_time:
+            changed.append(page)
+        elif page_time == stored_time:
+            same_minute.append(page)
+        else:
+            with job._lock:
+                job.unchanged += 1
+
+    if same_minute:
+        try:
+            stored = _load_stored_contents([existing[page["notion_page_id"]]["id"] for page in same_minute])
+        except Exception as e:
+            logging.warning(f"Failed to load {len(same_minute)} stored Notion pages for comparison: {e}")
+            stored = {}
+        for page in same_minute:
+            row = page_to_row(page)
+            current = stored.get(existing[page["notion_page_id"]]["id"])
+            if current is not None and all(current.get(field) == row[field] for field in _CONTENT_FIELDS):
+                with job._lock:
+                    job.unchanged += 1
+            else:
+                changed.append(page)
+    return changed
+
+
+def _flush_batch(job: NotionImportJob, batch: list):
+    """
+    페이지 묶음을 notion_page_id 기준 다중 행 upsert로 저장하고, 신규/변경 문서를 수집 큐에 넣습니다.
+    """
+    try:
+        existing = _find_existing_documents([p["notion_page_id"] for p in batch])
+    except Exception as e:
+        logging.error(f"❌ Failed to look up {len(batch)} Notion pages in Supabase: {e}")
+        with job._lock:
+            job.failed.extend({"title": page["title"], "error": str(e)} for page in batch)
+        return
+
+    rows, kinds = [], {}
+    for page in _changed_pages(job, batch, existing):
+        current = existing.get(page["notion_page_id"])
+        kinds[page["notion_page_id"]] = "updated" if current is not None else "created"
+        # 변경된 문서는 요약/테마를 비우고 PENDING으로 되돌린 뒤 다시 수집
+        rows.append({**page_to_row(page), "summary": None, "theme": None})
+
+    if not rows:
+        return
+
+    try:
+        upserted = (
+            get_supabase_client().from_("documents")
+            .upsert(rows, on_conflict="notion_page_id")
+            .execute()
+        )
+    except Exception as e:
+        logging.error(f"❌ Failed to upsert {len(rows)} Notion pages: {e}")
+        with job._lock:
+            job.failed.extend({"title": row["title"], "error": str(e)} for row in rows)
+        return
+
+    ingestion_queue = get_ingestion_queue()
+    for row in upserted.data or []:
+        kind = kinds.get(row.get("notion_page_id"), "created")
+        doc = {"document_id": row["id"], "title": row.get("title")}
+        with job._lock:
+            (job.created if kind == "created" else job.updated).append(doc)
+            if job.first_enqueued_at is None:
+                job.first_enqueued_at = time.time()
+        fn = process_ingestion if kind == "created" else reingest_document
+        ingestion_queue.submit(fn, row["id"], on_done=job._on_ingested)
+
+
+def _run_import(job: NotionImportJob):
+    job.status = "running"
+    try:
+        job.previous_watermark = get_sync_watermark(job.database_id) if job.incremental else None
+        job.watermark = job.previous_watermark
+
+        pages = queue.Queue(maxsize=_INSERT_BATCH_SIZE * 4)
+        threading.Thread(
+            target=_produce_pages,
+            args=(job, job.previous_watermark, pages),
+            name=f"notion-fetch-{job.id[:8]}",
+            daemon=True,
+        ).start()
+
+        batch = []
+        batch_started_at = None
+        edited_times = []
+        fetch_error = None
+
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0.0, batch_started_at + _FLUSH_INTERVAL_SECONDS - time.monotonic())
+            try:
+                item = pages.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _END_OF_PAGES:
+                break
+            if isinstance(item, Exception):
+                fetch_error = item
+                continue
+            if item is not None:
+                with job._lock:
+                    job.fetched += 1
+                if item.get("last_edited_time"):
+                    edited_times.append(item["last_edited_time"])
+                if not batch:
+                    batch_started_at = time.monotonic()
+                batch.append(item)
+
+            if batch and (len(batch) >= _INSERT_BATCH_SIZE or time.monotonic() - batch_started_at >= _FLUSH_INTERVAL_SECONDS):
+                _flush_batch(job, batch)
+                batch = []
+
+        if batch:
+            _flush_batch(job, batch)
+
+        if fetch_error is not None:
+            raise fetch_error
+
+        # 실패한 페이지가 있으면 다음 동기화에서 다시 조회되도록 watermark를 올리지 않습니다.
+        if edited_times and not job.failed:
+            # Notion의 last_edited_time은 같은 형식의 UTC ISO 문자열이므로 문자열 비교로 충분합니다.
+            job.watermark = max(edited_times)
+            set_sync_watermark(job.database_id, job.watermark)
+
+        job.status = "completed"
+        logging.info(
+            f"Notion DB {job.database_id} 가져오기 완료: 조회 {job.fetched}, 신규 {len(job.created)}, "
+            f"변경 {len(job.updated)}, 변경 없음 {job.unchanged}, 실패 {len(job.failed)}"
+        )
+    except Exception as e:
+        logging.error(f"Notion 가져오기 작업 {job.id} 실패: {e}", exc_info=True)
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = time.time()
@@ -0,0 +1,302 @@
+"""
+외부 서비스 커넥션 풀 관리.
+
+프로세스 전역으로 하나씩만 만들고 모든 경로(라우터, 수집, LlamaIndex 저장소)가 공유합니다.
+- Neo4j: 풀 크기/획득 대기 시간/커넥션 수명을 설정한 드라이버 하나
+  (Neo4jVectorStore, Neo4jGraphStore가 내부에서 만드는 드라이버는 adopt_neo4j_driver()로 교체합니다.)
+- Neo4j 비동기 드라이버: async 라우터(대시보드/그래프/디버그/수집 조회) 전용. 이벤트 루프를 막지 않습니다.
+- Supabase: keep-alive 커넥션 풀을 가진 httpx.Client 하나를 쓰는 Supabase 클라이언트 하나
+
+라우터 쿼리는 query_slot(kind)으로 엔드포인트 종류별 동시 실행 수를 제한합니다.
+(관리용 무거운 쿼리가 대화형 조회와 채팅이 쓸 커넥션/스레드를 차지하지 않도록)
+
+pool_stats()는 풀 사용량(사용 중/유휴/대기)을 반환하며 GET /api/debug/pools 와 /metrics 게이지로 노출됩니다.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+from app.services.components import register
+from app.services.metrics import get_metrics_registry
+from app.services.query_profiler import instrument_driver, instrument_async_driver
+
+
+# ---- Neo4j ----
+
+def _neo4j_driver_options(max_connection_pool_size: int) -> dict:
+    return {
+        "auth": (settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+        "max_connection_pool_size": max_connection_pool_size,
+        "connection_acquisition_timeout": settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        "max_connection_lifetime": settings.NEO4J_MAX_CONNECTION_LIFETIME,
+        "connection_timeout": settings.NEO4J_CONNECTION_TIMEOUT,
+    }
+
+def _create_neo4j_driver():
+    if settings.RAG_BACKEND == "memory":
+        return None
+    from neo4j import GraphDatabase
+
+    driver = GraphDatabase.driver(settings.NEO4J_URI, **_neo4j_driver_options(settings.NEO4J_MAX_CONNECTION_POOL_SIZE))
+    # 연결 확인
+    try:
+        driver.verify_connectivity()
+    except Exception:
+        driver.close()
+        raise
+    return instrument_driver(driver)
+
+_NEO4J = register(
+    "neo4j",
+    _create_neo4j_driver,
+    check=lambda driver: driver.verify_connectivity(),
+    close=lambda driver: driver.close(),
+)
+
+def get_neo4j_driver():
+    """
+    Neo4j 드라이버 인스턴스를 반환합니다. 애플리케이션 수명 동안 한 번만 생성되며,
+    연결에 실패하면 None을 반환하고 잠시 뒤 다시 시도합니다. (components.LazyComponent)
+    모든 쿼리의 소요 시간을 집계하도록 프로파일러 래퍼로 감싸서 반환합니다. (query_profiler 참고)
+    """
+    return _NEO4J.get()
+
+def adopt_neo4j_driver(store):
+    """
+    LlamaIndex Neo4j 저장소가 생성자에서 만든 자체 드라이버(기본 풀 설정, 풀 하나 추가)를 닫고
+    공유 드라이버로 바꿉니다. 저장소는 self._driver.session()/execute_query()만 사용하므로 교체해도 동작이 같습니다.
+    """
+    shared = get_neo4j_driver()
+    own = getattr(store, "_driver", None)
+    if shared is None or own is None or own is shared:
+        return store
+    store._driver = shared
+    try:
+        own.close()
+    except Exception as e:
+        logging.warning(f"{type(store).__name__} 자체 드라이버 종료 중 오류: {e}")
+    return store
+
+
+def _async_pool_size() -> int:
+    # 라우터 세션은 query_slot 안에서만 열리고 세션당 커넥션은 한 번에 하나이므로, 슬롯 수만큼이면 풀이 고갈되지 않습니다.
+    return settings.ROUTER_QUERY_CONCURRENCY + settings.ADMIN_QUERY_CONCURRENCY
+
+def _create_async_neo4j_driver():
+    if settings.RAG_BACKEND == "memory":
+        return None
+    from neo4j import AsyncGraphDatabase
+
+    # 생성 시점에는 연결하지 않습니다. (서버 연결 확인은 동기 드라이버 상태 확인이 대신합니다.)
+    return instrument_async_driver(AsyncGraphDatabase.driver(settings.NEO4J_URI, **_neo4j_driver_options(_async_pool_size())))
+
+# 비동기 드라이버의 close()는 코루틴이라 shutdown()이 아니라 lifespan의 close_async_resources()에서 닫습니다.
+_NEO4J_ASYNC = register("neo4j_async", _create_async_neo4j_driver)
+
+def get_async_neo4j_driver():
+    """async 라우터용 neo4j.AsyncDriver (쿼리 프로파일러로 계측됨). 사용할 수 없으면 None"""
+    return _NEO4J_ASYNC.get()
+
+async def close_async_resources():
+    driver = _NEO4J_ASYNC.get() if _NEO4J_ASYNC.status()["state"] == "ready" else None
+    _NEO4J_ASYNC.close()
+    if driver is not None:
+        try:
+            await driver.close()
+        except Exception as e:
+            logging.warning(f"neo4j_async 종료 중 오류: {e}")
+
+
+# ---- 라우터 동시 쿼리 상한 ----
+
+class _QuerySlots:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_use = 0
+        self.waiting = 0
+
+_QUERY_SLOTS = {}
+
+def _query_slots(kind: str) -> _QuerySlots:
+    slots = _QUERY_SLOTS.get(kind)
+    if slots is None:
+        limits = {"interactive": settings.ROUTER_QUERY_CONCURRENCY, "admin": settings.ADMIN_QUERY_CONCURRENCY}
+        slots = _QUERY_SLOTS[kind] = _QuerySlots(limits[kind])
+    return slots
+
+@asynccontextmanager
+async def query_slot(kind: str = "interactive"):
+    """
+    엔드포인트 종류별 동시 쿼리 상한. 슬롯이 없으면 빌 때까지 기다립니다.
+    - interactive: 대시보드/그래프/수집 조회 (ROUTER_QUERY_CONCURRENCY)
+    - admin: 디버그/재계산 등 무거운 관리 작업 (ADMIN_QUERY_CONCURRENCY)
+    """
+    slots = _query_slots(kind)
+    slots.waiting += 1
+    try:
+        await slots.semaphore.acquire()
+    finally:
+        slots.waiting -= 1
+    slots.in_use += 1
+    try:
+        yield
+    finally:
+        slots.in_use -= 1
+        slots.semaphore.release()
+
+
+# ---- Supabase ----
+
+def _create_supabase_client():
+    # 인메모리 저장소 구성에서는 사용하지 않음
+    if settings.RAG_BACKEND == "memory":
+        return None
+    import httpx
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+
+    # PostgREST/Storage/Functions 요청이 모두 이 클라이언트의 keep-alive 풀을 사용합니다.
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT_SECONDS),
+    )
+    try:
+        return create_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_SERVICE_ROLE_KEY,
+            options=SyncClientOptions(httpx_client=http_client),
+        )
+    except Exception:
+        http_client.close()
+        raise
+
+def _close_supabase_client(client):
+    http_client = getattr(client.options, "httpx_client", None)
+    if http_client is not None:
+        http_client.close()
+
+_SUPABASE = register(
+    "supabase",
+    _create_supabase_client,
+    check=lambda client: client.from_("documents").select("id").limit(1).execute(),
+    close=_close_supabase_client,
+)
+
+def get_supabase_client():
+    """
+    프로세스 전역 Supabase 클라이언트. 처음 사용할 때 생성되며, 실패하면 None을 반환하고 잠시 뒤 다시 시도합니다.
+    """
+    return _SUPABASE.get()
+
+
+# ---- 풀 사용량 ----
+# 드라이버/httpcore는 풀 상태를 공개 API로 제공하지 않아 내부 속성을 읽습니다.
+# 버전이 바뀌어 속성이 없으면 해당 항목만 None으로 남깁니다.
+
+def _neo4j_pool_stats(component, max_size: int) -> dict | None:
+    if component.status()["state"] != "ready":
+        return None
+    driver = component.get()
+    stats = {
+        "max_size": max_size,
+        "acquisition_timeout_s": settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        "max_lifetime_s": settings.NEO4J_MAX_CONNECTION_LIFETIME,
+        "in_use": None,
+        "idle": None,
+        "addresses": {},
+    }
+    try:
+        pool = driver._pool
+        in_use = idle = 0
+        for address, connections in list(pool.connections.items()):
+            used = pool.in_use_connection_count(address)
+            total = len(connections)
+            stats["addresses"][str(address)] = {"in_use": used, "idle": total - used}
+            in_use += used
+            idle += total - used
+        stats["in_use"], stats["idle"] = in_use, idle
+    except Exception as e:
+        logging.debug(f"{component.name} 풀 상태를 읽지 못했습니다: {e}")
+    return stats
+
+def _supabase_pool_stats() -> dict | None:
+    if _SUPABASE.status()["state"] != "ready":
+        return None
+    client = _SUPABASE.get()
+    stats = {
+        "max_size": settings.SUPABASE_MAX_CONNECTIONS,
+        "max_keepalive": settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        "in_use": None,
+        "idle": None,
+        "waiting": None,
+    }
+    try:
+        pool = client.options.httpx_client._transport._pool
+        connections = list(pool.connections)
+        in_use = sum(1 for connection in connections if not connection.is_idle())
+        stats["in_use"], stats["idle"] = in_use, len(connections) - in_use
+        # 커넥션을 배정받지 못하고 기다리는 요청 수 (풀 고갈 신호)
+        stats["waiting"] = sum(1 for request in list(pool._requests) if request.connection is None)
+    except Exception as e:
+        logging.debug(f"Supabase HTTP 풀 상태를 읽지 못했습니다: {e}")
+    return stats
+
+def pool_stats() -> dict:
+    """{"neo4j" | "neo4j_async" | "supabase": {...} | None}. 아직 만들어지지 않은 풀은 None (생성을 유발하지 않음)"""
+    return {
+        "neo4j": _neo4j_pool_stats(_NEO4J, settings.NEO4J_MAX_CONNECTION_POOL_SIZE),
+        "neo4j_async": _neo4j_pool_stats(_NEO4J_ASYNC, _async_pool_size()),
+        "supabase": _supabase_pool_stats(),
+    }
+
+def query_slot_stats() -> dict:
+    """{kind: {"limit", "in_use", "waiting"}} — 한 번이라도 사용된 종류만"""
+    return {
+        kind: {"limit": slots.limit, "in_use": slots.in_use, "waiting": slots.waiting}
+        for kind, slots in list(_QUERY_SLOTS.items())
+    }
+
+def _collect_connections() -> dict:
+    values = {}
+    for pool, stats in pool_stats().items():
+        if not stats:
+            continue
+        for state in ("in_use", "idle", "waiting"):
+            if stats.get(state) is not None:
+                values[(pool, state)] = stats[state]
+    return values
+
+def _collect_max_size() -> dict:
+    return {(pool,): stats["max_size"] for pool, stats in pool_stats().items() if stats}
+
+def _collect_query_slots() -> dict:
+    values = {}
+    for kind, stats in query_slot_stats().items():
+        values[(kind, "in_use")] = stats["in_use"]
+        values[(kind, "waiting")] = stats["waiting"]
+    return values
+
+get_metrics_registry().gauge(
+    "systema_pool_connections",
+    "Connection pool usage by state",
+    labelnames=("pool", "state"),
+    collect=_collect_connections,
+)
+get_metrics_registry().gauge(
+    "systema_pool_max_connections",
+    "Configured connection pool size",
+    labelnames=("pool",),
+    collect=_collect_max_size,
+)
+get_metrics_registry().gauge(
+    "systema_query_slots",
+    "Router query concurrency slots by endpoint class and state",
+    labelnames=("kind", "state"),
+    collect=_collect_query_slots,
+)
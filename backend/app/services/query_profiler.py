@@ -0,0 +1,554 @@
+"""
+Neo4j Cypher 쿼리 프로파일러.
+
+get_neo4j_driver()가 돌려주는 드라이버를 얇게 감싸서, session.run / tx.run 으로 실행되는 모든 쿼리의
+소요 시간, 반환 행 수, 서버 측 시간(result_available_after + result_consumed_after)을 쿼리 문장별로 집계합니다.
+
+- 느린 쿼리(NEO4J_SLOW_QUERY_MS 이상)는 "systema.slow_query" 로거로 남기고 최근 목록에 보관합니다.
+- NEO4J_PROFILE_SLOW_QUERIES가 켜져 있으면 느린 읽기 쿼리를 백그라운드에서 PROFILE로 한 번 더 실행해
+  실행 계획(연산자별 rows/dbHits)을 표본으로 저장합니다. (같은 쿼리는 PROFILE_MIN_INTERVAL_SECONDS에 한 번)
+- 집계는 GET /api/debug/queries 로 확인합니다.
+
+라우터가 쓰는 비동기 드라이버(neo4j.AsyncDriver)는 instrument_async_driver()로 같은 방식으로 집계합니다.
+
+결과 객체를 끝까지 읽거나(single/values/data/iteration) consume()할 때 기록됩니다.
+결과를 읽지 않은 쿼리(쓰기 등)는 다음 쿼리 실행 시점까지를 소요 시간으로 보고, 세션/트랜잭션이 끝날 때 요약을 기록합니다.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.core.config import settings
+from app.services.metrics import get_metrics_registry
+
+slow_query_logger = logging.getLogger("systema.slow_query")
+
+# 집계하는 서로 다른 쿼리 문장 수 상한. 넘으면 "(기타)"로 합산합니다.
+MAX_TRACKED_QUERIES = 500
+RECENT_SLOW_QUERIES = 100
+PROFILE_MIN_INTERVAL_SECONDS = 300
+OTHER_QUERIES = "(기타)"
+
+_WRITE_CLAUSES = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b", re.IGNORECASE)
+
+_QUERY_SECONDS = get_metrics_registry().histogram(
+    "systema_neo4j_query_seconds",
+    "Neo4j query latency in seconds (client side, until the result is consumed)",
+)
+_SLOW_QUERIES = get_metrics_registry().counter(
+    "systema_neo4j_slow_queries_total",
+    "Neo4j queries slower than NEO4J_SLOW_QUERY_MS",
+)
+
+
+def query_text(query) -> str:
+    """str 또는 neo4j.Query의 원문"""
+    return str(getattr(query, "text", query))
+
+
+def normalize_query(query) -> str:
+    """집계 키: 공백을 한 칸으로 합친 쿼리. // 주석이 있으면 실행할 수 없으므로 실행에는 query_text를 씁니다."""
+    return re.sub(r"\s+", " ", query_text(query)).strip()
+
+
+def is_read_query(query: str) -> bool:
+    upper = query.lstrip().upper()
+    if upper.startswith(("PROFILE", "EXPLAIN")):
+        return False
+    return not _WRITE_CLAUSES.search(query)
+
+
+def _flatten_plan(plan: dict, depth: int = 0, out: list | None = None) -> list:
+    out = [] if out is None else out
+    if not plan:
+        return out
+    args = plan.get("args") or {}
+    out.append({
+        "depth": depth,
+        "operator": plan.get("operatorType"),
+        "rows": plan.get("rows"),
+        "db_hits": plan.get("dbHits"),
+        "details": args.get("Details"),
+    })
+    for child in plan.get("children") or []:
+        _flatten_plan(child, depth + 1, out)
+    return out
+
+
+class _QueryStat:
+    __slots__ = ("query", "count", "total_ms", "max_ms", "rows", "server_ms", "slow", "profile", "profiled_at")
+
+    def __init__(self, query: str):
+        self.query = query
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.server_ms = 0.0
+        self.slow = 0
+        self.profile = None
+        self.profiled_at = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "id": hashlib.sha1(self.query.encode("utf-8")).hexdigest()[:12],
+            "query": self.query,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "server_ms": round(self.server_ms, 1),
+            "rows": self.rows,
+            "slow": self.slow,
+            "profile": self.profile,
+        }
+
+
+class QueryProfiler:
+    def __init__(self, slow_query_ms: int, profile_slow_queries: bool):
+        self.slow_query_ms = slow_query_ms
+        self.profile_slow_queries = profile_slow_queries
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._recent_slow = deque(maxlen=RECENT_SLOW_QUERIES)
+        self._driver = None
+        self._executor = None
+        self._profiling = set()
+
+    def attach_driver(self, driver):
+        """PROFILE 표본 실행에 쓸 원본 드라이버"""
+        self._driver = driver
+
+    def record(
+        self,
+        query: str,
+        parameters: dict,
+        elapsed: float,
+        rows: int,
+        summary=None,
+        read_only: bool | None = None,
+        text: str | None = None,
+    ):
+        """query는 normalize_query 결과(집계 키), text는 PROFILE로 다시 실행할 원문입니다. (없으면 query)"""
+        elapsed_ms = elapsed * 1000
+        server_ms = 0.0
+        if summary is not None:
+            server_ms = (summary.result_available_after or 0) + (summary.result_consumed_after or 0)
+        _QUERY_SECONDS.observe(elapsed)
+
+        is_slow = elapsed_ms >= self.slow_query_ms
+        should_profile = False
+        with self._lock:
+            key = query
+            if key not in self._stats and len(self._stats) >= MAX_TRACKED_QUERIES:
+                key = OTHER_QUERIES
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = _QueryStat(key)
+            stat.count += 1
+            stat.total_ms += elapsed_ms
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            stat.rows += rows
+            stat.server_ms += server_ms
+            if is_slow:
+                stat.slow += 1
+                self._recent_slow.append({
+                    "query": query,
+                    "elapsed_ms": round(elapsed_ms, 1),
+                    "server_ms": round(server_ms, 1),
+                    "rows": rows,
+                    "at": time.time(),
+                })
+                now = time.monotonic()
+                if (
+                    self.profile_slow_queries
+                    and key != OTHER_QUERIES
+                    and (read_only if read_only is not None else is_read_query(query))
+                    and key not in self._profiling
+                    and now - stat.profiled_at >= PROFILE_MIN_INTERVAL_SECONDS
+                ):
+                    stat.profiled_at = now
+                    self._profiling.add(key)
+                    should_profile = True
+
+        if is_slow:
+            _SLOW_QUERIES.inc()
+            slow_query_logger.warning(
+                f"느린 Cypher 쿼리 {elapsed_ms:.0f}ms (서버 {server_ms:.0f}ms, {rows}행): {query[:500]}"
+            )
+        if should_profile:
+            self._submit_profile(query, text or query, parameters)
+
+    def _submit_profile(self, query: str, text: str, parameters: dict):
+        if self._driver is None:
+            with self._lock:
+                self._profiling.discard(query)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cypher-profile")
+        self._executor.submit(self._profile, query, text, dict(parameters or {}))
+
+    def _profile(self, query: str, text: str, parameters: dict):
+        """느린 읽기 쿼리(원문 text)를 PROFILE로 다시 실행해 실행 계획을 query 통계에 저장합니다. (요청 경로 밖에서 실행)"""
+        try:
+            with self._driver.session() as session:
+                summary = session.run("PROFILE " + text, parameters).consume()
+            operators = _flatten_plan(summary.profile or {})
+            profile = {
+                "db_hits": sum(op["db_hits"] or 0 for op in operators),
+                "operators": operators[:50],
+                "at": time.time(),
+            }
+            with self._lock:
+                stat = self._stats.get(query)
+                if stat is not None:
+                    stat.profile = profile
+            slow_query_logger.info(f"PROFILE 표본 저장: dbHits={profile['db_hits']} {query[:200]}")
+        except Exception as e:
+            logging.error(f"PROFILE 실행 실패: {e}")
+        finally:
+            with self._lock:
+                self._profiling.discard(query)
+
+    def top_queries(self, limit: int = 20, sort: str = "total_ms") -> list:
+        with self._lock:
+            rows = [stat.as_dict() for stat in self._stats.values()]
+        rows.sort(key=lambda row: row.get(sort, 0), reverse=True)
+        return rows[:limit]
+
+    def recent_slow_queries(self, limit: int = 20) -> list:
+        with self._lock:
+            return list(self._recent_slow)[-limit:][::-1]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent_slow.clear()
+
+
+@lru_cache()
+def get_query_profiler() -> QueryProfiler:
+    return QueryProfiler(
+        slow_query_ms=settings.NEO4J_SLOW_QUERY_MS,
+        profile_slow_queries=settings.NEO4J_PROFILE_SLOW_QUERIES,
+    )
+
+
+# ---- 드라이버 래퍼 ----
+
+class _InstrumentedResult:
+    """neo4j.Result를 감싸 다 읽었을 때 집계합니다. 그 외 속성은 원본으로 위임합니다."""
+
+    def __init__(self, result, query, parameters: dict, read_only: bool | None, profiler: QueryProfiler, started: float):
+        self._result = result
+        self._query = normalize_query(query)
+        self._text = query_text(query)
+        self._parameters = parameters
+        self._read_only = read_only
+        self._profiler = profiler
+        self._started = started
+        self._stopped = None
+        self._rows = 0
+        self._summary = None
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+    def __iter__(self):
+        for record in self._result:
+            self._rows += 1
+            yield record
+        self._finish()
+
+    def single(self, strict: bool = False):
+        record = self._result.single(strict=strict)
+        if record is not None:
+            self._rows += 1
+        self._finish()
+        return record
+
+    def values(self, *keys):
+        values = self._result.values(*keys)
+        self._rows += len(values)
+        self._finish()
+        return values
+
+    def data(self, *keys):
+        data = self._result.data(*keys)
+        self._rows += len(data)
+        self._finish()
+        return data
+
+    def value(self, key=0, default=None):
+        values = self._result.value(key, default)
+        self._rows += len(values)
+        self._finish()
+        return values
+
+    def consume(self):
+        return self._finish()
+
+    def _stop_clock(self):
+        """결과를 읽지 않고 다음 쿼리로 넘어간 경우, 그 시점까지를 소요 시간으로 봅니다."""
+        if self._stopped is None:
+            self._stopped = time.perf_counter()
+
+    def _finish(self):
+        if self._done:
+            return self._summary
+        self._done = True
+        stopped = self._stopped or time.perf_counter()
+        try:
+            self._summary = self._result.consume()
+        finally:
+            self._record(stopped)
+        return self._summary
+
+    def _record(self, stopped: float):
+        self._profiler.record(
+            self._query,
+            self._parameters,
+            stopped - self._started,
+            self._rows,
+            self._summary,
+            read_only=self._read_only,
+            text=self._text,
+        )
+
+
+class _InstrumentedRunner:
+    """session / transaction 공통: run()을 감싸고 읽지 않은 결과를 마무리합니다."""
+
+    _read_only = None
+
+    def __init__(self, inner, profiler: QueryProfiler):
+        self._inner = inner
+        self._profiler = profiler
+        self._pending = []
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def run(self, query, parameters=None, **kwargs):
+        for pending in self._pending:
+            pending._stop_clock()
+        params = dict(parameters or {}, **kwargs)
+        started = time.perf_counter()
+        result = _InstrumentedResult(
+            self._inner.run(query, parameters, **kwargs),
+            query,
+            params,
+            self._read_only,
+            self._profiler,
+            started,
+        )
+        self._pending = [p for p in self._pending if not p._done] + [result]
+        return result
+
+    def _finish_pending(self):
+        pending, self._pending = self._pending, []
+        for result in pending:
+            if not result._done:
+                try:
+                    result._finish()
+                except Exception:
+                    pass
+
+
+class InstrumentedTransaction(_InstrumentedRunner):
+    def __init__(self, inner, profiler: QueryProfiler, read_only: bool | None = None):
+        super().__init__(inner, profiler)
+        self._read_only = read_only
+
+    def commit(self):
+        self._finish_pending()
+        return self._inner.commit()
+
+    def close(self):
+        self._finish_pending()
+        return self._inner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._finish_pending()
+        return self._inner.__exit__(exc_type, exc, tb)
+
+
+class InstrumentedSession(_InstrumentedRunner):
+    def _wrap_work(self, work, read_only: bool):
+        def wrapped(tx, *args, **kwargs):
+            instrumented = InstrumentedTransaction(tx, self._profiler, read_only=read_only)
+            value = work(instrumented, *args, **kwargs)
+            instrumented._finish_pending()
+            return value
+        return wrapped
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._inner.execute_read(self._wrap_work(work, True), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._inner.execute_write(self._wrap_work(work, False), *args, **kwargs)
+
+    def begin_transaction(self, *args, **kwargs):
+        return InstrumentedTransaction(self._inner.begin_transaction(*args, **kwargs), self._profiler)
+
+    def close(self):
+        self._finish_pending()
+        return self._inner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._finish_pending()
+        return self._inner.__exit__(exc_type, exc, tb)
+
+
+class InstrumentedDriver:
+    """neo4j.Driver 래퍼. session()만 계측하고 나머지는 원본 드라이버로 위임합니다."""
+
+    def __init__(self, driver, profiler: QueryProfiler):
+        self._driver = driver
+        self._profiler = profiler
+        profiler.attach_driver(driver)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def session(self, **kwargs):
+        return InstrumentedSession(self._driver.session(**kwargs), self._profiler)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._driver.__exit__(exc_type, exc, tb)
+
+
+def instrument_driver(driver):
+    return InstrumentedDriver(driver, get_query_profiler()) if driver is not None else None
+
+
+# ---- 비동기 드라이버 래퍼 (라우터용 neo4j.AsyncDriver) ----
+
+class _AsyncInstrumentedResult(_InstrumentedResult):
+    """neo4j.AsyncResult용. 집계 기준은 _InstrumentedResult와 같습니다."""
+
+    async def __aiter__(self):
+        async for record in self._result:
+            self._rows += 1
+            yield record
+        await self._finish_async()
+
+    async def single(self, strict: bool = False):
+        record = await self._result.single(strict=strict)
+        if record is not None:
+            self._rows += 1
+        await self._finish_async()
+        return record
+
+    async def values(self, *keys):
+        values = await self._result.values(*keys)
+        self._rows += len(values)
+        await self._finish_async()
+        return values
+
+    async def data(self, *keys):
+        data = await self._result.data(*keys)
+        self._rows += len(data)
+        await self._finish_async()
+        return data
+
+    async def value(self, key=0, default=None):
+        values = await self._result.value(key, default)
+        self._rows += len(values)
+        await self._finish_async()
+        return values
+
+    async def consume(self):
+        return await self._finish_async()
+
+    async def _finish_async(self):
+        if self._done:
+            return self._summary
+        self._done = True
+        stopped = self._stopped or time.perf_counter()
+        try:
+            self._summary = await self._result.consume()
+        finally:
+            self._record(stopped)
+        return self._summary
+
+
+class AsyncInstrumentedSession:
+    def __init__(self, inner, profiler: QueryProfiler):
+        self._inner = inner
+        self._profiler = profiler
+        self._pending = []
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    async def run(self, query, parameters=None, **kwargs):
+        for pending in self._pending:
+            pending._stop_clock()
+        params = dict(parameters or {}, **kwargs)
+        started = time.perf_counter()
+        result = _AsyncInstrumentedResult(
+            await self._inner.run(query, parameters, **kwargs),
+            query,
+            params,
+            None,
+            self._profiler,
+            started,
+        )
+        self._pending = [p for p in self._pending if not p._done] + [result]
+        return result
+
+    async def _finish_pending(self):
+        pending, self._pending = self._pending, []
+        for result in pending:
+            if not result._done:
+                try:
+                    await result._finish_async()
+                except Exception:
+                    pass
+
+    async def close(self):
+        await self._finish_pending()
+        return await self._inner.close()
+
+    async def __aenter__(self):
+        await self._inner.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._finish_pending()
+        return await self._inner.__aexit__(exc_type, exc, tb)
+
+
+class AsyncInstrumentedDriver:
+    """neo4j.AsyncDriver 래퍼. session()만 계측합니다. (PROFILE 표본은 동기 드라이버로 실행)"""
+
+    def __init__(self, driver, profiler: QueryProfiler):
+        self._driver = driver
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def session(self, **kwargs):
+        return AsyncInstrumentedSession(self._driver.session(**kwargs), self._profiler)
+
+
+def instrument_async_driver(driver):
+    return AsyncInstrumentedDriver(driver, get_query_profiler()) if driver is not None else None
@@ -4,89 +4,75 @@ import json
 from functools import lru_cache
 from datetime import datetime
 import math
-
-from llama_index.core import (
-    VectorStoreIndex,
-    StorageContext,
-    SimpleDirectoryReader,
-    Document,
-    Settings as LlamaSettings,
-    KnowledgeGraphIndex, # 추가
-)
-from llama_index.core.node_parser import SentenceSplitter
-from llama_index.embeddings.gemini import GeminiEmbedding
-from llama_index.llms.gemini import Gemini
-try:
-    # 2025 라이브러리: genai.configure 필요시 대비
-    import google.generativeai as genai
-    _HAS_GOOGLE_GENAI = True
-except Exception:
-    _HAS_GOOGLE_GENAI = False
-from llama_index.vector_stores.neo4jvector import Neo4jVectorStore
-from llama_index.graph_stores.neo4j import Neo4jGraphStore # 추가
-
-from supabase import create_client, Client
-from neo4j import GraphDatabase
+import time
 
 from app.core.config import settings
+from app.models.schemas import SearchParams, SearchFilters
+from app.services.components import register
+from app.services.dashboard_snapshot import get_dashboard_snapshot
+from app.services.rag_storage import RagStorage, Neo4jStorage, InMemoryStorage, EMBEDDING_DIMENSION
+from app.services.llm_cache import get_llm_cache, make_cache_key
+from app.services.metadata_answers import answer_metadata_question
+from app.services.metrics import StageTimer
+from app.services.pools import get_neo4j_driver, get_supabase_client, adopt_neo4j_driver
+from app.services.theme_summaries import get_theme_summary_store
+from app.services.rate_limiter import (
+    get_rate_limiter,
+    estimate_tokens,
+    is_throttle_error,
+    INTERACTIVE,
+    BACKGROUND,
+)
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # ---- 클라이언트 초기화 ----
-try:
-    # Supabase 클라이언트 초기화
-    supabase_client: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-    # logging.info("Supabase 클라이언트 초기화 성공")
-except Exception as e:
-    logging.error(f"Supabase 클라이언트 초기화 실패: {e}")
-    supabase_client = None
-
-# Neo4j 드라이버는 Neo4jVectorStore가 내부적으로 생성하므로, 여기서 미리 만들 필요가 없습니다.
-# 하지만 대시보드 등 다른 서비스에서 직접 쿼리를 위해 드라이버가 필요할 수 있습니다.
-@lru_cache(maxsize=None)
-def get_neo4j_driver():
-    """
-    Neo4j 드라이버 인스턴스를 생성하고 반환합니다.
-    @lru_cache를 사용하여 드라이버가 애플리케이션 수명 동안 한 번만 생성되도록 합니다.
-    """
-    # logging.info("Neo4j 드라이버 생성 시도...")
-    try:
-        driver = GraphDatabase.driver(
-            settings.NEO4J_URI,
-            auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD)
-        )
-        # 연결 확인
-        driver.verify_connectivity()
-        # logging.info("Neo4j 드라이버 생성 및 연결 확인 완료")
-        return driver
-    except Exception as e:
-        logging.error(f"Neo4j 드라이버 생성 실패: {e}", exc_info=True)
-        return None
+# llama_index, Gemini, Neo4j 드라이버 등 무거운 모듈은 처음 사용할 때 import합니다.
+# 구성요소는 components 레지스트리에서 지연 생성되며, 앱 lifespan이 백그라운드에서 미리 만들어 둡니다.
+# Neo4j 드라이버와 Supabase 클라이언트(커넥션 풀)는 pools 모듈이 관리합니다.
 
 # ---- LlamaIndex 전역 설정 ----
-@lru_cache(maxsize=None)
 def initialize_rag_settings():
     """
     RAG 파이프라인에 필요한 LLM, 임베딩 모델, 청크 파서, 벡터/그래프 저장소를 초기화하고
     LlamaIndex의 전역 설정으로 지정합니다.
     """
+    from llama_index.core import StorageContext, Settings as LlamaSettings
+    from llama_index.core.node_parser import SentenceSplitter
+
     # logging.info("RAG 설정 초기화 시작...")
     
-    # 보강: 일부 환경에서 GOOGLE_API_KEY 인식 문제 대비하여 사전 구성
-    if _HAS_GOOGLE_GENAI and settings.GOOGLE_API_KEY:
+    if settings.MODEL_PROVIDER == "stub":
+        # 벤치마크/부하 테스트용 결정적 모델 (외부 호출 없음)
+        from app.services.stub_models import StubLLM, StubEmbedding
+
+        llm = StubLLM(
+            latency_ms=settings.STUB_LLM_LATENCY_MS,
+            token_latency_ms=settings.STUB_LLM_TOKEN_LATENCY_MS,
+        )
+        embed_model = StubEmbedding(dimension=EMBEDDING_DIMENSION, latency_ms=settings.STUB_EMBED_LATENCY_MS)
+        logging.info("Model provider: stub")
+    else:
+        from llama_index.embeddings.gemini import GeminiEmbedding
+        from llama_index.llms.gemini import Gemini
+
+        # 보강: 일부 환경에서 GOOGLE_API_KEY 인식 문제 대비하여 사전 구성
         try:
-            genai.configure(api_key=settings.GOOGLE_API_KEY)
+            import google.generativeai as genai
+            if settings.GOOGLE_API_KEY:
+                genai.configure(api_key=settings.GOOGLE_API_KEY)
         except Exception:
             pass
-    llm = Gemini(model_name=settings.LLM_MODEL, api_key=settings.GOOGLE_API_KEY)
 
-    # Gemini 임베딩(기본 768차원) 사용 - 초기화 시 외부 호출 없음
-    embed_model = GeminiEmbedding(
-        model_name="models/embedding-001",
-        api_key=settings.GOOGLE_API_KEY,
-    )
-    logging.info("Embedding model configured: Gemini embedding-001 (768 dims)")
+        llm = Gemini(model_name=settings.LLM_MODEL, api_key=settings.GOOGLE_API_KEY)
+
+        # Gemini 임베딩(기본 768차원) 사용 - 초기화 시 외부 호출 없음
+        embed_model = GeminiEmbedding(
+            model_name="models/embedding-001",
+            api_key=settings.GOOGLE_API_KEY,
+        )
+        logging.info("Embedding model configured: Gemini embedding-001 (768 dims)")
     node_parser = SentenceSplitter(chunk_size=1024, chunk_overlap=128)  # 청크 사이즈 최적화 (한국어 회의록용)
 
     LlamaSettings.llm = llm
@@ -95,12 +81,19 @@ def initialize_rag_settings():
     
     # logging.info("LlamaIndex 전역 LLM, 임베딩 모델, 노드 파서 설정 완료")
 
+    if settings.RAG_BACKEND == "memory":
+        # InMemoryStorage가 자체 StorageContext를 가집니다. (get_storage 참고)
+        return llm, embed_model, None
+
+    from llama_index.graph_stores.neo4j import Neo4jGraphStore
+    from llama_index.vector_stores.neo4jvector import Neo4jVectorStore
+
     # 벡터 저장을 위한 Neo4jVectorStore
     neo4j_vector_store = Neo4jVectorStore(
         url=settings.NEO4J_URI,
         username=settings.NEO4J_USERNAME,
         password=settings.NEO4J_PASSWORD,
-        embedding_dimension=768,  # Gemini embedding-001 차원과 일치
+        embedding_dimension=EMBEDDING_DIMENSION,  # Gemini embedding-001 차원과 일치
         database="neo4j"
     )
     # logging.info("Neo4j 벡터 저장소 초기화 완료")
@@ -113,6 +106,10 @@ def initialize_rag_settings():
         database="neo4j"
     )
     # logging.info("Neo4j 그래프 저장소 초기화 완료")
+
+    # 두 저장소가 각자 만든 드라이버 대신 공유 드라이버(튜닝된 풀 하나)를 사용합니다.
+    adopt_neo4j_driver(neo4j_vector_store)
+    adopt_neo4j_driver(neo4j_graph_store)
     
     # 두 저장소를 포함하는 StorageContext 생성
     storage_context = StorageContext.from_defaults(
@@ -122,15 +119,165 @@ def initialize_rag_settings():
     
     return llm, embed_model, storage_context
 
-# 애플리케이션 시작 시 RAG 설정 초기화 실행
-LLM, EMBED_MODEL, STORAGE_CONTEXT = initialize_rag_settings()
+_MODELS = register("models", initialize_rag_settings)
+
+def _require_models() -> tuple:
+    """(LLM, 임베딩 모델, StorageContext). 초기화에 실패한 상태면 RuntimeError"""
+    models = _MODELS.get()
+    if models is None:
+        raise RuntimeError(f"RAG 모델/저장소가 준비되지 않았습니다: {_MODELS.status()['error']}")
+    return models
+
+def get_llm():
+    return _require_models()[0]
+
+def get_embed_model():
+    return _require_models()[1]
+
+def get_storage_context():
+    return _require_models()[2]
+
+@lru_cache(maxsize=None)
+def get_storage() -> RagStorage:
+    """
+    수집/검색이 사용하는 저장소. settings.RAG_BACKEND로 구현을 고릅니다.
+    - neo4j(기본): Supabase + Neo4j
+    - memory: 프로세스 내 저장소 (벤치마크/부하 테스트용)
+    """
+    if settings.RAG_BACKEND == "memory":
+        return InMemoryStorage(dimension=EMBEDDING_DIMENSION)
+    return Neo4jStorage(get_neo4j_driver, get_supabase_client, get_storage_context)
+
+# 임베딩 배치 크기 (Gemini batchEmbedContents 한 번에 보낼 텍스트 수)
+EMBED_BATCH_SIZE = 10
+
+# 문서 테마 분류 프롬프트
+THEME_PROMPT_TEMPLATE = """
+다음 회의록을 분석하여 가장 적절한 테마를 하나만 선택해주세요:
+
+제목: {title}
+내용: {content}...
+
+가능한 테마: 개발, 설계, 기획, 마케팅, QA, 사업, 일반 회의, 기타
+
+테마 이름만 답해주세요.
+"""
+
+# 문서 요약 프롬프트
+SUMMARY_PROMPT_TEMPLATE = """
+다음 회의록의 핵심 내용을 2-3문장으로 요약해주세요:
+
+제목: {title}
+내용: {content}...
+
+간결하고 명확하게 요약해주세요.
+"""
+
+# 테마별 종합 요약 프롬프트 (대시보드)
+THEME_SUMMARY_PROMPT_TEMPLATE = """
+다음은 '{theme}' 테마의 개별 문서 요약들입니다:
+
+{summaries}
+
+위 요약들을 종합하여 이 테마의 핵심 내용을 2-3문장으로 요약해주세요.
+"""
+
+# 지식 그래프 트리플렛 추출 프롬프트
+KG_MAX_TRIPLETS_PER_CHUNK = 10  # 증가: 더 많은 관계 추출
+KG_TRIPLET_EXTRACT_TEMPLATE = (
+    "다음 회의록에서 중요한 엔티티(사람, 조직, 프로젝트, 시스템, 기술)와 "
+    "그들 간의 관계를 추출해주세요. 특히 의사결정, 역할, 책임, "
+    "일정, 의존성 등에 초점을 맞춰주세요.\n"
+    "---------------------\n"
+    "{text}\n"
+    "---------------------\n"
+    "위 텍스트에서 최대 {max_knowledge_triplets}개의 "
+    "(주체, 관계, 객체) 형태의 트리플렛을 추출해주세요.\n"
+)
+
+# ---- Gemini 호출 래퍼 (레이트 리미터 적용) ----
+
+def llm_complete(prompt: str, lane: str = BACKGROUND) -> str:
+    """
+    레이트 리미터를 거쳐 LLM.complete를 호출하고 응답 텍스트를 반환합니다.
+    429/503 응답은 리미터가 백오프 후 재시도합니다.
+    """
+    response = get_rate_limiter("llm").call(
+        get_llm().complete, prompt,
+        lane=lane,
+        tokens=estimate_tokens(prompt),
+    )
+    return response.text.strip()
+
+def cached_llm_complete(template: str, lane: str = BACKGROUND, **variables) -> str:
+    """
+    프롬프트 템플릿을 채워 LLM을 호출하되, (모델, 템플릿, 입력) 해시로 결과를 캐시합니다.
+    같은 입력으로 다시 호출하면 LLM을 거치지 않고 저장된 결과를 반환합니다.
+    """
+    prompt = template.format(**variables)
+    cache = get_llm_cache()
+    if cache is None:
+        return llm_complete(prompt, lane=lane)
+
+    # stub 모델 응답이 Gemini 캐시 항목과 섞이지 않도록 제공자별로 키를 나눕니다.
+    model_name = "stub" if settings.MODEL_PROVIDER == "stub" else settings.LLM_MODEL
+    key = make_cache_key(model_name, template, variables)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = llm_complete(prompt, lane=lane)
+    if result:
+        cache.set(key, result, meta={"model": model_name})
+    return result
+
+def embed_query(text: str, lane: str = INTERACTIVE) -> list:
+    """레이트 리미터를 거쳐 질문 임베딩을 생성합니다."""
+    return get_rate_limiter("embedding").call(
+        get_embed_model().get_query_embedding, text,
+        lane=lane,
+        tokens=estimate_tokens(text),
+    )
+
+def embed_texts(texts: list, lane: str = BACKGROUND) -> list:
+    """
+    레이트 리미터를 거쳐 여러 텍스트를 배치 단위로 임베딩합니다.
+    배치 하나에 포함된 텍스트 수만큼 요청 예산을 소모합니다.
+    """
+    limiter = get_rate_limiter("embedding")
+    embed_model = get_embed_model()
+    embeddings = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start:start + EMBED_BATCH_SIZE]
+        embeddings.extend(limiter.call(
+            embed_model.get_text_embedding_batch, batch,
+            lane=lane,
+            tokens=sum(estimate_tokens(t) for t in batch),
+            requests=len(batch),
+        ))
+    return embeddings
+
+def _extract_kg_triplets(text: str) -> list:
+    """
+    KnowledgeGraphIndex의 kg_triplet_extract_fn으로 사용되는 트리플렛 추출 함수.
+    LlamaIndex 내부 LLM 호출 대신 cached_llm_complete를 사용해 레이트 리미터와 캐시를 적용합니다.
+    """
+    from llama_index.core import KnowledgeGraphIndex
+
+    response = cached_llm_complete(
+        KG_TRIPLET_EXTRACT_TEMPLATE,
+        lane=BACKGROUND,
+        text=text,
+        max_knowledge_triplets=KG_MAX_TRIPLETS_PER_CHUNK,
+    )
+    return KnowledgeGraphIndex._parse_triplet_response(response)
 
 # ---- 서비스 함수 ----
 
 def update_document_status(document_id: str, status: str):
     """Supabase에서 문서 상태를 업데이트하는 헬퍼 함수"""
     try:
-        supabase_client.from_("documents").update({"status": status}).eq("id", document_id).execute()
+        get_storage().update_document(document_id, {"status": status})
         # logging.info(f"문서 ID {document_id}의 상태를 {status}로 업데이트했습니다.")
     except Exception as e:
         logging.error(f"문서 ID {document_id}의 상태 업데이트 실패: {e}")
@@ -213,167 +360,239 @@ def extract_speaker_from_chunk(text: str) -> dict:
     
     return {}
 
-def perform_hybrid_search(question: str, top_k: int = 10) -> list:
+def perform_hybrid_search(
+    question: str,
+    top_k: int = 10,
+    timer: StageTimer | None = None,
+    params: SearchParams | None = None,
+    query_embedding: list | None = None,
+    filters: SearchFilters | None = None,
+) -> list:
     """
     하이브리드 검색 수행 (벡터 + 키워드 검색 결합)
     Reciprocal Rank Fusion (RRF) 알고리즘을 사용하여 결과 병합
+    timer를 넘기면 단계별 소요 시간(임베딩, 벡터, 키워드, 융합, 노드 조회)을 기록합니다.
+    params로 후보 수/임계값/가중치를 바꿀 수 있고, query_embedding을 넘기면 질문 임베딩을 건너뜁니다. (평가용)
+    filters(날짜, 테마, 참석자, 발언자, 문서 id)는 점수를 매기기 전에 벡터/키워드 검색 양쪽의 범위를 제한합니다.
     """
-    from llama_index.core.schema import NodeWithScore, TextNode
-    import numpy as np
-    
-    driver = get_neo4j_driver()
-    if not driver:
-        logging.error("Neo4j 드라이버를 가져올 수 없습니다.")
-        return []
+    timer = timer or StageTimer("search")
+    params = params or SearchParams()
+    storage = get_storage()
+    candidates = top_k * params.candidate_multiplier
     
     try:
         # 질문을 임베딩으로 변환
-        query_embedding = EMBED_MODEL.get_query_embedding(question)
+        if query_embedding is None:
+            with timer.span("query_embedding"):
+                query_embedding = embed_query(question)
         logging.info(f"Query embedding dimension: {len(query_embedding)}")
         
-        with driver.session() as session:
-            # 1. 벡터 검색
-            vector_query = """
-            CALL db.index.vector.queryNodes('vector', $k, $embedding) 
-            YIELD node, score
-            WHERE node:Chunk
-            RETURN node, score
-            ORDER BY score DESC
-            """
-            vector_results = session.run(
-                vector_query, 
-                k=top_k * 2,  # 더 많이 가져와서 나중에 필터링
-                embedding=query_embedding
-            ).values()
-            
-            # 2. 키워드 검색
-            keyword_search_query = """
-            CALL db.index.fulltext.queryNodes('keyword', $q, {limit: $limit}) 
-            YIELD node, score
-            WHERE node:Chunk
-            RETURN node, score
-            ORDER BY score DESC
-            """
-            keyword_results = session.run(
-                keyword_search_query,
-                q=question,
-                limit=top_k * 2
-            ).values()
-            
-            # 3. RRF 스코어 계산 및 원본 점수 보존
-            rrf_scores = {}
-            original_scores = {}  # 원본 검색 점수 보존
-            k = 60  # RRF 파라미터
-            
-            # 벡터 검색 결과에 대한 RRF 스코어
-            vector_count = 0
-            vector_threshold = 0.7  # 관련성 임계값 설정
-            
-            for rank, (node, score) in enumerate(vector_results):
-                node_id = node.get('id')
-                if node_id:
-                    # 디버깅: 실제 벡터 점수 확인
-                    if rank < 3:  # 상위 3개만 로깅
-                        logging.info(f"Vector search result {rank+1}: raw_score={score}, node_id={node_id[:8]}...")
-                    
-                    # 임계값 이하는 제외
-                    if float(score) < vector_threshold:
-                        logging.info(f"Skipping vector result with score {score} < {vector_threshold}")
-                        continue
-                        
-                    vector_count += 1
-                    
-                    # Neo4j 벡터 인덱스는 이미 정렬된 상위 결과만 반환
-                    # score 값의 의미를 정확히 파악하기 위해 로깅
-                    rrf_scores[node_id] = rrf_scores.get(node_id, 0) + 1.0 / (k + rank + 1)
-                    
-                    # 원본 점수를 그대로 저장 (나중에 변환)
-                    if node_id not in original_scores:
-                        original_scores[node_id] = float(score)
-            
-            logging.info(f"Vector search returned {vector_count} results for query: '{question[:50]}...'")
-            
-            # 키워드 검색 결과에 대한 RRF 스코어
-            keyword_count = 0
-            for rank, (node, score) in enumerate(keyword_results):
-                node_id = node.get('id')
-                if node_id:
-                    keyword_count += 1
-                    # 디버깅: 키워드 검색 점수 확인
-                    if rank < 3:
-                        logging.info(f"Keyword search result {rank+1}: score={score}, node_id={node_id[:8]}...")
-                    
-                    # 키워드 검색도 최소 임계값 적용
-                    if float(score) < 0.5:  # 키워드 검색 임계값 낮춤
-                        continue
-                        
-                    # 키워드 검색에 더 높은 가중치 부여
-                    rrf_scores[node_id] = rrf_scores.get(node_id, 0) + 1.5 / (k + rank + 1)
-                    
-                    # 키워드 검색 점수는 벡터 점수가 없을 때만 사용
-                    if node_id not in original_scores:
-                        original_scores[node_id] = min(float(score) * 0.2, 1.0)  # 키워드 점수 조정
-            
-            logging.info(f"Keyword search returned {keyword_count} results")
-
-            weighted_rrf_scores = {}
-            for node_id, base_score in rrf_scores.items():
-                node_query = """
-                MATCH (c:Chunk {id: $node_id})-[:BELONGS_TO]->(d:Document)
-                RETURN d.created_at AS created_at
-                """
-                result = session.run(node_query, node_id=node_id).single()
-                created_at = result["created_at"] if result and "created_at" in result else None
-
-                weight = time_decay_weight(created_at)
-                weighted_rrf_scores[node_id] = base_score * weight
-            
-            # 4. 상위 결과 선택 및 노드 생성 (시간 가중치 반영)
-            sorted_nodes = sorted(weighted_rrf_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
-            logging.info(f"Final RRF merged results: {len(sorted_nodes)} nodes selected from {len(rrf_scores)} candidates")
-            
-            # 노드 정보 가져오기
-            result_nodes = []
-            for node_id, rrf_score in sorted_nodes:
-                # 노드 상세 정보 조회
-                node_query = """
-                MATCH (c:Chunk {id: $node_id})
-                OPTIONAL MATCH (c)-[:BELONGS_TO]->(d:Document)
-                RETURN c, d
-                """
-                result = session.run(node_query, node_id=node_id).single()
-                
-                if result:
-                    chunk_node = result['c']
-                    doc_node = result['d']
-                    
-                    # TextNode 생성
-                    text_node = TextNode(
-                        text=chunk_node.get('text', chunk_node.get('_node_content', '')),
-                        id_=chunk_node.get('id'),
-                        metadata={
-                            'document_id': chunk_node.get('document_id', chunk_node.get('ref_doc_id')),
-                            'title': doc_node.get('title') if doc_node else None,
-                            'created_at': str(doc_node.get('created_at')) if doc_node and doc_node.get('created_at') else None,
-                            'rrf_score': rrf_score
-                        }
+        # 0. 2단계 검색: 요약 임베딩으로 후보 문서를 먼저 고릅니다.
+        document_ids, speakers = _resolve_filters(storage, filters)
+        if document_ids == []:
+            logging.info("필터 조건에 맞는 문서가 없습니다.")
+            return []
+        timer.lap("filter")
+
+        if params.document_prefilter > 0:
+            try:
+                # 필터가 있으면 필터를 통과한 문서 안에서 고릅니다.
+                selected = [
+                    document_id
+                    for document_id, _ in storage.document_vector_search(
+                        query_embedding, params.document_prefilter, document_ids=document_ids
                     )
+                ]
+                if selected:
+                    document_ids = selected
+                else:
+                    logging.info("요약 임베딩이 있는 문서가 없어 문서 선택 없이 검색합니다.")
+            except Exception as e:
+                logging.warning(f"문서 선택 단계 실패, 문서 선택 없이 진행합니다: {e}")
+            timer.lap("document_search")
+
+        # 1. 벡터 검색 (더 많이 가져와서 나중에 필터링)
+        vector_results = storage.vector_search(query_embedding, candidates, document_ids=document_ids, speakers=speakers)
+        timer.lap("vector_search")
+        
+        # 2. 키워드 검색
+        keyword_results = storage.keyword_search(question, candidates, document_ids=document_ids, speakers=speakers)
+        timer.lap("keyword_search")
+        
+        # 3. RRF 스코어 계산 및 원본 점수 보존
+        rrf_scores = {}
+        original_scores = {}  # 원본 검색 점수 보존
+        k = params.rrf_k  # RRF 파라미터
+        
+        # 벡터 검색 결과에 대한 RRF 스코어
+        vector_count = 0
+        vector_threshold = params.vector_threshold  # 관련성 임계값 설정
+        
+        for rank, (node_id, score) in enumerate(vector_results):
+            if node_id:
+                # 디버깅: 실제 벡터 점수 확인
+                if rank < 3:  # 상위 3개만 로깅
+                    logging.info(f"Vector search result {rank+1}: raw_score={score}, node_id={node_id[:8]}...")
+                
+                # 임계값 이하는 제외
+                if float(score) < vector_threshold:
+                    logging.info(f"Skipping vector result with score {score} < {vector_threshold}")
+                    continue
                     
-                    # 원본 검색 점수 사용 (없으면 RRF 점수를 정규화)
-                    display_score = original_scores.get(node_id, rrf_score * 100)
+                vector_count += 1
+                
+                # Neo4j 벡터 인덱스는 이미 정렬된 상위 결과만 반환
+                # score 값의 의미를 정확히 파악하기 위해 로깅
+                rrf_scores[node_id] = rrf_scores.get(node_id, 0) + 1.0 / (k + rank + 1)
+                
+                # 원본 점수를 그대로 저장 (나중에 변환)
+                if node_id not in original_scores:
+                    original_scores[node_id] = float(score)
+        
+        logging.info(f"Vector search returned {vector_count} results for query: '{question[:50]}...'")
+        
+        # 키워드 검색 결과에 대한 RRF 스코어
+        keyword_count = 0
+        for rank, (node_id, score) in enumerate(keyword_results):
+            if node_id:
+                keyword_count += 1
+                # 디버깅: 키워드 검색 점수 확인
+                if rank < 3:
+                    logging.info(f"Keyword search result {rank+1}: score={score}, node_id={node_id[:8]}...")
+                
+                # 키워드 검색도 최소 임계값 적용
+                if float(score) < params.keyword_threshold:  # 키워드 검색 임계값 낮춤
+                    continue
                     
-                    node_with_score = NodeWithScore(
-                        node=text_node,
-                        score=display_score
-                    )
-                    result_nodes.append(node_with_score)
+                # 키워드 검색에 더 높은 가중치 부여
+                rrf_scores[node_id] = rrf_scores.get(node_id, 0) + params.keyword_weight / (k + rank + 1)
+                
+                # 키워드 검색 점수는 벡터 점수가 없을 때만 사용
+                if node_id not in original_scores:
+                    original_scores[node_id] = min(float(score) * 0.2, 1.0)  # 키워드 점수 조정
+        
+        logging.info(f"Keyword search returned {keyword_count} results")
+
+        # 후보 전체의 문서 생성 시각을 한 번에 조회
+        created_at_by_id = storage.chunk_created_at(list(rrf_scores))
+        weighted_rrf_scores = {
+            node_id: base_score * time_decay_weight(created_at_by_id.get(node_id), params.decay_rate)
+            for node_id, base_score in rrf_scores.items()
+        }
+        
+        # 4. 상위 결과 선택 및 노드 생성 (시간 가중치 반영)
+        sorted_nodes = sorted(weighted_rrf_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+        logging.info(f"Final RRF merged results: {len(sorted_nodes)} nodes selected from {len(rrf_scores)} candidates")
+        timer.lap("fusion")
+        
+        # 노드 정보 가져오기 (상위 top_k개를 한 번에 조회)
+        chunks = storage.fetch_chunks([node_id for node_id, _ in sorted_nodes])
+        result_nodes = []
+        for node_id, rrf_score in sorted_nodes:
+            chunk = chunks.get(node_id)
+            if not chunk:
+                continue
             
-            return result_nodes
+            # 원본 검색 점수 사용 (없으면 RRF 점수를 정규화)
+            display_score = original_scores.get(node_id, rrf_score * 100)
+            result_nodes.append(_chunk_node(node_id, chunk, display_score, rrf_score=rrf_score))
+        
+        timer.lap("node_fetch")
+        return result_nodes
             
     except Exception as e:
         logging.error(f"하이브리드 검색 중 오류 발생: {e}", exc_info=True)
         return []
 
+def document_embedding_text(title: str, summary: str | None) -> str:
+    """Document.embedding(2단계 검색의 문서 선택용)에 넣는 텍스트: 제목 + 생성된 요약"""
+    return f"{title}\n{summary}" if summary else title
+
+def backfill_document_embeddings(batch_size: int = 100) -> int:
+    """
+    요약 임베딩이 없는 기존 문서의 Document.embedding을 채웁니다. (2단계 검색 도입 전 수집된 문서)
+    요약만 임베딩하므로 청크 재수집이나 LLM 호출은 없습니다. 반환: 채운 문서 수
+    """
+    storage = get_storage()
+    total = 0
+    while True:
+        documents = storage.document_embedding_backlog(batch_size)
+        if not documents:
+            break
+        embeddings = embed_texts(
+            [document_embedding_text(doc.get('title') or '', doc.get('summary')) for doc in documents],
+            lane=BACKGROUND,
+        )
+        for doc, embedding in zip(documents, embeddings):
+            storage.set_document_embedding(doc['id'], embedding)
+        total += len(documents)
+        logging.info(f"문서 요약 임베딩 백필: {total}개")
+        if len(documents) < batch_size:
+            break
+    return total
+
+def _chunk_node(node_id: str, chunk: dict, score: float, **extra):
+    """fetch_chunks 결과 -> NodeWithScore. 문서 메타데이터(title, created_at)는 Document 노드에서 가져온 값입니다."""
+    from llama_index.core.schema import NodeWithScore, TextNode
+
+    metadata = {
+        'document_id': chunk.get('document_id'),
+        'title': chunk.get('title'),
+        'created_at': str(chunk['created_at']) if chunk.get('created_at') else None,
+        **extra,
+    }
+    if chunk.get('chunk_index') is not None:
+        metadata['chunk_index'] = chunk['chunk_index']
+    if chunk.get('speaker'):
+        metadata['speaker'] = chunk['speaker']
+    return NodeWithScore(node=TextNode(text=chunk.get('text') or '', id_=node_id, metadata=metadata), score=score)
+
+def _resolve_filters(storage: RagStorage, filters: SearchFilters | None) -> tuple:
+    """
+    SearchFilters -> (document_ids, speakers). 제한이 없는 항목은 None입니다.
+    document_ids가 빈 목록이면 조건에 맞는 문서가 없다는 뜻입니다.
+    """
+    if filters is None:
+        return None, None
+    document_ids = storage.filter_documents(filters) if filters.scopes_documents else None
+    return document_ids, (list(filters.speakers) or None)
+
+def perform_vector_search(
+    question: str,
+    top_k: int = 10,
+    timer: StageTimer | None = None,
+    filters: SearchFilters | None = None,
+) -> list:
+    """
+    임계값 없이 벡터 유사도 상위 top_k 청크를 반환합니다.
+    하이브리드 검색이 임계값 때문에 아무것도 남기지 못했을 때 채팅 폴백으로 사용합니다. (같은 필터 적용)
+    """
+    timer = timer or StageTimer("search")
+    storage = get_storage()
+    try:
+        document_ids, speakers = _resolve_filters(storage, filters)
+        if document_ids == []:
+            return []
+        with timer.span("query_embedding"):
+            query_embedding = embed_query(question)
+        vector_results = [
+            (node_id, score)
+            for node_id, score in storage.vector_search(query_embedding, top_k, document_ids=document_ids, speakers=speakers)
+            if node_id
+        ]
+        timer.lap("vector_search")
+        chunks = storage.fetch_chunks([node_id for node_id, _ in vector_results])
+        result_nodes = [
+            _chunk_node(node_id, chunks[node_id], float(score))
+            for node_id, score in vector_results
+            if node_id in chunks
+        ]
+        timer.lap("node_fetch")
+        return result_nodes
+    except Exception as e:
+        logging.error(f"벡터 검색 중 오류 발생: {e}", exc_info=True)
+        return []
+
 def time_decay_weight(created_at: str, decay_rate=0.05) -> float:
     """
     문서 생성 시점을 기반으로 시간 가중치를 계산합니다.
@@ -388,36 +607,19 @@ def time_decay_weight(created_at: str, decay_rate=0.05) -> float:
     days_diff = (datetime.now() - created_dt).days
     return math.exp(-decay_rate * days_diff)
 
-def _create_document_node(document_id: str, doc_data: dict):
+def delete_document_graph(document_id: str):
     """
-    원본 문서를 나타내는 Document 노드를 생성하고 메타데이터를 저장합니다.
+    Neo4j에서 문서와 관련된 청크, Document 노드, 엔티티를 모두 삭제합니다.
+    재청킹/재수집/삭제 시 공통으로 사용합니다.
     """
-    driver = get_neo4j_driver()
-    if not driver:
-        logging.error(f"문서 {document_id}의 노드 생성 실패: Neo4j 드라이버를 가져올 수 없습니다.")
+    storage = get_storage()
+    storage.delete_document(document_id)
+    if not storage.persistent:
         return
 
-    query = """
-    MERGE (d:Document {id: $document_id})
-    SET d.title = $title,
-        d.created_at = datetime($created_at),
-        d.theme = $theme,
-        d.reference_urls = $reference_urls,
-        d.last_updated = timestamp()
-    """
-    try:
-        with driver.session(database="neo4j") as session:
-            session.run(
-                query,
-                document_id=document_id,
-                title=doc_data.get('title'),
-                created_at=doc_data.get('created_at'),
-                theme=doc_data.get('theme', ''),
-                reference_urls=doc_data.get('reference_urls', [])
-            )
-            # logging.info(f"문서 ID {document_id}에 대한 Document 노드를 생성/업데이트했습니다.")
-    except Exception as e:
-        logging.error(f"문서 ID {document_id}의 Document 노드 생성 중 오류 발생: {e}", exc_info=True)
+    removed_theme = get_dashboard_snapshot().remove_document(document_id)
+    if removed_theme:
+        get_theme_summary_store().schedule_refresh(removed_theme)
 
 
 def process_ingestion(document_id: str):
@@ -427,27 +629,36 @@ def process_ingestion(document_id: str):
     """
     # logging.info(f"문서 ID {document_id}에 대한 수집 처리 시작...")
     
+    from llama_index.core import Document, KnowledgeGraphIndex, Settings as LlamaSettings
+    from llama_index.core.schema import MetadataMode
+
     update_document_status(document_id, "INGESTING")
+    timer = StageTimer("ingestion")
+    storage = get_storage()
 
     try:
+        # LlamaIndex 전역 설정(노드 파서 등)이 준비되어 있어야 합니다.
+        _require_models()
+
+
         # 1. Supabase에서 문서와 관련 레이블들을 함께 가져오기
-        doc_response = supabase_client.from_("documents").select("id, title, content, created_at").eq("id", document_id).single().execute()
-        doc_data = doc_response.data
+        doc_data = storage.get_document(document_id)
         if not doc_data:
             raise ValueError("Supabase에서 문서를 찾을 수 없습니다.")
 
-        labels_response = supabase_client.from_("labels").select("key, value").eq("document_id", document_id).execute()
-        labels_data = labels_response.data or []
+        labels_data = storage.get_labels(document_id)
         
         # 레이블 데이터를 메타데이터로 변환
         metadata = {item['key']: item['value'] for item in labels_data}
         metadata['document_id'] = doc_data['id']
         metadata['title'] = doc_data['title']
         metadata['created_at'] = doc_data['created_at']
+        timer.lap("load_document")
 
         # 2. 회의록 메타데이터 추출
         meeting_metadata = extract_meeting_metadata(doc_data['content'])
         metadata.update(meeting_metadata)
+        timer.lap("metadata_extraction")
         
         # 3. LlamaIndex Document 객체 생성
         doc = Document(
@@ -488,7 +699,6 @@ def process_ingestion(document_id: str):
             seen_texts.add(text_key)
             
             node.metadata['document_id'] = doc_data['id']
-            node.metadata['ref_doc_id'] = doc_data['id']  # Neo4j vector store가 사용하는 필드
             node.metadata['chunk_index'] = i
             
             # 청크별 발언자 정보 추출 (있는 경우)
@@ -500,24 +710,19 @@ def process_ingestion(document_id: str):
         
         logging.info(f"Filtered {len(nodes)} chunks to {len(filtered_nodes)} chunks for document {document_id}")
         nodes = filtered_nodes
+        timer.lap("chunking")
         
         # 5. 먼저 Document 노드 생성 (테마와 요약 생성 포함)
         theme = metadata.get('theme', '')
         if not theme:
             # Use LLM to analyze content and suggest theme
             try:
-                theme_prompt = f"""
-                다음 회의록을 분석하여 가장 적절한 테마를 하나만 선택해주세요:
-                
-                제목: {doc_data['title']}
-                내용: {doc_data['content'][:500]}...
-                
-                가능한 테마: 개발, 설계, 기획, 마케팅, QA, 사업, 일반 회의, 기타
-                
-                테마 이름만 답해주세요.
-                """
-                response = LLM.complete(theme_prompt)
-                suggested_theme = response.text.strip()
+                suggested_theme = cached_llm_complete(
+                    THEME_PROMPT_TEMPLATE,
+                    lane=BACKGROUND,
+                    title=doc_data['title'],
+                    content=doc_data['content'][:500],
+                )
                 # Validate the suggested theme
                 valid_themes = ['개발', '설계', '기획', '마케팅', 'QA', '사업', '일반 회의', '기타']
                 theme = suggested_theme if suggested_theme in valid_themes else '일반 회의'
@@ -536,76 +741,84 @@ def process_ingestion(document_id: str):
                 else:
                     theme = '일반 회의'
             # logging.info(f"Auto-assigned theme '{theme}' for document {document_id}")
+        timer.lap("theme")
         
         # Generate summary for the document
         summary = ""
         try:
-            summary_prompt = f"""
-            다음 회의록의 핵심 내용을 2-3문장으로 요약해주세요:
-            
-            제목: {doc_data['title']}
-            내용: {doc_data['content'][:1500]}...
-            
-            간결하고 명확하게 요약해주세요.
-            """
-            response = LLM.complete(summary_prompt)
-            summary = response.text.strip()
+            summary = cached_llm_complete(
+                SUMMARY_PROMPT_TEMPLATE,
+                lane=BACKGROUND,
+                title=doc_data['title'],
+                content=doc_data['content'][:1500],
+            )
             logging.info(f"Generated summary for document {document_id}")
         except Exception as e:
             logging.error(f"Failed to generate summary for document {document_id}: {e}")
             summary = f"{doc_data['title']}에 대한 회의록입니다."
+        timer.lap("summary")
         
         # Update document in Supabase with theme and summary
         try:
-            supabase_client.from_("documents").update({
+            storage.update_document(document_id, {
                 "theme": theme,
                 "summary": summary
-            }).eq("id", document_id).execute()
+            })
             logging.info(f"Updated document {document_id} with theme '{theme}' and summary")
         except Exception as e:
             logging.error(f"Failed to update document {document_id} with theme and summary: {e}")
         
         # Create Document node in Neo4j FIRST
-        _create_document_node(document_id, {
+        # 회의 메타데이터는 Document 노드에만 저장합니다. (Chunk에는 document_id만)
+        storage.upsert_document_node(document_id, {
             'title': doc_data['title'],
             'created_at': doc_data['created_at'],
             'theme': theme,
-            'reference_urls': metadata.get('reference_urls', [])
+            'reference_urls': metadata.get('reference_urls', []),
+            # 본문에서 날짜를 찾지 못하면 문서 날짜를 회의 날짜로 씁니다. (날짜 필터가 인덱스 하나로 동작하도록)
+            'meeting_date': metadata.get('meeting_date') or str(doc_data['created_at'])[:10],
+            'attendees': metadata.get('attendees', []),
+            'location': metadata.get('location'),
+            'agenda': metadata.get('agenda'),
         })
+        timer.lap("document_node")
         
-        # 6. VectorStoreIndex로 노드 인덱싱
-        vector_index = VectorStoreIndex(
-            nodes=nodes,
-            storage_context=STORAGE_CONTEXT,
-            show_progress=True,
+        # 6. 청크와 문서 요약 임베딩 (레이트 리미터를 거쳐 한 번에 배치로 계산)
+        embeddings = embed_texts(
+            [document_embedding_text(doc_data['title'], summary)]
+            + [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes],
+            lane=BACKGROUND,
         )
+        for node, embedding in zip(nodes, embeddings[1:]):
+            node.embedding = embedding
+        timer.lap("embedding")
+
+        storage.set_document_embedding(document_id, embeddings[0])
+        storage.add_chunks(nodes)
+        timer.lap("vector_store")
         
         # 7. Chunk 노드 확인 및 Document 관계 생성
-        driver = get_neo4j_driver()
-        
-        if driver:
-            with driver.session() as session:
-                # Chunk 노드 확인 (ref_doc_id로 검색)
-                chunk_result = session.run("""
-                    MATCH (c:Chunk)
-                    WHERE c.ref_doc_id = $document_id OR c.document_id = $document_id
-                    RETURN count(c) as chunk_count
-                """, document_id=document_id)
-                
-                chunk_count = chunk_result.single()['chunk_count']
-                # logging.info(f"Created {chunk_count} Chunk nodes for document {document_id}")
-                
-                # Document-Chunk 관계 생성
-                rel_result = session.run("""
-                    MATCH (d:Document {id: $document_id})
-                    MATCH (c:Chunk)
-                    WHERE c.ref_doc_id = $document_id OR c.document_id = $document_id
-                    MERGE (c)-[:BELONGS_TO]->(d)
-                    RETURN count(*) as rel_count
-                """, document_id=document_id)
-                
-                rel_count = rel_result.single()['rel_count']
-                # logging.info(f"Created {rel_count} Document-Chunk relationships")
+        storage.link_chunks(document_id)
+        timer.lap("chunk_linking")
+
+        # 대시보드 스냅샷에 이 문서만 반영 (전체 재집계 없이)
+        if storage.persistent:
+            previous_theme = get_dashboard_snapshot().upsert_document(
+                document_id,
+                title=doc_data['title'],
+                created_at=doc_data['created_at'],
+                theme=theme,
+                reference_urls=metadata.get('reference_urls', []),
+                chunk_count=len(nodes),
+                content=doc_data['content'],
+                link=doc_data.get('link'),
+            )
+            # 테마 구성이 바뀌었으므로 종합 요약을 백그라운드에서 미리 갱신
+            theme_summaries = get_theme_summary_store()
+            theme_summaries.schedule_refresh(theme)
+            if previous_theme and previous_theme != theme:
+                theme_summaries.schedule_refresh(previous_theme)
+        timer.lap("dashboard_update")
         
         # 8. (선택사항) 지식 그래프 추출
         # KnowledgeGraphIndex로 엔티티와 관계 추출
@@ -613,59 +826,31 @@ def process_ingestion(document_id: str):
             # logging.info(f"Starting knowledge graph extraction for document {document_id}...")
             kg_index = KnowledgeGraphIndex.from_documents(
                 [doc],
-                storage_context=STORAGE_CONTEXT,
-                max_triplets_per_chunk=10,  # 증가: 더 많은 관계 추출
+                storage_context=storage.graph_storage_context(document_id),
+                max_triplets_per_chunk=KG_MAX_TRIPLETS_PER_CHUNK,
                 include_embeddings=False,  # 이미 벡터는 저장했으므로
                 show_progress=True,
-                kg_triple_extract_template=(
-                    "다음 회의록에서 중요한 엔티티(사람, 조직, 프로젝트, 시스템, 기술)와 "
-                    "그들 간의 관계를 추출해주세요. 특히 의사결정, 역할, 책임, "
-                    "일정, 의존성 등에 초점을 맞춰주세요.\n"
-                    "---------------------\n"
-                    "{text}\n"
-                    "---------------------\n"
-                    "위 텍스트에서 최대 {max_knowledge_triplets}개의 "
-                    "(주체, 관계, 객체) 형태의 트리플렛을 추출해주세요.\n"
-                )
+                kg_triplet_extract_fn=_extract_kg_triplets,  # 레이트 리미터 적용
             )
             # logging.info(f"Knowledge graph extraction completed for document {document_id}")
+            timer.lap("kg_extraction")
             
-            # Tag entities with document_id
-            if driver:
-                with driver.session() as session:
-                    # First, find all entities that don't have document_id
-                    tag_result = session.run("""
-                        MATCH (e:Entity)
-                        WHERE e.document_id IS NULL
-                        SET e.document_id = $document_id
-                        RETURN count(e) as tagged_count
-                    """, document_id=document_id)
-                    
-                    tagged_count = tag_result.single()['tagged_count']
-                    if tagged_count > 0:
-                        logging.info(f"Tagged {tagged_count} entities with document_id {document_id}")
-                    
-                    # Count total entities for this document
-                    entity_count_result = session.run("""
-                        MATCH (e:Entity)
-                        WHERE e.document_id = $document_id
-                        RETURN count(DISTINCT e) as count
-                    """, document_id=document_id)
-                    entity_count = entity_count_result.single()['count']
-                    logging.info(f"Total {entity_count} entities for document {document_id}")
+            # 중복 엔티티 병합, degree 갱신 (소유 문서는 추출 중에 기록됨)
+            storage.finalize_entities(document_id, timer)
                     
         except Exception as e:
             logging.error(f"Knowledge graph extraction failed for document {document_id}: {e}", exc_info=True)
         
         # 최종 확인: 이 문서와 연결된 엔티티 수 확인
+        driver = get_neo4j_driver()
         if driver:
             with driver.session() as session:
                 final_check = session.run("""
                     MATCH (e:Entity)
-                    WHERE e.document_id = $document_id OR 
+                    WHERE $document_id IN e.document_ids OR 
                           EXISTS {
                             MATCH (e)-[r]-(other)
-                            WHERE other.document_id = $document_id
+                            WHERE $document_id IN other.document_ids
                           }
                     WITH count(DISTINCT e) as entity_count
                     MATCH (d:Document {id: $document_id})
@@ -678,61 +863,126 @@ def process_ingestion(document_id: str):
         
         # logging.info(f"문서 ID {document_id}가 성공적으로 인덱싱되었습니다.")
         update_document_status(document_id, "INGESTED")
+        timer.lap("final_check")
+        timer.finish()
+        logging.info(f"문서 {document_id} 수집 단계별 소요 시간(ms): {timer.as_dict()}")
 
     except Exception as e:
         logging.error(f"문서 ID {document_id} 수집 처리 중 오류 발생: {e}", exc_info=True)
         update_document_status(document_id, "FAILED")
+        timer.finish(outcome="error")
+
+
+def _attach_document_links(grouped_sources: dict):
+    """documentId -> 소스 그룹에 Supabase 문서 출처 링크를 채웁니다. (실패해도 링크 없이 진행)"""
+    try:
+        doc_ids = [doc_id for doc_id in grouped_sources.keys() if doc_id and doc_id != 'unknown']
+        supabase_client = get_supabase_client()
+        if doc_ids and supabase_client is not None:
+            docs_resp = supabase_client.from_("documents").select("id, link").in_("id", doc_ids).execute()
+            if docs_resp and getattr(docs_resp, 'data', None):
+                id_to_link = {row.get("id"): row.get("link") for row in docs_resp.data}
+                for d_id, group in grouped_sources.items():
+                    group['link'] = id_to_link.get(d_id)
+    except Exception as e:
+        logging.error(f"Failed to enrich sources with document links: {e}")
+
 
+def _metadata_answer_events(metadata_answer: dict, timer: StageTimer, include_timings: bool):
+    """메타데이터 답변을 일반 채팅과 같은 SSE 이벤트(sources -> token -> done)로 보냅니다."""
+    grouped_sources = {}
+    for document in metadata_answer['documents']:
+        attendees = document.get('attendees') or []
+        text = "\n".join([
+            f"회의 날짜: {document.get('meeting_date') or '-'}",
+            f"테마: {document.get('theme') or '-'}",
+            f"참석자: {', '.join(attendees) if attendees else '-'}",
+        ])
+        grouped_sources[document['id']] = {
+            'documentId': document['id'],
+            'title': document.get('title') or f"문서 {document['id'][:8]}...",
+            'link': None,
+            'chunks': [{
+                'text': text,
+                'preview': text,
+                'score': 1.0,
+                'metadata': {**document, 'document_id': document['id'], 'search_type': 'metadata'},
+            }],
+        }
+    _attach_document_links(grouped_sources)
 
-def get_chat_response_stream(question: str):
+    if grouped_sources:
+        yield f"data: {json.dumps({'type': 'status', 'status': 'sources_found'})}\n\n"
+    yield f"data: {json.dumps({'type': 'sources', 'sources': list(grouped_sources.values())})}\n\n"
+    yield f"data: {json.dumps({'type': 'status', 'status': 'generating'})}\n\n"
+    yield f"data: {json.dumps({'type': 'token', 'content': metadata_answer['answer']})}\n\n"
+    timer.finish(outcome="metadata", stage="stream_total")
+    if include_timings:
+        yield f"data: {json.dumps({'type': 'timings', 'timings': timer.as_dict()})}\n\n"
+    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+
+
+def get_chat_response_stream(question: str, include_timings: bool = False, filters: SearchFilters | None = None):
     """
     사용자 질문에 대해 하이브리드 RAG 파이프라인(그래프 + 벡터)을 실행하고,
     생성된 답변과 소스 문서를 반환합니다.
+    include_timings=True면 done 직전에 단계별 소요 시간(ms)을 timings 이벤트로 보냅니다.
+    filters를 주면 해당 범위(날짜, 테마, 참석자, 발언자, 문서)의 청크에서만 검색합니다.
+    참석자/회의 수를 묻는 질문은 검색과 LLM 없이 Document 메타데이터로 답합니다. (metadata_answers)
     """
     # logging.info(f"질문 수신: {question}")
     
     def generate():
+        timer = StageTimer("chat")
         # 질문 분석 시작
         yield f"data: {json.dumps({'type': 'status', 'status': 'analyzing'})}\n\n"
         
         try:
+            # 0. 메타데이터 질문(참석자, 회의 수)은 인덱스된 Document 속성으로 바로 답합니다.
+            #    발언자 필터는 청크 단위라 메타데이터로 답할 수 없으므로 일반 경로로 보냅니다.
+            if settings.METADATA_ANSWERS_ENABLED and not (filters and filters.speakers):
+                metadata_answer = None
+                try:
+                    with timer.span("metadata_route"):
+                        metadata_answer = answer_metadata_question(get_storage(), question, filters)
+                except Exception as e:
+                    logging.warning(f"메타데이터 답변 실패, 일반 검색으로 진행합니다: {e}")
+                if metadata_answer is not None:
+                    yield from _metadata_answer_events(metadata_answer, timer, include_timings)
+                    return
+
             # 검색 시작
             yield f"data: {json.dumps({'type': 'status', 'status': 'searching'})}\n\n"
             
             # 1. 하이브리드 검색 수행 (벡터 + 키워드)
-            retrieved_nodes = perform_hybrid_search(question)
+            retrieved_nodes = perform_hybrid_search(question, timer=timer, filters=filters)
+            llm_limiter = get_rate_limiter("llm")
             
-            # 2. VectorStoreIndex를 사용하여 벡터 검색 수행 (폴백용)
+            # 2. 임계값을 통과한 결과가 없으면 벡터 유사도 상위 청크로 폴백
+            search_type = 'hybrid'
             if not retrieved_nodes:
-                # 명시적으로 임베딩 모델 설정 확인
-                logging.info(f"Current embed model: {LlamaSettings.embed_model}")
-                logging.info(f"Embed model type: {type(LlamaSettings.embed_model)}")
-                
-                vector_index = VectorStoreIndex.from_vector_store(
-                    vector_store=STORAGE_CONTEXT.vector_store,
-                    storage_context=STORAGE_CONTEXT,
-                    embed_model=EMBED_MODEL  # 명시적으로 임베딩 모델 전달
-                )
-                
-                # 벡터 검색 쿼리 엔진 생성
-                query_engine = vector_index.as_query_engine(
-                    streaming=True,
-                    similarity_top_k=10,  # 증가된 top_k
-                )
-                
-                # 쿼리 실행 및 스트리밍 응답 받기
-                response = query_engine.query(question)
-            else:
-                # 하이브리드 검색 결과로 응답 생성
+                retrieved_nodes = perform_vector_search(question, timer=timer, filters=filters)
+                search_type = 'vector'
+
+            # 3. 검색 결과로 응답 생성 (필터 범위에 청크가 하나도 없으면 LLM을 호출하지 않음)
+            response = None
+            if retrieved_nodes:
                 from llama_index.core.response_synthesizers import get_response_synthesizer
                 from llama_index.core.schema import QueryBundle
-                
+
                 synthesizer = get_response_synthesizer(
                     streaming=True,
-                    llm=LLM
+                    llm=get_llm()
                 )
-                
+
                 query_bundle = QueryBundle(query_str=question)
+                # 답변 생성 예산 확보 (컨텍스트 청크 + 질문 길이 기준)
+                with timer.span("rate_limit_wait"):
+                    llm_limiter.acquire(
+                        lane=INTERACTIVE,
+                        tokens=estimate_tokens(question) + sum(estimate_tokens(n.node.text) for n in retrieved_nodes),
+                    )
+                synthesis_started = time.perf_counter()
                 response = synthesizer.synthesize(
                     query=query_bundle,
                     nodes=retrieved_nodes
@@ -753,21 +1003,7 @@ def get_chat_response_stream(question: str):
                         'preview': node.text[:200] + '...' if len(node.text) > 200 else node.text,
                         'score': node_with_score.score,
                         'metadata': metadata,
-                        'search_type': 'hybrid'
-                    }
-                    source_nodes.append(source_info)
-            elif hasattr(response, 'source_nodes') and response.source_nodes:
-                yield f"data: {json.dumps({'type': 'status', 'status': 'sources_found'})}\n\n"
-                
-                for node in response.source_nodes[:10]:
-                    # 노드에 메타데이터가 있는지 확인
-                    metadata = getattr(node, 'metadata', {})
-                    source_info = {
-                        'text': node.text,  # 전체 텍스트 포함
-                        'preview': node.text[:200] + '...' if len(node.text) > 200 else node.text,
-                        'score': getattr(node, 'score', 0.0),
-                        'metadata': metadata,
-                        'search_type': 'vector'
+                        'search_type': search_type
                     }
                     source_nodes.append(source_info)
             
@@ -794,16 +1030,7 @@ def get_chat_response_stream(question: str):
                 })
             
             # 문서 출처 링크(Supabase) 조회 후 주입
-            try:
-                doc_ids = [doc_id for doc_id in grouped_sources.keys() if doc_id and doc_id != 'unknown']
-                if doc_ids and supabase_client is not None:
-                    docs_resp = supabase_client.from_("documents").select("id, link").in_("id", doc_ids).execute()
-                    if docs_resp and getattr(docs_resp, 'data', None):
-                        id_to_link = {row.get("id"): row.get("link") for row in docs_resp.data}
-                        for d_id, group in grouped_sources.items():
-                            group['link'] = id_to_link.get(d_id)
-            except Exception as e:
-                logging.error(f"Failed to enrich sources with document links: {e}")
+            _attach_document_links(grouped_sources)
             
             # 상위 5개 문서만 선택 (각 문서의 최고 점수 기준)
             sorted_groups = sorted(
@@ -827,6 +1054,8 @@ def get_chat_response_stream(question: str):
                     for token in response.response_gen:
                         # 토큰이 있으면 그대로 전송 (중복 체크 제거)
                         if token:
+                            if not has_content:
+                                timer.record("synthesis_ttft", time.perf_counter() - synthesis_started)
                             has_content = True
                             yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
                 except IndexError:
@@ -837,9 +1066,13 @@ def get_chat_response_stream(question: str):
                 except Exception as e:
                     # 기타 오류 처리
                     logging.error(f"Error during response streaming: {e}")
+                    if is_throttle_error(e):
+                        llm_limiter.report_throttle(INTERACTIVE, e)
                     yield f"data: {json.dumps({'type': 'token', 'content': '응답 처리 중 오류가 발생했습니다.'})}\n\n"
                     has_content = True
-                
+                else:
+                    llm_limiter.report_success()
+
                 # 응답이 없는 경우 기본 메시지
                 if not has_content:
                     yield f"data: {json.dumps({'type': 'token', 'content': '죄송합니다. 관련된 정보를 찾을 수 없습니다.'})}\n\n"
@@ -848,10 +1081,14 @@ def get_chat_response_stream(question: str):
                 response_text = str(response) if response else "죄송합니다. 관련된 정보를 찾을 수 없습니다."
                 yield f"data: {json.dumps({'type': 'token', 'content': response_text})}\n\n"
             
+            timer.finish(stage="stream_total")
+            if include_timings:
+                yield f"data: {json.dumps({'type': 'timings', 'timings': timer.as_dict()})}\n\n"
             yield f"data: {json.dumps({'type': 'done'})}\n\n"
 
         except Exception as e:
             logging.error(f"채팅 스트림 생성 중 오류 발생: {e}", exc_info=True)
+            timer.finish(outcome="error", stage="stream_total")
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
     
     return generate()
@@ -0,0 +1,971 @@
+"""
+RAG 저장소 추상화.
+
+process_ingestion / perform_hybrid_search가 쓰는 저장소 연산(원본 문서, Document 노드, 청크, 엔티티,
+벡터/키워드 검색)을 RagStorage 인터페이스로 모읍니다.
+
+- Neo4jStorage: 운영 구성. 원본 문서는 Supabase, 청크/그래프/인덱스는 Neo4j에 저장합니다.
+- InMemoryStorage: 외부 서비스 없이 동작하는 프로세스 내 구현. 벤치마크(backend/bench)와 로컬 실험용입니다.
+
+어떤 구현을 쓸지는 settings.RAG_BACKEND("neo4j" | "memory")로 정하며, rag_service.get_storage()가 생성합니다.
+"""
+import logging
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+import numpy as np
+
+from app.services.graph_export import delete_document_entities, refresh_entity_degrees
+from app.services.entity_resolution import resolve_document_entities
+from app.services.time_buckets import shift_document_buckets
+
+EMBEDDING_DIMENSION = 768
+
+# Chunk 노드 속성 (슬림 스키마). 문서 단위 메타데이터(제목, 날짜, 참석자 등)는 Document 노드에만 둡니다.
+# id, text, embedding, document_id, chunk_index, speaker
+CHUNK_WRITE_BATCH_SIZE = 500
+
+# 청크 쓰기: 본문은 text에 한 번만, 임베딩은 벡터 속성으로, Document 연결까지 한 쿼리에서 처리합니다.
+_WRITE_CHUNKS_QUERY = """
+UNWIND $rows AS row
+MERGE (c:Chunk {id: row.id})
+SET c.text = row.text,
+    c.document_id = row.document_id,
+    c.chunk_index = row.chunk_index,
+    c.speaker = row.speaker
+WITH c, row
+CALL db.create.setNodeVectorProperty(c, 'embedding', row.embedding)
+WITH c, row
+MATCH (d:Document {id: row.document_id})
+MERGE (c)-[:BELONGS_TO]->(d)
+"""
+
+
+def write_chunk_rows(session, rows: list):
+    """슬림 Chunk 행({id, text, document_id, chunk_index, speaker, embedding})을 배치로 씁니다. (수집, 스냅샷 가져오기)"""
+    for start in range(0, len(rows), CHUNK_WRITE_BATCH_SIZE):
+        session.run(_WRITE_CHUNKS_QUERY, rows=rows[start:start + CHUNK_WRITE_BATCH_SIZE]).consume()
+
+
+def parse_meeting_date(value) -> str | None:
+    """'YYYY-MM-DD'로 파싱되는 값만 통과시킵니다. (Cypher date()에 잘못된 값이 들어가면 쿼리 전체가 실패)"""
+    from datetime import date
+
+    try:
+        return date.fromisoformat(value).isoformat() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _document_matches(node: dict, filters) -> bool:
+    """InMemoryStorage용 SearchFilters 문서 조건 (Neo4jStorage.filter_documents와 같은 의미)"""
+    from datetime import date
+
+    if filters.document_ids and node["id"] not in filters.document_ids:
+        return False
+    if filters.themes and node.get("theme") not in filters.themes:
+        return False
+    if filters.date_from or filters.date_to:
+        meeting_date = parse_meeting_date(str(node.get("meeting_date") or node.get("created_at") or "")[:10])
+        if meeting_date is None:
+            return False
+        meeting_date = date.fromisoformat(meeting_date)
+        if (filters.date_from and meeting_date < filters.date_from) or (filters.date_to and meeting_date > filters.date_to):
+            return False
+    if filters.attendees:
+        names = node.get("attendees") or []
+        if not any(wanted in name for name in names for wanted in filters.attendees):
+            return False
+    return True
+
+
+def chunk_row(node) -> dict:
+    """LlamaIndex 노드 -> 슬림 Chunk 행 (임베딩 제외)"""
+    metadata = node.metadata
+    return {
+        "id": node.node_id,
+        "text": node.text,
+        "document_id": metadata.get("document_id") or node.ref_doc_id,
+        "chunk_index": metadata.get("chunk_index"),
+        "speaker": metadata.get("speaker"),
+    }
+
+
+class RagStorage(ABC):
+    """
+    저장소 인터페이스. 검색 결과의 score는 Neo4j 인덱스와 같은 척도를 따릅니다.
+    (벡터: 코사인 유사도를 [0, 1]로 옮긴 값, 키워드: BM25 점수)
+    메서드를 하나라도 빠뜨린 구현은 호출 시점이 아니라 생성 시점에 TypeError로 실패합니다.
+    """
+
+    # Neo4j/Supabase처럼 대시보드 스냅샷, 테마 요약 등 다른 서비스와 공유되는 저장소인지 여부
+    persistent = True
+
+    # ---- 원본 문서 ----
+
+    @abstractmethod
+    def get_document(self, document_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def get_labels(self, document_id: str) -> list:
+        ...
+
+    @abstractmethod
+    def update_document(self, document_id: str, fields: dict):
+        ...
+
+    # ---- 인덱스 ----
+
+    @abstractmethod
+    def upsert_document_node(self, document_id: str, doc_data: dict):
+        ...
+
+    @abstractmethod
+    def set_document_embedding(self, document_id: str, embedding: list):
+        """문서 요약 임베딩을 Document 노드에 저장합니다. (2단계 검색의 문서 선택용)"""
+
+    @abstractmethod
+    def document_embedding_backlog(self, limit: int) -> list:
+        """요약 임베딩이 없는 문서 [{"id", "title", "summary"}, ...] (기존 데이터 백필용)"""
+
+    @abstractmethod
+    def add_chunks(self, nodes: list):
+        """임베딩이 채워진 LlamaIndex 노드들을 저장합니다."""
+
+    @abstractmethod
+    def link_chunks(self, document_id: str) -> int:
+        """문서의 청크를 Document에 연결하고 청크 수를 반환합니다."""
+
+    @abstractmethod
+    def graph_storage_context(self, document_id: str):
+        """
+        이 문서의 지식 그래프 추출(KnowledgeGraphIndex)에 넘길 LlamaIndex StorageContext.
+        그래프 저장소에 들어가는 엔티티는 그 자리에서 이 문서 소유로 기록되므로, 문서 여러 개를 동시에 수집해도 섞이지 않습니다.
+        """
+
+    @abstractmethod
+    def finalize_entities(self, document_id: str, timer=None) -> int:
+        """지식 그래프 추출 직후 호출. 이 문서의 엔티티를 기존 엔티티와 병합하고 문서의 엔티티 수를 반환합니다."""
+
+    @abstractmethod
+    def delete_document(self, document_id: str):
+        ...
+
+    # ---- 검색 ----
+
+    @abstractmethod
+    def filter_documents(self, filters) -> list:
+        """SearchFilters의 문서 단위 조건(날짜, 테마, 참석자, 문서 id)을 만족하는 document_id 목록"""
+
+    @abstractmethod
+    def describe_documents(self, filters, limit: int) -> list:
+        """
+        filter_documents와 같은 조건의 문서를 회의 날짜 내림차순으로 최대 limit개
+        [{"id", "title", "meeting_date", "theme", "attendees"}, ...] (meeting_date는 'YYYY-MM-DD', 없으면 문서 생성일)
+        """
+
+    @abstractmethod
+    def document_vector_search(self, embedding: list, k: int, document_ids: list | None = None) -> list:
+        """요약 임베딩 기준 [(document_id, score), ...] 점수 내림차순. document_ids를 주면 그 안에서만 고릅니다."""
+
+    @abstractmethod
+    def vector_search(self, embedding: list, k: int, document_ids: list | None = None, speakers: list | None = None) -> list:
+        """
+        [(chunk_id, score), ...] 점수 내림차순.
+        document_ids/speakers를 주면 해당 문서/발언자의 청크만 점수를 매깁니다.
+        """
+
+    @abstractmethod
+    def keyword_search(self, query: str, limit: int, document_ids: list | None = None, speakers: list | None = None) -> list:
+        """[(chunk_id, score), ...] 점수 내림차순. 범위 제한은 vector_search와 같습니다."""
+
+    @abstractmethod
+    def chunk_created_at(self, chunk_ids: list) -> dict:
+        """chunk_id -> 소속 문서의 created_at"""
+
+    @abstractmethod
+    def fetch_chunks(self, chunk_ids: list) -> dict:
+        """chunk_id -> {"text", "document_id", "title", "created_at"}"""
+
+
+class _DocumentGraphStore:
+    """
+    Neo4jGraphStore 래퍼. 트리플렛의 두 엔티티(새로 만들었든 이미 있었든) document_ids에 이 문서를 추가합니다.
+    추출이 끝난 뒤 소유 문서 없는 엔티티를 한꺼번에 가져가면, 동시에 수집 중인 다른 문서의 엔티티까지 가져가게 됩니다.
+    """
+
+    def __init__(self, graph_store, document_id: str):
+        self._inner = graph_store
+        self.document_id = document_id
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def upsert_triplet(self, subj: str, rel: str, obj: str) -> None:
+        # Neo4jGraphStore.upsert_triplet과 같은 MERGE에 소유 문서 기록을 더합니다.
+        label = self._inner.node_label
+        query = f"""
+            MERGE (n1:`{label}` {{id: $subj}})
+            MERGE (n2:`{label}` {{id: $obj}})
+            MERGE (n1)-[:`{rel.replace(" ", "_").upper()}`]->(n2)
+            WITH [n1, n2] AS nodes
+            UNWIND nodes AS n
+            WITH DISTINCT n
+            SET n.document_ids = CASE
+                WHEN n.document_ids IS NULL THEN [$document_id]
+                WHEN $document_id IN n.document_ids THEN n.document_ids
+                ELSE n.document_ids + $document_id
+            END
+        """
+        with self._inner._driver.session(database=self._inner._database) as session:
+            session.run(query, subj=subj, obj=obj, document_id=self.document_id).consume()
+
+
+class Neo4jStorage(RagStorage):
+    """Supabase(원본 문서) + Neo4j(청크, Document, 엔티티, 벡터/키워드 인덱스)"""
+
+    def __init__(self, driver_provider, supabase_provider, storage_context_provider):
+        # 구성요소는 지연 초기화되므로(components 참고) 사용할 때마다 provider로 가져옵니다.
+        self._driver_provider = driver_provider
+        self._supabase_provider = supabase_provider
+        self._storage_context_provider = storage_context_provider
+
+    @property
+    def driver(self):
+        return self._driver_provider()
+
+    @property
+    def supabase(self):
+        client = self._supabase_provider()
+        if client is None:
+            raise RuntimeError("Supabase 클라이언트를 가져올 수 없습니다.")
+        return client
+
+    @property
+    def storage_context(self):
+        return self._storage_context_provider()
+
+    def _require_driver(self):
+        if not self.driver:
+            raise RuntimeError("Neo4j 드라이버를 가져올 수 없습니다.")
+        return self.driver
+
+    # ---- 원본 문서 ----
+
+    def get_document(self, document_id: str) -> dict | None:
+        response = self.supabase.from_("documents").select("id, title, content, created_at, link").eq("id", document_id).single().execute()
+        return response.data
+
+    def get_labels(self, document_id: str) -> list:
+        response = self.supabase.from_("labels").select("key, value").eq("document_id", document_id).execute()
+        return response.data or []
+
+    def update_document(self, document_id: str, fields: dict):
+        self.supabase.from_("documents").update(fields).eq("id", document_id).execute()
+
+    # ---- 인덱스 ----
+
+    def upsert_document_node(self, document_id: str, doc_data: dict):
+        """
+        원본 문서를 나타내는 Document 노드를 생성하고 메타데이터를 저장합니다.
+        """
+        if not self.driver:
+            logging.error(f"문서 {document_id}의 노드 생성 실패: Neo4j 드라이버를 가져올 수 없습니다.")
+            return
+
+        query = """
+        MERGE (d:Document {id: $document_id})
+        SET d.title = $title,
+            d.created_at = datetime($created_at),
+            d.theme = $theme,
+            d.reference_urls = $reference_urls,
+            d.meeting_date = coalesce(date($meeting_date), d.meeting_date),
+            d.attendees = coalesce($attendees, d.attendees),
+            d.location = coalesce($location, d.location),
+            d.agenda = coalesce($agenda, d.agenda),
+            d.last_updated = timestamp()
+        RETURN d.created_at AS created_at
+        """
+
+        def write(tx):
+            # 기존 created_at을 읽어 두었다가 시간 버킷 카운터를 같은 트랜잭션에서 옮깁니다.
+            previous = tx.run(
+                "MATCH (d:Document {id: $document_id}) RETURN d.created_at AS created_at",
+                document_id=document_id,
+            ).single()
+            record = tx.run(
+                query,
+                document_id=document_id,
+                title=doc_data.get('title'),
+                created_at=doc_data.get('created_at'),
+                theme=doc_data.get('theme', ''),
+                reference_urls=doc_data.get('reference_urls', []),
+                meeting_date=parse_meeting_date(doc_data.get('meeting_date')),
+                attendees=doc_data.get('attendees') or None,
+                location=doc_data.get('location'),
+                agenda=doc_data.get('agenda'),
+            ).single()
+            shift_document_buckets(tx, previous["created_at"] if previous else None, record["created_at"])
+
+        try:
+            with self.driver.session(database="neo4j") as session:
+                session.execute_write(write)
+        except Exception as e:
+            logging.error(f"문서 ID {document_id}의 Document 노드 생성 중 오류 발생: {e}", exc_info=True)
+
+    def set_document_embedding(self, document_id: str, embedding: list):
+        with self._require_driver().session() as session:
+            session.run("""
+                MATCH (d:Document {id: $document_id})
+                CALL db.create.setNodeVectorProperty(d, 'embedding', $embedding)
+                RETURN count(d) AS updated
+            """, document_id=document_id, embedding=embedding).consume()
+
+    def document_embedding_backlog(self, limit: int) -> list:
+        with self._require_driver().session() as session:
+            result = session.run("""
+                MATCH (d:Document)
+                WHERE d.embedding IS NULL
+                RETURN d.id AS id, d.title AS title
+                LIMIT $limit
+            """, limit=limit)
+            documents = {record["id"]: record["title"] for record in result}
+        if not documents:
+            return []
+        # 요약은 Supabase documents.summary에 있습니다.
+        response = self.supabase.from_("documents").select("id, title, summary").in_("id", list(documents)).execute()
+        summaries = {row["id"]: row for row in response.data or []}
+        return [
+            {
+                "id": document_id,
+                "title": (summaries.get(document_id) or {}).get("title") or title,
+                "summary": (summaries.get(document_id) or {}).get("summary"),
+            }
+            for document_id, title in documents.items()
+        ]
+
+    def add_chunks(self, nodes: list):
+        # Neo4jVectorStore.add는 메타데이터 전체와 직렬화한 노드(_node_content)를 청크마다 함께 저장하므로
+        # 슬림 스키마로 직접 씁니다.
+        rows = [{**chunk_row(node), "embedding": node.embedding} for node in nodes]
+        if not rows:
+            return
+        with self._require_driver().session() as session:
+            write_chunk_rows(session, rows)
+
+    def link_chunks(self, document_id: str) -> int:
+        if not self.driver:
+            return 0
+        with self.driver.session() as session:
+            # Chunk 노드 확인 (chunk_document_id 인덱스)
+            chunk_result = session.run("""
+                MATCH (c:Chunk {document_id: $document_id})
+                RETURN count(c) as chunk_count
+            """, document_id=document_id)
+            chunk_count = chunk_result.single()['chunk_count']
+
+            # Document-Chunk 관계 생성 (add_chunks가 이미 만들었으면 그대로 둠)
+            session.run("""
+                MATCH (d:Document {id: $document_id})
+                MATCH (c:Chunk {document_id: $document_id})
+                MERGE (c)-[:BELONGS_TO]->(d)
+                RETURN count(*) as rel_count
+            """, document_id=document_id).consume()
+        return chunk_count
+
+    def graph_storage_context(self, document_id: str):
+        from llama_index.core import StorageContext
+
+        shared = self.storage_context
+        return StorageContext.from_defaults(
+            docstore=shared.docstore,
+            index_store=shared.index_store,
+            vector_store=shared.vector_store,
+            graph_store=_DocumentGraphStore(shared.graph_store, document_id),
+        )
+
+    def finalize_entities(self, document_id: str, timer=None) -> int:
+        if not self.driver:
+            return 0
+        with self.driver.session() as session:
+            # 소유 문서는 추출 중에 기록됩니다. (_DocumentGraphStore)
+            # Count total entities for this document
+            entity_count_result = session.run("""
+                MATCH (e:Entity)
+                WHERE $document_id IN e.document_ids
+                RETURN count(DISTINCT e) as count
+            """, document_id=document_id)
+            entity_count = entity_count_result.single()['count']
+            logging.info(f"Total {entity_count} entities for document {document_id}")
+            if timer:
+                timer.lap("entity_tagging")
+
+            # 표기만 다른 중복 엔티티("홍길동 님", "길동" 등)를 기존 엔티티와 병합
+            try:
+                resolve_document_entities(session, document_id)
+            except Exception as e:
+                logging.error(f"Entity resolution failed for document {document_id}: {e}", exc_info=True)
+            if timer:
+                timer.lap("entity_resolution")
+
+            # 그래프 내보내기 정렬용 degree 갱신 (이 문서 엔티티와 이웃만)
+            refresh_entity_degrees(session, document_id)
+            if timer:
+                timer.lap("entity_degrees")
+        return entity_count
+
+    def delete_document(self, document_id: str):
+        driver = self._require_driver()
+        with driver.session() as session:
+            # 청크 삭제
+            session.run("""
+                MATCH (c:Chunk {document_id: $document_id})
+                DETACH DELETE c
+            """, document_id=document_id)
+
+            # Document 노드 삭제 (시간 버킷 카운터도 함께 차감)
+            deleted = session.run("""
+                MATCH (d:Document {id: $document_id})
+                WITH d, d.created_at AS created_at
+                DETACH DELETE d
+                RETURN created_at
+            """, document_id=document_id).single()
+            if deleted:
+                shift_document_buckets(session, deleted["created_at"], None)
+
+            # 관련 엔티티 삭제 (이웃 엔티티의 degree도 함께 갱신)
+            delete_document_entities(session, document_id)
+
+    # ---- 검색 ----
+
+    @staticmethod
+    def _document_filter(filters) -> tuple:
+        """SearchFilters 문서 조건 -> (WHERE 절, 파라미터). 조건마다 인덱스가 있는 속성을 사용합니다. (document_id, document_theme, document_meeting_date)"""
+        conditions = []
+        if filters.document_ids:
+            conditions.append("d.id IN $document_ids")
+        if filters.themes:
+            conditions.append("d.theme IN $themes")
+        if filters.date_from:
+            conditions.append("d.meeting_date >= $date_from")
+        if filters.date_to:
+            conditions.append("d.meeting_date <= $date_to")
+        if filters.attendees:
+            conditions.append("any(name IN coalesce(d.attendees, []) WHERE any(a IN $attendees WHERE name CONTAINS a))")
+        params = {
+            "document_ids": filters.document_ids,
+            "themes": filters.themes,
+            "date_from": filters.date_from,
+            "date_to": filters.date_to,
+            "attendees": filters.attendees,
+        }
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def filter_documents(self, filters) -> list:
+        where, params = self._document_filter(filters)
+        with self._require_driver().session() as session:
+            result = session.run("MATCH (d:Document)" + where + " RETURN d.id AS id", **params)
+            return [record["id"] for record in result]
+
+    def describe_documents(self, filters, limit: int) -> list:
+        where, params = self._document_filter(filters)
+        query = "MATCH (d:Document)" + where + """
+            RETURN d.id AS id, d.title AS title, left(toString(coalesce(d.meeting_date, d.created_at)), 10) AS meeting_date,
+                   d.theme AS theme, coalesce(d.attendees, []) AS attendees
+            ORDER BY meeting_date DESC
+            LIMIT $limit
+        """
+        with self._require_driver().session() as session:
+            return [record.data() for record in session.run(query, limit=limit, **params)]
+
+    def document_vector_search(self, embedding: list, k: int, document_ids: list | None = None) -> list:
+        if document_ids is not None:
+            query = """
+                MATCH (d:Document)
+                WHERE d.id IN $document_ids AND d.embedding IS NOT NULL
+                WITH d, vector.similarity.cosine(d.embedding, $embedding) AS score
+                RETURN d.id AS id, score
+                ORDER BY score DESC
+                LIMIT $k
+            """
+        else:
+            query = """
+                CALL db.index.vector.queryNodes('document_embeddings', $k, $embedding)
+                YIELD node, score
+                RETURN node.id AS id, score
+                ORDER BY score DESC
+            """
+        with self._require_driver().session() as session:
+            result = session.run(query, k=k, embedding=embedding, document_ids=document_ids)
+            return [(record["id"], record["score"]) for record in result]
+
+    @staticmethod
+    def _chunk_scope(alias: str, document_ids: list | None, speakers: list | None) -> list:
+        conditions = []
+        if document_ids is not None:
+            conditions.append(f"{alias}.document_id IN $document_ids")
+        if speakers is not None:
+            conditions.append(f"{alias}.speaker IN $speakers")
+        return conditions
+
+    def vector_search(self, embedding: list, k: int, document_ids: list | None = None, speakers: list | None = None) -> list:
+        scope = self._chunk_scope("c", document_ids, speakers)
+        if scope:
+            # 범위 안의 청크만 정확한 코사인 유사도로 비교합니다. (chunk_document_id / chunk_speaker 인덱스)
+            # vector.similarity.cosine은 벡터 인덱스와 같은 [0, 1] 척도입니다.
+            query = f"""
+                MATCH (c:Chunk)
+                WHERE {" AND ".join(scope)} AND c.embedding IS NOT NULL
+                WITH c, vector.similarity.cosine(c.embedding, $embedding) AS score
+                RETURN c.id AS id, score
+                ORDER BY score DESC
+                LIMIT $k
+            """
+        else:
+            query = """
+                CALL db.index.vector.queryNodes('vector', $k, $embedding)
+                YIELD node, score
+                WHERE node:Chunk
+                RETURN node.id AS id, score
+                ORDER BY score DESC
+            """
+        with self._require_driver().session() as session:
+            result = session.run(query, k=k, embedding=embedding, document_ids=document_ids, speakers=speakers)
+            return [(record["id"], record["score"]) for record in result]
+
+    def keyword_search(self, query: str, limit: int, document_ids: list | None = None, speakers: list | None = None) -> list:
+        scope = self._chunk_scope("node", document_ids, speakers)
+        if scope:
+            # 풀텍스트 결과는 점수 순으로 흘러나오므로 ORDER BY 없이 LIMIT을 걸면
+            # 범위 안의 청크를 limit개 찾는 즉시 멈춥니다.
+            with self._require_driver().session() as session:
+                result = session.run(f"""
+                    CALL db.index.fulltext.queryNodes('keyword', $q)
+                    YIELD node, score
+                    WHERE node:Chunk AND {" AND ".join(scope)}
+                    RETURN node.id AS id, score
+                    LIMIT $limit
+                """, q=query, limit=limit, document_ids=document_ids, speakers=speakers)
+                return [(record["id"], record["score"]) for record in result]
+        with self._require_driver().session() as session:
+            result = session.run("""
+                CALL db.index.fulltext.queryNodes('keyword', $q, {limit: $limit})
+                YIELD node, score
+                WHERE node:Chunk
+                RETURN node.id AS id, score
+                ORDER BY score DESC
+            """, q=query, limit=limit)
+            return [(record["id"], record["score"]) for record in result]
+
+    def chunk_created_at(self, chunk_ids: list) -> dict:
+        if not chunk_ids:
+            return {}
+        with self._require_driver().session() as session:
+            result = session.run("""
+                UNWIND $ids AS id
+                MATCH (c:Chunk {id: id})-[:BELONGS_TO]->(d:Document)
+                RETURN id, d.created_at AS created_at
+            """, ids=chunk_ids)
+            return {record["id"]: record["created_at"] for record in result}
+
+    def fetch_chunks(self, chunk_ids: list) -> dict:
+        if not chunk_ids:
+            return {}
+        with self._require_driver().session() as session:
+            result = session.run("""
+                UNWIND $ids AS id
+                MATCH (c:Chunk {id: id})
+                OPTIONAL MATCH (c)-[:BELONGS_TO]->(d:Document)
+                RETURN id,
+                       coalesce(c.text, '') AS text,
+                       c.document_id AS document_id,
+                       c.chunk_index AS chunk_index,
+                       c.speaker AS speaker,
+                       d.title AS title,
+                       d.created_at AS created_at
+            """, ids=chunk_ids)
+            return {record["id"]: dict(record) for record in result}
+
+
+# ---- 인메모리 구현 ----
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list:
+    """키워드 검색용 토큰화. Lucene standard analyzer처럼 단어 단위로 자르고 소문자화합니다."""
+    return [token.lower() for token in _TOKEN.findall(text or "")]
+
+
+class _TaggingGraphStore:
+    """한 문서의 추출이 SimpleGraphStore에 넣은 엔티티를 pending에 기록해 두었다가 finalize_entities에서 문서에 귀속시킵니다."""
+
+    def __init__(self, graph_store, pending: set):
+        self._inner = graph_store
+        self.pending = pending
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def upsert_triplet(self, subj: str, rel: str, obj: str) -> None:
+        self._inner.upsert_triplet(subj, rel, obj)
+        self.pending.update((subj, obj))
+
+
+class InMemoryStorage(RagStorage):
+    """
+    프로세스 메모리에 모든 것을 보관하는 구현.
+    벡터 검색은 정규화된 임베딩 행렬과의 내적(전수 비교), 키워드 검색은 역색인 + BM25입니다.
+    """
+
+    persistent = False
+
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        from llama_index.core import StorageContext
+        from llama_index.core.graph_stores import SimpleGraphStore
+        from llama_index.core.vector_stores import SimpleVectorStore
+
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._graph_store = SimpleGraphStore()
+        self.storage_context = StorageContext.from_defaults(
+            vector_store=SimpleVectorStore(),
+            graph_store=self._graph_store,
+        )
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.documents = {}       # 원본 문서 (Supabase documents 행)
+            self.labels = {}          # document_id -> [{"key", "value"}]
+            self.document_nodes = {}  # Document 노드 속성
+            self.entities = {}        # 엔티티 이름 -> 소유 document_id 집합
+            self._chunk_index = {}    # chunk_id -> 행 번호
+            self._chunk_rows = []     # 행 번호 -> {"id", "text", "document_id", "chunk_index", "speaker"}
+            self._document_positions = defaultdict(set)  # document_id -> 살아 있는 행 번호
+            self._document_embeddings = {}  # document_id -> 정규화된 요약 임베딩
+            self._alive = np.zeros(0, dtype=bool)
+            self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+            self._postings = defaultdict(dict)  # 토큰 -> {행 번호: tf}
+            self._lengths = []
+            self._total_length = 0
+            self._alive_count = 0
+            self._pending_entities = defaultdict(set)  # document_id -> 추출 중 추가된 엔티티 이름
+            self._graph_store._data.graph_dict.clear()
+
+    @property
+    def chunk_count(self) -> int:
+        return self._alive_count
+
+    # ---- 원본 문서 ----
+
+    def add_source_document(self, row: dict, labels: list | None = None):
+        """Supabase documents 테이블 대신 원본 문서를 직접 넣습니다. (벤치마크 시드용)"""
+        with self._lock:
+            self.documents[row["id"]] = dict(row)
+            self.labels[row["id"]] = list(labels or [])
+
+    def get_document(self, document_id: str) -> dict | None:
+        with self._lock:
+            row = self.documents.get(document_id)
+            return dict(row) if row else None
+
+    def get_labels(self, document_id: str) -> list:
+        with self._lock:
+            return list(self.labels.get(document_id, []))
+
+    def update_document(self, document_id: str, fields: dict):
+        with self._lock:
+            if document_id in self.documents:
+                self.documents[document_id].update(fields)
+
+    # ---- 인덱스 ----
+
+    def upsert_document_node(self, document_id: str, doc_data: dict):
+        with self._lock:
+            self.document_nodes[document_id] = {"id": document_id, **doc_data}
+
+    def reserve(self, capacity: int):
+        """임베딩 행렬을 미리 capacity 행만큼 확보합니다. (대량 적재 시 재할당/복사 방지)"""
+        with self._lock:
+            self._grow(capacity - len(self._chunk_rows))
+
+    def _grow(self, extra: int):
+        needed = len(self._chunk_rows) + extra
+        if needed <= self._matrix.shape[0]:
+            return
+        capacity = max(needed, self._matrix.shape[0] * 2, 1024)
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        matrix[:len(self._chunk_rows)] = self._matrix[:len(self._chunk_rows)]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._chunk_rows)] = self._alive[:len(self._chunk_rows)]
+        self._matrix, self._alive = matrix, alive
+
+    def add_chunk_rows(self, rows: list, embeddings):
+        """
+        rows: [{"id", "text", "document_id", ("chunk_index", "speaker")}, ...], embeddings: (len(rows), dimension)
+        벤치마크에서 대량의 청크를 바로 적재할 때도 사용합니다.
+        """
+        if not rows:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self._lock:
+            self._grow(len(rows))
+            for row, vector in zip(rows, vectors):
+                if row["id"] in self._chunk_index:
+                    self._remove_row(self._chunk_index[row["id"]])
+                position = len(self._chunk_rows)
+                self._chunk_index[row["id"]] = position
+                self._chunk_rows.append({
+                    "id": row["id"],
+                    "text": row["text"],
+                    "document_id": row["document_id"],
+                    "chunk_index": row.get("chunk_index"),
+                    "speaker": row.get("speaker"),
+                })
+                self._matrix[position] = vector
+                self._alive[position] = True
+                self._alive_count += 1
+                self._document_positions[row["document_id"]].add(position)
+
+                tokens = tokenize(row["text"])
+                counts = defaultdict(int)
+                for token in tokens:
+                    counts[token] += 1
+                for token, tf in counts.items():
+                    self._postings[token][position] = tf
+                self._lengths.append(len(tokens))
+                self._total_length += len(tokens)
+
+    def set_document_embedding(self, document_id: str, embedding: list):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        with self._lock:
+            self._document_embeddings[document_id] = vector / norm if norm else vector
+
+    def document_embedding_backlog(self, limit: int) -> list:
+        with self._lock:
+            return [
+                {
+                    "id": document_id,
+                    "title": node.get("title"),
+                    "summary": (self.documents.get(document_id) or {}).get("summary"),
+                }
+                for document_id, node in self.document_nodes.items()
+                if document_id not in self._document_embeddings
+            ][:limit]
+
+    def add_chunks(self, nodes: list):
+        self.add_chunk_rows([chunk_row(node) for node in nodes], [node.embedding for node in nodes])
+
+    def _remove_row(self, position: int):
+        if not self._alive[position]:
+            return
+        self._alive[position] = False
+        self._alive_count -= 1
+        row = self._chunk_rows[position]
+        positions = self._document_positions.get(row["document_id"])
+        if positions is not None:
+            positions.discard(position)
+            if not positions:
+                del self._document_positions[row["document_id"]]
+        for token in set(tokenize(row["text"])):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(position, None)
+                if not postings:
+                    del self._postings[token]
+        self._total_length -= self._lengths[position]
+        self._chunk_index.pop(row["id"], None)
+
+    def link_chunks(self, document_id: str) -> int:
+        with self._lock:
+            return len(self._document_positions.get(document_id, ()))
+
+    def graph_storage_context(self, document_id: str):
+        from llama_index.core import StorageContext
+
+        with self._lock:
+            pending = self._pending_entities[document_id]
+        return StorageContext.from_defaults(
+            docstore=self.storage_context.docstore,
+            index_store=self.storage_context.index_store,
+            vector_store=self.storage_context.vector_store,
+            graph_store=_TaggingGraphStore(self._graph_store, pending),
+        )
+
+    def finalize_entities(self, document_id: str, timer=None) -> int:
+        with self._lock:
+            for name in self._pending_entities.pop(document_id, ()):
+                self.entities.setdefault(name, set()).add(document_id)
+            if timer:
+                timer.lap("entity_tagging")
+            return sum(1 for owners in self.entities.values() if document_id in owners)
+
+    def delete_document(self, document_id: str):
+        with self._lock:
+            for position in list(self._document_positions.get(document_id, ())):
+                self._remove_row(position)
+            self.document_nodes.pop(document_id, None)
+            self._document_embeddings.pop(document_id, None)
+            # Neo4jStorage와 같이 소유 문서가 더 남지 않은 엔티티만 지웁니다.
+            removed = set()
+            for name, owners in self.entities.items():
+                owners.discard(document_id)
+                if not owners:
+                    removed.add(name)
+            for name in removed:
+                del self.entities[name]
+            graph = self._graph_store._data.graph_dict
+            for subj in list(graph):
+                if subj in removed:
+                    del graph[subj]
+                else:
+                    graph[subj] = [[rel, obj] for rel, obj in graph[subj] if obj not in removed]
+
+    # ---- 검색 ----
+
+    def filter_documents(self, filters) -> list:
+        with self._lock:
+            return [
+                document_id for document_id, node in self.document_nodes.items()
+                if _document_matches(node, filters)
+            ]
+
+    def describe_documents(self, filters, limit: int) -> list:
+        with self._lock:
+            rows = [
+                {
+                    "id": document_id,
+                    "title": node.get("title"),
+                    "meeting_date": str(node.get("meeting_date") or node.get("created_at") or "")[:10] or None,
+                    "theme": node.get("theme"),
+                    "attendees": list(node.get("attendees") or []),
+                }
+                for document_id, node in self.document_nodes.items()
+                if _document_matches(node, filters)
+            ]
+        rows.sort(key=lambda row: row["meeting_date"] or "", reverse=True)
+        return rows[:limit]
+
+    def document_vector_search(self, embedding: list, k: int, document_ids: list | None = None) -> list:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        with self._lock:
+            if document_ids is None:
+                document_ids = list(self._document_embeddings)
+            else:
+                document_ids = [i for i in document_ids if i in self._document_embeddings]
+            if norm == 0 or k <= 0 or not document_ids:
+                return []
+            scores = (1.0 + np.vstack([self._document_embeddings[i] for i in document_ids]) @ (query / norm)) / 2.0
+        top = np.argsort(-scores)[:k]
+        return [(document_ids[i], float(scores[i])) for i in top]
+
+    def _restricted_positions(self, document_ids: list | None, speakers: list | None) -> set | None:
+        """범위 안의 살아 있는 행 번호. 제한이 없으면 None"""
+        if document_ids is None and speakers is None:
+            return None
+        if document_ids is not None:
+            positions = set()
+            for document_id in document_ids:
+                positions.update(self._document_positions.get(document_id, ()))
+        else:
+            positions = {position for position in self._chunk_index.values()}
+        if speakers is not None:
+            allowed = set(speakers)
+            positions = {position for position in positions if self._chunk_rows[position]["speaker"] in allowed}
+        return positions
+
+    def vector_search(self, embedding: list, k: int, document_ids: list | None = None, speakers: list | None = None) -> list:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+        with self._lock:
+            count = len(self._chunk_rows)
+            if count == 0 or k <= 0:
+                return []
+            allowed = self._restricted_positions(document_ids, speakers)
+            if allowed is not None:
+                # 범위 안의 행만 비교합니다.
+                rows = np.fromiter(allowed, dtype=np.int64)
+                if rows.size == 0:
+                    return []
+                scores = (1.0 + self._matrix[rows] @ query) / 2.0
+                top = np.argsort(-scores)[:k]
+                return [(self._chunk_rows[rows[i]]["id"], float(scores[i])) for i in top]
+            # Neo4j 코사인 벡터 인덱스와 같은 척도: (1 + cos) / 2
+            scores = (1.0 + self._matrix[:count] @ query) / 2.0
+            scores[~self._alive[:count]] = -np.inf
+            k = min(k, self._alive_count)
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._chunk_rows[i]["id"], float(scores[i])) for i in top]
+
+    def keyword_search(self, query: str, limit: int, document_ids: list | None = None, speakers: list | None = None) -> list:
+        terms = set(tokenize(query))
+        with self._lock:
+            allowed = self._restricted_positions(document_ids, speakers)
+            n = self._alive_count
+            if n == 0 or not terms:
+                return []
+            avg_length = self._total_length / n
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for position, tf in postings.items():
+                    if allowed is not None and position not in allowed:
+                        continue
+                    length = self._lengths[position]
+                    denom = tf + self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * length / avg_length)
+                    scores[position] += idf * tf * (self.BM25_K1 + 1) / denom
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(self._chunk_rows[position]["id"], score) for position, score in ranked]
+
+    def chunk_created_at(self, chunk_ids: list) -> dict:
+        with self._lock:
+            result = {}
+            for chunk_id in chunk_ids:
+                position = self._chunk_index.get(chunk_id)
+                if position is None:
+                    continue
+                node = self.document_nodes.get(self._chunk_rows[position]["document_id"])
+                if node is not None:
+                    result[chunk_id] = node.get("created_at")
+            return result
+
+    def fetch_chunks(self, chunk_ids: list) -> dict:
+        with self._lock:
+            result = {}
+            for chunk_id in chunk_ids:
+                position = self._chunk_index.get(chunk_id)
+                if position is None:
+                    continue
+                row = self._chunk_rows[position]
+                node = self.document_nodes.get(row["document_id"]) or {}
+                result[chunk_id] = {
+                    "id": chunk_id,
+                    "text": row["text"],
+                    "document_id": row["document_id"],
+                    "chunk_index": row["chunk_index"],
+                    "speaker": row["speaker"],
+                    "title": node.get("title"),
+                    "created_at": node.get("created_at"),
+                }
+            return result
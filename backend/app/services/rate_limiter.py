@@ -0,0 +1,333 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from app.core.config import settings
+
+# 우선순위 레인: 채팅 등 사용자 대기 요청은 INTERACTIVE, 수집/배치 작업은 BACKGROUND
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+# 429 / 503 으로 판단할 수 있는 예외 메시지 패턴
+_THROTTLE_MARKERS = ("429", "503", "resource_exhausted", "resource exhausted", "too many requests", "unavailable", "quota")
+
+
+class RateLimitTimeout(Exception):
+    """지정된 시간 안에 호출 예산을 확보하지 못한 경우 발생합니다."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    프롬프트 토큰 수를 대략적으로 추정합니다.
+    한국어 혼용 텍스트 기준으로 글자 3개당 1토큰 정도로 계산합니다.
+    """
+    if not text:
+        return 1
+    return max(1, len(text) // 3)
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """예외(및 원인 체인)가 429/503 계열의 쿼터 초과 오류인지 판별합니다."""
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        for attr in ("code", "status_code", "status"):
+            value = getattr(current, attr, None)
+            if callable(value):
+                try:
+                    value = value()
+                except Exception:
+                    value = None
+            if value in (429, 503) or str(value) in ("429", "503"):
+                return True
+        response = getattr(current, "response", None)
+        if response is not None and getattr(response, "status_code", None) in (429, 503):
+            return True
+        message = str(current).lower()
+        if any(marker in message for marker in _THROTTLE_MARKERS):
+            return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def _retry_after_seconds(error: BaseException):
+    """예외에 포함된 Retry-After 헤더 값을 초 단위로 반환합니다. 없으면 None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) if response is not None else None
+    if not headers:
+        return None
+    try:
+        value = headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    초당 refill_per_sec 만큼 채워지는 토큰 버킷.
+    스레드 안전성은 상위 GeminiRateLimiter의 락이 보장합니다.
+    """
+
+    def __init__(self, capacity: float, refill_per_sec: float, now: float):
+        self.capacity = float(capacity)
+        self.refill_per_sec = float(refill_per_sec)
+        self.level = float(capacity)
+        self._updated_at = now
+
+    def refill(self, now: float, scale: float = 1.0):
+        elapsed = max(0.0, now - self._updated_at)
+        self.level = min(self.capacity, self.level + elapsed * self.refill_per_sec * scale)
+        self._updated_at = now
+
+    def time_until(self, amount: float, scale: float = 1.0) -> float:
+        deficit = amount - self.level
+        if deficit <= 0:
+            return 0.0
+        return deficit / max(self.refill_per_sec * scale, 1e-9)
+
+
+class GeminiRateLimiter:
+    """
+    요청 수(RPM)와 토큰 수(TPM) 예산을 각각 토큰 버킷으로 관리하는 프로세스 전역 리미터.
+
+    - INTERACTIVE 레인이 대기 중이면 BACKGROUND 레인은 양보합니다.
+    - BACKGROUND 레인은 버킷 용량의 background_share 까지만 소진할 수 있어,
+      대량 수집 중에도 채팅용 여유분이 항상 남습니다.
+    - 429/503 응답을 받으면 지수 백오프 동안 모든 호출을 멈추고
+      리필 속도를 절반으로 줄인 뒤(AIMD), 성공할 때마다 서서히 회복합니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        background_share: float = 0.8,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        min_scale: float = 0.1,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.background_share = min(max(background_share, 0.0), 1.0)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_scale = min_scale
+        self._clock = clock
+
+        now = clock()
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0, now)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, now)
+
+        self._cond = threading.Condition()
+        self._scale = 1.0
+        self._backoff_until = 0.0
+        self._consecutive_throttles = 0
+        self._waiting = {lane: 0 for lane in LANES}
+        self._stats = {
+            lane: {
+                "requests": 0,
+                "tokens": 0,
+                "wait_seconds_total": 0.0,
+                "wait_seconds_max": 0.0,
+                "throttled": 0,
+                "retries": 0,
+                "errors": 0,
+            }
+            for lane in LANES
+        }
+
+    # ---- 예산 확보 ----
+
+    def acquire(self, lane: str = BACKGROUND, tokens: int = 1, requests: int = 1, timeout: float | None = None) -> float:
+        """
+        요청/토큰 예산을 확보할 때까지 블록합니다. 실제로 기다린 시간(초)을 반환합니다.
+        """
+        if lane not in LANES:
+            raise ValueError(f"알 수 없는 레인입니다: {lane}")
+
+        # 버킷 용량보다 큰 요청은 영원히 대기하지 않도록 용량으로 자릅니다.
+        tokens = min(max(int(tokens), 1), int(self._tokens.capacity))
+        requests = min(max(int(requests), 1), int(self._requests.capacity))
+
+        start = self._clock()
+        deadline = start + timeout if timeout is not None else None
+
+        with self._cond:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    now = self._clock()
+                    self._requests.refill(now, self._scale)
+                    self._tokens.refill(now, self._scale)
+
+                    wait = self._wait_time(lane, tokens, requests, now)
+                    if wait <= 0:
+                        self._requests.level -= requests
+                        self._tokens.level -= tokens
+                        waited = now - start
+                        stats = self._stats[lane]
+                        stats["requests"] += requests
+                        stats["tokens"] += tokens
+                        stats["wait_seconds_total"] += waited
+                        stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+                        return waited
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise RateLimitTimeout(f"{self.name} 레이트 리미터 대기 시간 초과 (lane={lane})")
+                        wait = min(wait, remaining)
+                    # 다른 스레드의 반납/백오프 해제 알림을 받기 위해 짧게 나눠서 대기
+                    self._cond.wait(timeout=min(wait, 0.5))
+            finally:
+                self._waiting[lane] -= 1
+                self._cond.notify_all()
+
+    def _wait_time(self, lane: str, tokens: int, requests: int, now: float) -> float:
+        """현재 상태에서 예산 확보까지 기다려야 하는 시간(초). 0 이하이면 즉시 가능."""
+        if now < self._backoff_until:
+            return self._backoff_until - now
+
+        if lane == BACKGROUND:
+            # 채팅 요청이 대기 중이면 무조건 양보
+            if self._waiting[INTERACTIVE] > 0:
+                return 0.05
+            reserve_requests = self._requests.capacity * (1.0 - self.background_share)
+            reserve_tokens = self._tokens.capacity * (1.0 - self.background_share)
+        else:
+            reserve_requests = 0.0
+            reserve_tokens = 0.0
+
+        return max(
+            self._requests.time_until(min(requests + reserve_requests, self._requests.capacity), self._scale),
+            self._tokens.time_until(min(tokens + reserve_tokens, self._tokens.capacity), self._scale),
+        )
+
+    # ---- 피드백 ----
+
+    def report_success(self):
+        """호출 성공 시 감속 배율을 조금씩 회복합니다."""
+        with self._cond:
+            self._consecutive_throttles = 0
+            if self._scale < 1.0:
+                self._scale = min(1.0, self._scale + 0.05)
+
+    def report_throttle(self, lane: str = BACKGROUND, error: BaseException | None = None) -> float:
+        """
+        429/503 응답을 기록하고 전역 백오프를 설정합니다. 적용된 백오프(초)를 반환합니다.
+        """
+        with self._cond:
+            self._consecutive_throttles += 1
+            self._scale = max(self.min_scale, self._scale * 0.5)
+
+            retry_after = _retry_after_seconds(error) if error is not None else None
+            if retry_after is not None:
+                delay = min(self.max_backoff, retry_after)
+            else:
+                delay = min(self.max_backoff, self.base_backoff * (2 ** (self._consecutive_throttles - 1)))
+                delay *= random.uniform(0.8, 1.2)
+
+            self._backoff_until = max(self._backoff_until, self._clock() + delay)
+            if lane in self._stats:
+                self._stats[lane]["throttled"] += 1
+            self._cond.notify_all()
+
+        logging.warning(
+            f"Gemini {self.name} 쿼터 초과 감지: {delay:.1f}초 백오프, 속도 배율 {self._scale:.2f} (lane={lane})"
+        )
+        return delay
+
+    # ---- 호출 헬퍼 ----
+
+    def call(self, fn, *args, lane: str = BACKGROUND, tokens: int = 1, requests: int = 1, **kwargs):
+        """
+        예산을 확보한 뒤 fn을 호출합니다.
+        429/503 오류는 백오프 후 max_retries 까지 재시도하고, 그 외 오류는 그대로 전파합니다.
+        """
+        attempt = 0
+        while True:
+            self.acquire(lane=lane, tokens=tokens, requests=requests)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if is_throttle_error(e) and attempt < self.max_retries:
+                    attempt += 1
+                    with self._cond:
+                        self._stats[lane]["retries"] += 1
+                    self.report_throttle(lane, e)
+                    continue
+                with self._cond:
+                    self._stats[lane]["errors"] += 1
+                if is_throttle_error(e):
+                    self.report_throttle(lane, e)
+                raise
+            self.report_success()
+            return result
+
+    @contextmanager
+    def slot(self, lane: str = BACKGROUND, tokens: int = 1, requests: int = 1):
+        """
+        재시도가 불가능한 호출(스트리밍 등)을 위한 컨텍스트 매니저.
+        블록 안에서 발생한 429/503은 백오프에 반영한 뒤 다시 전파합니다.
+        """
+        self.acquire(lane=lane, tokens=tokens, requests=requests)
+        try:
+            yield
+        except Exception as e:
+            if is_throttle_error(e):
+                self.report_throttle(lane, e)
+            raise
+        else:
+            self.report_success()
+
+    # ---- 메트릭 ----
+
+    def metrics(self) -> dict:
+        with self._cond:
+            now = self._clock()
+            self._requests.refill(now, self._scale)
+            self._tokens.refill(now, self._scale)
+            return {
+                "name": self.name,
+                "rate_scale": round(self._scale, 3),
+                "backoff_remaining_seconds": round(max(0.0, self._backoff_until - now), 3),
+                "requests_available": round(self._requests.level, 2),
+                "requests_capacity": self._requests.capacity,
+                "tokens_available": round(self._tokens.level, 2),
+                "tokens_capacity": self._tokens.capacity,
+                "waiting": dict(self._waiting),
+                "lanes": {lane: dict(stats) for lane, stats in self._stats.items()},
+            }
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter(name: str) -> GeminiRateLimiter:
+    """
+    이름별(llm / embedding) 프로세스 전역 리미터를 반환합니다.
+    Gemini는 생성 모델과 임베딩 모델의 쿼터가 분리되어 있으므로 리미터도 따로 둡니다.
+    """
+    if name == "embedding":
+        rpm = settings.GEMINI_EMBED_REQUESTS_PER_MINUTE
+        tpm = settings.GEMINI_EMBED_TOKENS_PER_MINUTE
+    else:
+        rpm = settings.GEMINI_LLM_REQUESTS_PER_MINUTE
+        tpm = settings.GEMINI_LLM_TOKENS_PER_MINUTE
+    return GeminiRateLimiter(
+        name=name,
+        requests_per_minute=rpm,
+        tokens_per_minute=tpm,
+        background_share=settings.GEMINI_BACKGROUND_SHARE,
+    )
+
+
+def get_all_rate_limiter_metrics() -> dict:
+    return {name: get_rate_limiter(name).metrics() for name in ("llm", "embedding")}
@@ -0,0 +1,371 @@
+"""
+Neo4j 스냅샷 내보내기/가져오기.
+
+Neo4j 인스턴스를 다시 만들거나 스테이징 복제본을 띄울 때 모든 문서에 process_ingestion을 다시 돌리면
+임베딩/LLM 호출을 전부 반복하게 됩니다. 스냅샷은 수집 결과(Document, Chunk + 임베딩, Entity, 엔티티 관계)를
+디렉토리 하나에 저장하고, 모델 호출 없이 배치 UNWIND 쓰기로 그대로 다시 적재합니다.
+
+디렉토리 구성 (임베딩은 JSONL의 줄 순서와 같은 행 순서의 float32 .npy)
+- manifest.json: 형식/버전, 생성 시각, 임베딩 차원, 항목별 개수
+- documents.jsonl + document_embeddings.npy (Document.embedding이 없는 문서는 0 벡터, has_embedding=false)
+- chunks.jsonl + chunk_embeddings.npy
+- entities.jsonl: Entity 속성 전체 (id로 식별)
+- relationships.jsonl: Entity 사이 관계 {type, source, target, properties}
+
+가져오기는 id 기준 MERGE라 같은 스냅샷을 다시 적재해도 중복되지 않습니다. 벡터/키워드 인덱스는 적재 전에 지우고
+적재 후 다시 만들며, 시간 버킷과 커뮤니티(그래프 분석)는 적재한 데이터로 다시 계산합니다.
+원본 문서 본문과 상태는 Supabase에 있으므로 스냅샷에 포함하지 않습니다.
+
+수동 실행:
+    python -m app.services.snapshot export <디렉토리>
+    python -m app.services.snapshot import <디렉토리> [--keep-indexes]
+"""
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from app.services.entity_resolution import _quote
+from app.services.rag_storage import EMBEDDING_DIMENSION, write_chunk_rows
+
+SNAPSHOT_FORMAT = "systema-snapshot"
+SNAPSHOT_VERSION = 1
+# 가져오기 배치 크기 (Document/Entity/관계)
+IMPORT_BATCH_SIZE = 1000
+# 인덱스가 다시 ONLINE이 될 때까지 기다리는 최대 시간(초)
+INDEX_AWAIT_SECONDS = 600
+
+# Document의 시간 속성 (datetime, date). JSON에는 ISO 문자열로 저장하고 가져올 때 같은 타입으로 되돌립니다.
+_DOCUMENT_TEMPORAL = ("created_at", "meeting_date")
+
+_WRITE_DOCUMENTS_QUERY = """
+UNWIND $rows AS row
+MERGE (d:Document {id: row.id})
+SET d += row.props,
+    d.created_at = datetime(row.created_at),
+    d.meeting_date = date(row.meeting_date)
+"""
+
+_WRITE_DOCUMENT_EMBEDDINGS_QUERY = """
+UNWIND $rows AS row
+MATCH (d:Document {id: row.id})
+CALL db.create.setNodeVectorProperty(d, 'embedding', row.embedding)
+RETURN count(d) AS updated
+"""
+
+# 임베딩이 없는 청크 (정상 수집 결과에는 거의 없음)
+_WRITE_BARE_CHUNKS_QUERY = """
+UNWIND $rows AS row
+MERGE (c:Chunk {id: row.id})
+SET c.text = row.text,
+    c.document_id = row.document_id,
+    c.chunk_index = row.chunk_index,
+    c.speaker = row.speaker
+WITH c, row
+MATCH (d:Document {id: row.document_id})
+MERGE (c)-[:BELONGS_TO]->(d)
+"""
+
+_WRITE_ENTITIES_QUERY = """
+UNWIND $rows AS row
+MERGE (e:Entity {id: row.id})
+SET e += row.props
+// 이전 형식 스냅샷(소유 문서가 document_id 하나)은 document_ids 목록으로 옮깁니다.
+WITH e WHERE e.document_id IS NOT NULL
+SET e.document_ids = coalesce(e.document_ids, [e.document_id])
+REMOVE e.document_id
+"""
+
+_DROP_SEARCH_INDEXES = ("DROP INDEX `vector` IF EXISTS", "DROP INDEX `keyword` IF EXISTS")
+
+
+def _create_search_indexes(dimension: int) -> tuple:
+    # 02-init-neo4j.cypher의 vector/keyword 인덱스와 같은 정의
+    return (
+        f"""CREATE VECTOR INDEX `vector` IF NOT EXISTS
+        FOR (c:Chunk) ON (c.embedding)
+        OPTIONS {{ indexConfig: {{
+          `vector.dimensions`: {int(dimension)},
+          `vector.similarity_function`: 'cosine'
+        }}}}""",
+        "CREATE FULLTEXT INDEX `keyword` IF NOT EXISTS FOR (c:Chunk) ON EACH [c.text]",
+    )
+
+
+# ---- 직렬화 ----
+
+def _json_value(value):
+    """Neo4j 값 -> JSON 값. 시간 타입은 ISO 문자열로 바꿉니다."""
+    if hasattr(value, "iso_format"):
+        return value.iso_format()
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return value
+
+
+def _json_props(props: dict) -> dict:
+    return {key: _json_value(value) for key, value in props.items() if value is not None}
+
+
+def _write_jsonl(path: Path, rows) -> int:
+    count = 0
+    with path.open("w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def _read_jsonl(path: Path):
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---- 내보내기 ----
+
+def _export_embedded(session, path: Path, matrix_path: Path, count_query: str, rows_query: str, dimension: int) -> int:
+    """
+    JSONL 한 줄과 임베딩 행렬 한 행이 대응하도록 씁니다. 행렬은 개수를 먼저 세어 memmap으로 만들고
+    결과를 스트리밍하며 채우므로, 청크 수와 무관하게 메모리 사용량이 일정합니다.
+    """
+    expected = session.run(count_query).single()["c"]
+    matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32, shape=(expected, dimension))
+    written = 0
+    with path.open("w", encoding="utf-8") as f:
+        for record in session.run(rows_query):
+            # 내보내는 중에 추가된 노드는 다음 스냅샷에 포함됩니다.
+            if written >= expected:
+                break
+            embedding = record["embedding"]
+            row = {"id": record["id"], **_json_props(record["props"]), "has_embedding": embedding is not None}
+            if embedding is not None:
+                matrix[written] = embedding
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            written += 1
+    matrix.flush()
+    del matrix
+    if written < expected:
+        # 내보내는 중에 삭제된 노드가 있으면 행렬을 실제 행 수로 줄입니다.
+        np.save(matrix_path, np.load(matrix_path, mmap_mode="r")[:written].copy())
+    return written
+
+
+def export_snapshot(driver, directory: str) -> dict:
+    """Neo4j 수집 결과를 directory에 스냅샷으로 저장하고 manifest를 반환합니다."""
+    started = time.monotonic()
+    target = Path(directory)
+    target.mkdir(parents=True, exist_ok=True)
+
+    with driver.session() as session:
+        record = session.run(
+            "MATCH (c:Chunk) WHERE c.embedding IS NOT NULL RETURN size(c.embedding) AS dimension LIMIT 1"
+        ).single()
+        dimension = record["dimension"] if record else EMBEDDING_DIMENSION
+
+        documents = _export_embedded(
+            session, target / "documents.jsonl", target / "document_embeddings.npy",
+            "MATCH (d:Document) RETURN count(d) AS c",
+            "MATCH (d:Document) RETURN d.id AS id, d {.*, id: null, embedding: null} AS props, d.embedding AS embedding",
+            dimension,
+        )
+        chunks = _export_embedded(
+            session, target / "chunks.jsonl", target / "chunk_embeddings.npy",
+            "MATCH (c:Chunk) RETURN count(c) AS c",
+            """
+            MATCH (c:Chunk)
+            RETURN c.id AS id,
+                   c {.text, .document_id, .chunk_index, .speaker} AS props,
+                   c.embedding AS embedding
+            """,
+            dimension,
+        )
+        entities = _write_jsonl(target / "entities.jsonl", (
+            {"id": record["id"], "props": _json_props(record["props"])}
+            for record in session.run("MATCH (e:Entity) WHERE e.id IS NOT NULL RETURN e.id AS id, e {.*, id: null} AS props")
+        ))
+        relationships = _write_jsonl(target / "relationships.jsonl", (
+            {
+                "type": record["type"],
+                "source": record["source"],
+                "target": record["target"],
+                "properties": _json_props(record["properties"]),
+            }
+            for record in session.run("""
+                MATCH (a:Entity)-[r]->(b:Entity)
+                WHERE a.id IS NOT NULL AND b.id IS NOT NULL
+                RETURN type(r) AS type, a.id AS source, b.id AS target, properties(r) AS properties
+            """)
+        ))
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "dimension": dimension,
+        "counts": {
+            "documents": documents,
+            "chunks": chunks,
+            "entities": entities,
+            "relationships": relationships,
+        },
+    }
+    (target / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    logging.info(f"스냅샷 내보내기 완료 ({time.monotonic() - started:.1f}s): {target} {manifest['counts']}")
+    return manifest
+
+
+# ---- 가져오기 ----
+
+def read_manifest(directory: str) -> dict:
+    manifest = json.loads((Path(directory) / "manifest.json").read_text(encoding="utf-8"))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"스냅샷 형식이 아닙니다: {directory}")
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"지원하지 않는 스냅샷 버전입니다: {manifest.get('version')}")
+    return manifest
+
+
+def _with_embeddings(rows, matrix_path: Path, count: int):
+    """JSONL 행에 같은 순서의 임베딩(list)을 붙입니다. 임베딩이 없던 행은 None"""
+    matrix = np.load(matrix_path, mmap_mode="r")
+    for index, row in enumerate(rows):
+        if index >= count:
+            break
+        has_embedding = row.pop("has_embedding", False)
+        row["embedding"] = matrix[index].tolist() if has_embedding else None
+        yield row
+
+
+def _import_documents(session, directory: Path, count: int) -> int:
+    rows = _with_embeddings(_read_jsonl(directory / "documents.jsonl"), directory / "document_embeddings.npy", count)
+    for batch in _batches(rows, IMPORT_BATCH_SIZE):
+        params = []
+        for row in batch:
+            props = {key: value for key, value in row.items() if key not in ("id", "embedding", *_DOCUMENT_TEMPORAL)}
+            params.append({"id": row["id"], "props": props, **{key: row.get(key) for key in _DOCUMENT_TEMPORAL}})
+        session.run(_WRITE_DOCUMENTS_QUERY, rows=params).consume()
+        embedded = [{"id": row["id"], "embedding": row["embedding"]} for row in batch if row["embedding"] is not None]
+        if embedded:
+            session.run(_WRITE_DOCUMENT_EMBEDDINGS_QUERY, rows=embedded).consume()
+    return count
+
+
+def _import_chunks(session, directory: Path, count: int) -> int:
+    rows = _with_embeddings(_read_jsonl(directory / "chunks.jsonl"), directory / "chunk_embeddings.npy", count)
+    for batch in _batches(rows, IMPORT_BATCH_SIZE):
+        write_chunk_rows(session, [row for row in batch if row["embedding"] is not None])
+        bare = [row for row in batch if row["embedding"] is None]
+        if bare:
+            session.run(_WRITE_BARE_CHUNKS_QUERY, rows=bare).consume()
+    return count
+
+
+def _import_entities(session, directory: Path) -> int:
+    count = 0
+    for batch in _batches(_read_jsonl(directory / "entities.jsonl"), IMPORT_BATCH_SIZE):
+        session.run(_WRITE_ENTITIES_QUERY, rows=batch).consume()
+        count += len(batch)
+    return count
+
+
+def _import_relationships(session, directory: Path) -> int:
+    # 관계 타입은 파라미터로 넘길 수 없어 타입별 쿼리로 씁니다. (entity_resolution과 같은 방식)
+    count = 0
+    for batch in _batches(_read_jsonl(directory / "relationships.jsonl"), IMPORT_BATCH_SIZE):
+        by_type = {}
+        for row in batch:
+            by_type.setdefault(row["type"], []).append(row)
+        for rel_type, rows in by_type.items():
+            session.run(f"""
+                UNWIND $rows AS row
+                MATCH (a:Entity {{id: row.source}})
+                MATCH (b:Entity {{id: row.target}})
+                MERGE (a)-[r:{_quote(rel_type)}]->(b)
+                SET r += row.properties
+            """, rows=rows).consume()
+        count += len(batch)
+    return count
+
+
+def import_snapshot(driver, directory: str, rebuild_indexes: bool = True) -> dict:
+    """
+    스냅샷을 Neo4j에 적재합니다. 모델을 호출하지 않습니다.
+    rebuild_indexes=True면 vector/keyword 인덱스를 적재 전에 지우고 적재 후 다시 만들어 ONLINE이 될 때까지 기다립니다.
+    """
+    from app.services.graph_analytics import run_graph_analytics
+    from app.services.graph_export import rebuild_entity_degrees
+    from app.services.time_buckets import rebuild_time_buckets
+
+    started = time.monotonic()
+    source = Path(directory)
+    manifest = read_manifest(directory)
+    counts = manifest["counts"]
+    if manifest["dimension"] != EMBEDDING_DIMENSION:
+        raise ValueError(f"임베딩 차원이 다릅니다: 스냅샷 {manifest['dimension']}, 현재 {EMBEDDING_DIMENSION}")
+
+    report = {}
+    with driver.session() as session:
+        if rebuild_indexes:
+            # 적재 중에는 인덱스를 유지하지 않고 마지막에 한 번에 만듭니다.
+            for query in _DROP_SEARCH_INDEXES:
+                session.run(query).consume()
+
+        report["documents"] = _import_documents(session, source, counts["documents"])
+        logging.info(f"스냅샷 가져오기: 문서 {report['documents']}개")
+        report["chunks"] = _import_chunks(session, source, counts["chunks"])
+        logging.info(f"스냅샷 가져오기: 청크 {report['chunks']}개")
+        report["entities"] = _import_entities(session, source)
+        report["relationships"] = _import_relationships(session, source)
+        logging.info(f"스냅샷 가져오기: 엔티티 {report['entities']}개, 관계 {report['relationships']}개")
+
+        # 파생 데이터는 적재한 노드로 다시 계산합니다.
+        report["time_buckets"] = rebuild_time_buckets(session)
+        rebuild_entity_degrees(session)
+
+        if rebuild_indexes:
+            for query in _create_search_indexes(manifest["dimension"]):
+                session.run(query).consume()
+            session.run("CALL db.awaitIndexes($timeout)", timeout=INDEX_AWAIT_SECONDS).consume()
+
+    if report["entities"]:
+        report["graph_analytics"] = run_graph_analytics(driver)
+
+    report["seconds"] = round(time.monotonic() - started, 1)
+    logging.info(f"스냅샷 가져오기 완료: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.services.rag_service import get_neo4j_driver
+
+    parser = argparse.ArgumentParser(description="Neo4j 수집 결과 스냅샷 내보내기/가져오기")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="스냅샷 저장")
+    export_parser.add_argument("directory")
+    import_parser = subparsers.add_parser("import", help="스냅샷 적재")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("--keep-indexes", action="store_true", help="vector/keyword 인덱스를 지우지 않고 적재")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(json.dumps(export_snapshot(get_neo4j_driver(), args.directory), ensure_ascii=False, indent=2))
+    else:
+        print(import_snapshot(get_neo4j_driver(), args.directory, rebuild_indexes=not args.keep_indexes))
@@ -0,0 +1,124 @@
+"""
+외부 호출 없이 결정적으로 동작하는 LLM / 임베딩 모델 (MODEL_PROVIDER=stub).
+
+벤치마크와 부하 테스트에서 Gemini 대신 사용합니다. 같은 입력에는 항상 같은 출력을 내고,
+latency_ms로 호출 지연을 흉내 낼 수 있습니다.
+
+- StubEmbedding: 단어 해싱(feature hashing) 임베딩. 단어를 많이 공유하는 텍스트일수록 코사인 유사도가 높습니다.
+- StubLLM: 프롬프트 종류(테마 분류, 트리플렛 추출, 그 외)에 맞는 형식의 응답을 만듭니다.
+"""
+import hashlib
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.llms import CompletionResponse, CompletionResponseGen, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_completion_callback
+
+STUB_THEMES = ['개발', '설계', '기획', '마케팅', 'QA', '사업', '일반 회의', '기타']
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_HANGUL_WORD = re.compile(r"[가-힣]{2,}")
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@lru_cache(maxsize=200_000)
+def _feature(token: str, dimension: int):
+    value = _digest(token)
+    return value % dimension, 1.0 if (value >> 32) & 1 else -1.0
+
+
+def hash_embedding(text: str, dimension: int) -> np.ndarray:
+    tokens = [token.lower() for token in _WORD.findall(text or "")]
+    vector = np.zeros(dimension, dtype=np.float32)
+    if not tokens:
+        vector[_digest(text or "") % dimension] = 1.0
+        return vector
+    features = [_feature(token, dimension) for token in tokens]
+    indices = np.fromiter((index for index, _ in features), dtype=np.int64, count=len(features))
+    signs = np.fromiter((sign for _, sign in features), dtype=np.float32, count=len(features))
+    vector = np.bincount(indices, weights=signs, minlength=dimension).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class StubEmbedding(BaseEmbedding):
+    dimension: int = 768
+    latency_ms: float = 0.0
+
+    def _sleep(self):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    def _get_query_embedding(self, query: str) -> list:
+        self._sleep()
+        return hash_embedding(query, self.dimension).tolist()
+
+    async def _aget_query_embedding(self, query: str) -> list:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> list:
+        self._sleep()
+        return hash_embedding(text, self.dimension).tolist()
+
+    def _get_text_embeddings(self, texts: list) -> list:
+        # 배치 호출 한 번에 지연 한 번 (batchEmbedContents와 같은 모양)
+        self._sleep()
+        return [hash_embedding(text, self.dimension).tolist() for text in texts]
+
+
+class StubLLM(CustomLLM):
+    latency_ms: float = 0.0
+    # 스트리밍 시 토큰 사이 간격
+    token_latency_ms: float = 0.0
+    answer_words: int = 40
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="stub", context_window=1_000_000, num_output=2048)
+
+    def _respond(self, prompt: str) -> str:
+        seed = _digest(prompt)
+        if "테마 이름만" in prompt:
+            return STUB_THEMES[seed % len(STUB_THEMES)]
+        if "트리플렛" in prompt:
+            body = prompt.split("---------------------")
+            text = body[1] if len(body) > 2 else prompt
+            words = list(dict.fromkeys(_HANGUL_WORD.findall(text)))
+            triplets = []
+            for i in range(0, min(len(words) - 1, 20), 2):
+                triplets.append(f"({words[i]}, 관련, {words[i + 1]})")
+            return "\n".join(triplets[:10])
+        words = _HANGUL_WORD.findall(prompt) or ["응답"]
+        rng = random.Random(seed)
+        return " ".join(rng.choice(words) for _ in range(self.answer_words)) + "."
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        return CompletionResponse(text=self._respond(prompt))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        text = self._respond(prompt)
+
+        def gen() -> CompletionResponseGen:
+            if self.latency_ms > 0:
+                time.sleep(self.latency_ms / 1000)
+            accumulated = ""
+            for word in text.split(" "):
+                delta = word if not accumulated else " " + word
+                accumulated += delta
+                yield CompletionResponse(text=accumulated, delta=delta)
+                if self.token_latency_ms > 0:
+                    time.sleep(self.token_latency_ms / 1000)
+
+        return gen()
@@ -1,21 +1,34 @@
 import logging
-from app.core.config import settings
-from supabase import create_client, Client
+from starlette.concurrency import run_in_threadpool
+from app.services.pools import get_supabase_client
 
-# Supabase 클라이언트는 필요할 때마다 생성하여 사용합니다.
-# FastAPI의 의존성 주입 시스템을 사용할 수도 있습니다.
+# Supabase 클라이언트는 프로세스 전역으로 하나만 만들어 공유합니다. (pools 모듈 참고)
+
+async def run_supabase(query):
+    """
+    async 라우터용 Supabase 호출. supabase-py 클라이언트는 동기식이므로 요청을 스레드풀에서 실행해
+    이벤트 루프(와 진행 중인 채팅 스트림)를 막지 않습니다. (클라이언트 최초 생성도 스레드에서 일어납니다.)
+    query(client)는 실행할 요청 빌더를 반환합니다.
+        response = await run_supabase(lambda client: client.from_("documents").select("id").eq("status", "PENDING"))
+    """
+    def execute():
+        client = get_supabase_client()
+        if client is None:
+            raise RuntimeError("Supabase 클라이언트를 사용할 수 없습니다.")
+        return query(client).execute()
+
+    return await run_in_threadpool(execute)
 
 async def get_document_status(document_id: str) -> str:
     """특정 문서의 상태를 Supabase에서 조회합니다."""
     try:
-        # 비동기 환경에서는 매번 클라이언트를 생성하는 것이 더 안전할 수 있습니다.
-        supabase_client: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-        
-        response = supabase_client.from_("documents").select("status").eq("id", document_id).single().execute()
-        
+        response = await run_supabase(
+            lambda client: client.from_("documents").select("status").eq("id", document_id).single()
+        )
+
         if response.data:
             return response.data.get("status", "UNKNOWN")
         return "NOT_FOUND"
     except Exception as e:
         logging.error(f"Supabase에서 문서 상태 조회 중 오류 발생 (ID: {document_id}): {e}", exc_info=True)
-        return "ERROR" 
\ No newline at end of file
+        return "ERROR"
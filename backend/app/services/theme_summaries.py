@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from app.services.dashboard_snapshot import get_dashboard_snapshot
+
+# 테마 요약에 사용하는 문서 수 (문서 ID 정렬 기준 앞에서부터)
+THEME_SUMMARY_SOURCES = 5
+
+
+def make_input_hash(sources: list) -> str:
+    """[(문서 ID, 개별 요약), ...]으로 테마 요약 입력 해시를 만듭니다."""
+    payload = json.dumps(sources, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ThemeSummaryStore:
+    """
+    테마 종합 요약을 Supabase(theme_summaries 테이블)에 저장하고 메모리에서 제공하는 저장소.
+
+    - 테마에 속한 문서 ID와 개별 요약의 해시(input_hash)가 저장된 값과 같으면 저장된 요약을 그대로 반환합니다.
+    - 해시가 달라졌거나 아직 요약이 없으면 백그라운드에서 다시 생성하도록 예약하고,
+      그동안은 이전 요약(없으면 대체 문구)을 즉시 반환합니다. 요청 경로에서 LLM을 기다리지 않습니다.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self._lock = threading.Lock()
+        self._rows = None          # theme -> {"input_hash", "summary", "document_ids"}
+        self._inputs = {}          # theme -> (snapshot 버전, sources, input_hash, 문서 수)
+        self._inflight = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="theme-summary")
+
+    # ---- 저장소 ----
+
+    def _load_rows(self) -> dict:
+        if self._rows is not None:
+            return self._rows
+        from app.services.supabase_service import get_supabase_client
+        supabase_client = get_supabase_client()
+
+        rows = {}
+        try:
+            response = supabase_client.from_("theme_summaries").select("theme, input_hash, summary, document_ids").execute()
+            for row in response.data or []:
+                rows[row["theme"]] = row
+        except Exception as e:
+            # 마이그레이션(04-theme-summaries.sql)이 적용되지 않았으면 메모리에만 보관합니다.
+            logging.error(f"theme_summaries 테이블 조회 실패 (메모리 캐시만 사용): {e}")
+        with self._lock:
+            if self._rows is None:
+                self._rows = rows
+            return self._rows
+
+    def _save_row(self, theme: str, input_hash: str, summary: str, document_ids: list):
+        from app.services.supabase_service import get_supabase_client
+        supabase_client = get_supabase_client()
+
+        row = {"theme": theme, "input_hash": input_hash, "summary": summary, "document_ids": document_ids}
+        with self._lock:
+            if self._rows is None:
+                self._rows = {}
+            self._rows[theme] = row
+        try:
+            supabase_client.from_("theme_summaries").upsert({
+                **row,
+                "updated_at": datetime.utcnow().isoformat() + "Z",
+            }).execute()
+        except Exception as e:
+            logging.error(f"테마 '{theme}' 요약 저장 실패: {e}")
+
+    # ---- 입력 ----
+
+    def _current_inputs(self, theme: str):
+        """(sources, input_hash, 문서 수)를 반환합니다. 대시보드 스냅샷 버전이 같으면 이전 계산을 재사용합니다."""
+        version, doc_ids = get_dashboard_snapshot().theme_document_ids(theme)
+        with self._lock:
+            cached = self._inputs.get(theme)
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2], cached[3]
+
+        sources = []
+        selected = doc_ids[:THEME_SUMMARY_SOURCES]
+        if selected:
+            from app.services.supabase_service import get_supabase_client
+            supabase_client = get_supabase_client()
+
+            response = supabase_client.from_("documents").select("id, summary").in_("id", selected).execute()
+            rows = sorted(response.data or [], key=lambda doc: doc.get("id") or "")
+            sources = [[doc["id"], doc["summary"]] for doc in rows if doc.get("summary")]
+
+        input_hash = make_input_hash(sources)
+        with self._lock:
+            self._inputs[theme] = (version, sources, input_hash, len(doc_ids))
+        return sources, input_hash, len(doc_ids)
+
+    # ---- 생성 ----
+
+    def _regenerate(self, theme: str):
+        from app.services.rag_service import cached_llm_complete, THEME_SUMMARY_PROMPT_TEMPLATE
+        from app.services.rate_limiter import BACKGROUND
+
+        try:
+            sources, input_hash, _ = self._current_inputs(theme)
+            if not sources:
+                return
+            stored = self._load_rows().get(theme)
+            if stored and stored.get("input_hash") == input_hash:
+                return
+            summary = cached_llm_complete(
+                THEME_SUMMARY_PROMPT_TEMPLATE,
+                lane=BACKGROUND,
+                theme=theme,
+                summaries=' '.join(summary for _, summary in sources),
+            )
+            if summary:
+                self._save_row(theme, input_hash, summary, [doc_id for doc_id, _ in sources])
+                logging.info(f"테마 '{theme}' 종합 요약을 갱신했습니다.")
+        except Exception as e:
+            logging.error(f"테마 '{theme}' 요약 생성 실패: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(theme)
+
+    def schedule_refresh(self, theme: str):
+        """테마 요약을 백그라운드에서 (필요하면) 다시 생성하도록 예약합니다. 같은 테마는 중복 예약하지 않습니다."""
+        if not theme:
+            return
+        with self._lock:
+            if theme in self._inflight:
+                return
+            self._inflight.add(theme)
+        self._executor.submit(self._regenerate, theme)
+
+    def get(self, theme: str) -> dict:
+        """
+        저장된 테마 요약을 즉시 반환합니다.
+        status: "fresh"(최신), "stale"(이전 요약, 재생성 중), "pending"(요약 없음, 생성 중), "empty"(문서/요약 없음)
+        """
+        sources, input_hash, doc_count = self._current_inputs(theme)
+        if not sources:
+            if doc_count:
+                return {"theme": theme, "summary": f"{theme} 테마와 관련된 {doc_count}개의 회의록이 있습니다.", "status": "empty"}
+            return {"theme": theme, "summary": f"{theme} 테마와 관련된 회의록들의 종합 요약입니다.", "status": "empty"}
+
+        stored = self._load_rows().get(theme)
+
+        if stored and stored.get("input_hash") == input_hash:
+            return {"theme": theme, "summary": stored["summary"], "status": "fresh"}
+
+        self.schedule_refresh(theme)
+        if stored:
+            return {"theme": theme, "summary": stored["summary"], "status": "stale"}
+        # Use first summary as fallback
+        return {"theme": theme, "summary": sources[0][1], "status": "pending"}
+
+
+@lru_cache(maxsize=None)
+def get_theme_summary_store() -> ThemeSummaryStore:
+    return ThemeSummaryStore()
@@ -0,0 +1,213 @@
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+# 문서 수를 미리 세어두는 시간 버킷 단위
+GRANULARITIES = ("day", "week", "month")
+
+# 범위 조회 시 한 번에 반환하는 최대 버킷 수 (일 단위 약 10년)
+MAX_TIMELINE_BUCKETS = 3660
+
+_INCREMENT_QUERY = """
+UNWIND $buckets AS b
+MERGE (t:TimeBucket {granularity: b.granularity, key: b.key})
+ON CREATE SET t.count = 0
+SET t.count = t.count + b.delta
+"""
+
+_DECREMENT_QUERY = """
+UNWIND $buckets AS b
+MATCH (t:TimeBucket {granularity: b.granularity, key: b.key})
+SET t.count = t.count - b.delta
+WITH t
+WHERE t.count <= 0
+DELETE t
+"""
+
+
+def _to_date(value) -> date | None:
+    """Neo4j DateTime / datetime / date / ISO 문자열을 date로 변환합니다. (저장된 오프셋 기준)"""
+    if value is None:
+        return None
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+def bucket_key(granularity: str, day: date) -> str:
+    """
+    버킷 키. 사전순 정렬이 시간순과 같도록 고정 폭으로 만듭니다.
+    day: 2025-03-04, week: 2025-W10 (ISO 주차), month: 2025-03
+    """
+    if granularity == "day":
+        return day.isoformat()
+    if granularity == "week":
+        iso = day.isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    if granularity == "month":
+        return f"{day.year}-{day.month:02d}"
+    raise ValueError(f"지원하지 않는 단위입니다: {granularity}")
+
+
+def bucket_start(granularity: str, day: date) -> date:
+    """day가 속한 버킷의 시작 날짜"""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"지원하지 않는 단위입니다: {granularity}")
+
+
+def next_bucket_start(granularity: str, start: date) -> date:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return date(start.year + (start.month // 12), start.month % 12 + 1, 1)
+    raise ValueError(f"지원하지 않는 단위입니다: {granularity}")
+
+
+def bucket_label(granularity: str, start: date) -> str:
+    """대시보드에 표시하는 기간 이름 (주 단위는 기존 타임라인과 같은 'YYYY-N주차')"""
+    if granularity == "week":
+        iso = start.isocalendar()
+        return f"{iso[0]}-{iso[1]}주차"
+    if granularity == "month":
+        return f"{start.year}-{start.month}월"
+    return start.isoformat()
+
+
+def _key_start(granularity: str, key: str) -> date:
+    if granularity == "week":
+        year, week = key.split("-W")
+        return date.fromisocalendar(int(year), int(week), 1)
+    if granularity == "month":
+        year, month = key.split("-")
+        return date(int(year), int(month), 1)
+    return date.fromisoformat(key)
+
+
+def document_buckets(created_at, delta: int = 1) -> list:
+    """문서 하나가 속한 (단위별) 버킷 목록"""
+    day = _to_date(created_at)
+    if day is None:
+        return []
+    return [
+        {"granularity": granularity, "key": bucket_key(granularity, day), "delta": delta}
+        for granularity in GRANULARITIES
+    ]
+
+
+def shift_document_buckets(tx, previous, current):
+    """
+    Document의 created_at이 previous → current로 바뀐 만큼 버킷 카운터를 조정합니다.
+    생성은 previous=None, 삭제는 current=None으로 호출합니다. tx는 세션 또는 트랜잭션입니다.
+    """
+    old_buckets = document_buckets(previous)
+    new_buckets = document_buckets(current)
+    if old_buckets == new_buckets:
+        return
+    if old_buckets:
+        tx.run(_DECREMENT_QUERY, buckets=old_buckets)
+    if new_buckets:
+        tx.run(_INCREMENT_QUERY, buckets=new_buckets)
+
+
+async def query_timeline(session, granularity: str, start: date | None = None, end: date | None = None, limit: int = 4) -> list:
+    """
+    버킷 카운터로 타임라인을 조회합니다. (neo4j.AsyncSession) 비용은 반환하는 버킷 수에 비례합니다.
+
+    - start/end가 없으면 문서가 있는 최근 limit개 버킷을 최신순으로 반환합니다. (기존 대시보드 타임라인과 같은 형태)
+    - 범위를 주면 start~end 사이 모든 버킷을 오래된 순으로, 문서가 없는 버킷은 0으로 채워 반환합니다.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity는 {', '.join(GRANULARITIES)} 중 하나여야 합니다.")
+
+    if start is None and end is None:
+        result = await session.run("""
+            MATCH (t:TimeBucket {granularity: $granularity})
+            RETURN t.key AS key, t.count AS count
+            ORDER BY t.key DESC
+            LIMIT $limit
+        """, granularity=granularity, limit=limit)
+        timeline = []
+        async for record in result:
+            start_day = _key_start(granularity, record["key"])
+            timeline.append({
+                "period": bucket_label(granularity, start_day),
+                "key": record["key"],
+                "start": start_day.isoformat(),
+                "count": record["count"],
+            })
+        return timeline
+
+    end = end or date.today()
+    start = start or end
+    if start > end:
+        raise ValueError("start는 end보다 이후일 수 없습니다.")
+
+    first = bucket_start(granularity, start)
+    last = bucket_start(granularity, end)
+    starts = []
+    current = first
+    while current <= last:
+        starts.append(current)
+        if len(starts) > MAX_TIMELINE_BUCKETS:
+            raise ValueError(f"한 번에 조회할 수 있는 버킷은 최대 {MAX_TIMELINE_BUCKETS}개입니다.")
+        current = next_bucket_start(granularity, current)
+
+    result = await session.run("""
+        MATCH (t:TimeBucket {granularity: $granularity})
+        WHERE t.key >= $start_key AND t.key <= $end_key
+        RETURN t.key AS key, t.count AS count
+    """, granularity=granularity, start_key=bucket_key(granularity, first), end_key=bucket_key(granularity, last))
+    counts = {record["key"]: record["count"] async for record in result}
+
+    timeline = []
+    for start_day in starts:
+        key = bucket_key(granularity, start_day)
+        timeline.append({
+            "period": bucket_label(granularity, start_day),
+            "key": key,
+            "start": start_day.isoformat(),
+            "count": counts.get(key, 0),
+        })
+    return timeline
+
+
+def rebuild_time_buckets(session) -> dict:
+    """
+    모든 TimeBucket을 지우고 Document 노드로부터 다시 계산합니다. (기존 데이터 백필/정합성 복구용)
+    """
+    counts = Counter()
+    documents = 0
+    result = session.run("""
+        MATCH (d:Document)
+        WHERE d.created_at IS NOT NULL
+        RETURN d.created_at AS created_at
+    """)
+    for record in result:
+        for bucket in document_buckets(record["created_at"]):
+            counts[(bucket["granularity"], bucket["key"])] += 1
+        documents += 1
+
+    session.run("MATCH (t:TimeBucket) DETACH DELETE t")
+    buckets = [
+        {"granularity": granularity, "key": key, "delta": count}
+        for (granularity, key), count in counts.items()
+    ]
+    for i in range(0, len(buckets), 1000):
+        session.run(_INCREMENT_QUERY, buckets=buckets[i:i + 1000])
+
+    logging.info(f"시간 버킷 재계산 완료: 문서 {documents}개, 버킷 {len(buckets)}개")
+    return {"documents": documents, "buckets": len(buckets)}
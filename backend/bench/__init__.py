@@ -0,0 +1,6 @@
+"""
+오프라인 벤치마크.
+
+RAG_BACKEND=memory, MODEL_PROVIDER=stub 구성으로 process_ingestion과 perform_hybrid_search를
+외부 서비스 없이 실행해 처리량과 지연 시간을 잽니다. 사용법은 bench/run.py 참고.
+"""
@@ -0,0 +1,153 @@
+"""
+벤치마크용 합성 회의록 코퍼스.
+
+시드가 같으면 항상 같은 문서/청크/질문을 만듭니다. 문서는 실제 회의록과 같은 머리말
+(날짜, 참석자, 장소, 안건)과 "이름: 발언" 형식의 본문을 가지므로 extract_meeting_metadata,
+extract_speaker_from_chunk, 청킹 단계가 운영과 같은 경로를 탑니다.
+
+각 문서는 고유한 프로젝트 코드명("프로젝트 A17" 등)과 주제를 하나씩 가지며,
+질문은 특정 문서의 코드명/주제로 만들어 정답 문서 id를 함께 돌려줍니다.
+"""
+import random
+import uuid
+from datetime import date, timedelta
+
+NAMES = [
+    '김민준', '이서연', '박지훈', '최수아', '정도윤', '강하은', '조현우', '윤지아',
+    '장예준', '임채원', '한시우', '오유나', '서주원', '신다은', '권건우', '황서윤',
+]
+LOCATIONS = ['본사 3층 회의실', '온라인(Zoom)', '판교 오피스', '세미나실 B', '대회의실']
+THEMES = ['개발', '설계', '기획', '마케팅', 'QA', '사업', '일반 회의']
+TOPICS = {
+    '개발': ['결제 모듈 리팩터링', '검색 API 성능 개선', '배포 파이프라인 정비', '로그 수집 구조 변경'],
+    '설계': ['데이터 모델 재설계', '권한 체계 설계', '알림 서비스 아키텍처', '캐시 계층 설계'],
+    '기획': ['신규 온보딩 플로우', '요금제 개편안', '관리자 대시보드 기획', '모바일 앱 로드맵'],
+    '마케팅': ['하반기 캠페인 계획', '브랜드 리뉴얼', '리텐션 지표 분석', '제휴 프로모션'],
+    'QA': ['회귀 테스트 자동화', '릴리스 체크리스트', '버그 분류 기준', '성능 테스트 시나리오'],
+    '사업': ['파트너십 계약 검토', '해외 진출 전략', '분기 매출 리뷰', '투자 유치 준비'],
+    '일반 회의': ['주간 업무 공유', '팀 회고', '채용 계획 논의', '사무실 이전 준비'],
+}
+SUBJECTS = [
+    '일정', '예산', '담당자', '리스크', '우선순위', '지표', '배포', '테스트', '문서화', '고객 피드백',
+    '인프라 비용', '보안 검토', '성능', '장애 대응', '요구사항', '디자인 시안', '데이터 마이그레이션',
+]
+VERBS = [
+    '검토했습니다', '공유드립니다', '조정이 필요합니다', '확정했습니다', '다음 주까지 정리하겠습니다',
+    '추가 논의가 필요합니다', '문제가 없어 보입니다', '우려가 있습니다', '담당하기로 했습니다',
+]
+FILLERS = [
+    '지난 회의에서 나온 내용을 바탕으로', '현재 진행 상황을 보면', '고객사 요청에 따라',
+    '내부 논의 결과', '데이터를 다시 확인해 보니', '관련 팀과 협의한 결과', '일정상 무리가 없다면',
+]
+
+
+class Corpus:
+    """
+    seed로 결정되는 합성 코퍼스.
+    documents(n)은 Supabase documents 행과 같은 모양의 dict를, chunk_rows(n)은 검색 벤치마크용
+    청크 행을 만듭니다.
+    """
+
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(f"{self.seed}:{key}")
+
+    def _doc_profile(self, index: int) -> dict:
+        rng = self._rng("doc", index)
+        theme = THEMES[index % len(THEMES)]
+        return {
+            "index": index,
+            "rng": rng,
+            "theme": theme,
+            "topic": rng.choice(TOPICS[theme]),
+            "code": f"프로젝트 {chr(ord('A') + index % 26)}{index}",
+            "attendees": rng.sample(NAMES, rng.randint(3, 6)),
+            "date": date(2024, 1, 1) + timedelta(days=index % 540),
+        }
+
+    def _utterance(self, rng: random.Random, profile: dict) -> str:
+        speaker = rng.choice(profile["attendees"])
+        subject = rng.choice(SUBJECTS)
+        mention = profile["code"] if rng.random() < 0.3 else profile["topic"]
+        return f"{speaker}: {rng.choice(FILLERS)} {mention} {subject} 관련해서 {rng.choice(VERBS)}."
+
+    def document(self, index: int, paragraphs: int = 12) -> dict:
+        profile = self._doc_profile(index)
+        rng = profile["rng"]
+        header = "\n".join([
+            f"날짜: {profile['date'].isoformat()}",
+            f"참석자: {', '.join(profile['attendees'])}",
+            f"장소: {rng.choice(LOCATIONS)}",
+            f"안건: {profile['code']} {profile['topic']}",
+        ])
+        body = []
+        for _ in range(paragraphs):
+            body.append(" ".join(self._utterance(rng, profile) for _ in range(rng.randint(3, 6))))
+        return {
+            "id": str(uuid.UUID(int=self._rng("id", index).getrandbits(128))),
+            "title": f"{profile['code']} {profile['topic']} 회의",
+            "content": header + "\n\n" + "\n\n".join(body),
+            "created_at": f"{profile['date'].isoformat()}T10:00:00+00:00",
+            "link": None,
+            "status": "PENDING",
+        }
+
+    def documents(self, count: int, paragraphs: int = 12) -> list:
+        return [self.document(i, paragraphs) for i in range(count)]
+
+    def chunk_rows(self, count: int, chunks_per_document: int = 10) -> tuple:
+        """
+        검색 벤치마크용 청크 행과 Document 노드.
+        반환: (rows [{"id", "text", "document_id", "speaker"}],
+              document_nodes {id: {"title", "created_at", "summary", "theme", "meeting_date", "attendees"}})
+        """
+        rows = []
+        nodes = {}
+        doc_count = max(1, (count + chunks_per_document - 1) // chunks_per_document)
+        for doc_index in range(doc_count):
+            profile = self._doc_profile(doc_index)
+            rng = profile["rng"]
+            document_id = f"doc-{doc_index}"
+            nodes[document_id] = {
+                "title": f"{profile['code']} {profile['topic']} 회의",
+                "created_at": f"{profile['date'].isoformat()}T10:00:00+00:00",
+                # 수집 시 LLM이 만드는 요약 대신 쓰는 한 줄 요약 (2단계 검색의 문서 임베딩용)
+                "summary": f"{profile['code']} {profile['topic']} 논의. 참석자: {', '.join(profile['attendees'])}",
+                # 검색 필터용 회의 메타데이터
+                "theme": profile["theme"],
+                "meeting_date": profile["date"].isoformat(),
+                "attendees": list(profile["attendees"]),
+            }
+            for chunk_index in range(chunks_per_document):
+                if len(rows) >= count:
+                    break
+                text = " ".join(self._utterance(rng, profile) for _ in range(rng.randint(8, 14)))
+                rows.append({
+                    "id": f"{document_id}-{chunk_index}",
+                    "text": text,
+                    "document_id": document_id,
+                    "speaker": text.split(":", 1)[0],
+                })
+        return rows, nodes
+
+    def queries(self, count: int, document_count: int, id_of=None) -> list:
+        """
+        [(질문, 정답 문서 id)] 목록. id_of(index)로 문서 인덱스를 id로 바꿉니다.
+        (기본값은 chunk_rows의 "doc-{index}" 규칙)
+        """
+        id_of = id_of or (lambda index: f"doc-{index}")
+        rng = self._rng("queries", count, document_count)
+        result = []
+        for _ in range(count):
+            index = rng.randrange(document_count)
+            profile = self._doc_profile(index)
+            subject = rng.choice(SUBJECTS)
+            templates = [
+                f"{profile['code']} {subject} 어떻게 정했나요?",
+                f"{profile['topic']} {subject} 논의 내용 알려줘",
+                f"{profile['code']} 회의에서 {rng.choice(profile['attendees'])}가 말한 내용은?",
+            ]
+            result.append((rng.choice(templates), id_of(index)))
+        return result
@@ -0,0 +1,254 @@
+"""
+검색 품질/비용 평가.
+
+perform_hybrid_search의 튜닝 값(SearchParams, top_k) 조합마다 골든셋 질문을 실행해
+recall@k, MRR, nDCG@k와 검색 지연, 프롬프트 토큰(질문 + 컨텍스트 청크)을 한 표로 남깁니다.
+기준 설정(SearchParams 기본값, top_k=10)의 recall을 유지하면서 토큰이 가장 적은 조합을 추천합니다.
+
+골든셋은 JSONL이며 한 줄에 질문 하나입니다. relevant_chunks가 있으면 청크 단위, 없으면 문서 단위로 채점합니다.
+    {"question": "결제 모듈 배포 일정은?", "relevant_documents": ["<document uuid>"], "relevant_chunks": ["<chunk id>"]}
+
+사용법 (backend 디렉토리에서):
+    # 현재 .env의 Neo4j/Gemini로 평가
+    python -m bench.evaluate --golden golden.jsonl
+    # 외부 서비스 없이 합성 코퍼스로 평가 (memory 저장소 + stub 모델)
+    python -m bench.evaluate --synthetic 10000
+    # 그리드 지정: 키=값,값;키=값 (top_k와 SearchParams 필드)
+    python -m bench.evaluate --synthetic 10000 --grid "top_k=5,10;candidate_multiplier=1,2;vector_threshold=0.6,0.7"
+
+결과는 bench/results/eval-<시각>.md(표)와 .json으로 저장됩니다. 표는 설정 순서와 반올림이 고정되어 있어
+실행 간 diff로 비교할 수 있습니다.
+"""
+import argparse
+import itertools
+import json
+import math
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.run import configure_offline_environment, percentiles, load_chunks, _git_commit
+
+DEFAULT_GRID = {
+    "top_k": [5, 10],
+    "candidate_multiplier": [1, 2, 3],
+    "vector_threshold": [0.6, 0.7, 0.8],
+    "keyword_weight": [1.0, 1.5],
+}
+BASELINE = {"top_k": 10}
+
+
+# ---- 지표 ----
+
+def recall_at_k(ranked: list, relevant: set, k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & relevant) / len(relevant)
+
+
+def reciprocal_rank(ranked: list, relevant: set) -> float:
+    for rank, item in enumerate(ranked, start=1):
+        if item in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: list, relevant: set, k: int) -> float:
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, item in enumerate(ranked[:k], start=1) if item in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+# ---- 골든셋 / 그리드 ----
+
+def load_golden_set(path: str) -> list:
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            items.append({
+                "question": item["question"],
+                "relevant_documents": list(item.get("relevant_documents") or []),
+                "relevant_chunks": list(item.get("relevant_chunks") or []),
+            })
+    return items
+
+
+def parse_grid(spec: str | None) -> dict:
+    """'top_k=5,10;vector_threshold=0.6,0.7' -> {"top_k": [5, 10], ...}"""
+    if not spec:
+        return dict(DEFAULT_GRID)
+    grid = {}
+    for part in spec.split(";"):
+        if not part.strip():
+            continue
+        key, values = part.split("=", 1)
+        grid[key.strip()] = [json.loads(value) for value in values.split(",")]
+    return grid
+
+
+def expand_grid(grid: dict) -> list:
+    """그리드의 모든 조합 + 기준 설정. 기준 설정은 항상 첫 번째입니다."""
+    from app.models.schemas import SearchParams
+
+    unknown = set(grid) - set(SearchParams.model_fields) - {"top_k"}
+    if unknown:
+        raise ValueError(f"알 수 없는 파라미터: {', '.join(sorted(unknown))}")
+    keys = list(grid)
+    configs = [dict(BASELINE)]
+    for values in itertools.product(*(grid[key] for key in keys)):
+        config = dict(zip(keys, values))
+        config.setdefault("top_k", BASELINE["top_k"])
+        if _normalize(config) != _normalize(configs[0]):
+            configs.append(config)
+    return configs
+
+
+def _normalize(config: dict) -> dict:
+    from app.models.schemas import SearchParams
+
+    params = SearchParams(**{k: v for k, v in config.items() if k != "top_k"}).model_dump()
+    return {"top_k": config.get("top_k", BASELINE["top_k"]), **params}
+
+
+def _label(config: dict) -> str:
+    """기본값과 다른 값만 표시합니다."""
+    from app.models.schemas import SearchParams
+
+    defaults = {"top_k": BASELINE["top_k"], **SearchParams().model_dump()}
+    changed = [f"{key}={value}" for key, value in _normalize(config).items() if defaults[key] != value]
+    return " ".join(changed) or "(baseline)"
+
+
+# ---- 평가 ----
+
+def evaluate_config(config: dict, golden: list, embeddings: list) -> dict:
+    from app.models.schemas import SearchParams
+    from app.services import rag_service
+    from app.services.rate_limiter import estimate_tokens
+
+    top_k = config.get("top_k", BASELINE["top_k"])
+    params = SearchParams(**{k: v for k, v in config.items() if k != "top_k"})
+    recalls, rrs, ndcgs, latencies, tokens, returned = [], [], [], [], [], []
+    for item, embedding in zip(golden, embeddings):
+        t0 = time.perf_counter()
+        nodes = rag_service.perform_hybrid_search(item["question"], top_k=top_k, params=params, query_embedding=embedding)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        if item["relevant_chunks"]:
+            ranked = [node.node.node_id for node in nodes]
+            relevant = set(item["relevant_chunks"])
+        else:
+            # 문서 단위: 같은 문서의 청크는 처음 나온 순위만 인정
+            ranked = list(dict.fromkeys(node.node.metadata.get("document_id") for node in nodes))
+            relevant = set(item["relevant_documents"])
+        recalls.append(recall_at_k(ranked, relevant, top_k))
+        rrs.append(reciprocal_rank(ranked, relevant))
+        ndcgs.append(ndcg_at_k(ranked, relevant, top_k))
+        # 답변 생성 시 LLM에 들어가는 양 (get_chat_response_stream의 예산 계산과 같은 기준)
+        tokens.append(estimate_tokens(item["question"]) + sum(estimate_tokens(node.node.text) for node in nodes))
+        returned.append(len(nodes))
+
+    count = len(golden) or 1
+    latency = percentiles(latencies)
+    return {
+        "config": _label(config),
+        "params": _normalize(config),
+        "recall@k": round(sum(recalls) / count, 4),
+        "mrr": round(sum(rrs) / count, 4),
+        "ndcg@k": round(sum(ndcgs) / count, 4),
+        "p50_ms": latency.get("p50"),
+        "p99_ms": latency.get("p99"),
+        "prompt_tokens": round(sum(tokens) / count, 1),
+        "chunks": round(sum(returned) / count, 2),
+    }
+
+
+def recommend(results: list, tolerance: float) -> dict | None:
+    """기준 설정의 recall을 tolerance 이내로 유지하는 조합 중 프롬프트 토큰(동률이면 p50)이 가장 적은 것"""
+    if not results:
+        return None
+    floor = results[0]["recall@k"] - tolerance
+    eligible = [row for row in results if row["recall@k"] >= floor]
+    return min(eligible, key=lambda row: (row["prompt_tokens"], row["p50_ms"] or 0))
+
+
+def render_table(results: list) -> str:
+    from tabulate import tabulate
+
+    columns = ["config", "recall@k", "mrr", "ndcg@k", "p50_ms", "p99_ms", "prompt_tokens", "chunks"]
+    return tabulate(
+        [[row[column] for column in columns] for row in results],
+        headers=columns,
+        tablefmt="github",
+        floatfmt=("", ".4f", ".4f", ".4f", ".2f", ".2f", ".1f", ".2f"),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검색 튜닝 값 조합별 품질(recall/MRR/nDCG)과 비용(지연/토큰) 평가")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--golden", help="골든셋 JSONL 경로 (현재 .env의 저장소/모델 사용)")
+    source.add_argument("--synthetic", type=int, metavar="CHUNKS", help="합성 코퍼스 청크 수 (memory 저장소 + stub 모델)")
+    parser.add_argument("--queries", type=int, default=200, help="합성 골든셋 질문 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--grid", default=None, help="키=값,값;키=값 형식. 기본값은 DEFAULT_GRID")
+    parser.add_argument("--recall-tolerance", type=float, default=0.0, help="추천 시 허용하는 기준 대비 recall 감소폭")
+    parser.add_argument("--output", default=None, help="결과 경로(확장자 제외). 기본: bench/results/eval-<시각>")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        configure_offline_environment()
+
+    import logging
+    from app.services import rag_service
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.synthetic:
+        from bench.corpus import Corpus
+
+        corpus = Corpus(seed=args.seed)
+        document_count = load_chunks(rag_service.get_storage(), corpus, args.synthetic)
+        golden = [
+            {"question": question, "relevant_documents": [document_id], "relevant_chunks": []}
+            for question, document_id in corpus.queries(args.queries, document_count)
+        ]
+    else:
+        golden = load_golden_set(args.golden)
+
+    configs = expand_grid(parse_grid(args.grid))
+    print(f"{len(golden)} questions x {len(configs)} configs", file=sys.stderr)
+
+    # 질문 임베딩은 설정과 무관하므로 한 번만 계산합니다. (지연 시간은 검색 단계만 측정)
+    embeddings = [rag_service.embed_query(item["question"]) for item in golden]
+
+    results = [evaluate_config(config, golden, embeddings) for config in configs]
+    best = recommend(results, args.recall_tolerance)
+    table = render_table(results)
+
+    stem = Path(args.output) if args.output else Path("bench/results") / f"eval-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    stem.with_suffix(".md").write_text(table + "\n", encoding="utf-8")
+    stem.with_suffix(".json").write_text(json.dumps({
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "args": vars(args),
+            "questions": len(golden),
+        },
+        "results": results,
+        "recommended": best,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(table)
+    if best:
+        print(f"\nrecommended: {best['config']} (recall@k={best['recall@k']}, prompt_tokens={best['prompt_tokens']}, p50={best['p50_ms']}ms)")
+    print(f"report: {stem.with_suffix('.md')}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
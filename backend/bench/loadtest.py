@@ -0,0 +1,253 @@
+"""
+/api/chat SSE 부하 테스트.
+
+동시에 여러 채팅 스트림을 열고 이벤트(status/sources/token/done/error)를 파싱해
+요청마다 소스 도착 시간, 첫 토큰 시간(TTFT), 토큰 간 간격, 전체 시간, 오류를 기록합니다.
+동시성 단계를 여러 개 주면 단계별로 돌려 TTFT SLO를 지키는 최대 동시 스트림 수(용량)를 알려줍니다.
+
+도착 방식
+- closed: 동시 사용자 N명이 응답을 끝까지 받은 뒤 바로(또는 --think-ms 후) 다음 질문을 보냅니다.
+- poisson / constant: 초당 --rate 건으로 요청이 도착합니다. (지수 분포 / 일정 간격, 동시 스트림 상한 N)
+
+--url을 주지 않으면 memory 저장소 + stub 모델로 앱을 이 프로세스 안에서 띄우고 합성 코퍼스를 적재해 테스트합니다.
+
+사용법 (backend 디렉토리에서):
+    python -m bench.loadtest --concurrency 1,4,16,32 --requests 200
+    python -m bench.loadtest --arrival poisson --rate 5 --concurrency 64 --duration 60
+    python -m bench.loadtest --url http://localhost:8000 --concurrency 8 --requests 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.run import configure_offline_environment, percentiles, load_chunks, _git_commit
+
+
+class StreamResult:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status_code = None
+        self.time_to_sources = None
+        self.ttft = None
+        self.token_times = []
+        self.total = None
+        self.done = False
+        self.error = None
+
+    def gaps_ms(self) -> list:
+        return [(b - a) * 1000 for a, b in zip(self.token_times, self.token_times[1:])]
+
+
+async def run_stream(client, url: str, question: str) -> StreamResult:
+    result = StreamResult()
+    try:
+        async with client.stream("POST", url, json={"question": question}) as response:
+            result.status_code = response.status_code
+            if response.status_code != 200:
+                result.error = f"http {response.status_code}"
+                await response.aread()
+                return result
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                now = time.perf_counter()
+                event = json.loads(line[6:])
+                kind = event.get("type")
+                if kind == "sources" and result.time_to_sources is None:
+                    result.time_to_sources = now - result.started
+                elif kind == "token":
+                    if result.ttft is None:
+                        result.ttft = now - result.started
+                    result.token_times.append(now)
+                elif kind == "done":
+                    result.done = True
+                elif kind == "error":
+                    result.error = event.get("message") or "error event"
+        if not result.done and result.error is None:
+            result.error = "stream ended without done"
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.total = time.perf_counter() - result.started
+    return result
+
+
+async def run_level(url: str, questions: list, concurrency: int, args) -> tuple:
+    """한 동시성 단계를 실행하고 (결과 목록, 경과 초)를 반환합니다."""
+    import httpx
+
+    rng = random.Random(args.seed)
+    results = []
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    counter = iter(range(10 ** 9))
+
+    def next_question():
+        index = next(counter)
+        if args.requests and index >= args.requests:
+            return None
+        if deadline and time.perf_counter() >= deadline:
+            return None
+        return questions[index % len(questions)]
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        if args.arrival == "closed":
+            async def user():
+                while (question := next_question()) is not None:
+                    results.append(await run_stream(client, url, question))
+                    if args.think_ms:
+                        await asyncio.sleep(args.think_ms / 1000)
+
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+            tasks = []
+
+            async def one(question):
+                async with semaphore:
+                    results.append(await run_stream(client, url, question))
+
+            while (question := next_question()) is not None:
+                tasks.append(asyncio.create_task(one(question)))
+                interval = 1.0 / args.rate
+                await asyncio.sleep(rng.expovariate(args.rate) if args.arrival == "poisson" else interval)
+            await asyncio.gather(*tasks)
+    return results, time.perf_counter() - started
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    ok = [r for r in results if r.error is None]
+    errors = {}
+    for r in results:
+        if r.error is not None:
+            key = r.error.split(":")[0]
+            errors[key] = errors.get(key, 0) + 1
+    gaps = [gap for r in ok for gap in r.gaps_ms()]
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "error_rate": round((len(results) - len(ok)) / len(results), 4) if results else None,
+        "error_kinds": errors,
+        "throughput_rps": round(len(results) / elapsed, 3) if elapsed else None,
+        "time_to_sources_ms": percentiles([r.time_to_sources * 1000 for r in ok if r.time_to_sources is not None]),
+        "ttft_ms": percentiles([r.ttft * 1000 for r in ok if r.ttft is not None]),
+        "inter_token_gap_ms": percentiles(gaps),
+        "total_ms": percentiles([r.total * 1000 for r in ok]),
+    }
+
+
+def capacity(levels: dict, slo_ms: float, max_error_rate: float) -> int | None:
+    """p99 TTFT가 SLO 이하이고 오류율이 기준 이하인 가장 큰 동시성"""
+    passing = [
+        int(level) for level, summary in levels.items()
+        if summary["ttft_ms"] and summary["ttft_ms"]["p99"] <= slo_ms
+        and (summary["error_rate"] or 0) <= max_error_rate
+    ]
+    return max(passing) if passing else None
+
+
+def render_table(levels: dict) -> str:
+    from tabulate import tabulate
+
+    rows = []
+    for level, s in levels.items():
+        rows.append([
+            level, s["requests"], s["error_rate"], s["throughput_rps"],
+            s["time_to_sources_ms"].get("p50"), s["ttft_ms"].get("p50"), s["ttft_ms"].get("p99"),
+            s["inter_token_gap_ms"].get("p50"), s["inter_token_gap_ms"].get("p99"), s["total_ms"].get("p99"),
+        ])
+    return tabulate(rows, headers=[
+        "concurrency", "requests", "error_rate", "rps", "sources_p50", "ttft_p50", "ttft_p99",
+        "gap_p50", "gap_p99", "total_p99",
+    ], tablefmt="github")
+
+
+def serve_in_process(args) -> str:
+    """memory 저장소 + stub 모델로 앱을 백그라운드 스레드에서 띄우고 기본 URL을 반환합니다."""
+    configure_offline_environment(args.llm_latency_ms, args.embed_latency_ms)
+    import os
+    os.environ["STUB_LLM_TOKEN_LATENCY_MS"] = str(args.token_latency_ms)
+
+    import logging
+    import uvicorn
+    from app.main import app
+    from app.services import rag_service
+    from bench.corpus import Corpus
+
+    logging.getLogger().setLevel(logging.WARNING)
+    load_chunks(rag_service.get_storage(), Corpus(seed=args.seed), args.chunks)
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning", lifespan="on"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{args.port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/api/chat SSE 부하 테스트")
+    parser.add_argument("--url", default=None, help="대상 서버 기본 URL. 생략하면 memory + stub 구성으로 앱을 직접 띄움")
+    parser.add_argument("--concurrency", default="1,4,16", help="동시 스트림 수 단계 (쉼표 구분)")
+    parser.add_argument("--arrival", choices=["closed", "poisson", "constant"], default="closed")
+    parser.add_argument("--rate", type=float, default=5.0, help="poisson/constant 도착률 (req/s)")
+    parser.add_argument("--requests", type=int, default=100, help="단계별 요청 수 (0이면 --duration까지)")
+    parser.add_argument("--duration", type=float, default=0, help="단계별 최대 실행 시간(초)")
+    parser.add_argument("--think-ms", type=float, default=0, help="closed 모드에서 요청 사이 대기")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--ttft-slo-ms", type=float, default=2000, help="용량 판정 기준 p99 TTFT")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    # 로컬 앱(--url 생략) 전용
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chunks", type=int, default=10000, help="적재할 합성 청크 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="stub LLM 첫 응답 지연")
+    parser.add_argument("--token-latency-ms", type=float, default=20, help="stub LLM 토큰 간 지연")
+    parser.add_argument("--embed-latency-ms", type=float, default=50, help="stub 임베딩 지연")
+    parser.add_argument("--output", default=None, help="JSON 보고서 경로 (기본: bench/results/loadtest-<시각>.json)")
+    args = parser.parse_args(argv)
+    if args.arrival != "closed" and args.rate <= 0:
+        parser.error("--rate는 0보다 커야 합니다.")
+    if not args.requests and not args.duration:
+        parser.error("--requests 또는 --duration 중 하나는 필요합니다.")
+
+    base_url = args.url.rstrip("/") if args.url else serve_in_process(args)
+    url = f"{base_url}/api/chat"
+
+    from bench.corpus import Corpus
+    questions = [question for question, _ in Corpus(seed=args.seed).queries(500, max(1, args.chunks // 10))]
+
+    levels = {}
+    for level in [int(value) for value in args.concurrency.split(",") if value.strip()]:
+        print(f"[loadtest] concurrency={level} arrival={args.arrival}...", file=sys.stderr)
+        results, elapsed = asyncio.run(run_level(url, questions, level, args))
+        levels[str(level)] = summarize(results, elapsed)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "target": base_url if args.url else "in-process (memory + stub)",
+            "args": vars(args),
+        },
+        "levels": levels,
+        "capacity": capacity(levels, args.ttft_slo_ms, args.max_error_rate),
+    }
+    output = Path(args.output) if args.output else Path("bench/results") / f"loadtest-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(render_table(levels))
+    print(f"\ncapacity (p99 TTFT <= {args.ttft_slo_ms:.0f}ms, error rate <= {args.max_error_rate}): {report['capacity']}")
+    print(f"report: {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
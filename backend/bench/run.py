@@ -0,0 +1,239 @@
+"""
+오프라인 RAG 벤치마크.
+
+외부 서비스(Supabase, Neo4j, Gemini) 없이 RAG_BACKEND=memory, MODEL_PROVIDER=stub 구성으로
+- process_ingestion 처리량(docs/sec)과 문서당 지연
+- perform_hybrid_search 지연(p50/p90/p99)을 청크 1k/10k/100k 규모별로
+재고 JSON 보고서를 남깁니다. 같은 시드/옵션으로 돌린 보고서끼리는 --compare로 비교할 수 있습니다.
+
+사용법 (backend 디렉토리에서):
+    python -m bench.run
+    python -m bench.run --sizes 1000,10000 --queries 100 --output bench/results/after.json
+    python -m bench.run --compare bench/results/before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def configure_offline_environment(llm_latency_ms: float = 0, embed_latency_ms: float = 0):
+    """app 모듈을 import하기 전에 설정을 고정합니다. (settings는 import 시점에 읽힘)"""
+    os.environ["RAG_BACKEND"] = "memory"
+    os.environ["MODEL_PROVIDER"] = "stub"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["DASHBOARD_SNAPSHOT_REFRESH_SECONDS"] = "0"
+    os.environ["STUB_LLM_LATENCY_MS"] = str(llm_latency_ms)
+    os.environ["STUB_EMBED_LATENCY_MS"] = str(embed_latency_ms)
+    # 레이트 리미터가 벤치마크를 막지 않도록 예산을 크게 잡습니다.
+    for name in (
+        "GEMINI_LLM_REQUESTS_PER_MINUTE",
+        "GEMINI_LLM_TOKENS_PER_MINUTE",
+        "GEMINI_EMBED_REQUESTS_PER_MINUTE",
+        "GEMINI_EMBED_TOKENS_PER_MINUTE",
+    ):
+        os.environ[name] = str(10 ** 9)
+    # 필수 설정값 (memory/stub 구성에서는 사용되지 않음)
+    for name in ("SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY", "NEO4J_URI", "NEO4J_USERNAME", "NEO4J_PASSWORD", "GOOGLE_API_KEY"):
+        os.environ.setdefault(name, "unused")
+
+
+def percentiles(samples: list) -> dict:
+    import numpy as np
+
+    if not samples:
+        return {}
+    values = np.asarray(samples, dtype=float)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "mean": round(float(values.mean()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def bench_ingestion(corpus, documents: int) -> dict:
+    from app.services import rag_service
+
+    storage = rag_service.get_storage()
+    storage.clear()
+    rows = corpus.documents(documents + 1)
+    for row in rows:
+        storage.add_source_document(row)
+    # 첫 수집은 토크나이저 로딩 등 일회성 비용이 커서 측정에서 제외합니다.
+    warmup, rows = rows[-1], rows[:-1]
+    rag_service.process_ingestion(warmup["id"])
+    rag_service.delete_document_graph(warmup["id"])
+
+    latencies = []
+    started = time.perf_counter()
+    for row in rows:
+        t0 = time.perf_counter()
+        rag_service.process_ingestion(row["id"])
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+
+    failed = sum(1 for row in rows if storage.get_document(row["id"]).get("status") != "INGESTED")
+    return {
+        "documents": documents,
+        "failed": failed,
+        "chunks": storage.chunk_count,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(documents / elapsed, 3) if elapsed else None,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def load_chunks(storage, corpus, size: int):
+    import numpy as np
+    from app.services.rag_service import document_embedding_text
+    from app.services.stub_models import hash_embedding
+
+    storage.clear()
+    storage.reserve(size)
+    rows, nodes = corpus.chunk_rows(size)
+    for document_id, node in nodes.items():
+        storage.upsert_document_node(document_id, node)
+        storage.set_document_embedding(
+            document_id, hash_embedding(document_embedding_text(node["title"], node["summary"]), storage.dimension)
+        )
+    batch = 2000
+    for start in range(0, len(rows), batch):
+        part = rows[start:start + batch]
+        storage.add_chunk_rows(part, np.vstack([hash_embedding(row["text"], storage.dimension) for row in part]))
+    return len(nodes)
+
+
+def bench_search(corpus, size: int, queries: int, top_k: int, warmup: int = 5) -> dict:
+    from app.services import rag_service
+    from app.services.metrics import StageTimer
+
+    storage = rag_service.get_storage()
+    t0 = time.perf_counter()
+    document_count = load_chunks(storage, corpus, size)
+    load_seconds = time.perf_counter() - t0
+
+    workload = corpus.queries(queries, document_count)
+    for question, _ in workload[:warmup]:
+        rag_service.perform_hybrid_search(question, top_k=top_k)
+
+    latencies = []
+    stages = {}
+    hits = 0
+    for question, relevant in workload:
+        timer = StageTimer("bench_search")
+        t0 = time.perf_counter()
+        nodes = rag_service.perform_hybrid_search(question, top_k=top_k, timer=timer)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        for stage, seconds in timer.stages.items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+        if any(node.node.metadata.get("document_id") == relevant for node in nodes):
+            hits += 1
+
+    return {
+        "chunks": storage.chunk_count,
+        "documents": document_count,
+        "queries": queries,
+        "load_seconds": round(load_seconds, 3),
+        "latency_ms": percentiles(latencies),
+        "stage_p50_ms": {stage: percentiles(values)["p50"] for stage, values in stages.items()},
+        # 정답 문서가 top_k 안에 들어온 비율 (검색 경로가 정상 동작하는지 확인용)
+        "hit_rate": round(hits / queries, 3) if queries else None,
+    }
+
+
+def _flatten(report: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare_reports(baseline: dict, current: dict) -> str:
+    from tabulate import tabulate
+
+    before = _flatten({k: v for k, v in baseline.items() if k != "meta"})
+    after = _flatten({k: v for k, v in current.items() if k != "meta"})
+    rows = []
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        delta = f"{(new - old) / old * 100:+.1f}%" if old not in (None, 0) and new is not None else ""
+        rows.append([key, old, new, delta])
+    return tabulate(rows, headers=["metric", "baseline", "current", "delta"], tablefmt="github")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 수집/검색 벤치마크 (memory 저장소 + stub 모델)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="검색 벤치마크 청크 수 (쉼표 구분)")
+    parser.add_argument("--queries", type=int, default=200, help="규모별 검색 질문 수")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ingest-docs", type=int, default=50, help="수집 벤치마크 문서 수 (0이면 생략)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="stub LLM 호출당 지연")
+    parser.add_argument("--embed-latency-ms", type=float, default=0, help="stub 임베딩 호출당 지연")
+    parser.add_argument("--output", default=None, help="JSON 보고서 경로 (기본: bench/results/<시각>.json)")
+    parser.add_argument("--compare", default=None, help="비교할 기준 보고서(JSON)")
+    args = parser.parse_args(argv)
+
+    configure_offline_environment(args.llm_latency_ms, args.embed_latency_ms)
+
+    import logging
+    from bench.corpus import Corpus
+
+    # rag_service import 시 모델/저장소가 초기화됩니다. 검색 경로의 INFO 로그는 측정에서 제외합니다.
+    from app.services import rag_service  # noqa: F401
+    logging.getLogger().setLevel(logging.WARNING)
+
+    corpus = Corpus(seed=args.seed)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+    }
+    if args.ingest_docs > 0:
+        print(f"[ingestion] {args.ingest_docs} documents...", file=sys.stderr)
+        report["ingestion"] = bench_ingestion(corpus, args.ingest_docs)
+    report["search"] = {}
+    for size in sizes:
+        print(f"[search] {size} chunks, {args.queries} queries...", file=sys.stderr)
+        report["search"][str(size)] = bench_search(corpus, size, args.queries, args.top_k)
+
+    output = Path(args.output) if args.output else Path("bench/results") / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps({k: v for k, v in report.items() if k != "meta"}, ensure_ascii=False, indent=2))
+    print(f"report: {output}", file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(compare_reports(baseline, report))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,15 @@ DROP INDEX keyword IF EXISTS;
 DROP INDEX document_id IF EXISTS;
 DROP INDEX document_theme IF EXISTS;
 DROP INDEX chunk_document_id IF EXISTS;
+DROP INDEX chunk_id IF EXISTS;
+DROP INDEX chunk_speaker IF EXISTS;
+DROP INDEX document_meeting_date IF EXISTS;
 DROP INDEX entity_text_index IF EXISTS;
+DROP INDEX entity_document_id IF EXISTS;
+DROP INDEX entity_degree IF EXISTS;
+DROP INDEX entity_community IF EXISTS;
+DROP INDEX entity_name_key IF EXISTS;
+DROP INDEX entity_name_key_text IF EXISTS;
 
 // ===== 2단계: 모든 데이터 삭제 =====
 // 이 명령은 모든 노드와 관계를 삭제합니다
@@ -22,6 +30,8 @@ MATCH (n) RETURN count(n) as remaining_nodes;
 // ===== 4단계: 제약조건 삭제 (있는 경우) =====
 // 제약조건이 있으면 삭제합니다
 DROP CONSTRAINT entity_unique IF EXISTS;
+DROP CONSTRAINT time_bucket_key IF EXISTS;
+DROP CONSTRAINT community_id IF EXISTS;
 
 // ===== 5단계: 새로운 인덱스 생성 =====
 // 새로운 벡터 인덱스 생성
@@ -38,10 +48,37 @@ FOR (c:Chunk) ON EACH [c.text];
 CREATE INDEX document_id IF NOT EXISTS FOR (d:Document) ON (d.id);
 CREATE INDEX document_theme IF NOT EXISTS FOR (d:Document) ON (d.theme);
 
+// Chunk 노드는 {id, text, embedding, document_id, chunk_index, speaker}만 가집니다. (문서 메타데이터는 Document에)
 CREATE INDEX chunk_document_id IF NOT EXISTS FOR (c:Chunk) ON (c.document_id);
+// 청크 쓰기(MERGE)와 검색 결과 조회(fetch_chunks)용
+CREATE INDEX chunk_id IF NOT EXISTS FOR (c:Chunk) ON (c.id);
+
+// 검색 필터(SearchFilters): 발언자(청크 단위)와 회의 날짜 범위. 테마는 document_theme, 문서 id는 document_id 인덱스를 사용합니다.
+CREATE INDEX chunk_speaker IF NOT EXISTS FOR (c:Chunk) ON (c.speaker);
+CREATE INDEX document_meeting_date IF NOT EXISTS FOR (d:Document) ON (d.meeting_date);
 
 CREATE FULLTEXT INDEX entity_text_index IF NOT EXISTS FOR (n:Entity) ON EACH [n.id];
 
+// 그래프 내보내기용: degree(연결 수) 순 정렬/커서 페이지네이션
+// 엔티티의 소유 문서는 목록(document_ids)입니다. 여러 문서에서 병합된 엔티티가 문서 하나를 지울 때 함께 사라지지 않도록 합니다.
+// (목록 원소 검색은 범위 인덱스를 쓰지 못하므로 entity_document_id 인덱스는 두지 않습니다.)
+// 기존 데이터(document_id 하나)는 초기화 없이 다음 쿼리로 옮깁니다:
+// MATCH (e:Entity) WHERE e.document_id IS NOT NULL
+// SET e.document_ids = coalesce(e.document_ids, [e.document_id]) REMOVE e.document_id;
+CREATE INDEX entity_degree IF NOT EXISTS FOR (e:Entity) ON (e.degree);
+
+// 그래프 분석 결과: 커뮤니티별 엔티티 조회와 커뮤니티 슈퍼 노드
+CREATE INDEX entity_community IF NOT EXISTS FOR (e:Entity) ON (e.community);
+
+// 엔티티 정규화: 정규화 키로 같은 대상 후보를 찾습니다. (ENDS WITH 검색은 텍스트 인덱스 사용)
+CREATE INDEX entity_name_key IF NOT EXISTS FOR (e:Entity) ON (e.name_key);
+CREATE TEXT INDEX entity_name_key_text IF NOT EXISTS FOR (e:Entity) ON (e.name_key);
+CREATE CONSTRAINT community_id IF NOT EXISTS FOR (c:Community) REQUIRE c.id IS UNIQUE;
+
+// 타임라인용 시간 버킷 카운터 (granularity: day/week/month, key 예: 2025-03-04 / 2025-W10 / 2025-03)
+CREATE CONSTRAINT time_bucket_key IF NOT EXISTS
+FOR (t:TimeBucket) REQUIRE (t.granularity, t.key) IS UNIQUE;
+
 // Document 노드용 벡터 인덱스 (768 차원)
 CREATE VECTOR INDEX `document_embeddings` IF NOT EXISTS
 FOR (d:Document) ON (d.embedding) 
@@ -60,7 +97,11 @@ SHOW INDEXES;
 //   title: '문서 제목',
 //   theme: '개발',
 //   created_at: datetime(),
-//   reference_urls: []
+//   reference_urls: [],
+//   meeting_date: date('2025-05-21'),
+//   attendees: ['김철수', '이영희'],
+//   location: '3층 회의실',
+//   agenda: '배포 일정'
 // });
 
 // ===== 7단계: 디버깅 쿼리 (인덱싱 후 사용) =====
@@ -77,18 +118,19 @@ LIMIT 10;
 // 문서별 엔티티 수 확인
 MATCH (d:Document {id: 'your_document_id'})
 MATCH (e:Entity)
-WHERE e.document_id = d.id OR 
+WHERE d.id IN e.document_ids OR 
       EXISTS {
         MATCH (e)-[r]-(other)
-        WHERE other.document_id = d.id
+        WHERE d.id IN other.document_ids
       }
 RETURN d.id, d.title, count(DISTINCT e) as entity_count;
 
 // 모든 엔티티와 연결 정보 확인
 MATCH (e:Entity)
 WITH e, 
-     CASE WHEN e.document_id IS NOT NULL THEN [e.document_id] ELSE [] END as direct_docs
+     coalesce(e.document_ids, []) as direct_docs
 OPTIONAL MATCH (e)-[r]-(other)
-WHERE other.document_id IS NOT NULL
-WITH e, direct_docs + collect(DISTINCT other.document_id) as all_docs
+WHERE other.document_ids IS NOT NULL
+WITH e, direct_docs, reduce(ids = [], docs IN collect(other.document_ids) | ids + docs) as neighbor_docs
+WITH e, reduce(ids = [], id IN direct_docs + neighbor_docs | CASE WHEN id IN ids THEN ids ELSE ids + id END) as all_docs
 RETURN e.id, e.name, all_docs as documents; 
\ No newline at end of file
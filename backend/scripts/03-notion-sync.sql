@@ -0,0 +1,44 @@
+-- Notion 증분 동기화를 위한 스키마 확장
+-- 01-init-supabase.sql 실행 후(또는 기존 DB에) 실행하세요. 여러 번 실행해도 안전합니다.
+
+-- Notion 가져오기 시 저장하는 부가 메타데이터 (날짜, 태그, 참여자 등)
+ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS metadata jsonb;
+
+-- Notion 페이지 식별자와 마지막 수정 시각
+ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS notion_page_id text;
+ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS notion_last_edited_time timestamp with time zone;
+
+-- 같은 Notion 페이지가 중복 저장되지 않도록 유니크 제약 (Notion 이외 문서는 NULL이며, NULL끼리는 중복으로 보지 않음)
+-- PostgREST upsert(on_conflict=notion_page_id)는 부분 인덱스가 아닌 유니크 제약이 필요합니다.
+-- 이전 버전이 만든 같은 이름의 부분 유니크 인덱스는 지웁니다. 제약이 이미 있으면 그 인덱스는 제약의 것이므로 그대로 둡니다.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'documents_notion_page_id_key'
+    ) THEN
+        DROP INDEX IF EXISTS public.documents_notion_page_id_key;
+        ALTER TABLE public.documents
+            ADD CONSTRAINT documents_notion_page_id_key UNIQUE (notion_page_id);
+    END IF;
+END $$;
+
+COMMENT ON COLUMN public.documents.metadata IS 'Notion 등 외부 출처에서 가져온 부가 메타데이터';
+COMMENT ON COLUMN public.documents.notion_page_id IS 'Notion 페이지 ID (Notion에서 가져온 문서만)';
+COMMENT ON COLUMN public.documents.notion_last_edited_time IS 'Notion 페이지의 마지막 수정 시각 (증분 동기화 비교용)';
+
+-- Notion 데이터베이스별 동기화 watermark
+CREATE TABLE IF NOT EXISTS public.notion_sync_state (
+    database_id text NOT NULL,
+    watermark text,
+    updated_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT notion_sync_state_pkey PRIMARY KEY (database_id)
+);
+
+COMMENT ON TABLE public.notion_sync_state IS 'Notion 데이터베이스별 마지막 동기화 시점을 저장합니다.';
+COMMENT ON COLUMN public.notion_sync_state.watermark IS '마지막으로 반영한 페이지들의 최대 last_edited_time (ISO 8601)';
+
+ALTER TABLE public.notion_sync_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public access to all operations for notion_sync_state" ON public.notion_sync_state;
+CREATE POLICY "Allow public access to all operations for notion_sync_state" ON public.notion_sync_state
+FOR ALL USING (true) WITH CHECK (true);
@@ -0,0 +1,21 @@
+-- 테마 종합 요약 저장소
+-- 01-init-supabase.sql 실행 후(또는 기존 DB에) 실행하세요. 여러 번 실행해도 안전합니다.
+
+CREATE TABLE IF NOT EXISTS public.theme_summaries (
+    theme text NOT NULL,
+    input_hash text NOT NULL,
+    summary text NOT NULL,
+    document_ids jsonb NOT NULL DEFAULT '[]'::jsonb,
+    updated_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT theme_summaries_pkey PRIMARY KEY (theme)
+);
+
+COMMENT ON TABLE public.theme_summaries IS '대시보드 테마별 종합 요약 (LLM 생성 결과)을 저장합니다.';
+COMMENT ON COLUMN public.theme_summaries.input_hash IS '요약에 사용된 문서 ID와 개별 요약의 해시. 달라지면 백그라운드에서 다시 생성합니다.';
+COMMENT ON COLUMN public.theme_summaries.document_ids IS '요약에 사용된 문서 ID 목록';
+
+ALTER TABLE public.theme_summaries ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public access to all operations for theme_summaries" ON public.theme_summaries;
+CREATE POLICY "Allow public access to all operations for theme_summaries" ON public.theme_summaries
+FOR ALL USING (true) WITH CHECK (true);
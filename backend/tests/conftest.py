@@ -0,0 +1,54 @@
+"""
+테스트 공통 설정.
+
+settings는 import 시점에 읽히므로 app 모듈을 import하기 전에 memory 저장소 + stub 모델 구성으로 고정합니다.
+외부 API(Notion, Gemini 쿼터) 동작은 stub_server 픽스처의 로컬 HTTP 스텁으로 확인합니다.
+Neo4j가 필요한 테스트는 NEO4J_TEST_URI(예: bolt://localhost:7687, docker로 띄운 빈 DB)가 있을 때만 실행합니다.
+"""
+import os
+
+import pytest
+
+os.environ["RAG_BACKEND"] = "memory"
+os.environ["MODEL_PROVIDER"] = "stub"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+# 필수 설정값 (memory/stub 구성에서는 사용되지 않음)
+for _name in ("SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY", "NEO4J_URI", "NEO4J_USERNAME", "NEO4J_PASSWORD", "GOOGLE_API_KEY"):
+    os.environ.setdefault(_name, "unused")
+
+
+@pytest.fixture
+def neo4j_driver():
+    uri = os.environ.get("NEO4J_TEST_URI")
+    if not uri:
+        pytest.skip("NEO4J_TEST_URI가 없어 Neo4j 통합 테스트를 건너뜁니다.")
+    from neo4j import GraphDatabase
+
+    driver = GraphDatabase.driver(
+        uri,
+        auth=(os.environ.get("NEO4J_TEST_USERNAME", "neo4j"), os.environ.get("NEO4J_TEST_PASSWORD", "password")),
+    )
+    try:
+        driver.verify_connectivity()
+    except Exception as e:
+        driver.close()
+        pytest.skip(f"Neo4j에 연결할 수 없습니다: {e}")
+    yield driver
+    driver.close()
+
+
+@pytest.fixture
+def stub_server():
+    """stub_server(handler) -> StubServer. 테스트가 끝나면 닫습니다."""
+    from tests.stub_server import StubServer
+
+    servers = []
+
+    def start(handler):
+        server = StubServer(handler)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
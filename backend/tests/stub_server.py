@@ -0,0 +1,58 @@
+"""
+테스트용 로컬 HTTP 스텁 서버.
+
+handler(request) -> (status, headers, body)를 받아 127.0.0.1의 임의 포트에서 요청마다 별도 스레드로 응답합니다.
+request는 {"method", "path", "query", "json", "headers"} dict이며, 받은 요청은 server.requests에 순서대로 쌓입니다.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubServer:
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                request = {
+                    "method": self.command,
+                    "path": parsed.path,
+                    "query": {key: values[-1] for key, values in parse_qs(parsed.query).items()},
+                    "json": json.loads(raw) if raw else None,
+                    "headers": dict(self.headers),
+                }
+                with stub._lock:
+                    stub.requests.append(request)
+                status, headers, body = stub.handler(request)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, str(value))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,50 @@
+import asyncio
+
+from starlette.requests import Request
+
+from app.api.routers import dashboard
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeDriver:
+    def session(self):
+        return FakeSession()
+
+
+class FakeSnapshot:
+    def get_view(self):
+        return '"snapshot"', {"tasks": [{"theme": "설계", "items": []}]}
+
+
+def _request(headers=None):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/dashboard", "headers": raw})
+
+
+def test_dashboard_timeline_comes_from_time_buckets(monkeypatch):
+    buckets = [{"period": "2026-42주차", "key": "2026-W42", "start": "2026-10-12", "count": 3}]
+    calls = []
+
+    async def fake_query_timeline(session, granularity, start=None, end=None, limit=4):
+        calls.append((granularity, limit))
+        return list(buckets)
+
+    monkeypatch.setattr(dashboard, "get_dashboard_snapshot", FakeSnapshot)
+    monkeypatch.setattr(dashboard, "query_timeline", fake_query_timeline)
+
+    response = asyncio.run(dashboard.get_dashboard_data(_request(), FakeDriver()))
+    assert calls == [("week", dashboard.TIMELINE_WEEKS)]
+    assert b'"timeline":[{"period":"2026-42' in response.body
+    etag = response.headers["etag"]
+
+    # 스냅샷이 그대로여도 카운터가 바뀌면 ETag가 달라져야 합니다.
+    assert asyncio.run(dashboard.get_dashboard_data(_request({"If-None-Match": etag}), FakeDriver())).status_code == 304
+    buckets[0]["count"] = 4
+    assert asyncio.run(dashboard.get_dashboard_data(_request({"If-None-Match": etag}), FakeDriver())).status_code == 200
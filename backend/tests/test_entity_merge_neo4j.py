@@ -0,0 +1,87 @@
+"""
+_merge_batch 관계 재배선과 문서 삭제 시 엔티티 소유권 통합 테스트 (실제 Neo4j 필요)
+
+    docker run --rm -p 7687:7687 -e NEO4J_AUTH=neo4j/password neo4j:5
+    NEO4J_TEST_URI=bolt://localhost:7687 python -m pytest tests/test_entity_merge_neo4j.py
+"""
+import uuid
+
+import pytest
+
+from app.services.entity_resolution import resolve_document_entities
+from app.services.graph_export import delete_document_entities
+
+
+@pytest.fixture
+def entity_graph(neo4j_driver):
+    """대표 노드(홍길동, 문서 a), 중복 노드(홍길동 님, 문서 b), 이웃(프로젝트X는 a, 회의록Y는 b)과 관계를 만들고 테스트 후 지웁니다.
+    기존 엔티티는 이전 수집에서 name_key가 저장된 상태입니다."""
+    tag = uuid.uuid4().hex
+    with neo4j_driver.session() as session:
+        session.run("""
+            CREATE (c:Entity {id: $tag + '-c', name: '홍길동', name_key: '홍길동', document_ids: [$tag + '-a'], test_tag: $tag})
+            CREATE (d:Entity {id: $tag + '-d', name: '홍길동 님', document_ids: [$tag + '-b'], test_tag: $tag})
+            CREATE (x:Entity {id: $tag + '-x', name: '프로젝트X', name_key: '프로젝트x', document_ids: [$tag + '-a'], test_tag: $tag})
+            CREATE (y:Entity {id: $tag + '-y', name: '회의록Y', name_key: '회의록y', document_ids: [$tag + '-b'], test_tag: $tag})
+            CREATE (d)-[:WORKS_ON {since: 2024}]->(x)
+            CREATE (d)-[:WROTE]->(y)
+            CREATE (x)-[:MENTIONS]->(d)
+            CREATE (d)-[:KNOWS]->(c)
+        """, tag=tag).consume()
+    yield tag
+    with neo4j_driver.session() as session:
+        session.run("MATCH (e:Entity {test_tag: $tag}) DETACH DELETE e", tag=tag).consume()
+
+
+def test_merge_rewires_relationships_to_canonical(neo4j_driver, entity_graph):
+    tag = entity_graph
+    with neo4j_driver.session() as session:
+        merged = resolve_document_entities(session, f"{tag}-b")
+        assert merged == 1
+
+        remaining = session.run("""
+            MATCH (e:Entity {test_tag: $tag})
+            RETURN e.id AS id, e.aliases AS aliases, e.document_ids AS document_ids ORDER BY id
+        """, tag=tag).data()
+        assert [row["id"] for row in remaining] == [f"{tag}-c", f"{tag}-x", f"{tag}-y"]
+        assert remaining[0]["aliases"] == ["홍길동 님"]
+        # 대표 노드는 두 문서 모두에 속합니다.
+        assert remaining[0]["document_ids"] == [f"{tag}-a", f"{tag}-b"]
+
+        relationships = session.run("""
+            MATCH (a:Entity {test_tag: $tag})-[r]->(b:Entity {test_tag: $tag})
+            RETURN a.id AS source, type(r) AS type, b.id AS target, properties(r) AS props
+            ORDER BY type
+        """, tag=tag).data()
+        # 대표 노드와 중복 노드 사이의 KNOWS는 자기 루프가 되므로 버려집니다.
+        assert relationships == [
+            {"source": f"{tag}-x", "type": "MENTIONS", "target": f"{tag}-c", "props": {}},
+            {"source": f"{tag}-c", "type": "WORKS_ON", "target": f"{tag}-x", "props": {"since": 2024}},
+            {"source": f"{tag}-c", "type": "WROTE", "target": f"{tag}-y", "props": {}},
+        ]
+
+
+def test_deleting_canonical_document_keeps_merged_document_edges(neo4j_driver, entity_graph):
+    tag = entity_graph
+    with neo4j_driver.session() as session:
+        resolve_document_entities(session, f"{tag}-b")
+        deleted = delete_document_entities(session, f"{tag}-a")
+        # 문서 a에만 속한 프로젝트X만 지워지고, b에서 병합된 홍길동과 b의 관계는 남습니다.
+        assert deleted == 1
+
+        remaining = session.run("""
+            MATCH (e:Entity {test_tag: $tag})
+            RETURN e.id AS id, e.document_ids AS document_ids, e.degree AS degree ORDER BY id
+        """, tag=tag).data()
+        assert remaining == [
+            {"id": f"{tag}-c", "document_ids": [f"{tag}-b"], "degree": 1},
+            {"id": f"{tag}-y", "document_ids": [f"{tag}-b"], "degree": 1},
+        ]
+        relationships = session.run("""
+            MATCH (a:Entity {test_tag: $tag})-[r]->(b:Entity {test_tag: $tag})
+            RETURN a.id AS source, type(r) AS type, b.id AS target
+        """, tag=tag).data()
+        assert relationships == [{"source": f"{tag}-c", "type": "WROTE", "target": f"{tag}-y"}]
+
+        assert delete_document_entities(session, f"{tag}-b") == 2
+        assert session.run("MATCH (e:Entity {test_tag: $tag}) RETURN count(e) AS c", tag=tag).single()["c"] == 0
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.entity_resolution import find_duplicate_groups, normalize_name
+
+
+@pytest.mark.parametrize("name, key", [
+    ("홍길동", "홍길동"),
+    ("홍길동 님", "홍길동"),
+    ("홍길동님은", "홍길동"),
+    ("홍길동 팀장님께서", "홍길동"),
+    ("「홍길동」", "홍길동"),
+    ("홍길동의", "홍길동"),
+    # 성만 남는 호칭은 떼지 않음 (같은 성의 다른 사람과 합쳐지지 않도록). 끝의 "님"만 떼어짐
+    ("김 팀장님", "김팀장"),
+    ("김 팀장", "김팀장"),
+    ("김팀장님은", "김팀장"),
+    ("박씨", "박씨"),
+    ("남궁 대표님", "남궁대표"),
+    # 조사처럼 끝나는 이름은 2글자 이하가 남으면 그대로
+    ("이영도", "이영도"),
+    ("김민도", "김민도"),
+    ("회의는", "회의는"),
+    # 한글이 아닌 이름
+    ("Alice 님", "alice"),
+    ("Project X", "projectx"),
+    ("", ""),
+])
+def test_normalize_name(name, key):
+    assert normalize_name(name) == key
+
+
+def _entity(id, name):
+    return {"id": id, "name": name, "key": normalize_name(name), "degree": 0}
+
+
+def test_same_surname_titles_are_not_merged_with_each_other_or_surname():
+    entities = [_entity("a", "김 팀장님"), _entity("b", "김 과장님"), _entity("c", "김")]
+    assert find_duplicate_groups(entities) == []
+
+
+def test_honorific_and_particle_variants_are_merged():
+    entities = [_entity("a", "홍길동"), _entity("b", "홍길동님은"), _entity("c", "홍길동 님")]
+    groups = find_duplicate_groups(entities)
+    assert len(groups) == 1
+    canonical, duplicates = groups[0]
+    assert canonical["id"] == "a"
+    assert sorted(d["id"] for d in duplicates) == ["b", "c"]
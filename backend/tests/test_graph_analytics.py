@@ -0,0 +1,34 @@
+"""그래프 분석 계산과 SciPy 지연 로딩"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from app.services.graph_analytics import build_adjacency, louvain, modularity, pagerank
+
+
+def test_two_triangles_form_two_communities():
+    sources = np.array([0, 1, 2, 3, 4, 5, 2])
+    targets = np.array([1, 2, 0, 4, 5, 3, 3])
+    adjacency = build_adjacency(6, sources, targets)
+
+    labels = louvain(adjacency)
+    assert len(set(labels[:3])) == 1 and len(set(labels[3:])) == 1 and labels[0] != labels[3]
+    assert modularity(adjacency, labels) > 0.3
+    assert abs(pagerank(6, sources, targets).sum() - 1.0) < 1e-9
+
+
+def test_app_import_does_not_load_scipy():
+    # 다른 테스트가 이미 scipy를 불러왔을 수 있으므로 새 프로세스에서 확인합니다. (환경 변수는 conftest 설정을 물려받음)
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('scipy' in sys.modules)"],
+        cwd=Path(__file__).resolve().parents[1],
+        env=dict(os.environ),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "False"
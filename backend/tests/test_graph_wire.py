@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+from app.services import graph_wire
+from app.services.graph_export import decode_cursor, stream_graph_page
+from app.services.graph_wire import encode_frames, iter_graph_frames
+
+
+def _entity(i):
+    return {"id": f"e{i}", "name": f"엔티티{i}", "type": "Entity", "properties": {}}
+
+
+async def _collect(frames):
+    return [frame async for frame in frames]
+
+
+class FakeResult:
+    """neo4j.AsyncResult처럼 레코드를 비동기로 내보내고, 몇 개를 읽었는지 기록합니다."""
+
+    def __init__(self, records):
+        self.records = records
+        self.consumed = 0
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self.records:
+            self.consumed += 1
+            yield record
+
+
+class FakeSession:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.queries = []
+
+    async def run(self, query, **params):
+        self.queries.append(params)
+        return self.results.pop(0)
+
+
+def test_node_frames_are_emitted_while_records_arrive(monkeypatch):
+    monkeypatch.setattr(graph_wire, "ROWS_PER_FRAME", 2)
+    produced = []
+
+    async def items():
+        for i in range(5):
+            produced.append(i)
+            yield "entity", _entity(i)
+
+    async def first_node_frame():
+        frames = iter_graph_frames(items())
+        async for frame in frames:
+            if frame["t"] == "nodes":
+                await frames.aclose()
+                return frame, list(produced)
+
+    frame, produced_so_far = asyncio.run(first_node_frame())
+    assert frame["rows"] == [["e0", "엔티티0", "Entity"], ["e1", "엔티티1", "Entity"]]
+    # 나머지 레코드를 읽기 전에 첫 프레임이 나옵니다.
+    assert produced_so_far == [0, 1]
+
+
+def test_frames_index_edges_and_place_meta():
+    async def items():
+        yield "meta", {"stats": {"total_entities_in_db": 3}}
+        yield "entity", _entity(0)
+        yield "entity", _entity(1)
+        yield "entity", _entity(0)
+        yield "relationship", {"source": "e0", "target": "e1", "type": "KNOWS", "properties": {}}
+        yield "relationship", {"source": "e1", "target": "older", "type": "MENTIONS", "properties": {}}
+        yield "meta", {"next_cursor": "abc"}
+
+    frames = asyncio.run(_collect(iter_graph_frames(items(), meta={"level": "top"})))
+    assert frames == [
+        {"t": "meta", "level": "top", "stats": {"total_entities_in_db": 3}},
+        {"t": "nodes", "rows": [["e0", "엔티티0", "Entity"], ["e1", "엔티티1", "Entity"]]},
+        {"t": "edges", "rows": [[0, 1, "KNOWS"], [1, "older", "MENTIONS"]]},
+        {"t": "end", "nodes": 2, "edges": 2, "next_cursor": "abc"},
+    ]
+
+
+def test_query_failure_mid_stream_sends_error_frame():
+    async def items():
+        yield "entity", _entity(0)
+        raise RuntimeError("connection lost")
+
+    frames = asyncio.run(_collect(iter_graph_frames(items())))
+    assert [frame["t"] for frame in frames] == ["meta", "error"]
+    assert frames[-1]["message"] == "connection lost"
+
+
+def test_ndjson_encoding_is_one_frame_per_line():
+    async def items():
+        yield "entity", _entity(0)
+
+    chunks = asyncio.run(_collect(encode_frames(iter_graph_frames(items()), "ndjson")))
+    assert [json.loads(chunk)["t"] for chunk in chunks] == ["meta", "nodes", "end"]
+
+
+def test_graph_page_streams_entities_before_relationship_query():
+    entities = FakeResult([
+        {"id": "e0", "name": "A", "type": "Entity", "properties": None, "degree": 5},
+        {"id": "e1", "name": "B", "type": "Entity", "properties": None, "degree": 3},
+    ])
+    relationships = FakeResult([{"source": "e0", "target": "e1", "type": "KNOWS", "properties": None}])
+    session = FakeSession(entities, relationships)
+
+    async def run():
+        stream = stream_graph_page(session, limit_entities=2, limit_relationships=10)
+        first = await stream.__anext__()
+        # 첫 엔티티는 관계 쿼리를 보내기 전에, 엔티티 결과를 다 읽기 전에 나옵니다.
+        state = (entities.consumed, len(session.queries))
+        rest = [item async for item in stream]
+        return first, state, rest
+
+    first, state, rest = asyncio.run(run())
+    assert first == ("entity", {"id": "e0", "name": "A", "type": "Entity", "properties": {}})
+    assert state == (1, 1)
+    assert [kind for kind, _ in rest] == ["entity", "relationship", "meta"]
+    assert session.queries[1]["ids"] == ["e0", "e1"]
+    assert decode_cursor(rest[-1][1]["next_cursor"]) == (3, "e1")
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+
+from app.models.schemas import SearchFilters
+from app.services.metadata_answers import answer_metadata_question, detect_metadata_question
+from app.services.rag_storage import InMemoryStorage
+
+TODAY = date(2026, 5, 25)
+
+
+@pytest.mark.parametrize("question, kind, date_from, date_to, themes", [
+    ("5/21 회의 참석자 누구야?", "attendees", date(2026, 5, 21), date(2026, 5, 21), []),
+    ("who attended the 5/21 meeting", "attendees", date(2026, 5, 21), date(2026, 5, 21), []),
+    ("5월 21일 회의에 누가 왔어?", "attendees", date(2026, 5, 21), date(2026, 5, 21), []),
+    ("2024-05-21 회의에 몇 명 참석했어?", "attendees", date(2024, 5, 21), date(2024, 5, 21), []),
+    ("12/30 회의 참석자", "attendees", date(2025, 12, 30), date(2025, 12, 30), []),
+    ("이번 달 설계 회의 몇 번 했어?", "count", date(2026, 5, 1), date(2026, 5, 31), ["설계"]),
+    ("how many design meetings this month", "count", date(2026, 5, 1), date(2026, 5, 31), ["설계"]),
+    ("지난달 회의 몇 건?", "count", date(2026, 4, 1), date(2026, 4, 30), []),
+    ("2024년 3월 개발 회의 몇 개야", "count", date(2024, 3, 1), date(2024, 3, 31), ["개발"]),
+    ("올해 회의는 총 몇 번 열렸어?", "count", date(2026, 1, 1), date(2026, 12, 31), []),
+    ("회의 몇 번 했어?", "count", None, None, []),
+])
+def test_detects_metadata_questions(question, kind, date_from, date_to, themes):
+    intent = detect_metadata_question(question, TODAY)
+    assert intent is not None
+    assert (intent.kind, intent.date_from, intent.date_to, intent.themes) == (kind, date_from, date_to, themes)
+
+
+@pytest.mark.parametrize("question", [
+    # "몇 명"이 참석/참여와 함께 쓰이지 않음
+    "3월에 몇 명 채용하기로 했어?",
+    "이번 달 회의에서 몇 명 뽑기로 했어?",
+    # 기간/테마 외의 주제 한정어가 남음
+    "배포 회의 몇 번 했어?",
+    "프로젝트 2.0 회의 몇 번?",
+    "이번 달 보안 점검 회의 몇 번 했어?",
+    "how many release meetings this month",
+    # 참석자 조건이 붙은 회의 수
+    "이번 달 김철수가 참석한 회의 몇 번이야?",
+    "how many meetings did Kim attend this month",
+    # 회의 내용 질문
+    "5/21 회의에서 뭐 논의했어?",
+    "디자인 시스템 토큰 정리는 어떻게 됐어",
+    # 어느 회의인지 알 수 없음
+    "참석자 누구?",
+    "5월 회의 3번 했어?",
+])
+def test_hands_off_to_rag(question):
+    assert detect_metadata_question(question, TODAY) is None
+
+
+@pytest.fixture
+def storage():
+    storage = InMemoryStorage(dimension=8)
+    documents = [
+        ("doc-1", "설계 리뷰", "2026-05-21", "설계", ["김민준", "이서연"]),
+        ("doc-2", "API 설계", "2026-05-12", "설계", ["박지훈"]),
+        ("doc-3", "스프린트 회고", "2026-05-21", "개발", ["최수아"]),
+        ("doc-4", "지난달 기획", "2026-04-02", "기획", ["김민준"]),
+    ]
+    for document_id, title, meeting_date, theme, attendees in documents:
+        storage.upsert_document_node(document_id, {
+            "title": title, "created_at": meeting_date, "meeting_date": meeting_date,
+            "theme": theme, "attendees": attendees,
+        })
+    return storage
+
+
+def test_answers_count_from_document_metadata(storage):
+    answer = answer_metadata_question(storage, "이번 달 설계 회의 몇 번 했어?", today=TODAY)
+    assert answer["kind"] == "count"
+    assert answer["answer"].startswith("이번 달(2026-05-01 ~ 2026-05-31) 설계 회의는 총 2건입니다.")
+    assert [document["id"] for document in answer["documents"]] == ["doc-1", "doc-2"]
+
+
+def test_answers_attendees_within_request_filters(storage):
+    answer = answer_metadata_question(storage, "5/21 회의 참석자 누구야?", SearchFilters(themes=["개발"]), today=TODAY)
+    assert answer["kind"] == "attendees"
+    assert [document["id"] for document in answer["documents"]] == ["doc-3"]
+    assert "최수아 (1명)" in answer["answer"]
+
+
+def test_non_metadata_question_returns_none(storage):
+    assert answer_metadata_question(storage, "배포 회의 몇 번 했어?", today=TODAY) is None
@@ -0,0 +1,151 @@
+"""NotionClient를 로컬 목 Notion 서버(tests/stub_server.py)로 확인합니다."""
+import threading
+import time
+
+import requests
+
+from app.services.notion_service import NotionClient
+
+
+def _page(i):
+    return {
+        "id": f"page-{i}",
+        "url": f"https://notion.so/page-{i}",
+        "last_edited_time": "2024-05-21T00:00:00.000Z",
+        "properties": {"Name": {"title": [{"plain_text": f"회의 {i}"}]}},
+    }
+
+
+def _paragraph(text):
+    return {"type": "paragraph", "paragraph": {"rich_text": [{"plain_text": text}]}}
+
+
+def _paginate(items, request, page_size):
+    """Notion 방식 커서 페이지네이션: start_cursor는 다음 항목의 위치"""
+    source = request["json"] if request["method"] == "POST" else request["query"]
+    start = int((source or {}).get("start_cursor") or 0)
+    end = start + page_size
+    return {
+        "results": items[start:end],
+        "has_more": end < len(items),
+        "next_cursor": str(end) if end < len(items) else None,
+    }
+
+
+def _client(server, **kwargs):
+    return NotionClient(api_key="test", base_url=server.url, requests_per_second=0, **kwargs)
+
+
+def test_follows_database_and_block_cursors(stub_server):
+    pages = [_page(i) for i in range(250)]
+    blocks = [_paragraph(f"줄 {i}") for i in range(5)]
+
+    def handler(request):
+        if request["path"] == "/databases/db/query":
+            return 200, {}, _paginate(pages, request, 100)
+        return 200, {}, _paginate(blocks, request, 2)
+
+    server = stub_server(handler)
+    client = _client(server)
+
+    assert [page["id"] for page in client.iter_database_pages("db")] == [f"page-{i}" for i in range(250)]
+    query_cursors = [r["json"].get("start_cursor") for r in server.requests if r["method"] == "POST"]
+    assert query_cursors == [None, "100", "200"]
+
+    assert client.fetch_page_content("page-0") == "\n".join(f"줄 {i}" for i in range(5))
+    block_cursors = [r["query"].get("start_cursor") for r in server.requests if r["method"] == "GET"]
+    assert block_cursors == [None, "2", "4"]
+
+
+def test_retries_429_after_retry_after(stub_server):
+    calls = []
+
+    def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return 429, {"Retry-After": "0.3"}, {"object": "error", "code": "rate_limited"}
+        return 200, {}, {"results": [_page(0)], "has_more": False, "next_cursor": None}
+
+    server = stub_server(handler)
+    pages = list(_client(server).iter_database_pages("db"))
+
+    assert [page["id"] for page in pages] == ["page-0"]
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.3
+
+
+def test_gives_up_after_max_retries(stub_server):
+    server = stub_server(lambda request: (503, {"Retry-After": "0"}, {"object": "error"}))
+    client = _client(server, max_retries=2)
+
+    try:
+        list(client.iter_database_pages("db"))
+    except Exception as e:
+        assert getattr(e.response, "status_code", None) == 503
+    else:
+        raise AssertionError("503이 계속되면 예외가 나야 합니다.")
+    assert len(server.requests) == 3
+
+
+def test_fetches_block_children_in_parallel(stub_server):
+    pages = [_page(i) for i in range(8)]
+    lock = threading.Lock()
+    in_flight = {"now": 0, "max": 0}
+
+    def handler(request):
+        if request["method"] == "POST":
+            return 200, {}, _paginate(pages, request, 100)
+        with lock:
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        time.sleep(0.2)
+        with lock:
+            in_flight["now"] -= 1
+        page_id = request["path"].split("/")[2]
+        return 200, {}, {"results": [_paragraph(f"{page_id} 본문")], "has_more": False, "next_cursor": None}
+
+    server = stub_server(handler)
+    client = _client(server, max_concurrency=4)
+
+    started = time.monotonic()
+    documents = client.fetch_pages_with_content("db")
+    elapsed = time.monotonic() - started
+
+    assert [document["content"] for document in documents] == [f"page-{i} 본문" for i in range(8)]
+    assert [document["title"] for document in documents] == [f"회의 {i}" for i in range(8)]
+    assert in_flight["max"] == 4
+    # 순차 실행이면 1.6초, 4개씩 동시에 가져오면 약 0.4초
+    assert elapsed < 1.2
+
+    streamed = list(client.iter_pages_with_content("db"))
+    assert sorted(document["notion_page_id"] for document in streamed) == [f"page-{i}" for i in range(8)]
+
+
+def test_streaming_skips_pages_whose_body_fails(stub_server):
+    pages = [_page(i) for i in range(4)]
+
+    def handler(request):
+        if request["method"] == "POST":
+            return 200, {}, _paginate(pages, request, 100)
+        page_id = request["path"].split("/")[2]
+        if page_id == "page-2":
+            return 404, {}, {"object": "error", "code": "object_not_found"}
+        return 200, {}, {"results": [_paragraph(f"{page_id} 본문")], "has_more": False, "next_cursor": None}
+
+    client = _client(stub_server(handler))
+    failures = []
+
+    streamed = list(client.iter_pages_with_content("db", on_error=lambda page, error: failures.append((page, error))))
+
+    assert sorted(document["notion_page_id"] for document in streamed) == ["page-0", "page-1", "page-3"]
+    [(page, error)] = failures
+    assert (page["notion_page_id"], page["title"]) == ("page-2", "회의 2")
+    assert error.response.status_code == 404
+
+    # on_error가 없으면 예전처럼 예외가 올라옵니다.
+    try:
+        list(client.iter_pages_with_content("db"))
+    except requests.HTTPError as e:
+        assert e.response.status_code == 404
+    else:
+        raise AssertionError("본문 조회 실패가 전달되어야 합니다.")
@@ -0,0 +1,96 @@
+"""Notion 동기화: 증분 변경 판정(_changed_pages)과 페이지 단위 실패 처리. Supabase/Notion 조회는 monkeypatch로 대신합니다."""
+import queue
+
+from app.services import notion_sync
+from app.services.notion_sync import NotionImportJob, _changed_pages, page_to_row
+
+DATABASE_URL = "https://www.notion.so/workspace/meetings-a1b9819259280a2b0d5f9a234e44c7aa"
+
+
+def _page(page_id: str, edited: str, content: str = "본문") -> dict:
+    return {
+        "notion_page_id": page_id,
+        "title": f"회의 {page_id}",
+        "content": content,
+        "source": f"https://www.notion.so/{page_id}",
+        "date": "2024-10-01",
+        "tags": ["설계"],
+        "people": ["홍길동"],
+        "generation": None,
+        "last_edited_time": edited,
+    }
+
+
+def _stored(document_id: str, page: dict) -> dict:
+    row = page_to_row(page)
+    return {"id": document_id, **{field: row[field] for field in notion_sync._CONTENT_FIELDS}}
+
+
+def test_equal_timestamp_compares_content(monkeypatch):
+    watermark = "2024-10-01T09:30:00.000Z"
+    saved = _page("p1", watermark)
+    edited = _page("p1", watermark, content="같은 분에 고친 본문")
+    untouched = _page("p2", watermark)
+    older = _page("p3", "2024-10-01T09:00:00.000Z")
+    newer = _page("p4", "2024-10-01T09:31:00.000Z")
+    created = _page("p5", watermark)
+    existing = {
+        "p1": {"id": "d1", "notion_page_id": "p1", "notion_last_edited_time": watermark},
+        "p2": {"id": "d2", "notion_page_id": "p2", "notion_last_edited_time": watermark},
+        "p3": {"id": "d3", "notion_page_id": "p3", "notion_last_edited_time": "2024-10-01T09:30:00+00:00"},
+        "p4": {"id": "d4", "notion_page_id": "p4", "notion_last_edited_time": watermark},
+    }
+    looked_up = []
+
+    def load(document_ids):
+        looked_up.extend(document_ids)
+        return {"d1": _stored("d1", saved), "d2": _stored("d2", untouched)}
+
+    monkeypatch.setattr(notion_sync, "_load_stored_contents", load)
+    job = NotionImportJob(DATABASE_URL, incremental=True)
+
+    changed = _changed_pages(job, [edited, untouched, older, newer, created], existing)
+
+    assert [page["notion_page_id"] for page in changed] == ["p4", "p5", "p1"]
+    assert job.unchanged == 2
+    # 내용 비교는 시각이 같은 기존 페이지만 합니다.
+    assert looked_up == ["d1", "d2"]
+
+
+def test_equal_timestamp_is_changed_when_stored_content_is_unavailable(monkeypatch):
+    watermark = "2024-10-01T09:30:00.000Z"
+
+    def load(document_ids):
+        raise RuntimeError("supabase down")
+
+    monkeypatch.setattr(notion_sync, "_load_stored_contents", load)
+    job = NotionImportJob(DATABASE_URL, incremental=True)
+    existing = {"p1": {"id": "d1", "notion_page_id": "p1", "notion_last_edited_time": watermark}}
+
+    assert _changed_pages(job, [_page("p1", watermark)], existing) == [_page("p1", watermark)]
+    assert job.unchanged == 0
+
+
+def test_full_import_keeps_every_page():
+    job = NotionImportJob(DATABASE_URL, incremental=False)
+    pages = [_page("p1", "2024-10-01T09:00:00.000Z")]
+    existing = {"p1": {"id": "d1", "notion_page_id": "p1", "notion_last_edited_time": "2024-10-01T09:30:00Z"}}
+    assert _changed_pages(job, pages, existing) == pages
+
+
+def test_page_fetch_failure_is_recorded_and_import_continues(monkeypatch):
+    def pages(database_url, edited_since=None, on_error=None):
+        yield _page("p1", "2024-10-01T09:30:00.000Z")
+        on_error(_page("p2", "2024-10-01T09:31:00.000Z", content=""), RuntimeError("blocks 500"))
+        yield _page("p3", "2024-10-01T09:32:00.000Z")
+
+    monkeypatch.setattr(notion_sync, "iter_notion_pages", pages)
+    job = NotionImportJob(DATABASE_URL, incremental=True)
+    produced = queue.Queue()
+
+    notion_sync._produce_pages(job, None, produced)
+
+    items = [produced.get_nowait() for _ in range(produced.qsize())]
+    assert [item["notion_page_id"] for item in items[:-1]] == ["p1", "p3"]
+    assert items[-1] is notion_sync._END_OF_PAGES
+    assert job.failed == [{"title": "회의 p2", "error": "blocks 500"}]
@@ -0,0 +1,67 @@
+"""QueryProfiler: 느린 읽기 쿼리의 PROFILE 표본은 원문으로 실행하고, 통계는 정규화한 키로 모읍니다."""
+from types import SimpleNamespace
+
+from app.services.query_profiler import InstrumentedDriver, QueryProfiler, normalize_query
+
+QUERY = """
+    // 1. 이름으로 엔티티를 찾습니다
+    MATCH (e:Entity)
+    WHERE e.name CONTAINS $q // 부분 일치
+    RETURN e.name AS name
+"""
+
+
+class FakeResult:
+    def __init__(self, records=()):
+        self._records = list(records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def consume(self):
+        return SimpleNamespace(result_available_after=0, result_consumed_after=0, profile={
+            "operatorType": "ProduceResults", "rows": 1, "dbHits": 3, "args": {}, "children": [],
+        })
+
+
+class FakeSession:
+    def __init__(self, runs):
+        self.runs = runs
+
+    def run(self, query, parameters=None, **kwargs):
+        self.runs.append((query, dict(parameters or {}, **kwargs)))
+        return FakeResult([{"name": "홍길동"}])
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeDriver:
+    def __init__(self):
+        self.runs = []
+
+    def session(self, **kwargs):
+        return FakeSession(self.runs)
+
+
+def test_profiles_original_text_and_keys_stats_by_normalized_query():
+    profiler = QueryProfiler(slow_query_ms=0, profile_slow_queries=True)
+    driver = FakeDriver()
+    with InstrumentedDriver(driver, profiler).session() as session:
+        assert [record["name"] for record in session.run(QUERY, q="길동")] == ["홍길동"]
+    profiler._executor.shutdown(wait=True)
+
+    profiled = [run for run in driver.runs if run[0].startswith("PROFILE ")]
+    # 주석이 줄 단위로 남아 있어야 PROFILE 쿼리가 유효합니다.
+    assert profiled == [("PROFILE " + QUERY, {"q": "길동"})]
+
+    [stat] = profiler.top_queries()
+    assert stat["query"] == normalize_query(QUERY)
+    assert stat["count"] == 1
+    assert stat["profile"]["db_hits"] == 3
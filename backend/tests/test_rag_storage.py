@@ -0,0 +1,47 @@
+"""RagStorage 인터페이스: 빠진 메서드는 생성 시점에 드러나야 합니다."""
+import pytest
+
+from app.services.rag_storage import InMemoryStorage, Neo4jStorage, RagStorage
+
+
+def test_implementations_cover_the_interface():
+    assert not Neo4jStorage.__abstractmethods__
+    assert not InMemoryStorage.__abstractmethods__
+    InMemoryStorage()
+
+
+def test_incomplete_backend_fails_at_construction():
+    class PartialStorage(RagStorage):
+        def get_document(self, document_id: str) -> dict | None:
+            return None
+
+    with pytest.raises(TypeError, match="fetch_chunks"):
+        PartialStorage()
+
+
+def test_deleting_document_keeps_entities_shared_with_other_documents():
+    storage = InMemoryStorage()
+    storage.graph_storage_context("doc-a").graph_store.upsert_triplet("홍길동", "WORKS_ON", "프로젝트X")
+    assert storage.finalize_entities("doc-a") == 2
+    storage.graph_storage_context("doc-b").graph_store.upsert_triplet("홍길동", "WROTE", "회의록Y")
+    assert storage.finalize_entities("doc-b") == 2
+
+    storage.delete_document("doc-a")
+
+    assert storage.entities == {"홍길동": {"doc-b"}, "회의록Y": {"doc-b"}}
+    assert storage.storage_context.graph_store.get("홍길동") == [["WROTE", "회의록Y"]]
+
+
+def test_concurrent_extractions_tag_only_their_own_entities():
+    storage = InMemoryStorage()
+    graph_a = storage.graph_storage_context("doc-a").graph_store
+    graph_b = storage.graph_storage_context("doc-b").graph_store
+    graph_a.upsert_triplet("홍길동", "WORKS_ON", "프로젝트X")
+    graph_b.upsert_triplet("김철수", "WROTE", "회의록Y")
+
+    # doc-b가 먼저 끝나도 doc-a의 엔티티를 가져가지 않습니다.
+    assert storage.finalize_entities("doc-b") == 2
+    assert storage.finalize_entities("doc-a") == 2
+    assert storage.entities == {
+        "홍길동": {"doc-a"}, "프로젝트X": {"doc-a"}, "김철수": {"doc-b"}, "회의록Y": {"doc-b"},
+    }
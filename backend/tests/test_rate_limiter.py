@@ -0,0 +1,108 @@
+"""GeminiRateLimiter를 429/503을 돌려주는 로컬 스텁 엔드포인트(tests/stub_server.py)로 확인합니다."""
+import threading
+import time
+
+import pytest
+import requests
+
+from app.services.rate_limiter import BACKGROUND, INTERACTIVE, GeminiRateLimiter, RateLimitTimeout, TokenBucket
+
+
+def _scripted(statuses):
+    """요청마다 statuses의 다음 (status, headers)로 응답하고, 다 쓰면 200"""
+    lock = threading.Lock()
+    remaining = list(statuses)
+
+    def handler(request):
+        with lock:
+            status, headers = remaining.pop(0) if remaining else (200, {})
+        return status, headers, {"lane": request["query"].get("lane")}
+
+    return handler
+
+
+def _generate(server, lane="interactive"):
+    response = requests.get(f"{server.url}/generate", params={"lane": lane}, timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+
+def test_token_bucket_refills_at_rate_and_caps_at_capacity():
+    bucket = TokenBucket(capacity=10, refill_per_sec=2, now=0.0)
+    bucket.level = 0
+    bucket.refill(1.5)
+    assert bucket.level == 3
+    assert bucket.time_until(5) == 1.0
+    # 감속 배율이 0.5면 같은 양을 채우는 데 두 배가 걸립니다.
+    assert bucket.time_until(5, scale=0.5) == 2.0
+    bucket.refill(100.0)
+    assert bucket.level == 10
+
+
+def test_acquire_waits_for_refill():
+    limiter = GeminiRateLimiter("test", requests_per_minute=600, tokens_per_minute=10 ** 6)
+    limiter.acquire(INTERACTIVE, requests=600)  # 버킷을 비움 (초당 10개씩 다시 참)
+
+    waited = limiter.acquire(INTERACTIVE, requests=5)
+    assert 0.4 <= waited < 0.8
+
+
+def test_interactive_lane_goes_before_waiting_background(stub_server):
+    server = stub_server(_scripted([]))
+    limiter = GeminiRateLimiter("test", requests_per_minute=600, tokens_per_minute=10 ** 6, background_share=1.0)
+    limiter.acquire(INTERACTIVE, requests=600)
+
+    background = threading.Thread(target=lambda: limiter.call(_generate, server, "background", lane=BACKGROUND))
+    background.start()
+    time.sleep(0.02)  # 백그라운드가 먼저 대기를 시작합니다.
+    interactive = threading.Thread(target=lambda: limiter.call(_generate, server, "interactive", lane=INTERACTIVE))
+    interactive.start()
+    background.join(5)
+    interactive.join(5)
+
+    assert [request["query"]["lane"] for request in server.requests] == ["interactive", "background"]
+
+
+def test_background_keeps_reserve_for_interactive():
+    limiter = GeminiRateLimiter("test", requests_per_minute=10, tokens_per_minute=10 ** 6, background_share=0.8)
+    for _ in range(8):
+        limiter.acquire(BACKGROUND, timeout=0.1)
+    # 남은 20%는 채팅용입니다.
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(BACKGROUND, timeout=0.1)
+    assert limiter.acquire(INTERACTIVE, timeout=0.1) < 0.05
+
+
+def test_backs_off_on_429_and_503_then_recovers(stub_server):
+    server = stub_server(_scripted([(429, {"Retry-After": "0.3"}), (503, {})]))
+    limiter = GeminiRateLimiter(
+        "test", requests_per_minute=6000, tokens_per_minute=10 ** 6, base_backoff=0.2, max_backoff=1.0
+    )
+
+    started = time.monotonic()
+    assert limiter.call(_generate, server, lane=INTERACTIVE) == {"lane": "interactive"}
+    elapsed = time.monotonic() - started
+
+    # Retry-After 0.3초 + 지수 백오프 2번째(0.2 * 2, ±20%)
+    assert elapsed >= 0.3 + 0.4 * 0.8
+    assert len(server.requests) == 3
+    metrics = limiter.metrics()
+    assert metrics["lanes"]["interactive"]["throttled"] == 2
+    assert metrics["lanes"]["interactive"]["retries"] == 2
+    # AIMD: 쿼터 초과마다 속도 절반, 성공마다 0.05씩 회복
+    assert metrics["rate_scale"] == 0.3
+
+    for _ in range(14):
+        limiter.call(_generate, server, lane=INTERACTIVE)
+    assert limiter.metrics()["rate_scale"] == 1.0
+
+
+def test_gives_up_after_max_retries(stub_server):
+    server = stub_server(lambda request: (503, {"Retry-After": "0"}, {}))
+    limiter = GeminiRateLimiter("test", requests_per_minute=6000, tokens_per_minute=10 ** 6, max_retries=2)
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        limiter.call(_generate, server, lane=BACKGROUND)
+    assert excinfo.value.response.status_code == 503
+    assert len(server.requests) == 3
+    assert limiter.metrics()["lanes"]["background"]["errors"] == 1
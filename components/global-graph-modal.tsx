@@ -5,6 +5,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription } f
 import { Button } from "@/components/ui/button"
 import { Loader2, Network, Download, ZoomIn, ZoomOut } from "lucide-react"
 import { GraphVisualizer } from "./graph-visualizer"
+import { fetchGraphStream } from "@/lib/graph-stream"
 import { Badge } from "@/components/ui/badge"
 import { Slider } from "@/components/ui/slider"
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select"
@@ -19,23 +20,32 @@ export function GlobalGraphModal({ isOpen, onClose }: GlobalGraphModalProps) {
   const [entities, setEntities] = useState<any[]>([])
   const [relationships, setRelationships] = useState<any[]>([])
   const [stats, setStats] = useState<any>({})
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [entityLimit, setEntityLimit] = useState(100)
   const [relationshipLimit, setRelationshipLimit] = useState(200)
   const [layoutDirection, setLayoutDirection] = useState<'TB' | 'LR' | 'BT' | 'RL'>('TB')
   const [layoutType, setLayoutType] = useState<'dagre' | 'force'>('force')
 
+  // 압축 스트림(format=ndjson)으로 받으면서 노드/엣지 묶음이 도착할 때마다 바로 그립니다.
+  const graphUrl = (cursor?: string | null) =>
+    `/api/graph/all?limit_entities=${entityLimit}&limit_relationships=${relationshipLimit}&format=ndjson` +
+    (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "")
+
   const fetchGraphData = async () => {
     setLoading(true)
     try {
-      const response = await fetch(
-        `/api/graph/all?limit_entities=${entityLimit}&limit_relationships=${relationshipLimit}`
-      )
-      if (response.ok) {
-        const data = await response.json()
-        setEntities(data.entities || [])
-        setRelationships(data.relationships || [])
-        setStats(data.stats || {})
-      }
+      const data = await fetchGraphStream(graphUrl(), {
+        onProgress: (partial) => {
+          setEntities(partial.entities)
+          setRelationships(partial.relationships)
+          if (partial.entities.length > 0) setLoading(false)
+        },
+      })
+      setEntities(data.entities)
+      setRelationships(data.relationships)
+      setStats(data.meta.stats || {})
+      setNextCursor(data.meta.next_cursor || null)
     } catch (error) {
       console.error("Failed to fetch global graph data:", error)
     } finally {
@@ -43,6 +53,22 @@ export function GlobalGraphModal({ isOpen, onClose }: GlobalGraphModalProps) {
     }
   }
 
+  // 다음 순위(degree)의 엔티티와, 이미 받은 엔티티와의 관계를 이어 붙입니다.
+  const fetchMoreGraphData = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const data = await fetchGraphStream(graphUrl(nextCursor))
+      setEntities((prev) => [...prev, ...data.entities])
+      setRelationships((prev) => [...prev, ...data.relationships])
+      setNextCursor(data.meta.next_cursor || null)
+    } catch (error) {
+      console.error("Failed to fetch more graph data:", error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   useEffect(() => {
     if (isOpen) {
       fetchGraphData()
@@ -120,6 +146,16 @@ export function GlobalGraphModal({ isOpen, onClose }: GlobalGraphModalProps) {
                     </Select>
                   )}
                   
+                  <Button
+                    variant="outline"
+                    size="sm"
+                    onClick={fetchMoreGraphData}
+                    disabled={!nextCursor || loadingMore}
+                  >
+                    {loadingMore && <Loader2 className="h-4 w-4 mr-1 animate-spin" />}
+                    더 불러오기
+                  </Button>
+
                   <Button
                     variant="outline"
                     size="sm"
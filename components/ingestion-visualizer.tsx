@@ -7,6 +7,7 @@ import { ScrollArea } from "@/components/ui/scroll-area"
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs"
 import { Loader2, FileText, Network } from "lucide-react"
 import { GraphVisualizer } from "./graph-visualizer"
+import { fetchGraphStream } from "@/lib/graph-stream"
 
 interface Chunk {
   id: string
@@ -57,10 +58,9 @@ export function IngestionVisualizer({ documentId, isOpen, onClose }: IngestionVi
       setDocumentTitle(details.title || "")
 
       // Fetch graph data
-      const graphRes = await fetch(`/api/ingest/${documentId}/graph`)
-      const graph = await graphRes.json()
-      setEntities(graph.entities || [])
-      setRelationships(graph.relationships || [])
+      const graph = await fetchGraphStream(`/api/ingest/${documentId}/graph?format=ndjson`)
+      setEntities(graph.entities)
+      setRelationships(graph.relationships)
     } catch (error) {
       console.error("Failed to fetch ingestion details:", error)
     } finally {
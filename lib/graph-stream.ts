@@ -0,0 +1,102 @@
+// 그래프 API의 format=ndjson 스트림을 받으면서 점진적으로 파싱합니다.
+// 프레임 형식은 backend/app/services/graph_wire.py 참고
+
+export interface StreamedEntity {
+  id: string
+  name: string
+  type: string
+  properties: Record<string, any>
+}
+
+export interface StreamedRelationship {
+  source: string
+  target: string
+  type: string
+  properties: Record<string, any>
+}
+
+export interface GraphStreamResult {
+  meta: Record<string, any>
+  entities: StreamedEntity[]
+  relationships: StreamedRelationship[]
+}
+
+interface GraphStreamOptions {
+  // 프레임(노드/엣지 묶음)을 받을 때마다 지금까지 받은 전체 결과로 호출됩니다.
+  onProgress?: (result: GraphStreamResult) => void
+  signal?: AbortSignal
+}
+
+export async function fetchGraphStream(
+  url: string,
+  { onProgress, signal }: GraphStreamOptions = {}
+): Promise<GraphStreamResult> {
+  const response = await fetch(url, { signal })
+  if (!response.ok || !response.body) {
+    throw new Error(`Graph stream request failed: ${response.status}`)
+  }
+
+  const result: GraphStreamResult = { meta: {}, entities: [], relationships: [] }
+  // 정수 인덱스가 아니라 elementId 문자열로 온 엔드포인트는 이전 페이지의 노드이므로 그대로 둡니다.
+  const resolve = (ref: number | string) =>
+    typeof ref === "number" ? result.entities[ref]?.id : ref
+
+  const handleFrame = (frame: any) => {
+    switch (frame.t) {
+      case "meta": {
+        const { t, ...meta } = frame
+        result.meta = meta
+        break
+      }
+      case "end": {
+        // 결과를 다 읽은 뒤 정해지는 값(next_cursor 등)은 end 프레임으로 옵니다.
+        const { t, nodes, edges, ...extra } = frame
+        result.meta = { ...result.meta, ...extra }
+        break
+      }
+      case "error":
+        throw new Error(`Graph stream failed: ${frame.message}`)
+      case "nodes":
+        for (const [id, name, type, properties] of frame.rows) {
+          result.entities.push({ id, name, type, properties: properties || {} })
+        }
+        break
+      case "edges":
+        for (const [source, target, type, properties] of frame.rows) {
+          result.relationships.push({
+            source: resolve(source),
+            target: resolve(target),
+            type,
+            properties: properties || {},
+          })
+        }
+        break
+      default:
+        return
+    }
+    onProgress?.({
+      meta: result.meta,
+      entities: [...result.entities],
+      relationships: [...result.relationships],
+    })
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let newline = buffer.indexOf("\n")
+    while (newline >= 0) {
+      const line = buffer.slice(0, newline).trim()
+      buffer = buffer.slice(newline + 1)
+      if (line) handleFrame(JSON.parse(line))
+      newline = buffer.indexOf("\n")
+    }
+  }
+  if (buffer.trim()) handleFrame(JSON.parse(buffer))
+
+  return result
+}